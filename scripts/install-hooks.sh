@@ -1,6 +1,10 @@
 #!/bin/bash
 # Script to install git hooks for the project
 # This sets up pre-commit and pre-push hooks to enforce code quality
+#
+# Usage: scripts/install-hooks.sh [--with-cache-warm]
+#   --with-cache-warm  Also install post-commit and post-checkout hooks that
+#                      warm the review cache in the background
 
 # Colors for output
 RED='\033[0;31m'
@@ -9,6 +13,17 @@ YELLOW='\033[1;33m'
 BLUE='\033[0;34m'
 NC='\033[0m' # No Color
 
+WITH_CACHE_WARM=false
+for arg in "$@"; do
+    case "$arg" in
+        --with-cache-warm) WITH_CACHE_WARM=true ;;
+        *)
+            echo -e "${RED}❌ Error: Unknown option $arg${NC}"
+            exit 1
+            ;;
+    esac
+done
+
 echo -e "${BLUE}🔧 Installing Git Hooks for gemini-code-review-mcp${NC}"
 echo ""
 
@@ -55,6 +70,10 @@ install_hook() {
 echo -e "${BLUE}Installing hooks...${NC}"
 install_hook "pre-commit"
 install_hook "pre-push"
+if [ "$WITH_CACHE_WARM" = true ]; then
+    install_hook "post-commit"
+    install_hook "post-checkout"
+fi
 
 echo ""
 echo -e "${GREEN}🎉 Git hooks installed successfully!${NC}"
@@ -62,6 +81,9 @@ echo ""
 echo "Hooks installed:"
 echo "  • pre-commit: Runs tests when committing to master/main"
 echo "  • pre-push: Prevents direct pushes to master/main"
+if [ "$WITH_CACHE_WARM" = true ]; then
+    echo "  • post-commit, post-checkout: Warm the review cache in the background"
+fi
 echo ""
 echo -e "${YELLOW}📝 Note: You can bypass hooks in emergencies with:${NC}"
 echo "  • git commit --no-verify"
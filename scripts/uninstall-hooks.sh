@@ -46,6 +46,8 @@ uninstall_hook() {
 echo -e "${BLUE}Removing hooks...${NC}"
 uninstall_hook "pre-commit"
 uninstall_hook "pre-push"
+uninstall_hook "post-commit"
+uninstall_hook "post-checkout"
 
 echo ""
 echo -e "${GREEN}🎉 Git hooks uninstalled successfully!${NC}"
\ No newline at end of file
@@ -1,8 +1,22 @@
 """Cache module for performance optimization."""
 
 try:
+    from .single_flight import SingleFlight
     from .sqlite_cache import CacheEntry, CacheManager, get_cache_manager
+    from .sweeper import CacheSweeper, start_cache_sweeper
+    from .tiered_cache import TieredCache
 except ImportError:
+    from single_flight import SingleFlight
     from sqlite_cache import CacheEntry, CacheManager, get_cache_manager
+    from sweeper import CacheSweeper, start_cache_sweeper
+    from tiered_cache import TieredCache
 
-__all__ = ["CacheManager", "CacheEntry", "get_cache_manager"]
+__all__ = [
+    "CacheManager",
+    "CacheEntry",
+    "CacheSweeper",
+    "SingleFlight",
+    "TieredCache",
+    "get_cache_manager",
+    "start_cache_sweeper",
+]
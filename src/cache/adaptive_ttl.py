@@ -0,0 +1,151 @@
+"""Adaptive per-operation TTLs learned from how often cached results churn.
+
+Every operation (``git_changed_files``, ``read_text``, ``template_render``...)
+keeps hit, miss and stale counters. A hit is stale when the caller's
+validator rejects it (the file or repository changed underneath it); explicit
+invalidations of an operation count as churn too. After each window of
+reads the operation's TTL scale is doubled if almost nothing churned and
+halved if much of it did, always staying between the configured bounds. The
+TTL a caller asks for is the starting point, so stable operations drift
+towards long TTLs and churny ones towards short TTLs without hand-tuning.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_MIN_TTL = 60
+DEFAULT_MAX_TTL = 24 * 3600
+
+# Reads per adaptation step; small windows react faster but are noisier
+ADAPT_WINDOW = 20
+# Churn rates above SHRINK_ABOVE halve the TTL, below GROW_BELOW double it
+SHRINK_ABOVE = 0.25
+GROW_BELOW = 0.05
+
+
+@dataclass
+class OperationStats:
+    """Counters and learned TTL scale for one cache operation."""
+
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0  # Hits rejected by the caller's validator
+    invalidations: int = 0
+    window_reads: int = 0
+    window_churn: int = 0
+    scale: float = 1.0
+    base_ttl: Optional[int] = None  # TTL most recently requested by callers
+
+    def add(self, delta: "OperationStats") -> None:
+        """Add the counters of a pending delta."""
+        self.hits += delta.hits
+        self.misses += delta.misses
+        self.stale += delta.stale
+        self.invalidations += delta.invalidations
+        if delta.base_ttl is not None:
+            self.base_ttl = delta.base_ttl
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered with a usable cached value."""
+        lookups = self.hits + self.misses
+        return (self.hits - self.stale) / lookups if lookups else 0.0
+
+
+class AdaptiveTTL:
+    """Policy that turns observed churn into per-operation TTLs."""
+
+    def __init__(
+        self,
+        min_ttl: int = DEFAULT_MIN_TTL,
+        max_ttl: int = DEFAULT_MAX_TTL,
+        window: int = ADAPT_WINDOW,
+        enabled: bool = True,
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            min_ttl: Shortest TTL adaptation may choose, in seconds
+            max_ttl: Longest TTL adaptation may choose, in seconds
+            window: Number of reads between adaptation steps
+            enabled: If False, requested TTLs are used unchanged
+        """
+        if min_ttl > max_ttl:
+            raise ValueError(f"min_ttl ({min_ttl}) must not exceed max_ttl ({max_ttl})")
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.window = window
+        self.enabled = enabled
+
+    def _bounds(self, base_ttl: int) -> Tuple[int, int]:
+        """Bounds for one base TTL; adaptation never moves a TTL across them."""
+        return min(self.min_ttl, base_ttl), max(self.max_ttl, base_ttl)
+
+    def ttl_for(self, stats: Optional[OperationStats], base_ttl: int) -> int:
+        """
+        Get the TTL to store an entry with.
+
+        Args:
+            stats: Learned statistics of the operation, if any
+            base_ttl: TTL requested by the caller (or the cache default)
+
+        Returns:
+            Effective TTL in seconds
+        """
+        if not self.enabled or stats is None or stats.scale == 1.0:
+            return base_ttl
+        low, high = self._bounds(base_ttl)
+        return int(min(max(base_ttl * stats.scale, low), high))
+
+    def apply(self, stats: OperationStats, delta: OperationStats) -> None:
+        """
+        Fold pending observations into an operation's statistics.
+
+        Args:
+            stats: Persistent statistics, updated in place
+            delta: Observations recorded since the last update
+        """
+        stats.add(delta)
+        if not self.enabled:
+            return
+        stats.window_reads += delta.hits + delta.invalidations
+        stats.window_churn += delta.stale + delta.invalidations
+        if stats.window_reads < self.window:
+            return
+
+        churn = stats.window_churn / stats.window_reads
+        stats.window_reads = stats.window_churn = 0
+        if churn > SHRINK_ABOVE:
+            stats.scale /= 2
+        elif churn < GROW_BELOW:
+            stats.scale *= 2
+        else:
+            return
+
+        if stats.base_ttl:
+            # Stop scaling once the bounds are reached so recovery is quick
+            low, high = self._bounds(stats.base_ttl)
+            stats.scale = min(
+                max(stats.scale, low / stats.base_ttl), high / stats.base_ttl
+            )
+
+    def describe(self, stats: OperationStats, default_ttl: int) -> Dict[str, Any]:
+        """
+        Summarize an operation for get_stats.
+
+        Args:
+            stats: Statistics of the operation
+            default_ttl: Cache default used when no base TTL was recorded
+
+        Returns:
+            Counters, hit rate and the current effective TTL
+        """
+        return {
+            "hits": stats.hits,
+            "misses": stats.misses,
+            "stale": stats.stale,
+            "invalidations": stats.invalidations,
+            "hit_rate": stats.hit_rate,
+            "effective_ttl": self.ttl_for(stats, stats.base_ttl or default_ttl),
+        }
@@ -0,0 +1,310 @@
+"""Portable cache bundles for warm starts on fresh machines.
+
+A bundle is a single gzip-compressed file holding the cache entries that
+belong to one project, so CI can restore it like any other build cache.
+Absolute paths under the project root are stored as ``${project}/...`` in
+both keys and values (at the start of any line, so rendered file trees are
+covered too) and are mapped back to the importing checkout, which may live
+anywhere. Large payloads are stored once per content digest, the
+same way the SQLite cache stores them, and are verified on import.
+
+The bundle records the project fingerprint components it was exported at
+(see ``BUNDLE_COMPONENTS``); importing into a project whose fingerprint
+differs is refused, because entries validated only by their TTL (branch
+name, remote URL, rendered templates) would otherwise be served for the
+wrong commit.
+
+Format (one JSON object per line):
+    header:  {"format", "version", "created_at", "fingerprint"}
+    blob:    {"blob": digest, "data": base64 payload}
+    entry:   {"operation", "params", "value": base64 value, "blobs": digests,
+              "expires_at"}
+"""
+
+import base64
+import gzip
+import json
+import re
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+try:
+    from ..errors import CacheError
+    from .codec import decode_value, encode_value
+    from .content_store import BlobPayload, content_digest, externalize, internalize
+    from .sqlite_cache import CacheManager
+except ImportError:
+    from cache.codec import decode_value, encode_value
+    from cache.content_store import (
+        BlobPayload,
+        content_digest,
+        externalize,
+        internalize,
+    )
+    from cache.sqlite_cache import CacheManager
+    from errors import CacheError
+
+BUNDLE_FORMAT = "gemini-code-review-cache-bundle"
+BUNDLE_VERSION = 1
+
+# Placeholder for the project root in stored paths
+PROJECT_MARKER = "${project}"
+_MARKER_PATTERN = re.compile(rf"^{re.escape(PROJECT_MARKER)}", re.MULTILINE)
+
+# Fingerprint components a bundle is only valid for: the commit it was built
+# at and the GEMINI_* settings. Both are portable across machines, unlike the
+# stat-based components.
+BUNDLE_COMPONENTS = ("head", "env")
+
+
+# Fields every bundle line of a kind must have, with their JSON types
+_HEADER_FIELDS = {"fingerprint": dict}
+_BLOB_FIELDS = {"blob": str, "data": str}
+_ENTRY_FIELDS = {
+    "operation": str,
+    "params": dict,
+    "value": str,
+    "blobs": list,
+    "expires_at": (int, float),
+}
+
+
+@dataclass
+class BundleReport:
+    """Outcome of an export or import."""
+
+    entries: int = 0
+    blobs: int = 0
+    skipped: int = 0
+
+
+def _root_pattern(root: str) -> "re.Pattern[str]":
+    """Match the project root as a whole path at the start of any line."""
+    return re.compile(rf"^{re.escape(root)}(?=/|$)", re.MULTILINE)
+
+
+def _relativize(value: Any, root: str) -> Any:
+    """Replace the project root at the start of every line of string leaves."""
+    if isinstance(value, str):
+        return _root_pattern(root).sub(lambda _: PROJECT_MARKER, value)
+    if isinstance(value, dict):
+        return {k: _relativize(v, root) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_relativize(item, root) for item in value]
+    return value
+
+
+def _absolutize(value: Any, root: str) -> Any:
+    """Map ``${project}`` at line starts onto the importing project root."""
+    if isinstance(value, str):
+        return _MARKER_PATTERN.sub(lambda _: root, value)
+    if isinstance(value, dict):
+        return {k: _absolutize(v, root) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_absolutize(item, root) for item in value]
+    return value
+
+
+def _mentions_project(params: Any, root: str) -> bool:
+    """Check whether an entry's key refers to a path inside the project."""
+    if isinstance(params, str):
+        return params == root or params.startswith(root + "/")
+    if isinstance(params, dict):
+        return any(_mentions_project(v, root) for v in params.values())
+    if isinstance(params, list):
+        return any(_mentions_project(item, root) for item in params)
+    return False
+
+
+def _pack(value: Any) -> str:
+    """Encode a value for a JSON line."""
+    return base64.b64encode(encode_value(value)).decode("ascii")
+
+
+def _unpack(data: str) -> Any:
+    """Decode a value written by _pack."""
+    return decode_value(base64.b64decode(data))
+
+
+def _check_fields(
+    line: Dict[str, Any], fields: Dict[str, Any], kind: str, bundle: Any
+) -> None:
+    """
+    Check that a bundle line has the fields of its kind.
+
+    Raises:
+        CacheError: If a field is missing or has the wrong type
+    """
+    for name, expected in fields.items():
+        if not isinstance(line.get(name), expected):
+            raise CacheError(
+                f"Malformed cache bundle {bundle}: {kind} has no valid '{name}'"
+            )
+
+
+def export_bundle(
+    cache: CacheManager,
+    project_path: Union[str, Path],
+    output: Union[str, Path],
+    fingerprint: Dict[str, str],
+) -> BundleReport:
+    """
+    Write the project's unexpired cache entries to a bundle file.
+
+    Entries whose key does not mention a path inside the project are left
+    out; they belong to other projects or to this machine.
+
+    Args:
+        cache: Cache to export from
+        project_path: Project directory
+        output: Bundle file to write
+        fingerprint: Project fingerprint components, including BUNDLE_COMPONENTS
+
+    Returns:
+        Number of exported entries and distinct blobs
+    """
+    root = str(Path(project_path).resolve())
+    report = BundleReport()
+    blobs: Dict[str, BlobPayload] = {}
+    lines: List[Dict[str, Any]] = []
+
+    for operation, params, value, expires_at in cache.export_entries():
+        if not _mentions_project(params, root):
+            report.skipped += 1
+            continue
+        entry_blobs: Dict[str, BlobPayload] = {}
+        packed = _pack(externalize(_relativize(value, root), entry_blobs))
+        blobs.update(entry_blobs)
+        lines.append(
+            {
+                "operation": operation,
+                "params": _relativize(params, root),
+                "value": packed,
+                "blobs": list(entry_blobs),
+                "expires_at": expires_at,
+            }
+        )
+
+    header = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "created_at": time.time(),
+        "fingerprint": {name: fingerprint[name] for name in BUNDLE_COMPONENTS},
+    }
+    with gzip.open(output, "wt", encoding="utf-8") as f:
+        f.write(json.dumps(header) + "\n")
+        for digest, payload in blobs.items():
+            f.write(json.dumps({"blob": digest, "data": _pack(payload)}) + "\n")
+        for line in lines:
+            f.write(json.dumps(line) + "\n")
+
+    report.entries = len(lines)
+    report.blobs = len(blobs)
+    return report
+
+
+def _read_lines(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """Read the JSON lines of a bundle."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+    except (OSError, EOFError, ValueError) as e:
+        raise CacheError(f"Cannot read cache bundle {path}: {e}")
+
+
+def import_bundle(
+    cache: CacheManager,
+    project_path: Union[str, Path],
+    bundle: Union[str, Path],
+    fingerprint: Dict[str, str],
+) -> BundleReport:
+    """
+    Merge a bundle into the cache, mapping its paths onto this project.
+
+    Existing entries are kept; entries from the bundle replace only those
+    with the same key. Expired entries and entries whose blobs are missing
+    or corrupt are skipped.
+
+    Args:
+        cache: Cache to import into
+        project_path: Project directory
+        bundle: Bundle file written by export_bundle
+        fingerprint: Current project fingerprint components
+
+    Returns:
+        Number of imported and skipped entries
+
+    Raises:
+        CacheError: If the file is not a bundle or was exported at a
+            different project fingerprint
+    """
+    root = str(Path(project_path).resolve())
+    lines = _read_lines(bundle)
+    header = next(lines, None)
+    if not isinstance(header, dict) or header.get("format") != BUNDLE_FORMAT:
+        raise CacheError(f"{bundle} is not a cache bundle")
+    if header.get("version") != BUNDLE_VERSION:
+        raise CacheError(
+            f"Unsupported cache bundle version {header.get('version')} "
+            f"(expected {BUNDLE_VERSION})"
+        )
+    _check_fields(header, _HEADER_FIELDS, "header", bundle)
+
+    mismatched = [
+        name
+        for name in BUNDLE_COMPONENTS
+        if header["fingerprint"].get(name) != fingerprint[name]
+    ]
+    if mismatched:
+        raise CacheError(
+            "Cache bundle was exported for a different project state "
+            f"(changed: {', '.join(mismatched)})"
+        )
+
+    report = BundleReport()
+    blobs: Dict[str, BlobPayload] = {}
+    entries: List[Tuple[str, Dict[str, Any], Any, float]] = []
+    now = time.time()
+    for line in lines:
+        if not isinstance(line, dict):
+            raise CacheError(f"Malformed cache bundle {bundle}: line is not an object")
+        if "blob" in line:
+            _check_fields(line, _BLOB_FIELDS, "blob", bundle)
+            try:
+                payload = _unpack(line["data"])
+            except (ValueError, zlib.error):
+                # Corrupt payloads are skipped like mismatched ones
+                continue
+            # Content addressing doubles as an integrity check
+            if content_digest(payload) == line["blob"]:
+                blobs[line["blob"]] = payload
+            continue
+
+        _check_fields(line, _ENTRY_FIELDS, "entry", bundle)
+        if line["expires_at"] <= now or not all(
+            digest in blobs for digest in line["blobs"]
+        ):
+            report.skipped += 1
+            continue
+        try:
+            value = internalize(_unpack(line["value"]), blobs)
+        except (ValueError, zlib.error):
+            report.skipped += 1
+            continue
+        entries.append(
+            (
+                line["operation"],
+                _absolutize(line["params"], root),
+                _absolutize(value, root),
+                line["expires_at"],
+            )
+        )
+
+    cache.import_entries(entries)
+    report.entries = len(entries)
+    report.blobs = len(blobs)
+    return report
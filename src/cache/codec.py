@@ -0,0 +1,109 @@
+"""Binary encoding for cached values.
+
+Values are stored as BLOBs with a fixed header followed by the payload:
+
+    version (1 byte) | codec (1 byte) | original payload size (8 bytes)
+
+Plain strings, bytes and lists of strings skip JSON entirely; everything else
+is JSON. Payloads above ``COMPRESSION_THRESHOLD`` are zlib-compressed when that
+actually saves space. Rows written before this format existed are TEXT and are
+decoded as JSON.
+"""
+
+import json
+import struct
+import zlib
+from typing import Any, Tuple, Union
+
+FORMAT_VERSION = 1
+
+# Codec identifiers; the high bit marks a zlib-compressed payload
+CODEC_JSON = 0x01
+CODEC_STR = 0x02
+CODEC_BYTES = 0x03
+CODEC_STR_LIST = 0x04
+CODEC_ZLIB = 0x80
+
+# Payloads smaller than this are not worth the zlib call
+COMPRESSION_THRESHOLD = 4096
+# Level 1 keeps encoding faster than json.dumps while still shrinking text 3-5x
+COMPRESSION_LEVEL = 1
+
+_HEADER = struct.Struct(">BBQ")
+_LIST_SEPARATOR = "\0"
+
+
+def _encode_payload(value: Any) -> Tuple[int, bytes]:
+    """Pick the most compact codec for a value and serialize it."""
+    if isinstance(value, str):
+        return CODEC_STR, value.encode("utf-8")
+    if isinstance(value, (bytes, bytearray)):
+        return CODEC_BYTES, bytes(value)
+    if (
+        isinstance(value, list)
+        and value != [""]
+        and all(isinstance(item, str) and _LIST_SEPARATOR not in item for item in value)
+    ):
+        return CODEC_STR_LIST, _LIST_SEPARATOR.join(value).encode("utf-8")
+    return CODEC_JSON, json.dumps(value).encode("utf-8")
+
+
+def encode_value(value: Any) -> bytes:
+    """
+    Encode a value for storage in the cache database.
+
+    Args:
+        value: A str, bytes, list of str or any JSON-serializable value
+
+    Returns:
+        Header-prefixed, possibly compressed, payload
+    """
+    codec, payload = _encode_payload(value)
+    original_size = len(payload)
+
+    if original_size >= COMPRESSION_THRESHOLD:
+        compressed = zlib.compress(payload, COMPRESSION_LEVEL)
+        if len(compressed) < original_size:
+            codec |= CODEC_ZLIB
+            payload = compressed
+
+    return _HEADER.pack(FORMAT_VERSION, codec, original_size) + payload
+
+
+def decode_value(stored: Union[str, bytes]) -> Any:
+    """
+    Decode a value read from the cache database.
+
+    Args:
+        stored: BLOB written by encode_value, or legacy JSON text
+
+    Returns:
+        The original value
+
+    Raises:
+        ValueError: If the BLOB header is not recognised
+    """
+    if isinstance(stored, str):
+        # Legacy rows stored json.dumps() output as TEXT
+        return json.loads(stored)
+
+    version, codec, original_size = _HEADER.unpack_from(stored)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported cache value format version: {version}")
+
+    payload = memoryview(stored)[_HEADER.size :]
+    if codec & CODEC_ZLIB:
+        data = zlib.decompress(payload, bufsize=max(original_size, 1))
+        codec &= ~CODEC_ZLIB
+    else:
+        data = bytes(payload)
+
+    if codec == CODEC_STR:
+        return data.decode("utf-8")
+    if codec == CODEC_BYTES:
+        return data
+    if codec == CODEC_STR_LIST:
+        return data.decode("utf-8").split(_LIST_SEPARATOR) if data else []
+    if codec == CODEC_JSON:
+        return json.loads(data)
+    raise ValueError(f"Unknown cache value codec: {codec:#x}")
@@ -0,0 +1,98 @@
+"""Content addressing for large strings and bytes inside cached values.
+
+Before a value is written, every str or bytes leaf of at least
+``BLOB_THRESHOLD`` bytes is moved out of it and replaced by a reference
+``{"$blob": "<sha256>"}``. The SQLite cache stores each distinct payload once
+in a reference-counted blob table, so the same file content cached under
+several operations, encodings or branches costs its bytes only once.
+"""
+
+import hashlib
+from typing import Any, Dict, Union
+
+BLOB_REF_KEY = "$blob"
+
+# Smaller leaves are cheaper to store inline than to look up separately
+BLOB_THRESHOLD = 1024
+
+BlobPayload = Union[str, bytes]
+
+
+def content_digest(payload: BlobPayload) -> str:
+    """
+    Get the content address of a payload.
+
+    The type is part of the digest so a str and bytes with the same bytes
+    never share a blob.
+
+    Args:
+        payload: String or bytes content
+
+    Returns:
+        Hex-encoded SHA-256 digest
+    """
+    if isinstance(payload, str):
+        return hashlib.sha256(b"s" + payload.encode("utf-8")).hexdigest()
+    return hashlib.sha256(b"b" + bytes(payload)).hexdigest()
+
+
+def _is_large(leaf: Any, threshold: int) -> bool:
+    """Check whether a leaf should be stored as a blob."""
+    if isinstance(leaf, str):
+        # UTF-8 needs 1-4 bytes per character; only encode when undecided
+        if len(leaf) >= threshold:
+            return True
+        return len(leaf) * 4 >= threshold and len(leaf.encode("utf-8")) >= threshold
+    if isinstance(leaf, (bytes, bytearray)):
+        return len(leaf) >= threshold
+    return False
+
+
+def externalize(
+    value: Any, blobs: Dict[str, BlobPayload], threshold: int = BLOB_THRESHOLD
+) -> Any:
+    """
+    Replace large leaves of a value with blob references.
+
+    Args:
+        value: Value about to be cached
+        blobs: Receives digest -> payload for every replaced leaf
+        threshold: Minimum payload size in bytes to store as a blob
+
+    Returns:
+        The value with large leaves replaced by references
+    """
+    if _is_large(value, threshold):
+        payload = value if isinstance(value, str) else bytes(value)
+        digest = content_digest(payload)
+        blobs[digest] = payload
+        return {BLOB_REF_KEY: digest}
+    if isinstance(value, dict):
+        return {k: externalize(v, blobs, threshold) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [externalize(item, blobs, threshold) for item in value]
+    return value
+
+
+def internalize(value: Any, blobs: Dict[str, BlobPayload]) -> Any:
+    """
+    Resolve blob references produced by externalize.
+
+    Only digests present in ``blobs`` are resolved, so ordinary dicts that
+    happen to use the reference key are left untouched.
+
+    Args:
+        value: Value read from the cache
+        blobs: Payloads of the blobs the entry references
+
+    Returns:
+        The original value
+    """
+    if isinstance(value, dict):
+        digest = value.get(BLOB_REF_KEY)
+        if len(value) == 1 and isinstance(digest, str) and digest in blobs:
+            return blobs[digest]
+        return {k: internalize(v, blobs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [internalize(item, blobs) for item in value]
+    return value
@@ -8,7 +8,7 @@ import hashlib
 import json
 import time
 from dataclasses import dataclass, field
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from ..interfaces.cache_protocol import CacheProtocol
 
@@ -96,6 +96,38 @@ class InMemoryCache(CacheProtocol):
             ttl=ttl or self.ttl,
         )
 
+    def get_many(
+        self, operation: str, params_list: List[Dict[str, Any]]
+    ) -> List[Optional[Any]]:
+        """
+        Get several values of one operation.
+
+        Args:
+            operation: The operation name
+            params_list: Parameters identifying each entry
+
+        Returns:
+            Values in the same order as params_list, None for misses
+        """
+        return [self.get(operation, params) for params in params_list]
+
+    def set_many(
+        self,
+        operation: str,
+        items: List[Tuple[Dict[str, Any], Any]],
+        ttl: Optional[int] = None,
+    ) -> None:
+        """
+        Store several values of one operation.
+
+        Args:
+            operation: The operation name
+            items: (params, value) pairs to store
+            ttl: Time-to-live in seconds (uses default if not specified)
+        """
+        for params, value in items:
+            self.set(operation, params, value, ttl)
+
     def invalidate(
         self, operation: Optional[str] = None, params: Optional[Dict[str, Any]] = None
     ) -> int:
@@ -122,16 +154,19 @@ class InMemoryCache(CacheProtocol):
             self._cache.clear()
             return count
 
-    def cleanup_expired(self) -> int:
+    def cleanup_expired(self, batch_size: Optional[int] = None) -> int:
         """
-        Remove all expired entries from cache.
+        Remove expired entries from cache.
+
+        Args:
+            batch_size: If provided, remove at most this many entries
 
         Returns:
             Number of entries removed
         """
         expired_keys = [
             key for key, entry in self._cache.items() if entry.is_expired()
-        ]
+        ][:batch_size]
 
         for key in expired_keys:
             del self._cache[key]
@@ -0,0 +1,183 @@
+"""Single-flight stampede protection for cached computations.
+
+When several callers miss the same cache key at once, only one of them runs
+the expensive computation. Threads in the same process wait on a shared
+future. Other processes see a lease row in the SQLite cache and poll for the
+result instead of recomputing it. Async callers go through a worker thread and
+share the same in-flight registry as sync callers.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    # Only needed for annotations; importing interfaces at runtime would be
+    # circular because the cached wrappers import this module
+    from ..interfaces.cache_protocol import CacheProtocol
+
+DEFAULT_LEASE_TTL_SECONDS = 30.0
+DEFAULT_POLL_INTERVAL_SECONDS = 0.05
+# Lease TTLs a follower waits for another process before computing itself
+MAX_WAIT_LEASES = 3
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Deduplicates concurrent computations of the same cache entry."""
+
+    def __init__(
+        self,
+        cache: "CacheProtocol",
+        lease_ttl: float = DEFAULT_LEASE_TTL_SECONDS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL_SECONDS,
+    ):
+        """
+        Initialize single-flight protection for a cache.
+
+        Args:
+            cache: Cache storing the computed values. Cross-process leases are
+                used when it provides acquire_lease/release_lease.
+            lease_ttl: Seconds before a lease held by a crashed process lapses
+            poll_interval: Seconds between polls while another process computes
+        """
+        self._cache = cache
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self._inflight: Dict[Tuple[str, str], "Future[Any]"] = {}
+        self._lock = threading.Lock()
+        self._owner_prefix = f"{os.getpid()}-{uuid.uuid4().hex}"
+
+    def _store(
+        self, operation: str, params: Dict[str, Any], value: Any, ttl: Optional[int]
+    ) -> None:
+        """Write a computed value, passing ttl only when one was given."""
+        if ttl is None:
+            self._cache.set(operation, params, value)
+        else:
+            self._cache.set(operation, params, value, ttl=ttl)
+
+    def _compute_with_lease(
+        self,
+        operation: str,
+        params: Dict[str, Any],
+        compute: Callable[[], Any],
+        ttl: Optional[int],
+        is_valid: Optional[Callable[[Any], bool]],
+    ) -> Any:
+        """Compute under a cross-process lease, or wait for its holder.
+
+        Waiting is bounded: a holder that keeps renewing its lease without
+        storing a usable value would otherwise stall followers forever.
+        """
+        acquire = getattr(self._cache, "acquire_lease", None)
+        release = getattr(self._cache, "release_lease", None)
+        if acquire is None or release is None:
+            value = compute()
+            self._store(operation, params, value, ttl)
+            return value
+
+        owner = f"{self._owner_prefix}-{threading.get_ident()}"
+        deadline = time.monotonic() + self.lease_ttl * MAX_WAIT_LEASES
+        while time.monotonic() < deadline:
+            if acquire(operation, params, owner, self.lease_ttl):
+                try:
+                    value = compute()
+                    self._store(operation, params, value, ttl)
+                    return value
+                finally:
+                    release(operation, params, owner)
+
+            # Another process is computing; wait for its result. If it dies,
+            # its lease lapses and the next acquire succeeds.
+            time.sleep(self.poll_interval)
+            cached = self._cache.get(operation, params)
+            if self._usable(cached, is_valid):
+                return cached
+
+        logger.warning(
+            f"Gave up waiting for another process to compute {operation}; "
+            "computing it locally"
+        )
+        value = compute()
+        self._store(operation, params, value, ttl)
+        return value
+
+    @staticmethod
+    def _usable(cached: Any, is_valid: Optional[Callable[[Any], bool]]) -> bool:
+        """Check whether a cached value can be returned without recomputing."""
+        return cached is not None and (is_valid is None or is_valid(cached))
+
+    def get_or_compute(
+        self,
+        operation: str,
+        params: Dict[str, Any],
+        compute: Callable[[], Any],
+        ttl: Optional[int] = None,
+        is_valid: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Return the cached value, computing it at most once across callers.
+
+        Args:
+            operation: The operation name
+            params: Parameters that uniquely identify the operation
+            compute: Produces the value to cache on a miss; must not return None
+            ttl: Time-to-live in seconds (uses the cache default if not specified)
+            is_valid: Optional check of a cached value; stale values are
+                recomputed and overwritten
+
+        Returns:
+            The cached or freshly computed value
+        """
+        cached = self._cache.get(operation, params)
+        if self._usable(cached, is_valid):
+            return cached
+        if cached is not None:
+            # Feeds adaptive TTLs on caches that track stale hits
+            record_stale = getattr(self._cache, "record_stale", None)
+            if record_stale is not None:
+                record_stale(operation)
+
+        flight_key = (operation, json.dumps(params, sort_keys=True))
+        with self._lock:
+            future = self._inflight.get(flight_key)
+            is_leader = future is None
+            if future is None:
+                future = Future()
+                self._inflight[flight_key] = future
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            value = self._compute_with_lease(operation, params, compute, ttl, is_valid)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(flight_key, None)
+
+    async def aget_or_compute(
+        self,
+        operation: str,
+        params: Dict[str, Any],
+        compute: Callable[[], Any],
+        ttl: Optional[int] = None,
+        is_valid: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Async variant of get_or_compute; runs in a worker thread."""
+        return await asyncio.to_thread(
+            self.get_or_compute, operation, params, compute, ttl, is_valid
+        )
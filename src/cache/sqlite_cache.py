@@ -7,22 +7,56 @@ filesystem and Git operations, improving performance for repeated operations.
 import asyncio
 import hashlib
 import json
+import logging
+import os
 import sqlite3
 import time
 from contextlib import contextmanager
 from dataclasses import dataclass, field
 from pathlib import Path
 from threading import Lock
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 try:
     from ..errors import CacheError
+    from .adaptive_ttl import (
+        DEFAULT_MAX_TTL,
+        DEFAULT_MIN_TTL,
+        AdaptiveTTL,
+        OperationStats,
+    )
+    from .codec import decode_value, encode_value
+    from .content_store import BlobPayload, externalize, internalize
 except ImportError:
     import sys
     from pathlib import Path
     sys.path.insert(0, str(Path(__file__).parent.parent))
+    from cache.adaptive_ttl import (
+        DEFAULT_MAX_TTL,
+        DEFAULT_MIN_TTL,
+        AdaptiveTTL,
+        OperationStats,
+    )
+    from cache.codec import decode_value, encode_value
+    from cache.content_store import BlobPayload, externalize, internalize
     from errors import CacheError
 
+logger = logging.getLogger(__name__)
+
+EVICTION_POLICIES = ("lru", "lfu")
+
+# Stay well below SQLite's bound-parameter limit in IN (...) clauses
+_SQL_CHUNK_SIZE = 500
+
+# (key, operation, params JSON, serialized value, blob digests)
+_PreparedRow = Tuple[str, str, str, bytes, List[str]]
+
+# (operation, params JSON) of an entry whose value changed
+ChangedKey = Tuple[str, str]
+
+# Epochs whose changed keys are kept; readers further behind flush entirely
+_CHANGE_LOG_SIZE = 1000
+
 
 @dataclass
 class CacheEntry:
@@ -55,44 +89,261 @@ class CacheEntry:
 class CacheManager:
     """Thread-safe SQLite cache manager for file tree and Git metadata."""
 
-    def __init__(self, cache_dir: Optional[Path] = None, ttl: int = 900):
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        ttl: int = 900,
+        max_size_bytes: Optional[int] = None,
+        eviction_policy: str = "lru",
+        vacuum_interval: int = 100,
+        adaptive_ttl: Optional[AdaptiveTTL] = None,
+    ):
         """
         Initialize the cache manager.
 
         Args:
             cache_dir: Directory to store cache database. If None, uses temp directory.
             ttl: Default time-to-live for cache entries in seconds.
+            max_size_bytes: Maximum total size of stored values. When exceeded,
+                entries are evicted down to 90% of the limit. None means unbounded.
+            eviction_policy: "lru" (least recently accessed first) or "lfu"
+                (least frequently accessed first).
+            vacuum_interval: Number of writes between incremental vacuum passes.
+            adaptive_ttl: Policy adapting TTLs per operation from observed hit,
+                miss and stale rates. None keeps requested TTLs unchanged while
+                still recording the statistics.
         """
+        if eviction_policy not in EVICTION_POLICIES:
+            raise ValueError(
+                f"Invalid eviction policy '{eviction_policy}'. "
+                f"Must be one of: {', '.join(EVICTION_POLICIES)}"
+            )
+
         if cache_dir is None:
             cache_dir = Path.home() / ".cache" / "gemini-code-review"
 
         cache_dir.mkdir(parents=True, exist_ok=True)
         self.db_path = cache_dir / "metadata_cache.db"
         self.ttl = ttl
+        self.max_size_bytes = max_size_bytes
+        self.eviction_policy = eviction_policy
+        self.vacuum_interval = vacuum_interval
         self._lock = Lock()
+        self.last_epoch = 0
+        # Reads are recorded here and applied during the next write, so that
+        # lookups never need a write transaction of their own.
+        self._pending_access: Dict[str, Tuple[float, int]] = {}
+        # Per-operation counters, deferred the same way
+        self._pending_stats: Dict[str, OperationStats] = {}
+        # Operation statistics as of this process's last write
+        self._op_stats: Dict[str, OperationStats] = {}
+        self.adaptive_ttl = adaptive_ttl or AdaptiveTTL(enabled=False)
+        self._writes_since_vacuum = 0
         self._init_db()
 
     def _init_db(self) -> None:
         """Initialize the SQLite database schema."""
         with self._get_connection() as conn:
+            self._enable_incremental_vacuum(conn)
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS cache (
                     key TEXT PRIMARY KEY,
                     value TEXT NOT NULL,
                     timestamp REAL NOT NULL,
-                    ttl INTEGER NOT NULL
+                    ttl INTEGER NOT NULL,
+                    size INTEGER NOT NULL DEFAULT 0,
+                    last_access REAL NOT NULL DEFAULT 0,
+                    access_count INTEGER NOT NULL DEFAULT 0,
+                    expires_at REAL NOT NULL DEFAULT 0,
+                    blob_refs TEXT NOT NULL DEFAULT '[]',
+                    blob_size INTEGER NOT NULL DEFAULT 0,
+                    operation TEXT,
+                    params TEXT
                 )
             """
             )
+            self._migrate_columns(conn)
             conn.execute(
                 """
                 CREATE INDEX IF NOT EXISTS idx_timestamp 
                 ON cache(timestamp)
             """
             )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_expires_at
+                ON cache(expires_at)
+            """
+            )
+            # Covering indexes: eviction order and size totals never touch values
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_lru
+                ON cache(last_access, size)
+            """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_lfu
+                ON cache(access_count, last_access, size)
+            """
+            )
+            # Monotonic write counter shared by every process using this DB,
+            # so in-process tiers can detect writes made elsewhere.
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_meta (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """
+            )
+            # Entries changed at each epoch, so in-process tiers can drop just
+            # those; keys is NULL when everything may have changed
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_changes (
+                    epoch INTEGER PRIMARY KEY,
+                    keys TEXT
+                )
+            """
+            )
+            # Cross-process computation leases used for stampede protection
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_leases (
+                    key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """
+            )
+            # Per-operation hit/miss/stale counters and learned TTL scales
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_op_stats (
+                    operation TEXT PRIMARY KEY,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    misses INTEGER NOT NULL DEFAULT 0,
+                    stale INTEGER NOT NULL DEFAULT 0,
+                    invalidations INTEGER NOT NULL DEFAULT 0,
+                    window_reads INTEGER NOT NULL DEFAULT 0,
+                    window_churn INTEGER NOT NULL DEFAULT 0,
+                    scale REAL NOT NULL DEFAULT 1.0,
+                    base_ttl INTEGER
+                )
+            """
+            )
+            self._init_blob_store(conn)
+            conn.execute(
+                "INSERT OR IGNORE INTO cache_meta (name, value) VALUES ('epoch', 0)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO cache_meta (name, value) VALUES ('evictions', 0)"
+            )
             conn.commit()
 
+    def _init_blob_store(self, conn: sqlite3.Connection) -> None:
+        """Create the content-addressed blob table and its refcount triggers."""
+        # size precedes data so reading it never walks the payload's overflow pages
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_blobs (
+                hash TEXT PRIMARY KEY,
+                refcount INTEGER NOT NULL DEFAULT 0,
+                size INTEGER NOT NULL,
+                data BLOB NOT NULL
+            )
+        """
+        )
+        # Covers both garbage collection and the stored-size total
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_blob_refcount
+            ON cache_blobs(refcount, size)
+        """
+        )
+        # Every path that adds or removes cache rows (writes, REPLACE, eviction,
+        # invalidation, expiry) keeps refcounts right through these triggers.
+        # Unreferenced blobs are deleted by _collect_blobs at the end of each
+        # write, so a REPLACE that drops and re-adds a reference is safe.
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS cache_blob_ref
+            AFTER INSERT ON cache WHEN NEW.blob_refs != '[]'
+            BEGIN
+                UPDATE cache_blobs SET refcount = refcount + 1
+                WHERE hash IN (SELECT value FROM json_each(NEW.blob_refs));
+            END
+        """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS cache_blob_unref
+            AFTER DELETE ON cache WHEN OLD.blob_refs != '[]'
+            BEGIN
+                UPDATE cache_blobs SET refcount = refcount - 1
+                WHERE hash IN (SELECT value FROM json_each(OLD.blob_refs));
+            END
+        """
+        )
+
+    def _enable_incremental_vacuum(self, conn: sqlite3.Connection) -> None:
+        """Switch the database to incremental auto-vacuum if it is not already."""
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if mode == 2:  # INCREMENTAL
+            return
+
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        has_tables = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'"
+        ).fetchone()[0]
+        if has_tables:
+            # Existing databases only pick up the new mode after a full VACUUM
+            try:
+                conn.execute("VACUUM")
+            except sqlite3.OperationalError as e:
+                logger.debug(f"Deferred cache VACUUM, database busy: {e}")
+
+    def _migrate_columns(self, conn: sqlite3.Connection) -> None:
+        """Add bookkeeping columns to databases created before them."""
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(cache)")}
+
+        if "size" not in columns:
+            conn.execute("ALTER TABLE cache ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+            conn.execute(
+                "ALTER TABLE cache ADD COLUMN last_access REAL NOT NULL DEFAULT 0"
+            )
+            conn.execute(
+                "ALTER TABLE cache ADD COLUMN access_count INTEGER NOT NULL DEFAULT 0"
+            )
+            conn.execute(
+                """
+                UPDATE cache
+                SET size = LENGTH(CAST(value AS BLOB)), last_access = timestamp
+                """
+            )
+
+        if "expires_at" not in columns:
+            conn.execute(
+                "ALTER TABLE cache ADD COLUMN expires_at REAL NOT NULL DEFAULT 0"
+            )
+            conn.execute("UPDATE cache SET expires_at = timestamp + ttl")
+
+        if "blob_refs" not in columns:
+            conn.execute(
+                "ALTER TABLE cache ADD COLUMN blob_refs TEXT NOT NULL DEFAULT '[]'"
+            )
+            conn.execute(
+                "ALTER TABLE cache ADD COLUMN blob_size INTEGER NOT NULL DEFAULT 0"
+            )
+
+        if "operation" not in columns:
+            # Unhashed keys, so entries can be exported; NULL for older rows
+            conn.execute("ALTER TABLE cache ADD COLUMN operation TEXT")
+            conn.execute("ALTER TABLE cache ADD COLUMN params TEXT")
+
     @contextmanager
     def _get_connection(self):
         """Get a database connection with proper error handling."""
@@ -100,6 +351,8 @@ class CacheManager:
         try:
             conn = sqlite3.connect(self.db_path, timeout=5.0)
             conn.row_factory = sqlite3.Row
+            # Rows removed by INSERT OR REPLACE must release their blob refs too
+            conn.execute("PRAGMA recursive_triggers = ON")
             yield conn
         except sqlite3.Error as e:
             raise CacheError(f"Database error: {e}")
@@ -116,42 +369,417 @@ class CacheManager:
         # Hash for consistent length and avoid special characters
         return hashlib.sha256(key_str.encode()).hexdigest()
 
-    def get(self, operation: str, params: Dict[str, Any]) -> Optional[Any]:
+    def _bump_epoch(
+        self, conn: sqlite3.Connection, changed: Optional[List[ChangedKey]]
+    ) -> int:
         """
-        Get a value from cache.
+        Increment the shared write epoch inside the caller's transaction.
+
+        Args:
+            conn: Connection of the writing transaction
+            changed: Entries whose value changed, None if any entry may have
+
+        Returns:
+            The new epoch
+        """
+        conn.execute("UPDATE cache_meta SET value = value + 1 WHERE name = 'epoch'")
+        row = conn.execute(
+            "SELECT value FROM cache_meta WHERE name = 'epoch'"
+        ).fetchone()
+        self.last_epoch = row["value"] if row else 0
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_changes (epoch, keys) VALUES (?, ?)",
+            (self.last_epoch, None if changed is None else json.dumps(changed)),
+        )
+        conn.execute(
+            "DELETE FROM cache_changes WHERE epoch <= ?",
+            (self.last_epoch - _CHANGE_LOG_SIZE,),
+        )
+        return self.last_epoch
+
+    def get_epoch(self) -> int:
+        """
+        Get the current write epoch of the cache database.
+
+        The epoch increases on every write and invalidation made by any
+        process sharing this database. Removing expired entries does not
+        change it, since they are no longer returned anyway.
+
+        Returns:
+            Current epoch value
+        """
+        with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT value FROM cache_meta WHERE name = 'epoch'"
+            ).fetchone()
+            return row["value"] if row else 0
+
+    def changes_since(
+        self, epoch: int, until: Optional[int] = None
+    ) -> Tuple[int, Optional[Set[ChangedKey]]]:
+        """
+        Get the entries changed after an epoch.
+
+        Args:
+            epoch: Last epoch the caller has seen
+            until: Last epoch to include, defaults to the current one
+
+        Returns:
+            The current epoch, and the (operation, params JSON) keys changed
+            in between, or None if they are unknown (log pruned or a
+            cache-wide invalidation) and every entry must be assumed changed
+        """
+        with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT value FROM cache_meta WHERE name = 'epoch'"
+            ).fetchone()
+            current = row["value"] if row else 0
+            last = current if until is None else min(until, current)
+            if last <= epoch:
+                return current, set()
+            rows = conn.execute(
+                "SELECT keys FROM cache_changes WHERE epoch > ? AND epoch <= ?",
+                (epoch, last),
+            ).fetchall()
+
+        if len(rows) != last - epoch or any(row["keys"] is None for row in rows):
+            return current, None
+        changed: Set[ChangedKey] = set()
+        for row in rows:
+            changed.update(tuple(key) for key in json.loads(row["keys"]))
+        return current, changed
+
+    def _record_access(self, key: str) -> None:
+        """Remember a read so it can update LRU/LFU bookkeeping later."""
+        _, count = self._pending_access.get(key, (0.0, 0))
+        self._pending_access[key] = (time.time(), count + 1)
+
+    def _flush_access(self, conn: sqlite3.Connection) -> None:
+        """Apply recorded reads inside the caller's write transaction."""
+        if not self._pending_access:
+            return
+        conn.executemany(
+            """
+            UPDATE cache
+            SET last_access = MAX(last_access, ?), access_count = access_count + ?
+            WHERE key = ?
+            """,
+            [
+                (accessed, count, key)
+                for key, (accessed, count) in self._pending_access.items()
+            ],
+        )
+        self._pending_access.clear()
+
+    def _note(self, operation: str, **counts: int) -> None:
+        """Remember hits, misses, stale hits or invalidations of an operation."""
+        delta = self._pending_stats.setdefault(operation, OperationStats())
+        for name, count in counts.items():
+            setattr(delta, name, getattr(delta, name) + count)
+
+    def _load_stats(
+        self, conn: sqlite3.Connection, operation: Optional[str] = None
+    ) -> Dict[str, OperationStats]:
+        """Read persisted statistics of one or all operations."""
+        if operation is None:
+            cursor = conn.execute("SELECT * FROM cache_op_stats")
+        else:
+            cursor = conn.execute(
+                "SELECT * FROM cache_op_stats WHERE operation = ?", (operation,)
+            )
+        loaded = {
+            row["operation"]: OperationStats(
+                hits=row["hits"],
+                misses=row["misses"],
+                stale=row["stale"],
+                invalidations=row["invalidations"],
+                window_reads=row["window_reads"],
+                window_churn=row["window_churn"],
+                scale=row["scale"],
+                base_ttl=row["base_ttl"],
+            )
+            for row in cursor
+        }
+        self._op_stats.update(loaded)
+        return loaded
+
+    def _flush_stats(self, conn: sqlite3.Connection) -> None:
+        """Fold recorded operation statistics in inside a write transaction."""
+        for operation, delta in self._pending_stats.items():
+            # Re-read so counters from other processes are not overwritten
+            stats = self._load_stats(conn, operation).get(operation, OperationStats())
+            self.adaptive_ttl.apply(stats, delta)
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO cache_op_stats
+                    (operation, hits, misses, stale, invalidations,
+                     window_reads, window_churn, scale, base_ttl)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    operation,
+                    stats.hits,
+                    stats.misses,
+                    stats.stale,
+                    stats.invalidations,
+                    stats.window_reads,
+                    stats.window_churn,
+                    stats.scale,
+                    stats.base_ttl,
+                ),
+            )
+            self._op_stats[operation] = stats
+        self._pending_stats.clear()
+
+    def record_hits(self, operation: str, count: int = 1) -> None:
+        """
+        Count hits served by a tier in front of this cache.
+
+        Args:
+            operation: The operation name
+            count: Number of hits
+        """
+        with self._lock:
+            self._note(operation, hits=count)
+
+    def record_stale(self, operation: str, count: int = 1) -> None:
+        """
+        Count cached values the caller found stale when validating them.
+
+        Stale hits shorten the TTL of the operation when adaptation is on.
+
+        Args:
+            operation: The operation name
+            count: Number of stale values
+        """
+        with self._lock:
+            self._note(operation, stale=count)
+
+    def effective_ttl(self, operation: str, ttl: Optional[int] = None) -> int:
+        """
+        Get the TTL entries of an operation are currently stored with.
+
+        Args:
+            operation: The operation name
+            ttl: Requested TTL (uses default if not specified)
+
+        Returns:
+            TTL in seconds after adaptation
+        """
+        return self.adaptive_ttl.ttl_for(
+            self._op_stats.get(operation), ttl or self.ttl
+        )
+
+    def _collect_blobs(self, conn: sqlite3.Connection) -> int:
+        """Delete blobs no cache entry references any more."""
+        return conn.execute("DELETE FROM cache_blobs WHERE refcount <= 0").rowcount
+
+    def _stored_size(self, conn: sqlite3.Connection) -> int:
+        """Total bytes held by entry rows and blobs, from covering indexes."""
+        rows = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        blobs = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache_blobs"
+        ).fetchone()[0]
+        return rows + blobs
+
+    def _evict_if_needed(self, conn: sqlite3.Connection) -> int:
+        """Evict entries until the stored size is back under the low watermark."""
+        if self.max_size_bytes is None:
+            return 0
+
+        total = self._stored_size(conn)
+        if total <= self.max_size_bytes:
+            return 0
+
+        # Evict to 90% of the limit so that we don't evict on every write
+        target = int(self.max_size_bytes * 0.9)
+        if self.eviction_policy == "lfu":
+            order = "access_count, last_access"
+        else:
+            order = "last_access"
+
+        evicted = 0
+        # A victim's blobs are only freed if nothing else shares them, so the
+        # estimate can be optimistic; re-measure and repeat until under target.
+        while total > target:
+            excess = total - target
+            victims: List[int] = []
+            freed = 0
+            for row in conn.execute(
+                f"SELECT rowid, size, blob_size FROM cache ORDER BY {order}"
+            ):
+                victims.append(row["rowid"])
+                freed += row["size"] + row["blob_size"]
+                if freed >= excess:
+                    break
+            if not victims:
+                break
+
+            for start in range(0, len(victims), _SQL_CHUNK_SIZE):
+                chunk = victims[start : start + _SQL_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                conn.execute(
+                    f"DELETE FROM cache WHERE rowid IN ({placeholders})", chunk
+                )
+            self._collect_blobs(conn)
+            evicted += len(victims)
+            total = self._stored_size(conn)
+
+        conn.execute(
+            "UPDATE cache_meta SET value = value + ? WHERE name = 'evictions'",
+            (evicted,),
+        )
+        logger.debug(f"Evicted {evicted} cache entries, {total} bytes remain")
+        return evicted
+
+    def _after_write(self) -> None:
+        """Run an incremental vacuum pass every vacuum_interval writes."""
+        self._writes_since_vacuum += 1
+        if self._writes_since_vacuum >= self.vacuum_interval:
+            self._writes_since_vacuum = 0
+            self._incremental_vacuum()
+
+    def _incremental_vacuum(self) -> int:
+        """Return free pages to the filesystem; callers must hold the lock."""
+        with self._get_connection() as conn:
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free_pages:
+                # executescript steps the pragma to completion; execute() frees
+                # only a single page per call
+                conn.executescript("PRAGMA incremental_vacuum;")
+            return free_pages
+
+    def vacuum(self) -> int:
+        """
+        Reclaim free pages left behind by deleted entries.
+
+        Returns:
+            Number of pages returned to the filesystem
+        """
+        with self._lock:
+            self._writes_since_vacuum = 0
+            return self._incremental_vacuum()
+
+    def get_entry(self, operation: str, params: Dict[str, Any]) -> Optional[CacheEntry]:
+        """
+        Get a cache entry including its timestamp and TTL.
 
         Args:
             operation: The operation name (e.g., "file_tree", "git_diff")
             params: Parameters that uniquely identify the operation
 
         Returns:
-            Cached value if found and not expired, None otherwise
+            CacheEntry if found and not expired, None otherwise
         """
-        key = self._generate_key(operation, params)
+        return self.get_entries(operation, [params])[0]
+
+    def get_entries(
+        self, operation: str, params_list: List[Dict[str, Any]]
+    ) -> List[Optional[CacheEntry]]:
+        """
+        Get several cache entries of one operation in a single transaction.
+
+        Args:
+            operation: The operation name
+            params_list: Parameters identifying each entry
+
+        Returns:
+            Entries in the same order as params_list, None for misses
+        """
+        keys = [self._generate_key(operation, params) for params in params_list]
+        found: Dict[str, CacheEntry] = {}
+        with_blobs: Dict[str, List[str]] = {}
+        now = time.time()
 
         with self._lock:
             with self._get_connection() as conn:
-                cursor = conn.execute(
-                    "SELECT value, timestamp, ttl FROM cache WHERE key = ?", (key,)
-                )
-                row = cursor.fetchone()
-
-                if row:
-                    entry = CacheEntry(
-                        key=key,
-                        value=json.loads(row["value"]),
-                        timestamp=row["timestamp"],
-                        ttl=row["ttl"],
+                unique_keys = list(dict.fromkeys(keys))
+                for start in range(0, len(unique_keys), _SQL_CHUNK_SIZE):
+                    chunk = unique_keys[start : start + _SQL_CHUNK_SIZE]
+                    placeholders = ",".join("?" * len(chunk))
+                    # Expired rows are filtered here and left for cleanup_expired
+                    cursor = conn.execute(
+                        f"SELECT key, value, timestamp, ttl, blob_refs FROM cache "
+                        f"WHERE key IN ({placeholders}) AND expires_at >= ?",
+                        [*chunk, now],
                     )
+                    for row in cursor:
+                        entry = CacheEntry(
+                            key=row["key"],
+                            value=decode_value(row["value"]),
+                            timestamp=row["timestamp"],
+                            ttl=row["ttl"],
+                        )
+                        found[row["key"]] = entry
+                        if row["blob_refs"] != "[]":
+                            with_blobs[row["key"]] = json.loads(row["blob_refs"])
 
-                    if not entry.is_expired():
-                        return entry.value
-                    else:
-                        # Clean up expired entry
-                        conn.execute("DELETE FROM cache WHERE key = ?", (key,))
-                        conn.commit()
+                if with_blobs:
+                    self._resolve_blobs(conn, found, with_blobs)
 
-        return None
+                for key in found:
+                    self._record_access(key)
+                hits = sum(1 for key in keys if key in found)
+                self._note(operation, hits=hits, misses=len(keys) - hits)
+
+        return [found.get(key) for key in keys]
+
+    def _resolve_blobs(
+        self,
+        conn: sqlite3.Connection,
+        found: Dict[str, CacheEntry],
+        with_blobs: Dict[str, List[str]],
+    ) -> None:
+        """Replace blob references in found entries, dropping unresolvable ones."""
+        digests = list({d for refs in with_blobs.values() for d in refs})
+        blobs: Dict[str, BlobPayload] = {}
+        for start in range(0, len(digests), _SQL_CHUNK_SIZE):
+            chunk = digests[start : start + _SQL_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            for row in conn.execute(
+                f"SELECT hash, data FROM cache_blobs WHERE hash IN ({placeholders})",
+                chunk,
+            ):
+                blobs[row["hash"]] = decode_value(row["data"])
+
+        for key, refs in with_blobs.items():
+            if not all(digest in blobs for digest in refs):
+                # Replaced and collected by another process since the row was read
+                del found[key]
+                continue
+            found[key].value = internalize(found[key].value, blobs)
+
+    def get(self, operation: str, params: Dict[str, Any]) -> Optional[Any]:
+        """
+        Get a value from cache.
+
+        Args:
+            operation: The operation name (e.g., "file_tree", "git_diff")
+            params: Parameters that uniquely identify the operation
+
+        Returns:
+            Cached value if found and not expired, None otherwise
+        """
+        entry = self.get_entry(operation, params)
+        return entry.value if entry is not None else None
+
+    def get_many(
+        self, operation: str, params_list: List[Dict[str, Any]]
+    ) -> List[Optional[Any]]:
+        """
+        Get several values of one operation in a single transaction.
+
+        Args:
+            operation: The operation name
+            params_list: Parameters identifying each entry
+
+        Returns:
+            Values in the same order as params_list, None for misses
+        """
+        return [
+            entry.value if entry is not None else None
+            for entry in self.get_entries(operation, params_list)
+        ]
 
     def set(
         self,
@@ -169,21 +797,281 @@ class CacheManager:
             value: The value to cache
             ttl: Time-to-live in seconds (uses default if not specified)
         """
-        key = self._generate_key(operation, params)
-        entry = CacheEntry(
-            key=key, value=value, timestamp=time.time(), ttl=ttl or self.ttl
+        self.set_many(operation, [(params, value)], ttl)
+
+    def set_many(
+        self,
+        operation: str,
+        items: List[Tuple[Dict[str, Any], Any]],
+        ttl: Optional[int] = None,
+    ) -> None:
+        """
+        Store several values of one operation in a single transaction.
+
+        Args:
+            operation: The operation name
+            items: (params, value) pairs to store
+            ttl: Time-to-live in seconds (uses default if not specified)
+        """
+        if not items:
+            return
+
+        timestamp = time.time()
+        base_ttl = ttl or self.ttl
+        blobs: Dict[str, BlobPayload] = {}
+        prepared = [
+            self._prepare(operation, params, value, blobs) for params, value in items
+        ]
+
+        with self._lock:
+            with self._get_connection() as conn:
+                self._flush_access(conn)
+                self._pending_stats.setdefault(
+                    operation, OperationStats()
+                ).base_ttl = base_ttl
+                self._flush_stats(conn)
+                effective_ttl = self.adaptive_ttl.ttl_for(
+                    self._op_stats.get(operation), base_ttl
+                )
+                self._insert(
+                    conn,
+                    [(row, timestamp, effective_ttl) for row in prepared],
+                    blobs,
+                )
+                self._evict_if_needed(conn)
+                self._collect_blobs(conn)
+                self._bump_epoch(conn, _changed_keys(prepared))
+                conn.commit()
+            self._after_write()
+
+    def _prepare(
+        self,
+        operation: str,
+        params: Dict[str, Any],
+        value: Any,
+        blobs: Dict[str, BlobPayload],
+    ) -> _PreparedRow:
+        """Serialize a value outside the lock, collecting the blobs it needs."""
+        entry_blobs: Dict[str, BlobPayload] = {}
+        serialized = encode_value(externalize(value, entry_blobs))
+        blobs.update(entry_blobs)
+        return (
+            self._generate_key(operation, params),
+            operation,
+            json.dumps(params, sort_keys=True),
+            serialized,
+            list(entry_blobs),
         )
 
+    def _insert(
+        self,
+        conn: sqlite3.Connection,
+        rows: List[Tuple[_PreparedRow, float, int]],
+        blobs: Dict[str, BlobPayload],
+    ) -> None:
+        """Write prepared rows with their timestamps and TTLs."""
+        blob_sizes = self._store_blobs(conn, blobs)
+        values = []
+        for (key, operation, params_json, serialized, refs), timestamp, ttl in rows:
+            values.append(
+                (
+                    key,
+                    sqlite3.Binary(serialized),
+                    timestamp,
+                    ttl,
+                    len(serialized),
+                    timestamp,
+                    timestamp + ttl,
+                    json.dumps(refs),
+                    sum(blob_sizes[digest] for digest in refs),
+                    operation,
+                    params_json,
+                )
+            )
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO cache
+                (key, value, timestamp, ttl, size, last_access, access_count,
+                 expires_at, blob_refs, blob_size, operation, params)
+            VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?, ?, ?, ?)
+            """,
+            values,
+        )
+
+    def export_entries(self) -> List[Tuple[str, Dict[str, Any], Any, float]]:
+        """
+        Read every unexpired entry together with its unhashed key.
+
+        Entries written before keys were stored alongside them are left out.
+        Reads made here do not count as accesses.
+
+        Returns:
+            (operation, params, value, expires_at) tuples
+        """
+        found: Dict[str, CacheEntry] = {}
+        with_blobs: Dict[str, List[str]] = {}
+        keys: Dict[str, Tuple[str, Dict[str, Any], float]] = {}
+
         with self._lock:
             with self._get_connection() as conn:
-                conn.execute(
-                    """
-                    INSERT OR REPLACE INTO cache (key, value, timestamp, ttl)
-                    VALUES (?, ?, ?, ?)
-                    """,
-                    (entry.key, json.dumps(entry.value), entry.timestamp, entry.ttl),
+                cursor = conn.execute(
+                    "SELECT key, operation, params, value, timestamp, ttl, "
+                    "expires_at, blob_refs FROM cache "
+                    "WHERE operation IS NOT NULL AND expires_at >= ?",
+                    (time.time(),),
                 )
+                for row in cursor:
+                    found[row["key"]] = CacheEntry(
+                        key=row["key"],
+                        value=decode_value(row["value"]),
+                        timestamp=row["timestamp"],
+                        ttl=row["ttl"],
+                    )
+                    keys[row["key"]] = (
+                        row["operation"],
+                        json.loads(row["params"]),
+                        row["expires_at"],
+                    )
+                    if row["blob_refs"] != "[]":
+                        with_blobs[row["key"]] = json.loads(row["blob_refs"])
+
+                if with_blobs:
+                    self._resolve_blobs(conn, found, with_blobs)
+
+        return [
+            (operation, params, found[key].value, expires_at)
+            for key, (operation, params, expires_at) in keys.items()
+            if key in found
+        ]
+
+    def import_entries(
+        self, entries: List[Tuple[str, Dict[str, Any], Any, float]]
+    ) -> int:
+        """
+        Merge entries exported from another cache, keeping their expiry times.
+
+        Imported entries replace local ones with the same key only; they do
+        not count towards the adaptive TTL statistics.
+
+        Args:
+            entries: (operation, params, value, expires_at) tuples
+
+        Returns:
+            Number of entries written
+        """
+        now = time.time()
+        blobs: Dict[str, BlobPayload] = {}
+        rows = [
+            (
+                self._prepare(operation, params, value, blobs),
+                now,
+                max(1, int(expires_at - now)),
+            )
+            for operation, params, value, expires_at in entries
+            if expires_at > now
+        ]
+        if not rows:
+            return 0
+
+        with self._lock:
+            with self._get_connection() as conn:
+                self._flush_access(conn)
+                self._insert(conn, rows, blobs)
+                self._evict_if_needed(conn)
+                self._collect_blobs(conn)
+                self._bump_epoch(conn, _changed_keys(row for row, _, _ in rows))
                 conn.commit()
+            self._after_write()
+        return len(rows)
+
+    def _store_blobs(
+        self, conn: sqlite3.Connection, blobs: Dict[str, BlobPayload]
+    ) -> Dict[str, int]:
+        """
+        Insert blobs that are not stored yet.
+
+        Content already in the store is neither re-encoded nor re-compressed.
+        Refcounts are raised by the insert trigger once entries reference them.
+
+        Returns:
+            Stored size of every blob in ``blobs``, keyed by digest
+        """
+        sizes: Dict[str, int] = {}
+        digests = list(blobs)
+        for start in range(0, len(digests), _SQL_CHUNK_SIZE):
+            chunk = digests[start : start + _SQL_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            for row in conn.execute(
+                f"SELECT hash, size FROM cache_blobs WHERE hash IN ({placeholders})",
+                chunk,
+            ):
+                sizes[row["hash"]] = row["size"]
+
+        new_rows = []
+        for digest, payload in blobs.items():
+            if digest in sizes:
+                continue
+            data = encode_value(payload)
+            sizes[digest] = len(data)
+            new_rows.append((digest, len(data), sqlite3.Binary(data)))
+
+        conn.executemany(
+            "INSERT INTO cache_blobs (hash, refcount, size, data) VALUES (?, 0, ?, ?)",
+            new_rows,
+        )
+        return sizes
+
+    def acquire_lease(
+        self, operation: str, params: Dict[str, Any], owner: str, ttl: float
+    ) -> bool:
+        """
+        Try to become the only process computing a cache entry.
+
+        Args:
+            operation: The operation name
+            params: Parameters that uniquely identify the operation
+            owner: Identifier of the caller, unique per process and flight
+            ttl: Seconds after which the lease lapses if never released
+
+        Returns:
+            True if the caller now holds the lease
+        """
+        key = self._generate_key(operation, params)
+        now = time.time()
+
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM cache_leases WHERE key = ? AND expires_at < ?", (key, now)
+            )
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO cache_leases (key, owner, expires_at)
+                VALUES (?, ?, ?)
+                """,
+                (key, owner, now + ttl),
+            )
+            row = conn.execute(
+                "SELECT owner FROM cache_leases WHERE key = ?", (key,)
+            ).fetchone()
+            conn.commit()
+            return row is not None and row["owner"] == owner
+
+    def release_lease(self, operation: str, params: Dict[str, Any], owner: str) -> None:
+        """
+        Release a lease acquired with acquire_lease.
+
+        Args:
+            operation: The operation name
+            params: Parameters that uniquely identify the operation
+            owner: Identifier passed to acquire_lease
+        """
+        key = self._generate_key(operation, params)
+        with self._get_connection() as conn:
+            conn.execute(
+                "DELETE FROM cache_leases WHERE key = ? AND owner = ?", (key, owner)
+            )
+            conn.commit()
 
     def invalidate(
         self, operation: Optional[str] = None, params: Optional[Dict[str, Any]] = None
@@ -200,6 +1088,7 @@ class CacheManager:
         """
         with self._lock:
             with self._get_connection() as conn:
+                self._flush_access(conn)
                 if operation and params:
                     # Invalidate specific entry
                     key = self._generate_key(operation, params)
@@ -214,62 +1103,115 @@ class CacheManager:
                     # Clear entire cache
                     cursor = conn.execute("DELETE FROM cache")
 
+                if operation and cursor.rowcount:
+                    # Entries dropped because their source changed are churn
+                    self._note(
+                        operation, invalidations=cursor.rowcount if params else 1
+                    )
+                self._flush_stats(conn)
+                self._collect_blobs(conn)
+                self._bump_epoch(
+                    conn,
+                    (
+                        [(operation, json.dumps(params, sort_keys=True))]
+                        if operation and params
+                        else None
+                    ),
+                )
                 conn.commit()
-                return cursor.rowcount
+            self._after_write()
+            return cursor.rowcount
 
-    def cleanup_expired(self) -> int:
+    def cleanup_expired(self, batch_size: Optional[int] = None) -> int:
         """
-        Remove all expired entries from cache.
+        Remove expired entries from cache.
+
+        Args:
+            batch_size: If provided, remove at most this many entries so the
+                write lock is held only briefly; call again to continue.
 
         Returns:
             Number of entries removed
         """
-        current_time = time.time()
+        now = time.time()
 
         with self._lock:
             with self._get_connection() as conn:
-                # First, get all entries to check expiration
-                cursor = conn.execute("SELECT key, timestamp, ttl FROM cache")
-                expired_keys: List[str] = []
-
-                for row in cursor:
-                    entry_age = current_time - row["timestamp"]
-                    if entry_age > row["ttl"]:
-                        expired_keys.append(row["key"])
-
-                # Delete expired entries
-                if expired_keys:
-                    placeholders = ",".join("?" * len(expired_keys))
+                if batch_size is None:
                     cursor = conn.execute(
-                        f"DELETE FROM cache WHERE key IN ({placeholders})", expired_keys
+                        "DELETE FROM cache WHERE expires_at < ?", (now,)
                     )
-                    conn.commit()
-                    return cursor.rowcount
-
-                return 0
+                else:
+                    cursor = conn.execute(
+                        """
+                        DELETE FROM cache WHERE rowid IN (
+                            SELECT rowid FROM cache WHERE expires_at < ? LIMIT ?
+                        )
+                        """,
+                        (now, batch_size),
+                    )
+                removed = cursor.rowcount
+                if removed:
+                    # No epoch bump: expired entries are invisible to readers
+                    # already, and in-process tiers expire them on their own
+                    self._collect_blobs(conn)
+                conn.commit()
+            if removed:
+                self._after_write()
+            return removed
 
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
         with self._lock:
             with self._get_connection() as conn:
+                self._flush_stats(conn)
+                conn.commit()
+                operations = self._load_stats(conn)
+
                 cursor = conn.execute("SELECT COUNT(*) as total FROM cache")
                 total = cursor.fetchone()["total"]
 
-                cursor = conn.execute("SELECT SUM(LENGTH(value)) as size FROM cache")
-                size = cursor.fetchone()["size"] or 0
+                size = self._stored_size(conn)
+                row = conn.execute(
+                    "SELECT COUNT(*) AS blobs, COALESCE(SUM(size), 0) AS size "
+                    "FROM cache_blobs"
+                ).fetchone()
+                blob_count, blob_size = row["blobs"], row["size"]
 
-                # Check expired entries
-                current_time = time.time()
-                cursor = conn.execute("SELECT timestamp, ttl FROM cache")
-                expired = sum(
-                    1 for row in cursor if current_time - row["timestamp"] > row["ttl"]
+                cursor = conn.execute(
+                    "SELECT COUNT(*) as expired FROM cache WHERE expires_at < ?",
+                    (time.time(),),
                 )
+                expired = cursor.fetchone()["expired"]
+
+                page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+                page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+                free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                row = conn.execute(
+                    "SELECT value FROM cache_meta WHERE name = 'evictions'"
+                ).fetchone()
+                evictions = row["value"] if row else 0
 
                 return {
                     "total_entries": total,
                     "expired_entries": expired,
                     "active_entries": total - expired,
                     "cache_size_bytes": size,
+                    "blob_entries": blob_count,
+                    "blob_size_bytes": blob_size,
+                    "db_size_bytes": page_count * page_size,
+                    "free_pages": free_pages,
+                    "fragmentation": free_pages / page_count if page_count else 0.0,
+                    "evictions": evictions,
+                    "max_size_bytes": self.max_size_bytes,
+                    "eviction_policy": self.eviction_policy,
+                    "adaptive_ttl": self.adaptive_ttl.enabled,
+                    "min_ttl": self.adaptive_ttl.min_ttl,
+                    "max_ttl": self.adaptive_ttl.max_ttl,
+                    "operations": {
+                        operation: self.adaptive_ttl.describe(stats, self.ttl)
+                        for operation, stats in sorted(operations.items())
+                    },
                     "db_path": str(self.db_path),
                 }
 
@@ -287,24 +1229,106 @@ class CacheManager:
         """Async wrapper for set operation."""
         await asyncio.to_thread(self.set, operation, params, value, ttl)
 
+    async def aget_many(
+        self, operation: str, params_list: List[Dict[str, Any]]
+    ) -> List[Optional[Any]]:
+        """Async wrapper for get_many operation."""
+        return await asyncio.to_thread(self.get_many, operation, params_list)
+
+    async def aset_many(
+        self,
+        operation: str,
+        items: List[Tuple[Dict[str, Any], Any]],
+        ttl: Optional[int] = None,
+    ) -> None:
+        """Async wrapper for set_many operation."""
+        await asyncio.to_thread(self.set_many, operation, items, ttl)
+
     async def ainvalidate(
         self, operation: Optional[str] = None, params: Optional[Dict[str, Any]] = None
     ) -> int:
         """Async wrapper for invalidate operation."""
         return await asyncio.to_thread(self.invalidate, operation, params)
 
-    async def acleanup_expired(self) -> int:
+    async def acleanup_expired(self, batch_size: Optional[int] = None) -> int:
         """Async wrapper for cleanup operation."""
-        return await asyncio.to_thread(self.cleanup_expired)
+        return await asyncio.to_thread(self.cleanup_expired, batch_size)
 
 
 # Global cache instance
 _cache_manager: Optional[CacheManager] = None
 
 
+DEFAULT_CACHE_MAX_MB = 512
+
+
+def _changed_keys(rows: Iterable[_PreparedRow]) -> List[ChangedKey]:
+    """Get the change log keys of prepared rows."""
+    return [(operation, params_json) for _, operation, params_json, _, _ in rows]
+
+
+def _max_size_from_env() -> Optional[int]:
+    """Read the cache size limit from GEMINI_CACHE_MAX_MB (0 disables it)."""
+    max_mb_env = os.getenv("GEMINI_CACHE_MAX_MB", str(DEFAULT_CACHE_MAX_MB))
+    try:
+        max_mb = int(max_mb_env)
+    except ValueError:
+        logger.warning(
+            f"Invalid GEMINI_CACHE_MAX_MB='{max_mb_env}', "
+            f"using default {DEFAULT_CACHE_MAX_MB}"
+        )
+        max_mb = DEFAULT_CACHE_MAX_MB
+    return max_mb * 1024 * 1024 if max_mb > 0 else None
+
+
+def _eviction_policy_from_env() -> str:
+    """Read the eviction policy from GEMINI_CACHE_EVICTION."""
+    policy = os.getenv("GEMINI_CACHE_EVICTION", "lru").lower()
+    if policy not in EVICTION_POLICIES:
+        logger.warning(f"Invalid GEMINI_CACHE_EVICTION='{policy}', using 'lru'")
+        policy = "lru"
+    return policy
+
+
+def _ttl_from_env(name: str, default: int) -> int:
+    """Read a positive TTL bound in seconds from the environment."""
+    ttl_env = os.getenv(name, str(default))
+    try:
+        ttl = int(ttl_env)
+        if ttl <= 0:
+            raise ValueError(ttl_env)
+    except ValueError:
+        logger.warning(f"Invalid {name}='{ttl_env}', using default {default}")
+        ttl = default
+    return ttl
+
+
+def _adaptive_ttl_from_env() -> AdaptiveTTL:
+    """
+    Read the TTL policy from GEMINI_CACHE_ADAPTIVE_TTL, GEMINI_CACHE_MIN_TTL
+    and GEMINI_CACHE_MAX_TTL.
+    """
+    enabled = os.getenv("GEMINI_CACHE_ADAPTIVE_TTL", "true").lower() != "false"
+    min_ttl = _ttl_from_env("GEMINI_CACHE_MIN_TTL", DEFAULT_MIN_TTL)
+    max_ttl = _ttl_from_env("GEMINI_CACHE_MAX_TTL", DEFAULT_MAX_TTL)
+    if min_ttl > max_ttl:
+        logger.warning(
+            f"GEMINI_CACHE_MIN_TTL={min_ttl} exceeds GEMINI_CACHE_MAX_TTL={max_ttl}, "
+            "using defaults"
+        )
+        min_ttl, max_ttl = DEFAULT_MIN_TTL, DEFAULT_MAX_TTL
+    return AdaptiveTTL(min_ttl, max_ttl, enabled=enabled)
+
+
 def get_cache_manager(cache_dir: Optional[Path] = None, ttl: int = 900) -> CacheManager:
     """Get or create the global cache manager instance."""
     global _cache_manager
     if _cache_manager is None:
-        _cache_manager = CacheManager(cache_dir, ttl)
+        _cache_manager = CacheManager(
+            cache_dir,
+            ttl,
+            max_size_bytes=_max_size_from_env(),
+            eviction_policy=_eviction_policy_from_env(),
+            adaptive_ttl=_adaptive_ttl_from_env(),
+        )
     return _cache_manager
@@ -0,0 +1,124 @@
+"""Background sweeper that removes expired cache entries in bounded batches.
+
+Reads never delete expired rows, so without a sweeper they stay on disk until
+they are overwritten, evicted or removed by an explicit cleanup.
+"""
+
+import logging
+import os
+import threading
+from typing import Optional
+
+try:
+    from ..interfaces.cache_protocol import CacheProtocol
+except ImportError:
+    from interfaces.cache_protocol import CacheProtocol
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SWEEP_INTERVAL_SECONDS = 300
+DEFAULT_SWEEP_BATCH_SIZE = 500
+# Cap on batches per pass so a huge backlog never monopolises the write lock
+DEFAULT_MAX_BATCHES_PER_SWEEP = 20
+
+
+class CacheSweeper:
+    """Daemon thread that periodically calls cleanup_expired in small batches."""
+
+    def __init__(
+        self,
+        cache: CacheProtocol,
+        interval: float = DEFAULT_SWEEP_INTERVAL_SECONDS,
+        batch_size: int = DEFAULT_SWEEP_BATCH_SIZE,
+        max_batches: int = DEFAULT_MAX_BATCHES_PER_SWEEP,
+    ):
+        """
+        Initialize the sweeper.
+
+        Args:
+            cache: Cache to remove expired entries from
+            interval: Seconds between sweeps
+            batch_size: Maximum entries removed per transaction
+            max_batches: Maximum transactions per sweep
+        """
+        self.cache = cache
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.total_removed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sweep_once(self) -> int:
+        """
+        Run one sweep pass.
+
+        Returns:
+            Number of entries removed
+        """
+        removed = 0
+        for _ in range(self.max_batches):
+            batch = self.cache.cleanup_expired(batch_size=self.batch_size)
+            removed += batch
+            if batch < self.batch_size or self._stop.is_set():
+                break
+        self.total_removed += removed
+        if removed:
+            logger.debug(f"Cache sweeper removed {removed} expired entries")
+        return removed
+
+    def _run(self) -> None:
+        """Thread body: sweep until stopped."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep_once()
+            except Exception as e:
+                # Never let cache maintenance take down the server
+                logger.warning(f"Cache sweep failed: {e}")
+
+    def start(self) -> None:
+        """Start the background thread (no-op if already running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="cache-sweeper", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Signal the thread to stop and wait for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def start_cache_sweeper(cache: CacheProtocol) -> Optional[CacheSweeper]:
+    """
+    Start a sweeper configured from GEMINI_CACHE_SWEEP_INTERVAL.
+
+    Args:
+        cache: Cache to sweep
+
+    Returns:
+        The running sweeper, or None if sweeping is disabled (interval 0)
+    """
+    interval_env = os.getenv(
+        "GEMINI_CACHE_SWEEP_INTERVAL", str(DEFAULT_SWEEP_INTERVAL_SECONDS)
+    )
+    try:
+        interval = float(interval_env)
+    except ValueError:
+        logger.warning(
+            f"Invalid GEMINI_CACHE_SWEEP_INTERVAL='{interval_env}', "
+            f"using default {DEFAULT_SWEEP_INTERVAL_SECONDS}"
+        )
+        interval = DEFAULT_SWEEP_INTERVAL_SECONDS
+
+    if interval <= 0:
+        return None
+
+    sweeper = CacheSweeper(cache, interval=interval)
+    sweeper.start()
+    return sweeper
@@ -0,0 +1,379 @@
+"""Two-tier cache: a bounded in-process LRU in front of the SQLite cache.
+
+Hot keys (current branch, rendered templates, repeated file reads) are served
+from process memory without a SQLite round-trip or JSON decoding. Writes go
+through to SQLite so other processes and later runs still see them.
+
+Mutable values are copied into the memory tier on store and out of it on
+hit, so callers may modify what they get or set just as they could with
+values decoded from SQLite.
+"""
+
+import copy
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import RLock
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from ..interfaces.cache_protocol import CacheProtocol
+    from .sqlite_cache import CacheManager
+except ImportError:
+    from cache.sqlite_cache import CacheManager
+    from interfaces.cache_protocol import CacheProtocol
+
+
+def _approximate_size(value: Any) -> int:
+    """Cheaply approximate the in-memory footprint of a cached value in bytes."""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return (
+            sum(_approximate_size(k) + _approximate_size(v) for k, v in value.items())
+            + 16
+        )
+    if isinstance(value, (list, tuple)):
+        return sum(_approximate_size(item) for item in value) + 8 * len(value) + 16
+    return 16
+
+
+_IMMUTABLE_TYPES = (str, bytes, int, float, bool, type(None))
+
+
+def _detached(value: Any) -> Any:
+    """Copy a value unless it is immutable, so the memory tier never shares it."""
+    if isinstance(value, _IMMUTABLE_TYPES):
+        return value
+    return copy.deepcopy(value)
+
+
+@dataclass
+class MemoryTierEntry:
+    """Value held in the in-process tier with its absolute expiry time."""
+
+    value: Any
+    expires_at: float
+    size: int
+
+    def is_expired(self) -> bool:
+        """Check if this entry has expired."""
+        return time.time() > self.expires_at
+
+
+class TieredCache(CacheProtocol):
+    """Size-bounded in-memory LRU layered over a SQLite CacheManager."""
+
+    def __init__(
+        self,
+        backend: CacheManager,
+        max_entries: int = 1024,
+        max_bytes: int = 32 * 1024 * 1024,
+        epoch_check_interval: float = 1.0,
+    ):
+        """
+        Initialize the tiered cache.
+
+        Args:
+            backend: SQLite cache manager used as the persistent tier
+            max_entries: Maximum number of entries kept in memory
+            max_bytes: Approximate maximum bytes of values kept in memory
+            epoch_check_interval: Seconds between checks of the backend write
+                epoch; writes from other processes are noticed within this window
+        """
+        self.backend = backend
+        self.ttl = backend.ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.epoch_check_interval = epoch_check_interval
+        self._entries: "OrderedDict[Tuple[str, str], MemoryTierEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = RLock()
+        self._epoch = backend.get_epoch()
+        self._last_epoch_check = time.monotonic()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def _memory_key(operation: str, params: Dict[str, Any]) -> Tuple[str, str]:
+        """Build the in-memory key (no hashing needed, unlike the SQLite key)."""
+        return operation, json.dumps(params, sort_keys=True)
+
+    def _clear_memory(self) -> None:
+        """Drop every entry from the in-memory tier."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def _forget(self, keys: Optional[Iterable[Tuple[str, str]]]) -> None:
+        """Drop changed entries from memory; None means any may have changed."""
+        if keys is None:
+            self._clear_memory()
+            return
+        for key in keys:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+    def _sync_epoch(self) -> None:
+        """Drop memory entries that another writer changed in the backend."""
+        now = time.monotonic()
+        if now - self._last_epoch_check < self.epoch_check_interval:
+            return
+        self._last_epoch_check = now
+        epoch, changed = self.backend.changes_since(self._epoch)
+        if epoch != self._epoch:
+            self._forget(changed)
+            self._epoch = epoch
+
+    def _after_own_write(self, previous_epoch: int) -> None:
+        """Record the epoch produced by our own write-through."""
+        new_epoch = self.backend.last_epoch
+        if new_epoch != previous_epoch + 1:
+            # Others wrote in between; drop what they changed
+            _, changed = self.backend.changes_since(previous_epoch, new_epoch - 1)
+            self._forget(changed)
+        self._epoch = new_epoch
+        self._last_epoch_check = time.monotonic()
+
+    def _remember(self, key: Tuple[str, str], value: Any, expires_at: float) -> None:
+        """Insert into the memory tier and evict least-recently-used entries."""
+        size = _approximate_size(value)
+        if size > self.max_bytes:
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+
+        self._entries[key] = MemoryTierEntry(_detached(value), expires_at, size)
+        self._bytes += size
+
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self._evictions += 1
+
+    def get(self, operation: str, params: Dict[str, Any]) -> Optional[Any]:
+        """
+        Get a value from memory, falling back to SQLite.
+
+        Args:
+            operation: The operation name (e.g., "file_tree", "git_diff")
+            params: Parameters that uniquely identify the operation
+
+        Returns:
+            Cached value if found and not expired, None otherwise
+        """
+        key = self._memory_key(operation, params)
+
+        with self._lock:
+            self._sync_epoch()
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not entry.is_expired():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    self.backend.record_hits(operation)
+                    return _detached(entry.value)
+                del self._entries[key]
+                self._bytes -= entry.size
+
+            self._misses += 1
+            backend_entry = self.backend.get_entry(operation, params)
+            if backend_entry is None:
+                return None
+
+            # Keep the expiry of the persistent entry so both tiers agree
+            self._remember(
+                key, backend_entry.value, backend_entry.timestamp + backend_entry.ttl
+            )
+            return backend_entry.value
+
+    def set(
+        self,
+        operation: str,
+        params: Dict[str, Any],
+        value: Any,
+        ttl: Optional[int] = None,
+    ) -> None:
+        """
+        Store a value in memory and write it through to SQLite.
+
+        Args:
+            operation: The operation name
+            params: Parameters that uniquely identify the operation
+            value: The value to cache
+            ttl: Time-to-live in seconds (uses default if not specified)
+        """
+        effective_ttl = ttl or self.ttl
+        key = self._memory_key(operation, params)
+
+        with self._lock:
+            self._sync_epoch()
+            previous_epoch = self._epoch
+            self.backend.set(operation, params, value, effective_ttl)
+            self._after_own_write(previous_epoch)
+            # Expire together with the persistent entry, whose TTL may be adapted
+            expires_at = time.time() + self.backend.effective_ttl(
+                operation, effective_ttl
+            )
+            self._remember(key, value, expires_at)
+
+    def get_many(
+        self, operation: str, params_list: List[Dict[str, Any]]
+    ) -> List[Optional[Any]]:
+        """
+        Get several values, fetching all memory misses in one SQLite query.
+
+        Args:
+            operation: The operation name
+            params_list: Parameters identifying each entry
+
+        Returns:
+            Values in the same order as params_list, None for misses
+        """
+        keys = [self._memory_key(operation, params) for params in params_list]
+        results: List[Optional[Any]] = [None] * len(keys)
+        missing: List[int] = []
+        memory_hits = 0
+
+        with self._lock:
+            self._sync_epoch()
+            for index, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and not entry.is_expired():
+                    self._entries.move_to_end(key)
+                    memory_hits += 1
+                    results[index] = _detached(entry.value)
+                    continue
+                if entry is not None:
+                    del self._entries[key]
+                    self._bytes -= entry.size
+                missing.append(index)
+
+            if memory_hits:
+                self._hits += memory_hits
+                self.backend.record_hits(operation, memory_hits)
+            if missing:
+                self._misses += len(missing)
+                backend_entries = self.backend.get_entries(
+                    operation, [params_list[index] for index in missing]
+                )
+                for index, backend_entry in zip(missing, backend_entries):
+                    if backend_entry is None:
+                        continue
+                    self._remember(
+                        keys[index],
+                        backend_entry.value,
+                        backend_entry.timestamp + backend_entry.ttl,
+                    )
+                    results[index] = backend_entry.value
+
+        return results
+
+    def set_many(
+        self,
+        operation: str,
+        items: List[Tuple[Dict[str, Any], Any]],
+        ttl: Optional[int] = None,
+    ) -> None:
+        """
+        Store several values in memory and write them through in one transaction.
+
+        Args:
+            operation: The operation name
+            items: (params, value) pairs to store
+            ttl: Time-to-live in seconds (uses default if not specified)
+        """
+        if not items:
+            return
+        effective_ttl = ttl or self.ttl
+
+        with self._lock:
+            self._sync_epoch()
+            previous_epoch = self._epoch
+            self.backend.set_many(operation, items, effective_ttl)
+            self._after_own_write(previous_epoch)
+            expires_at = time.time() + self.backend.effective_ttl(
+                operation, effective_ttl
+            )
+            for params, value in items:
+                self._remember(self._memory_key(operation, params), value, expires_at)
+
+    def record_stale(self, operation: str, count: int = 1) -> None:
+        """Count cached values the caller found stale (see CacheManager)."""
+        self.backend.record_stale(operation, count)
+
+    def acquire_lease(
+        self, operation: str, params: Dict[str, Any], owner: str, ttl: float
+    ) -> bool:
+        """Acquire a cross-process computation lease from the persistent tier."""
+        return self.backend.acquire_lease(operation, params, owner, ttl)
+
+    def release_lease(self, operation: str, params: Dict[str, Any], owner: str) -> None:
+        """Release a lease acquired with acquire_lease."""
+        self.backend.release_lease(operation, params, owner)
+
+    def invalidate(
+        self, operation: Optional[str] = None, params: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Invalidate cache entries in both tiers.
+
+        Args:
+            operation: If provided, only invalidate entries for this operation
+            params: If provided with operation, only invalidate specific entry
+
+        Returns:
+            Number of entries invalidated in the persistent tier
+        """
+        with self._lock:
+            previous_epoch = self._epoch
+            count = self.backend.invalidate(operation, params)
+            if operation and params:
+                self._forget([self._memory_key(operation, params)])
+            else:
+                # The backend clears everything for operation-only invalidation
+                self._clear_memory()
+            self._after_own_write(previous_epoch)
+            return count
+
+    def cleanup_expired(self, batch_size: Optional[int] = None) -> int:
+        """
+        Remove expired entries from both tiers.
+
+        Args:
+            batch_size: Maximum number of persistent entries to remove
+
+        Returns:
+            Number of entries removed from the persistent tier
+        """
+        with self._lock:
+            expired = [
+                key for key, entry in self._entries.items() if entry.is_expired()
+            ]
+            self._forget(expired)
+            # Removing expired entries does not change the backend epoch
+            return self.backend.cleanup_expired(batch_size)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics for the persistent and in-memory tiers."""
+        stats = self.backend.get_stats()
+        with self._lock:
+            lookups = self._hits + self._misses
+            stats["memory_tier"] = {
+                "entries": len(self._entries),
+                "size_bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "epoch": self._epoch,
+            }
+        return stats
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+CLI cache command for managing the review cache.
+
+This module provides the 'gemini-code-review-mcp cache' command. Its 'warm'
+subcommand precomputes the inputs of a review (file tree, changed files,
+configuration discovery, task list and PRD summary) so the next review of
+the project starts hot. The optional post-commit and post-checkout hooks
+installed by scripts/install-hooks.sh run it in the background.
+
+'export' and 'import' move a project's cache entries between machines as a
+single compressed bundle, so CI jobs on fresh containers can restore them
+like any other build cache.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    from ..cache import get_cache_manager
+    from ..cache.bundle import BUNDLE_COMPONENTS, export_bundle, import_bundle
+    from ..dependencies import get_production_container
+    from ..errors import CacheError
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    from cache import get_cache_manager
+    from cache.bundle import BUNDLE_COMPONENTS, export_bundle, import_bundle
+    from dependencies import get_production_container
+    from errors import CacheError
+
+
+def warm_project(
+    project_path: Path, task_list: Optional[str] = None, verbose: bool = True
+) -> bool:
+    """
+    Precompute and cache review inputs for a project.
+
+    Args:
+        project_path: Project directory
+        task_list: Specific task list file name (most recent if None)
+        verbose: Whether to print one line per artifact
+
+    Returns:
+        True if every artifact is now cached
+    """
+    container = get_production_container()
+    if container.cache_manager is None:
+        print("✗ Caching is disabled", file=sys.stderr)
+        return False
+
+    try:
+        results = container.review_artifacts.warm(
+            str(project_path), container.file_finder, task_list
+        )
+    except Exception as e:
+        print(f"✗ Failed to warm cache: {e}", file=sys.stderr)
+        return False
+
+    if verbose:
+        for name, computed in results.items():
+            print(f"✓ {name}: {'computed' if computed else 'already warm'}")
+    return True
+
+
+def transfer_bundle(
+    command: str, project_path: Path, bundle: Path, verbose: bool = True
+) -> bool:
+    """
+    Export the project's cache entries to a bundle, or import them from one.
+
+    Args:
+        command: "export" or "import"
+        project_path: Project directory
+        bundle: Bundle file to write or read
+        verbose: Whether to print a summary
+
+    Returns:
+        True on success
+    """
+    container = get_production_container()
+    if container.cache_manager is None:
+        print("✗ Caching is disabled", file=sys.stderr)
+        return False
+
+    fingerprint = container.project_fingerprint.compute(
+        project_path, components=BUNDLE_COMPONENTS
+    )
+    transfer = export_bundle if command == "export" else import_bundle
+    try:
+        report = transfer(
+            get_cache_manager(), project_path, bundle, fingerprint.components
+        )
+    except (CacheError, OSError) as e:
+        print(f"✗ Failed to {command} cache: {e}", file=sys.stderr)
+        return False
+
+    if verbose:
+        verb = "Exported" if command == "export" else "Imported"
+        print(
+            f"✓ {verb} {report.entries} entries ({report.blobs} blobs), "
+            f"skipped {report.skipped}"
+        )
+    return True
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    """Create and configure the argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="gemini-code-review-mcp cache",
+        description="Manage the Gemini Code Review cache",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Precompute review inputs for the current directory
+  gemini-code-review-mcp cache warm
+
+  # Warm a specific project, including a specific task list
+  gemini-code-review-mcp cache warm /path/to/project --task-list tasks-feature.md
+
+  # Save the project's cache at the end of a CI job, restore it in the next
+  gemini-code-review-mcp cache export review-cache.gz
+  gemini-code-review-mcp cache import review-cache.gz
+        """,
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    warm = subparsers.add_parser(
+        "warm", help="Precompute review inputs so the next review starts hot"
+    )
+    warm.add_argument(
+        "path",
+        nargs="?",
+        default=".",
+        help="Project to warm (default: current directory)",
+    )
+    warm.add_argument(
+        "--task-list", help="Task list file name (default: most recent in tasks/)"
+    )
+    warm.add_argument("--quiet", action="store_true", help="Suppress progress messages")
+
+    for name, help_text in (
+        ("export", "Write the project's cache entries to a portable bundle"),
+        ("import", "Merge a bundle exported for the same commit into the cache"),
+    ):
+        transfer = subparsers.add_parser(name, help=help_text)
+        transfer.add_argument("bundle", help="Bundle file (gzip-compressed)")
+        transfer.add_argument(
+            "--project",
+            default=".",
+            help="Project the entries belong to (default: current directory)",
+        )
+        transfer.add_argument(
+            "--quiet", action="store_true", help="Suppress progress messages"
+        )
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Main entry point for the cache command.
+
+    Args:
+        argv: Arguments after 'cache' (defaults to sys.argv[1:])
+
+    Returns:
+        Process exit code
+    """
+    parser = create_argument_parser()
+    args = parser.parse_args(argv)
+
+    project_path = Path(args.path if args.command == "warm" else args.project)
+    project_path = project_path.resolve()
+    if not project_path.is_dir():
+        print(f"✗ Error: {project_path} is not a directory", file=sys.stderr)
+        return 1
+
+    if args.command == "warm":
+        success = warm_project(project_path, args.task_list, verbose=not args.quiet)
+    else:
+        success = transfer_bundle(
+            args.command, project_path, Path(args.bundle), verbose=not args.quiet
+        )
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,9 +18,11 @@ from typing import Any, Dict, List, Optional
 try:
     from .generate_code_review_context import generate_code_review_context_main
     from .meta_prompt_analyzer import generate_optimized_meta_prompt
+    from .project_snapshot import build_project_snapshot
 except ImportError:
     from generate_code_review_context import generate_code_review_context_main
     from meta_prompt_analyzer import generate_optimized_meta_prompt
+    from project_snapshot import build_project_snapshot
 
 # Load environment variables from .env file (optional)
 try:
@@ -342,6 +344,17 @@ def create_argument_parser():
         action="append",
         help="URL(s) to include in context (can be repeated for multiple URLs)",
     )
+    parser.add_argument(
+        "--since-last-review",
+        action="store_true",
+        help="Only review files changed since the last recorded review of this project",
+    )
+    parser.add_argument(
+        "--cache-friendly-layout",
+        action="store_true",
+        help="Order the context from most to least stable section so repeat reviews "
+        "reuse the model's prompt cache (or set GEMINI_CONTEXT_LAYOUT=cache_friendly)",
+    )
 
     return parser
 
@@ -397,8 +410,14 @@ def execute_auto_prompt_workflow(
         # Step 1: Generate optimized prompt using project analysis (no intermediate files)
         print("🤖 Generating optimized prompt using Gemini analysis...")
 
+        # One look at the project serves the prompt and the context
+        snapshot = build_project_snapshot(
+            project_path,
+            bool(kwargs.get("include_claude_memory")),
+            bool(kwargs.get("include_cursor_rules")),
+        )
         prompt_result = generate_optimized_meta_prompt(
-            project_path=project_path, scope=scope
+            project_path=project_path, scope=scope, snapshot=snapshot
         )
 
         if not prompt_result.get("analysis_completed"):
@@ -443,6 +462,7 @@ def execute_auto_prompt_workflow(
                 enable_gemini_review=False,  # Don't run default AI review
                 temperature=temperature,
                 auto_prompt_content=generated_prompt,  # Pass the meta-prompt to embed in context
+                project_snapshot=snapshot,
                 **context_kwargs,
             )
 
@@ -792,6 +812,8 @@ Working examples:
             include_cursor_rules=args.include_cursor_rules,
             thinking_budget=args.thinking_budget,
             url_context=args.url_context,
+            since_last_review=args.since_last_review,
+            cache_friendly_layout=args.cache_friendly_layout,
         )
 
         print("\n🎉 Code review process completed!")
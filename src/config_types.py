@@ -5,8 +5,11 @@ Configuration types module.
 This module defines shared configuration types used across the codebase.
 """
 
-from dataclasses import dataclass
-from typing import List, Optional, Union
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Optional, Union
+
+if TYPE_CHECKING:
+    from .project_snapshot import ProjectSnapshot
 
 # Central configuration defaults
 DEFAULT_INCLUDE_CLAUDE_MEMORY = False
@@ -31,6 +34,8 @@ class CodeReviewConfig:
     phase_number: Optional[str] = None
     task_number: Optional[str] = None
     temperature: float = 0.5
+    # Gemini model the context is sized for and sent to (default: GEMINI_MODEL)
+    model: Optional[str] = None
     task_list: Optional[str] = None
     default_prompt: Optional[str] = None
     compare_branch: Optional[str] = None
@@ -42,3 +47,7 @@ class CodeReviewConfig:
     auto_prompt_content: Optional[str] = None
     thinking_budget: Optional[int] = None
     url_context: Optional[Union[str, List[str]]] = None
+    since_last_review: bool = False
+    cache_friendly_layout: bool = False
+    # Shared with the meta-prompt so the project is only examined once
+    project_snapshot: Optional["ProjectSnapshot"] = field(default=None, repr=False)
@@ -7,15 +7,15 @@ contexts (Claude memory files, Cursor rules) into a structured format suitable f
 AI consumption. It also manages a caching mechanism for configurations.
 """
 
-import glob
 import logging
-import os
 from typing import Any, Dict, List, Optional, TypedDict
 
 try:
     from .config_types import DEFAULT_INCLUDE_CLAUDE_MEMORY, DEFAULT_INCLUDE_CURSOR_RULES
+    from .services.project_fingerprint import ProjectFingerprint
 except ImportError:
     from config_types import DEFAULT_INCLUDE_CLAUDE_MEMORY, DEFAULT_INCLUDE_CURSOR_RULES
+    from services.project_fingerprint import ProjectFingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -32,9 +32,11 @@ class DiscoveredConfigurations(TypedDict):
 class ConfigurationCache:
     """Cache for configuration discovery to improve performance."""
 
-    def __init__(self):
+    def __init__(self, fingerprint: Optional[ProjectFingerprint] = None):
         self.cache: Dict[str, Any] = {}
-        self.mtimes: Dict[str, float] = {}
+        # Config sub-hash of the project fingerprint at discovery time
+        self.fingerprints: Dict[str, str] = {}
+        self._fingerprint = fingerprint or ProjectFingerprint()
 
     def get_configurations(
         self,
@@ -64,12 +66,9 @@ class ConfigurationCache:
             self.set_configurations(cache_key, project_path, configurations)
             return configurations
 
-        # Check if any configuration files have been modified
-        current_mtime = self._get_max_config_mtime(project_path)
-        cached_mtime = self.mtimes.get(cache_key, 0)
-
-        if current_mtime > cached_mtime:
-            # Configuration files have been modified, invalidate cache and rediscover
+        # Check if any configuration file was added, removed or modified
+        if self._config_fingerprint(project_path) != self.fingerprints.get(cache_key):
+            # Configuration files have changed, invalidate cache and rediscover
             self.invalidate(cache_key)
             configurations = _discover_project_configurations_uncached(
                 project_path, include_claude_memory, include_cursor_rules
@@ -82,44 +81,19 @@ class ConfigurationCache:
     def set_configurations(self, cache_key: str, project_path: str, configurations: Dict[str, Any]):
         """Cache configurations for a project."""
         self.cache[cache_key] = configurations
-        self.mtimes[cache_key] = self._get_max_config_mtime(project_path)
+        self.fingerprints[cache_key] = self._config_fingerprint(project_path)
 
     def invalidate(self, cache_key: str):
         """Invalidate cache for a cache key."""
         if cache_key in self.cache:
             del self.cache[cache_key]
-        if cache_key in self.mtimes:
-            del self.mtimes[cache_key]
-
-    def _get_max_config_mtime(self, project_path: str) -> float:
-        """Get the maximum modification time of configuration files."""
-        max_mtime = 0
-
-        # Check CLAUDE.md files
-        for claude_pattern in ["CLAUDE.md", "*/CLAUDE.md", "**/CLAUDE.md"]:
-            # Enable recursive search for ** patterns
-            recursive = "**" in claude_pattern
-            claude_files = glob.glob(
-                os.path.join(project_path, claude_pattern), recursive=recursive
-            )
-            for claude_file in claude_files:
-                if os.path.isfile(claude_file):
-                    max_mtime = max(max_mtime, os.path.getmtime(claude_file))
-
-        # Check cursor rules
-        cursorrules_file = os.path.join(project_path, ".cursorrules")
-        if os.path.isfile(cursorrules_file):
-            max_mtime = max(max_mtime, os.path.getmtime(cursorrules_file))
-
-        cursor_rules_dir = os.path.join(project_path, ".cursor", "rules")
-        if os.path.isdir(cursor_rules_dir):
-            for root, _, files in os.walk(cursor_rules_dir):
-                for file in files:
-                    if file.endswith(".mdc"):
-                        file_path = os.path.join(root, file)
-                        max_mtime = max(max_mtime, os.path.getmtime(file_path))
-
-        return max_mtime
+        if cache_key in self.fingerprints:
+            del self.fingerprints[cache_key]
+
+    def _config_fingerprint(self, project_path: str) -> str:
+        """Get the configuration component of the project fingerprint."""
+        fingerprint = self._fingerprint.compute(project_path, components=("config",))
+        return fingerprint.components["config"]
 
 
 # Global cache instance
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Compression of changed-file contents before a review is rendered.
+
+Changed files otherwise go into the prompt verbatim. Each transform below
+removes tokens that carry little review value, and each is reported in the
+rendered context so reviewers know what was left out:
+
+    license     boilerplate license/copyright headers at the top of a file
+    whitespace  trailing whitespace, runs of blank lines, wide indentation
+    duplicates  files identical to an earlier changed file
+    literals    long string literals and base64 blobs (off by default)
+
+The first three do not change what the code means; ``literals`` does, which
+is why it has to be asked for. Select transforms with
+GEMINI_CONTEXT_COMPRESSION (a comma-separated list, or "off").
+
+Removing lines shifts line numbers, so samples of large files, whose
+``[Lines a-b]`` blocks and outline are numbered, keep every line, and the
+outline of any other file that lost lines is taken before compressing.
+"""
+
+import hashlib
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+try:
+    from .file_selector import estimate_tokens
+    from .large_file_sampler import is_sampled, numbered_outline
+except ImportError:
+    from file_selector import estimate_tokens
+    from large_file_sampler import is_sampled, numbered_outline
+
+logger = logging.getLogger(__name__)
+
+TRANSFORMS = ("license", "whitespace", "duplicates", "literals")
+DEFAULT_TRANSFORMS = ("license", "whitespace", "duplicates")
+
+# Literals and blobs shorter than this are kept
+MIN_ELIDED_CHARS = 200
+
+_LICENSE = re.compile(
+    r"copyright|licen[cs]e|spdx-license-identifier|all rights reserved"
+    r"|permission is hereby granted|without warranties",
+    re.IGNORECASE,
+)
+_COMMENT_LINE = re.compile(r"^\s*(#|//|/\*|\*|--|;|<!--|-->|$)")
+_PREAMBLE = re.compile(r"^(#!|#.*coding[:=]|<\?php|<\?xml)")
+_STRING_LITERAL = re.compile(
+    rf"""(["'])((?:\\.|(?!\1)[^\\\n]){{{MIN_ELIDED_CHARS},}})\1"""
+)
+# Long runs of base64 characters that mix digits and both letter cases
+_BASE64 = re.compile(
+    r"(?=[A-Za-z0-9+/]*[0-9])(?=[A-Za-z0-9+/]*[A-Z])(?=[A-Za-z0-9+/]*[a-z])"
+    rf"[A-Za-z0-9+/]{{{MIN_ELIDED_CHARS},}}={{0,2}}"
+)
+# Headings, lists and indented code blocks make these unsafe to rewrite
+_PROSE_EXTENSIONS = {".md", ".markdown", ".mdx", ".rst", ".txt"}
+
+
+@dataclass
+class CompressionReport:
+    """What the compression stage removed."""
+
+    tokens_before: int = 0
+    tokens_after: int = 0
+    licenses: List[Tuple[str, int]] = field(default_factory=list)  # (path, lines)
+    whitespace: List[str] = field(default_factory=list)
+    duplicates: List[Tuple[str, str]] = field(default_factory=list)  # (copy, original)
+    literals: List[Tuple[str, int]] = field(default_factory=list)  # (path, chars)
+
+    @property
+    def saved(self) -> int:
+        """Estimated tokens saved."""
+        return self.tokens_before - self.tokens_after
+
+    def notes(self, project_path: str = "") -> List[str]:
+        """
+        Describe every transform that changed something.
+
+        Args:
+            project_path: Root to show file paths relative to
+
+        Returns:
+            One line per transform, empty if nothing changed
+        """
+
+        def show(path: str) -> str:
+            return _relative(path, project_path)
+
+        notes: List[str] = []
+        if self.licenses:
+            lines = sum(count for _, count in self.licenses)
+            notes.append(
+                f"License headers removed ({lines} lines): "
+                + ", ".join(show(path) for path, _ in self.licenses)
+            )
+        if self.whitespace:
+            notes.append(
+                "Trailing whitespace, blank line runs and indentation normalized: "
+                + ", ".join(show(path) for path in self.whitespace)
+            )
+        for copy, original in self.duplicates:
+            notes.append(f"{show(copy)} is identical to {show(original)}")
+        if self.literals:
+            chars = sum(count for _, count in self.literals)
+            notes.append(
+                f"Long string literals and base64 blobs elided ({chars:,} chars): "
+                + ", ".join(show(path) for path, _ in self.literals)
+            )
+        return notes
+
+
+def _relative(path: str, project_path: str) -> str:
+    """Show a path relative to the project root when it is known."""
+    return os.path.relpath(path, project_path) if project_path else path
+
+
+def compression_transforms() -> Tuple[str, ...]:
+    """
+    Read the enabled transforms from GEMINI_CONTEXT_COMPRESSION.
+
+    Returns:
+        Enabled transform names; DEFAULT_TRANSFORMS when unset
+    """
+    setting = os.getenv("GEMINI_CONTEXT_COMPRESSION")
+    if setting is None:
+        return DEFAULT_TRANSFORMS
+    if setting.strip().lower() in ("", "off", "none", "false"):
+        return ()
+    names = tuple(name.strip().lower() for name in setting.split(",") if name.strip())
+    unknown = [name for name in names if name not in TRANSFORMS]
+    if unknown:
+        logger.warning(
+            f"Unknown GEMINI_CONTEXT_COMPRESSION transforms {unknown}, "
+            f"expected some of {', '.join(TRANSFORMS)}"
+        )
+    return tuple(name for name in names if name in TRANSFORMS)
+
+
+def strip_license_header(content: str) -> Tuple[str, int]:
+    """
+    Remove a license comment block from the top of a file.
+
+    Shebang, encoding and XML/PHP preamble lines are kept.
+
+    Args:
+        content: File content
+
+    Returns:
+        Tuple of (content, number of lines removed)
+    """
+    lines = content.split("\n")
+    start = 0
+    while start < len(lines) and _PREAMBLE.match(lines[start]):
+        start += 1
+
+    end = start
+    in_block = False
+    while end < len(lines):
+        line = lines[end]
+        if in_block:
+            in_block = "*/" not in line and "-->" not in line
+        elif _COMMENT_LINE.match(line):
+            in_block = ("/*" in line and "*/" not in line) or (
+                "<!--" in line and "-->" not in line
+            )
+        else:
+            break
+        end += 1
+
+    # Keep blank lines that follow the block out of the count
+    while end > start and not lines[end - 1].strip():
+        end -= 1
+    block = "\n".join(lines[start:end])
+    if end - start < 3 or not _LICENSE.search(block):
+        return content, 0
+
+    marker = f"[License header removed: {end - start} lines]"
+    return "\n".join(lines[:start] + [marker] + lines[end:]), end - start
+
+
+def _indent_unit(lines: List[str]) -> int:
+    """Find the indentation step used by every space-indented line, or 0."""
+    unit = 0
+    for line in lines:
+        stripped = line.lstrip(" ")
+        width = len(line) - len(stripped)
+        if width and stripped:
+            if stripped.startswith("\t"):
+                return 0
+            unit = math.gcd(unit, width)
+    return unit
+
+
+def normalize_whitespace(
+    content: str, reindent: bool = True, collapse: bool = True
+) -> str:
+    """
+    Strip trailing whitespace, collapse blank line runs and narrow indentation.
+
+    Indentation is rescaled to two spaces per level only when every indented
+    line is a multiple of the file's indentation step, so nesting and
+    alignment are preserved exactly.
+
+    Args:
+        content: File content
+        reindent: Whether indentation may be rescaled
+        collapse: Whether runs of blank lines may be collapsed
+
+    Returns:
+        Normalized content
+    """
+    lines = [line.rstrip() for line in content.split("\n")]
+
+    collapsed: List[str] = []
+    for line in lines:
+        if line or not collapse or not collapsed or collapsed[-1]:
+            collapsed.append(line)
+
+    unit = _indent_unit(collapsed) if reindent else 0
+    if unit > 2:
+        rescaled: List[str] = []
+        for line in collapsed:
+            stripped = line.lstrip(" ")
+            levels = (len(line) - len(stripped)) // unit
+            rescaled.append("  " * levels + stripped)
+        collapsed = rescaled
+    return "\n".join(collapsed)
+
+
+def elide_literals(content: str) -> Tuple[str, int]:
+    """
+    Replace long string literals and base64 blobs with a short marker.
+
+    Args:
+        content: File content
+
+    Returns:
+        Tuple of (content, number of characters elided)
+    """
+    elided = 0
+
+    def literal(match: "re.Match[str]") -> str:
+        nonlocal elided
+        elided += len(match.group(2))
+        quote = match.group(1)
+        return f"{quote}[elided {len(match.group(2)):,}-char string]{quote}"
+
+    def blob(match: "re.Match[str]") -> str:
+        nonlocal elided
+        elided += len(match.group(0))
+        return f"[elided {len(match.group(0)):,}-char base64 blob]"
+
+    content = _STRING_LITERAL.sub(literal, content)
+    content = _BASE64.sub(blob, content)
+    return content, elided
+
+
+def _compressible(content: str) -> bool:
+    """Skip placeholders such as "[File deleted]" and empty files."""
+    return bool(content) and not (
+        content.startswith("[") and content.endswith("]") and "\n" not in content
+    )
+
+
+def compress_review_context(
+    data: Dict[str, Any], transforms: Tuple[str, ...] = DEFAULT_TRANSFORMS
+) -> Tuple[Dict[str, Any], CompressionReport]:
+    """
+    Compress the changed files of review template data.
+
+    Args:
+        data: Template data as built by generate_review_context_data
+        transforms: Names of the transforms to apply
+
+    Returns:
+        Tuple of (template data with compressed files and a
+        "compression_notes" list for the template, compression report)
+    """
+    report = CompressionReport()
+    changed_files: List[Dict[str, Any]] = data.get("changed_files") or []
+    if not transforms or not changed_files:
+        return data, report
+
+    seen: Dict[str, str] = {}
+    compressed_files: List[Dict[str, Any]] = []
+    for file_info in changed_files:
+        path = file_info["path"]
+        content = file_info.get("content") or ""
+        if not _compressible(content):
+            compressed_files.append(file_info)
+            continue
+        report.tokens_before += estimate_tokens(content, path)
+
+        if "duplicates" in transforms:
+            digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            if digest in seen:
+                report.duplicates.append((path, seen[digest]))
+                original = _relative(seen[digest], data.get("project_path") or "")
+                content = f"[Identical to {original}]"
+                report.tokens_after += estimate_tokens(content)
+                compressed_files.append(dict(file_info, content=content))
+                continue
+            seen[digest] = path
+
+        prose = os.path.splitext(path)[1].lower() in _PROSE_EXTENSIONS
+        sampled = is_sampled(content)
+        original = content
+        if "license" in transforms and not prose and not sampled:
+            content, removed = strip_license_header(content)
+            if removed:
+                report.licenses.append((path, removed))
+        if "whitespace" in transforms:
+            normalized = normalize_whitespace(
+                content, reindent=not (prose or sampled), collapse=not sampled
+            )
+            if normalized != content:
+                report.whitespace.append(path)
+                content = normalized
+        if "literals" in transforms:
+            content, elided = elide_literals(content)
+            if elided:
+                report.literals.append((path, elided))
+
+        report.tokens_after += estimate_tokens(content)
+        compressed_info = dict(file_info, content=content)
+        if content.count("\n") != original.count("\n"):
+            compressed_info["outline"] = numbered_outline(path, original)
+        compressed_files.append(compressed_info)
+
+    compressed = dict(data)
+    compressed["changed_files"] = compressed_files
+    compressed["compression_notes"] = report.notes(data.get("project_path") or "")
+    return compressed, report
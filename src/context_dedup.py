@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Deduplication of text repeated across the sections of a review context.
+
+The same material often reaches the prompt more than once: the meta-prompt
+embeds the configuration context and is then sent next to it, CLAUDE.md
+files imported by several parents are merged once per parent, and a changed
+CLAUDE.md or rules file also appears in the configuration. After
+compression, and before the context is packed into the token budget, every
+run of at least GEMINI_CONTEXT_DEDUP_MIN_CHARS characters (whole lines)
+that already appeared earlier is replaced with a short reference to the
+first occurrence.
+
+Repeats are found with a Rabin-Karp rolling hash over windows of line
+hashes, verified line by line, and extended as far as the lines keep
+matching. Changed files are never deduplicated against themselves, since
+repetition inside a file is part of what is reviewed.
+"""
+
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from .file_selector import estimate_tokens
+except ImportError:
+    from file_selector import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Repeats shorter than this are kept; a reference costs about 20 tokens
+DEFAULT_MIN_CHARS = 400
+# Lines per hashed window; a repeat must span at least this many lines
+WINDOW_LINES = 4
+
+_BASE = 1_000_003
+_MODULUS = (1 << 61) - 1
+
+
+@dataclass
+class DedupReport:
+    """What the deduplication stage replaced."""
+
+    tokens_before: int = 0
+    tokens_after: int = 0
+    # (section, section repeated from, lines, characters)
+    repeats: List[Tuple[str, str, int, int]] = field(default_factory=list)
+
+    @property
+    def saved(self) -> int:
+        """Estimated tokens saved."""
+        return self.tokens_before - self.tokens_after
+
+    def notes(self) -> List[str]:
+        """
+        Describe the replaced repeats.
+
+        Returns:
+            One line per pair of sections, empty if nothing was replaced
+        """
+        pairs: Dict[Tuple[str, str], int] = {}
+        for section, source, lines, _ in self.repeats:
+            pairs[(section, source)] = pairs.get((section, source), 0) + lines
+        return [
+            f"{lines} lines of {section} repeated from {source}, "
+            "replaced with references"
+            for (section, source), lines in pairs.items()
+        ]
+
+
+@dataclass
+class _Block:
+    """Text already added, as lines, with where each kept line ended up."""
+
+    label: str
+    lines: List[str]
+    # Line number in the deduplicated text, or -1 for replaced lines
+    positions: List[int]
+
+    def kept(self, line: int) -> bool:
+        """Whether a line is in the deduplicated text."""
+        return self.positions[line] >= 0
+
+
+def dedup_min_chars() -> int:
+    """
+    Read the repeat threshold from GEMINI_CONTEXT_DEDUP_MIN_CHARS.
+
+    Returns:
+        Minimum characters of a replaced repeat, 0 when deduplication is off
+    """
+    setting = os.getenv("GEMINI_CONTEXT_DEDUP_MIN_CHARS")
+    if setting is None:
+        return DEFAULT_MIN_CHARS
+    if setting.strip().lower() in ("", "off", "none", "false"):
+        return 0
+    try:
+        min_chars = int(setting)
+        if min_chars < 0:
+            raise ValueError(setting)
+        return min_chars
+    except ValueError:
+        logger.warning(
+            f"Invalid GEMINI_CONTEXT_DEDUP_MIN_CHARS='{setting}', "
+            f"using {DEFAULT_MIN_CHARS}"
+        )
+        return DEFAULT_MIN_CHARS
+
+
+class BlockDeduplicator:
+    """Replaces text that repeats earlier text with references to it."""
+
+    def __init__(self, min_chars: int = DEFAULT_MIN_CHARS):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            min_chars: Minimum characters of a replaced repeat
+        """
+        self.min_chars = min_chars
+        self.report = DedupReport()
+        self._blocks: List[_Block] = []
+        # Window hash -> (block index, first line) of its first occurrence
+        self._index: Dict[int, Tuple[int, int]] = {}
+        self._high = pow(_BASE, WINDOW_LINES - 1, _MODULUS)
+
+    def _window_hashes(self, line_hashes: List[int]) -> List[int]:
+        """Rolling hashes of every WINDOW_LINES consecutive lines."""
+        windows: List[int] = []
+        rolling = 0
+        for position, line_hash in enumerate(line_hashes):
+            if position >= WINDOW_LINES:
+                leaving = line_hashes[position - WINDOW_LINES]
+                rolling = (rolling - leaving * self._high) % _MODULUS
+            rolling = (rolling * _BASE + line_hash) % _MODULUS
+            if position >= WINDOW_LINES - 1:
+                windows.append(rolling)
+        return windows
+
+    def _index_window(self, block_id: int, start: int, window: int) -> None:
+        """Remember a window of kept lines as a source for later repeats."""
+        block = self._blocks[block_id]
+        if all(block.kept(line) for line in range(start, start + WINDOW_LINES)):
+            self._index.setdefault(window, (block_id, start))
+
+    def _match(
+        self, lines: List[str], position: int, window: int, block_id: int
+    ) -> Optional[Tuple[int, int, int]]:
+        """Find the longest earlier occurrence of the lines at a position."""
+        source = self._index.get(window)
+        if source is None:
+            return None
+        source_id, start = source
+        source_block = self._blocks[source_id]
+        source_lines = source_block.lines
+        # Within one block, a repeat may not overlap the text it repeats
+        limit = position if source_id == block_id else len(source_lines)
+        length = 0
+        while (
+            position + length < len(lines)
+            and start + length < limit
+            and source_block.kept(start + length)
+            and source_lines[start + length] == lines[position + length]
+        ):
+            length += 1
+        if length < WINDOW_LINES:
+            return None  # hash collision
+        if sum(len(line) + 1 for line in lines[position : position + length]) < (
+            self.min_chars
+        ):
+            return None
+        return source_id, start, length
+
+    def add(self, label: str, text: str, self_references: bool = True) -> str:
+        """
+        Add the next section of the context.
+
+        Args:
+            label: How references to this section name it
+            text: Section text
+            self_references: Whether repeats within this section are replaced
+
+        Returns:
+            The text with repeats of earlier text replaced by references
+        """
+        self.report.tokens_before += estimate_tokens(text)
+        lines = text.split("\n")
+        block_id = len(self._blocks)
+        block = _Block(label, lines, [-1] * len(lines))
+        self._blocks.append(block)
+        windows = self._window_hashes([hash(line) for line in lines])
+
+        output: List[str] = []
+        position = 0
+        while position < len(lines):
+            match = None
+            if self.min_chars and position < len(windows):
+                match = self._match(lines, position, windows[position], block_id)
+            if match is None:
+                block.positions[position] = len(output)
+                output.append(lines[position])
+                # Index the window that ends at this line once it is complete
+                start = position - WINDOW_LINES + 1
+                if self_references and start >= 0:
+                    self._index_window(block_id, start, windows[start])
+                position += 1
+                continue
+
+            source_id, start, length = match
+            source = self._blocks[source_id]
+            first = source.positions[start] + 1
+            output.append(
+                f"[... {length} lines repeated from {source.label}, "
+                f"lines {first}-{first + length - 1} ...]"
+            )
+            self.report.repeats.append(
+                (
+                    label,
+                    source.label,
+                    length,
+                    sum(len(line) + 1 for line in lines[position : position + length]),
+                )
+            )
+            position += length
+
+        if not self_references:
+            for start, window in enumerate(windows):
+                self._index_window(block_id, start, window)
+        deduplicated = "\n".join(output)
+        self.report.tokens_after += estimate_tokens(deduplicated)
+        return deduplicated
+
+
+def _relative(path: str, project_path: str) -> str:
+    """Show a path relative to the project root when it is known."""
+    return os.path.relpath(path, project_path) if project_path else path
+
+
+def deduplicate_review_context(
+    data: Dict[str, Any], min_chars: int = DEFAULT_MIN_CHARS
+) -> Tuple[Dict[str, Any], DedupReport]:
+    """
+    Replace text repeated across the sections of review template data.
+
+    Sections are visited from the most to the least stable (configuration,
+    PRD summary, URL context, changed files, meta-prompt), so the copy that
+    is kept is the one least likely to change between reviews.
+
+    Args:
+        data: Template data as built by generate_review_context_data
+        min_chars: Minimum characters of a replaced repeat, 0 to disable
+
+    Returns:
+        Tuple of (template data with repeats replaced and their notes added
+        to "compression_notes", deduplication report)
+    """
+    deduplicator = BlockDeduplicator(min_chars)
+    if not min_chars:
+        return data, deduplicator.report
+
+    deduplicated = dict(data)
+    for key, label in (
+        ("configuration_content", "<configuration_context>"),
+        ("prd_summary", "<overall_prd_summary>"),
+        ("url_context_content", "the additional context URLs"),
+    ):
+        if data.get(key):
+            deduplicated[key] = deduplicator.add(label, data[key])
+
+    project_path = data.get("project_path") or ""
+    changed_files: List[Dict[str, Any]] = []
+    for file_info in data.get("changed_files") or []:
+        content = file_info.get("content") or ""
+        label = f"File: {_relative(file_info['path'], project_path)}"
+        new_content = deduplicator.add(label, content, self_references=False)
+        changed_files.append(
+            file_info
+            if new_content == content
+            else dict(file_info, content=new_content)
+        )
+    deduplicated["changed_files"] = changed_files
+
+    if data.get("auto_prompt_content"):
+        deduplicated["auto_prompt_content"] = deduplicator.add(
+            "<user_instructions>", data["auto_prompt_content"]
+        )
+
+    report = deduplicator.report
+    if not report.repeats:
+        return data, report
+    deduplicated["compression_notes"] = (
+        list(data.get("compression_notes") or []) + report.notes()
+    )
+    return deduplicated, report
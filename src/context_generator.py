@@ -11,7 +11,17 @@ import logging
 import os
 import re
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+)
 
 # Import necessary modules
 try:
@@ -28,10 +38,23 @@ try:
         format_configuration_context_for_ai,
         get_applicable_rules_for_files,
     )
+    from .context_compressor import compress_review_context, compression_transforms
+    from .context_dedup import dedup_min_chars, deduplicate_review_context
+    from .context_packer import context_token_budget, pack_review_context
     from .dependencies import get_production_container
     from .gemini_api_client import send_to_gemini_for_review
     from .git_utils import generate_file_tree, get_changed_files
     from .model_config_manager import load_model_config
+    from .project_snapshot import SnapshotProducers, build_project_snapshot
+    from .prompt_layout import CACHE_FRIENDLY_LAYOUT, apply_layout, context_layout
+    from .review_snapshot import split_by_snapshot
+    # Re-exported: the template renderer used to live in this module
+    from .review_template import (
+        extract_clean_prompt_content,
+        format_review_template,
+        iter_review_template,
+        write_review_template,
+    )
     from .task_list_parser import (
         PhaseData,
         TaskData,
@@ -54,10 +77,22 @@ except ImportError:
         format_configuration_context_for_ai,
         get_applicable_rules_for_files,
     )
+    from context_compressor import compress_review_context, compression_transforms
+    from context_dedup import dedup_min_chars, deduplicate_review_context
+    from context_packer import context_token_budget, pack_review_context
     from dependencies import get_production_container
     from gemini_api_client import send_to_gemini_for_review
     from git_utils import generate_file_tree, get_changed_files
     from model_config_manager import load_model_config
+    from project_snapshot import SnapshotProducers, build_project_snapshot
+    from prompt_layout import CACHE_FRIENDLY_LAYOUT, apply_layout, context_layout
+    from review_snapshot import split_by_snapshot
+    from review_template import (
+        extract_clean_prompt_content,
+        format_review_template,
+        iter_review_template,
+        write_review_template,
+    )
     from task_list_parser import (
         PhaseData,
         TaskData,
@@ -101,309 +136,6 @@ def _create_minimal_task_data(number: str, description: str) -> TaskData:
     }
 
 
-def extract_clean_prompt_content(auto_prompt_content: str) -> str:
-    """
-    Extract clean prompt content from auto-generated prompt response.
-
-    Since auto-prompt generation now returns raw content without headers/footers,
-    this function primarily handles basic cleanup and formatting.
-
-    Args:
-        auto_prompt_content: Auto-prompt response (should be clean already)
-
-    Returns:
-        Clean prompt content suitable for user_instructions
-    """
-    # Basic cleanup - remove any extra whitespace
-    content = auto_prompt_content.strip()
-
-    # Remove any remaining code block markers if present (just in case)
-    if content.startswith("```") and content.endswith("```"):
-        lines = content.split("\n")
-        if len(lines) > 2:
-            content = "\n".join(lines[1:-1]).strip()
-
-    # Collapse multiple blank lines
-    content = re.sub(r"\n\n\n+", "\n\n", content)
-
-    return content
-
-
-def format_review_template(data: Dict[str, Any], use_cache: bool = True) -> str:
-    """
-    Format the final review template.
-
-    Args:
-        data: Dictionary containing all template data
-        use_cache: Whether to use caching for template rendering
-
-    Returns:
-        Formatted markdown template
-    """
-    # Initialize cache variables
-    cache = None
-    cache_key = None
-    
-    # Try to get from cache first if enabled
-    if use_cache:
-        try:
-            from .cache import get_cache_manager
-            import hashlib
-            import json
-            
-            cache = get_cache_manager()
-            
-            # Create a cache key from relevant template data
-            # We'll hash the data to create a stable key
-            
-            # Add template version hash to invalidate cache when template changes
-            # Hash the function code itself to detect changes
-            import inspect
-            template_code = inspect.getsource(format_review_template)
-            template_hash = hashlib.md5(template_code.encode()).hexdigest()[:8]
-            
-            cache_data = {
-                "template_version": template_hash,  # Invalidate when template changes
-                "review_mode": data.get("review_mode"),
-                "scope": data.get("scope"),
-                "phase_number": data.get("phase_number"),
-                "task_number": data.get("task_number"),
-                "prd_summary": data.get("prd_summary", "")[:100],  # First 100 chars
-                "total_phases": data.get("total_phases"),
-                "has_config": bool(data.get("configuration_content")),
-                "has_url_context": bool(data.get("url_context_content")),
-                "changed_files_count": len(data.get("changed_files", [])),
-                "file_tree_hash": hashlib.md5(data.get("file_tree", "").encode()).hexdigest()[:8],
-            }
-            cache_key = hashlib.md5(json.dumps(cache_data, sort_keys=True).encode()).hexdigest()
-            
-            cached_result = cache.get("template_render", {"key": cache_key})
-            if cached_result is not None:
-                logger.debug(f"Using cached template render for key: {cache_key}")
-                return cached_result
-        except Exception as e:
-            logger.debug(f"Cache not available for template rendering: {e}")
-            cache = None
-            cache_key = None
-    # Add scope information to header
-    review_mode = data.get("review_mode", "task_list_based")
-    if review_mode == "github_pr":
-        scope_info = "Review Mode: GitHub PR Analysis"
-    else:
-        scope_info = f"Review Scope: {data['scope']}"
-        if data.get("phase_number"):
-            scope_info += f" (Phase: {data['phase_number']})"
-        elif data.get("task_number"):
-            scope_info += f" (Task: {data['task_number']})"
-
-    template = f"""# Code Review Context - {scope_info}
-"""
-
-    # Check if we have task list data (total_phases > 0 indicates a task list exists)
-    has_task_list = data.get("total_phases", 0) > 0
-
-    if has_task_list:
-        # Include PRD/task list related tags only when task list exists
-        template += f"""
-<overall_prd_summary>
-{data['prd_summary']}
-</overall_prd_summary>
-
-<total_phases>
-{data['total_phases']}
-</total_phases>
-
-<current_phase_number>
-{data['current_phase_number']}
-</current_phase_number>
-"""
-
-        # Only add previous phase if it exists
-        if data["previous_phase_completed"]:
-            template += f"""
-<previous_phase_completed>
-{data['previous_phase_completed']}
-</previous_phase_completed>
-"""
-
-        # Only add next phase if it exists
-        if data["next_phase"]:
-            template += f"""
-<next_phase>
-{data['next_phase']}
-</next_phase>
-"""
-
-        template += f"""<current_phase_description>
-{data['current_phase_description']}
-</current_phase_description>
-
-<subtasks_completed>
-{chr(10).join(f"- {subtask}" for subtask in data['subtasks_completed'])}
-</subtasks_completed>"""
-    else:
-        # For projects without task lists, just include the summary/prompt
-        if data.get("prd_summary"):
-            template += f"""
-<project_context>
-{data['prd_summary']}
-</project_context>"""
-
-    # Add GitHub PR metadata if available
-    branch_data = data.get("branch_comparison_data")
-    if branch_data and branch_data["mode"] == "github_pr":
-        pr_data = branch_data["pr_data"]
-        summary = branch_data.get("summary", {})
-        template += f"""
-<github_pr_metadata>
-Repository: {branch_data['repository']}
-PR Number: {pr_data['pr_number']}
-Title: {pr_data['title']}
-Author: {pr_data['author']}
-Source Branch: {pr_data['source_branch']}
-Target Branch: {pr_data['target_branch']}
-Source SHA: {pr_data.get('source_sha', 'N/A')[:8]}...
-Target SHA: {pr_data.get('target_sha', 'N/A')[:8]}...
-State: {pr_data['state']}
-Created: {pr_data['created_at']}
-Updated: {pr_data['updated_at']}
-Files Changed: {summary.get('files_changed', 'N/A')}
-Files Added: {summary.get('files_added', 'N/A')}
-Files Modified: {summary.get('files_modified', 'N/A')}
-Files Deleted: {summary.get('files_deleted', 'N/A')}"""
-        if pr_data.get("body") and pr_data["body"].strip():
-            # Show first 200 chars of PR description
-            description = pr_data["body"].strip()[:200]
-            if len(pr_data["body"]) > 200:
-                description += "..."
-            template += f"""
-Description: {description}"""
-        template += """
-</github_pr_metadata>"""
-
-    template += f"""
-<project_path>
-{data['project_path']}
-</project_path>"""
-
-    # Add configuration content section if available
-    if data.get("configuration_content"):
-        template += f"""
-<configuration_context>
-{data['configuration_content']}
-</configuration_context>"""
-
-        # Add applicable rules summary if available
-        applicable_rules = data.get("applicable_rules", [])
-        if applicable_rules:
-            template += f"""
-<applicable_configuration_rules>
-The following configuration rules apply to the changed files:
-{chr(10).join(f"- {rule.description} (from {rule.file_path})" for rule in applicable_rules)}
-</applicable_configuration_rules>"""
-
-    template += f"""
-<file_tree>
-{data['file_tree']}
-</file_tree>
-
-<files_changed>"""
-
-    for file_info in data["changed_files"]:
-        file_ext = os.path.splitext(file_info["path"])[1].lstrip(".")
-        if not file_ext:
-            file_ext = "txt"
-
-        template += f"""
-File: {file_info['path']} ({file_info['status']})
-```{file_ext}
-{file_info['content']}
-```"""
-
-    template += """
-</files_changed>"""
-
-    # Add AI review instructions only if not raw_context_only
-    if not data.get("raw_context_only", False):
-        template += """
-
-<user_instructions>"""
-
-        # Check if auto-generated meta-prompt should be used
-        auto_prompt_content = data.get("auto_prompt_content")
-        if auto_prompt_content:
-            # Extract clean prompt content (remove headers, metadata, and formatting)
-            clean_prompt = extract_clean_prompt_content(auto_prompt_content)
-            # Use the auto-generated meta-prompt as user instructions
-            template += clean_prompt
-        else:
-            # Use default template-based instructions
-            # Customize instructions based on review mode and scope
-            review_mode = data.get("review_mode", "task_list_based")
-            branch_data = data.get("branch_comparison_data")
-
-            if review_mode == "github_pr" and branch_data:
-                config_note = ""
-                if data.get("configuration_content"):
-                    config_note = "\n\nPay special attention to the configuration context (Claude memory and Cursor rules) provided above, which contains project-specific guidelines and coding standards that should be followed."
-
-                template += f"""You are reviewing a GitHub Pull Request that contains changes from branch '{branch_data['pr_data']['source_branch']}' to '{branch_data['pr_data']['target_branch']}'.
-
-The PR "{branch_data['pr_data']['title']}" by {branch_data['pr_data']['author']} includes {branch_data['summary']['files_changed']} changed files with {branch_data['summary']['files_added']} additions, {branch_data['summary']['files_modified']} modifications, and {branch_data['summary']['files_deleted']} deletions.{config_note}
-
-Based on the PR metadata, commit history, and file changes shown above, conduct a comprehensive code review focusing on:
-1. Code quality and best practices
-2. Security implications of the changes
-3. Performance considerations
-4. Testing coverage and approach
-5. Documentation completeness
-6. Integration and compatibility issues
-
-Identify specific lines, files, or patterns that are concerning and provide actionable feedback."""
-            elif data["scope"] == "full_project":
-                config_note = ""
-                if data.get("configuration_content"):
-                    config_note = "\n\nImportant: Refer to the configuration context (Claude memory and Cursor rules) provided above for project-specific guidelines and coding standards that should be followed throughout the project."
-
-                template += f"""We have completed all phases (and subtasks within) of this project: {data['current_phase_description']}.{config_note}
-
-Based on the PRD, all completed phases, all subtasks that were finished across the entire project, and the files changed in the working directory, your job is to conduct a comprehensive code review and output your code review feedback for the entire project. Identify specific lines or files that are concerning when appropriate."""
-            elif data["scope"] == "specific_task":
-                config_note = ""
-                if data.get("configuration_content"):
-                    config_note = "\n\nImportant: Refer to the configuration context (Claude memory and Cursor rules) provided above for project-specific guidelines and coding standards."
-
-                template += f"""We have just completed task #{data['current_phase_number']}: "{data['current_phase_description']}".{config_note}
-
-Based on the PRD, the completed task, and the files changed in the working directory, your job is to conduct a code review and output your code review feedback for this specific task. Identify specific lines or files that are concerning when appropriate."""
-            else:
-                config_note = ""
-                if data.get("configuration_content"):
-                    config_note = "\n\nImportant: Refer to the configuration context (Claude memory and Cursor rules) provided above for project-specific guidelines and coding standards."
-
-                template += f"""We have just completed phase #{data['current_phase_number']}: "{data['current_phase_description']}".{config_note}
-
-Based on the PRD, the completed phase, all subtasks that were finished in that phase, and the files changed in the working directory, your job is to conduct a code review and output your code review feedback for the completed phase. Identify specific lines or files that are concerning when appropriate."""
-
-        template += """
-</user_instructions>"""
-
-    # Add URL context if available
-    if data.get("url_context_content"):
-        template += "\n\n" + data["url_context_content"] + "\n"
-
-    # Cache the result if caching is enabled
-    if use_cache and cache is not None and cache_key is not None:
-        try:
-            # Cache for 30 minutes since templates don't change often
-            cache.set("template_render", {"key": cache_key}, template, ttl=1800)
-            logger.debug(f"Cached template render for key: {cache_key}")
-        except Exception as e:
-            logger.debug(f"Failed to cache template render: {e}")
-
-    return template
-
-
 # Legacy function - kept for backward compatibility but marked as deprecated
 def find_project_files(
     project_path: str, task_list_name: Optional[str] = None
@@ -440,6 +172,28 @@ def find_project_files(
     return prd_file, task_file
 
 
+def _local_diff_provider(
+    project_path: str,
+) -> Callable[[List[str]], Dict[str, str]]:
+    """
+    Build a diff lookup for changed files of the working tree.
+
+    Args:
+        project_path: Repository root the changed file paths live under
+
+    Returns:
+        Function mapping absolute file paths to their staged and unstaged diff
+    """
+
+    def get_diffs(paths: List[str]) -> Dict[str, str]:
+        relative = {path: os.path.relpath(path, project_path) for path in paths}
+        git_client = get_production_container().git_client
+        diffs = git_client.get_file_diffs(project_path, list(relative.values()))
+        return {path: diffs.get(rel, "") for path, rel in relative.items()}
+
+    return get_diffs
+
+
 def generate_review_context_data(config: CodeReviewConfig) -> Dict[str, Any]:
     """
     Generate review context data by gathering all necessary information.
@@ -625,16 +379,13 @@ Working examples:
         )
 
         if task_file:
-            # We have a task list - read and parse it
-            with open(task_file, "r", encoding="utf-8") as f:
-                task_content = f.read()
-            task_data = parse_task_list(task_content)
+            # We have a task list - read and parse it (cached by content hash)
+            artifacts = container.review_artifacts
+            task_data = artifacts.task_list(task_file, parse_task_list)
 
             if prd_file:
                 # We have both PRD and task list - use PRD summary
-                with open(prd_file, "r", encoding="utf-8") as f:
-                    prd_content = f.read()
-                prd_summary = extract_prd_summary(prd_content)
+                prd_summary = artifacts.prd_summary(prd_file, extract_prd_summary)
             else:
                 # Generate summary from task list
                 prd_summary = generate_prd_summary_from_task_list(task_data)
@@ -872,23 +623,27 @@ Working examples:
     if config.include_cursor_rules:
         config_types.append("Cursor rules")
 
+    # Tree, changed files and configurations come from one snapshot per request
+    snapshot = config.project_snapshot
+    if snapshot is None or not snapshot.matches(
+        config.project_path, config.include_claude_memory, config.include_cursor_rules
+    ):
+        snapshot = build_project_snapshot(
+            config.project_path,
+            config.include_claude_memory,
+            config.include_cursor_rules,
+            producers=SnapshotProducers(
+                configurations=discover_project_configurations_with_flags,
+                changed_files=get_changed_files,
+                file_tree=generate_file_tree,
+            ),
+        )
+
     if config_types:
         print(f"🔍 Discovering {' and '.join(config_types)}...")
-        configurations: DiscoveredConfigurations = (
-            discover_project_configurations_with_flags(
-                config.project_path,
-                config.include_claude_memory,
-                config.include_cursor_rules,
-            )
-        )
     else:
         print("ℹ️  Configuration discovery disabled")
-        configurations: DiscoveredConfigurations = {
-            "claude_memory_files": [],
-            "cursor_rules": [],
-            "discovery_errors": [],
-            "performance_stats": {},
-        }
+    configurations: DiscoveredConfigurations = snapshot.configurations
 
     # Extract typed values from configurations
     claude_memory_files: List[ClaudeMemoryFile] = configurations["claude_memory_files"]
@@ -912,6 +667,8 @@ Working examples:
     # Get git changes based on review mode
     changed_files: List[Dict[str, Any]] = []
     pr_data: Optional[Dict[str, Any]] = None
+    # PR file contents are already patches; only local changes have hunks to fetch
+    diff_provider: Optional[Callable[[List[str]], Dict[str, str]]] = None
 
     if current_mode == "github_pr":
         # GitHub PR analysis mode
@@ -955,14 +712,32 @@ Working examples:
         except Exception as e:
             print(f"❌ Failed to fetch PR data: {e}")
             # Fallback to task list mode
-            changed_files = get_changed_files(config.project_path)
+            changed_files = list(snapshot.changed_files)
+            diff_provider = _local_diff_provider(config.project_path)
 
     else:
         # Task list based mode (default)
-        changed_files = get_changed_files(config.project_path)
+        changed_files = list(snapshot.changed_files)
+        diff_provider = _local_diff_provider(config.project_path)
 
     # Generate file tree
-    file_tree = generate_file_tree(config.project_path)
+    file_tree = snapshot.file_tree
+
+    # Remember this review's inputs; in delta mode drop files reviewed before
+    changed_files, previous_review = split_by_snapshot(
+        get_production_container().review_snapshots,
+        config.project_path,
+        changed_files,
+        file_tree,
+        config.since_last_review,
+    )
+    if previous_review is not None:
+        print(
+            f"🔁 Reviewing {len(changed_files)} files changed since the last review "
+            f"({len(previous_review['unchanged_files'])} unchanged)"
+        )
+    elif config.since_last_review:
+        print("ℹ️  No previous review recorded, reviewing all changed files")
 
     # Get applicable configuration rules for changed files
     changed_file_paths = [f["path"] for f in changed_files]
@@ -1035,12 +810,55 @@ Working examples:
         "configuration_errors": configurations["discovery_errors"],
         "raw_context_only": config.raw_context_only,
         "url_context_content": url_context_content,
+        "previous_review": previous_review,
     }
     
     # Use converter to create template data with proper typing
     template_data = review_context_to_dict(review_context, extra_template_data)
-    
-    return template_data
+
+    # Drop boilerplate before measuring, so packing degrades fewer files
+    template_data, compression = compress_review_context(
+        template_data, compression_transforms()
+    )
+    if compression.saved > 0:
+        print(f"🗜️  Compressed changed files, saving ~{compression.saved:,} tokens")
+
+    # Send material repeated across sections (e.g. configuration embedded in
+    # the meta-prompt) only once
+    template_data, dedup = deduplicate_review_context(template_data, dedup_min_chars())
+    if dedup.repeats:
+        print(
+            f"♻️  Replaced {len(dedup.repeats)} repeated blocks with references, "
+            f"saving ~{dedup.saved:,} tokens"
+        )
+
+    # Fit the document into the model's context window
+    template_data, packing = pack_review_context(
+        template_data, context_token_budget(config.model), diff_provider
+    )
+    if packing.degraded:
+        print(f"📦 {packing.summary()}")
+
+    # Most stable sections first, so repeat reviews share a cacheable prefix
+    return apply_layout(template_data, context_layout(config.cache_friendly_layout))
+
+
+def _record_review(project_path: str, review_path: str) -> None:
+    """Record the review as the baseline for the next --since-last-review run."""
+    try:
+        with open(review_path, "r", encoding="utf-8") as f:
+            review = f.read()
+    except OSError as e:
+        logger.warning(f"Could not read review for snapshot: {e}")
+        return
+    get_production_container().review_snapshots.record_review(project_path, review)
+
+
+def _write_through(chunks: Iterable[str], out: TextIO) -> Iterator[str]:
+    """Write chunks to a stream, passing each one on."""
+    for chunk in chunks:
+        out.write(chunk)
+        yield chunk
 
 
 def process_and_output_review(
@@ -1049,9 +867,10 @@ def process_and_output_review(
     """
     Process template data and output review results.
 
-    This function takes the prepared template_data, formats it using
-    format_review_template, saves it to a file, and then conditionally
-    calls send_to_gemini_for_review.
+    This function takes the prepared template_data, renders it into a file
+    with write_review_template, and then conditionally calls
+    send_to_gemini_for_review. The document is only held in memory as a
+    whole when Gemini needs it.
 
     Args:
         config: CodeReviewConfig object
@@ -1060,8 +879,10 @@ def process_and_output_review(
     Returns:
         Tuple of (context_file_path, gemini_review_path)
     """
-    # Format template
-    review_context = format_review_template(template_data)
+    # Stream to disk unless the whole text is needed for Gemini anyway
+    review_context = (
+        format_review_template(template_data) if config.enable_gemini_review else None
+    )
 
     # Save output with scope-based naming
     if config.output is None:
@@ -1104,14 +925,30 @@ def process_and_output_review(
     output_path = config.output
     assert output_path is not None, "Output path should be set by now"
 
+    prefix = None
     with open(output_path, "w", encoding="utf-8") as f:
-        f.write(review_context)
+        if template_data.get("layout") == CACHE_FRIENDLY_LAYOUT:
+            # The tracker digests the chunks as they are written
+            chunks = (
+                [review_context]
+                if review_context is not None
+                else iter_review_template(template_data)
+            )
+            prefix = get_production_container().prefix_tracker.measure(
+                config.project_path or os.getcwd(), _write_through(chunks, f)
+            )
+        elif review_context is None:
+            write_review_template(template_data, f)
+        else:
+            f.write(review_context)
 
     print(f"📝 Generated review context: {os.path.basename(output_path)}")
+    if prefix is not None:
+        print(f"🧊 {prefix.summary()}")
 
     # Send to Gemini for comprehensive review if enabled
     gemini_output = None
-    if config.enable_gemini_review:
+    if review_context is not None:
         print("🔄 Sending to Gemini for AI code review...")
         # Ensure project_path is not None
         project_path = (
@@ -1121,10 +958,12 @@ def process_and_output_review(
             review_context,
             project_path,
             config.temperature,
+            model=config.model,
             thinking_budget=config.thinking_budget,
         )
         if gemini_output:
             print(f"✅ AI code review completed: {os.path.basename(gemini_output)}")
+            _record_review(project_path, gemini_output)
         else:
             print(
                 "⚠️  AI code review failed or was skipped (check API key and model availability)"
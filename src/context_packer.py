@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Token-budget packing of review contexts.
+
+The review document has to fit the model's input window
+(``input_token_limits`` in model_config.json). The header, task data, PR
+metadata and instructions are always kept. The project configuration, the
+file tree and every changed file can be degraded, and changed files are
+ranked by change size, file type and relevance to the task. Each changed
+file gets the richest representation that still fits:
+
+    full     the file content as read
+    hunks    only the changed hunks of its diff
+    outline  definition lines (classes, functions, headings) with line numbers
+    stub     one line saying what was left out
+
+Every degradable item starts at its smallest representation and is then
+upgraded in priority order while budget remains, so the packed document
+stays within the budget whenever the fixed sections do. Budget left over at
+the end goes to the leading lines of the next richer representation of
+items left at an outline or stub.
+"""
+
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from .file_selector import estimate_tokens
+    from .large_file_sampler import numbered_outline
+    from .model_config_manager import get_input_token_limit
+    from .review_template import render_sections
+except ImportError:
+    from file_selector import estimate_tokens
+    from large_file_sampler import numbered_outline
+    from model_config_manager import get_input_token_limit
+    from review_template import render_sections
+
+logger = logging.getLogger(__name__)
+
+LEVELS = ("full", "truncated", "hunks", "outline", "stub")
+
+# Tokens kept free for the review prompt wrapped around the context
+PROMPT_RESERVE_TOKENS = 2048
+# Token counts are estimates; headroom keeps an underestimate from overflowing
+ESTIMATE_HEADROOM = 0.9
+
+# Priorities of the non-file items; changed files score roughly 0.05-20
+CONFIGURATION_PRIORITY = 100.0
+FILE_TREE_PRIORITY = 1.0
+
+_SOURCE_EXTENSIONS = {
+    ".c",
+    ".cc",
+    ".cpp",
+    ".cs",
+    ".go",
+    ".h",
+    ".hpp",
+    ".java",
+    ".js",
+    ".jsx",
+    ".kt",
+    ".php",
+    ".py",
+    ".rb",
+    ".rs",
+    ".scala",
+    ".sh",
+    ".sql",
+    ".swift",
+    ".ts",
+    ".tsx",
+    ".vue",
+}
+_GENERATED = re.compile(
+    r"(\.lock|-lock\.json|\.min\.(js|css)|\.map|\.snap)$|(^|/)(dist|build|vendor)/"
+)
+_TEST = re.compile(
+    r"(^|/)(tests?|__tests__|spec)/|(^|/)test_[^/]*$|[._](test|spec)\.[^/.]+$"
+)
+
+_TRUNCATED_NOTE = "... (truncated to fit the model's context window)"
+
+
+@dataclass
+class PackingReport:
+    """How a review context was fitted into its token budget."""
+
+    budget: int
+    tokens: int = 0
+    # Chosen level per changed file path, plus "configuration" and "file_tree";
+    # "truncated" marks full content cut short
+    levels: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def degraded(self) -> bool:
+        """Whether anything was left out or shortened."""
+        return any(level != "full" for level in self.levels.values())
+
+    def counts(self) -> Dict[str, int]:
+        """Number of items packed at each level."""
+        counts = {level: 0 for level in LEVELS}
+        for level in self.levels.values():
+            counts[level] = counts.get(level, 0) + 1
+        return counts
+
+    def summary(self) -> str:
+        """One-line description for progress output."""
+        counts = ", ".join(
+            f"{count} {level}" for level, count in self.counts().items() if count
+        )
+        return (
+            f"Packed review context into {self.tokens:,}/{self.budget:,} tokens "
+            f"({counts})"
+        )
+
+
+@dataclass
+class _Item:
+    """A degradable part of the document and its candidate representations."""
+
+    key: str
+    priority: float
+    overhead: int  # Tokens of the surrounding section markup
+    options: List[Tuple[str, str, int]]  # (level, text, tokens), richest first
+    choice: int = -1
+
+    @property
+    def level(self) -> str:
+        """Name of the chosen representation."""
+        return self.options[self.choice][0]
+
+    @property
+    def text(self) -> str:
+        """Text of the chosen representation."""
+        return self.options[self.choice][1]
+
+
+def context_token_budget(model: Optional[str] = None) -> int:
+    """
+    Get the token budget for a review context.
+
+    The model's input token limit minus room for the review prompt and
+    estimation headroom, optionally lowered by GEMINI_CONTEXT_TOKEN_BUDGET.
+
+    Args:
+        model: Model name or alias (default: GEMINI_MODEL or the config default)
+
+    Returns:
+        Maximum estimated tokens for the review context
+    """
+    budget = int(
+        (get_input_token_limit(model) - PROMPT_RESERVE_TOKENS) * ESTIMATE_HEADROOM
+    )
+    budget_env = os.getenv("GEMINI_CONTEXT_TOKEN_BUDGET")
+    if budget_env:
+        try:
+            requested = int(budget_env)
+            if requested <= 0:
+                raise ValueError(budget_env)
+            budget = min(budget, requested)
+        except ValueError:
+            logger.warning(
+                f"Invalid GEMINI_CONTEXT_TOKEN_BUDGET='{budget_env}', "
+                f"using model limit ({budget})"
+            )
+    return max(budget, 0)
+
+
+def _tokens(text: str) -> int:
+    """Estimate tokens of one piece, rounding up so pieces sum safely."""
+    return estimate_tokens(text) + 1 if text else 0
+
+
+def _type_weight(path: str) -> float:
+    """Weight a file by how much reviewing it is worth."""
+    normalized = path.replace(os.sep, "/").lower()
+    if _GENERATED.search(normalized):
+        return 0.05
+    if _TEST.search(normalized):
+        return 0.7
+    extension = os.path.splitext(normalized)[1]
+    if extension in _SOURCE_EXTENSIONS:
+        return 1.0
+    return 0.5
+
+
+def _changed_lines(diff: str) -> int:
+    """Count added and removed lines in a unified diff."""
+    return sum(
+        1
+        for line in diff.splitlines()
+        if line[:1] in ("+", "-") and not line.startswith(("+++", "---"))
+    )
+
+
+def _task_text(data: Dict[str, Any]) -> str:
+    """Collect the task description files are matched against."""
+    parts = [
+        data.get("prd_summary"),
+        data.get("current_phase_description"),
+        data.get("auto_prompt_content"),
+        *(data.get("subtasks_completed") or []),
+    ]
+    return "\n".join(str(part) for part in parts if part).lower()
+
+
+def _priority(file_info: Dict[str, Any], diff: str, task_text: str) -> float:
+    """Score a changed file by change size, file type and task relevance."""
+    path = file_info["path"]
+    changed = (
+        _changed_lines(diff)
+        if diff
+        else len((file_info.get("content") or "").splitlines())
+    )
+    score = _type_weight(path) * (1.0 + math.log1p(changed))
+    stem = os.path.splitext(os.path.basename(path))[0].lower()
+    if len(stem) >= 3 and stem in task_text:
+        score *= 2
+    return score
+
+
+def _hunks(diff: str) -> str:
+    """Strip file headers from a diff, keeping only its hunks."""
+    lines: List[str] = []
+    in_hunk = False
+    for line in diff.splitlines():
+        if line.startswith("@@"):
+            in_hunk = True
+        elif line.startswith("diff --git"):
+            in_hunk = False
+        if in_hunk:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def _stub(what: str, content: str) -> str:
+    """Describe content left out of the context."""
+    return (
+        f"[{what} omitted to fit the model's context window: "
+        f"{len(content.splitlines())} lines, ~{estimate_tokens(content):,} tokens]"
+    )
+
+
+def _file_options(file_info: Dict[str, Any], diff: str) -> List[Tuple[str, str]]:
+    """Candidate representations of a changed file, richest first."""
+    content = file_info.get("content") or ""
+    # Compression may have removed lines; outlines number the original ones
+    outline, total_lines = file_info.get("outline") or numbered_outline(
+        file_info["path"], content
+    )
+    options = [("full", content)]
+
+    hunks = _hunks(diff)
+    if hunks and len(hunks) < len(content):
+        options.append(
+            ("hunks", f"[Changed hunks only; file has {total_lines} lines]\n{hunks}")
+        )
+
+    if outline:
+        options.append(
+            (
+                "outline",
+                f"[Outline only: {len(outline.splitlines())} definitions "
+                f"in {total_lines} lines]\n{outline}",
+            )
+        )
+
+    options.append(("stub", _stub("File content", content)))
+    return options
+
+
+def _make_item(
+    key: str,
+    priority: float,
+    section: str,
+    text: str,
+    options: List[Tuple[str, str]],
+    path: Optional[str] = None,
+) -> _Item:
+    """Measure the options of one degradable item."""
+    # File contents are measured once per file version across runs
+    full_tokens = estimate_tokens(text, path)
+    overhead = max(_tokens(section) - full_tokens, 0)
+    return _Item(
+        key=key,
+        priority=priority,
+        overhead=overhead,
+        options=[
+            (level, value, full_tokens + 1 if level == "full" else _tokens(value))
+            for level, value in options
+        ],
+    )
+
+
+def _head(text: str, max_tokens: int, note: str) -> Optional[str]:
+    """Keep as many leading lines as fit in max_tokens, followed by a note."""
+    lines = text.splitlines()
+    low, high = 0, len(lines)
+    while low < high:
+        middle = (low + high + 1) // 2
+        candidate = "\n".join(lines[:middle] + [note])
+        if _tokens(candidate) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    if low == 0:
+        return None
+    return "\n".join(lines[:low] + [note])
+
+
+def pack_review_context(
+    data: Dict[str, Any],
+    budget: int,
+    diff_provider: Optional[Callable[[List[str]], Dict[str, str]]] = None,
+) -> Tuple[Dict[str, Any], PackingReport]:
+    """
+    Fit review template data into a token budget.
+
+    Args:
+        data: Template data as built by generate_review_context_data
+        budget: Maximum estimated tokens of the rendered document
+        diff_provider: Returns diffs for changed file paths; without it no
+            file is reduced to hunks
+
+    Returns:
+        Tuple of (template data to render, packing report). The input dict
+        is returned unchanged when everything fits.
+    """
+    changed_files: List[Dict[str, Any]] = data.get("changed_files") or []
+    report = PackingReport(budget=budget)
+
+    sections = list(render_sections(data))
+    report.tokens = estimate_tokens("".join(text for _, text in sections))
+    if report.tokens <= budget:
+        report.levels = {info["path"]: "full" for info in changed_files}
+        return data, report
+
+    diffs: Dict[str, str] = {}
+    if diff_provider is not None and changed_files:
+        try:
+            diffs = diff_provider([info["path"] for info in changed_files])
+        except Exception as e:
+            logger.warning(f"Could not get diffs for context packing: {e}")
+
+    fixed = 0
+    items: List[_Item] = []
+    file_sections = iter(text for name, text in sections if name == "changed_file")
+    task_text = _task_text(data)
+    for name, text in sections:
+        if name == "configuration" and data.get("configuration_content"):
+            content = data["configuration_content"]
+            items.append(
+                _make_item(
+                    "configuration",
+                    CONFIGURATION_PRIORITY,
+                    text,
+                    content,
+                    [
+                        ("full", content),
+                        ("stub", _stub("Project configuration", content)),
+                    ],
+                )
+            )
+        elif name == "file_tree":
+            tree = data.get("file_tree") or ""
+            items.append(
+                _make_item(
+                    "file_tree",
+                    FILE_TREE_PRIORITY,
+                    text,
+                    tree,
+                    [("full", tree), ("stub", _stub("File tree", tree))],
+                )
+            )
+        elif name != "changed_file":
+            fixed += _tokens(text)
+
+    for index, file_info in enumerate(changed_files):
+        diff = diffs.get(file_info["path"], "")
+        items.append(
+            _make_item(
+                str(index),
+                _priority(file_info, diff, task_text),
+                next(file_sections),
+                file_info.get("content") or "",
+                _file_options(file_info, diff),
+                file_info["path"],
+            )
+        )
+
+    remaining = (
+        budget - fixed - sum(item.overhead + item.options[-1][2] for item in items)
+    )
+    if remaining < 0:
+        logger.warning(
+            f"Review context needs ~{budget - remaining:,} tokens even with every "
+            f"file reduced to a stub; the budget is {budget:,}"
+        )
+
+    # Upgrade items to the richest representation that fits, most important first
+    for item in sorted(items, key=lambda item: -item.priority):
+        smallest = item.options[-1][2]
+        for choice, (_, _, tokens) in enumerate(item.options):
+            if tokens - smallest <= remaining:
+                item.choice = choice
+                remaining -= tokens - smallest
+                break
+
+    # Spend what is left on the leading part of the next richer representation
+    levels: Dict[str, Tuple[str, str]] = {}
+    for item in sorted(items, key=lambda item: -item.priority):
+        levels[item.key] = (item.level, item.text)
+        # Cutting hunks short would hide changes the review is about
+        if item.level in ("full", "hunks") or remaining <= 0:
+            continue
+        level, richer, _ = item.options[item.choice - 1]
+        current = item.options[item.choice][2]
+        head = _head(richer, current + remaining, _TRUNCATED_NOTE)
+        if head is not None and _tokens(head) > current:
+            remaining -= _tokens(head) - current
+            levels[item.key] = ("truncated" if level == "full" else level, head)
+
+    packed = dict(data)
+    packed["changed_files"] = list(changed_files)
+    for item in items:
+        level, text = levels[item.key]
+        if item.key == "configuration":
+            packed["configuration_content"] = text
+            report.levels[item.key] = level
+        elif item.key == "file_tree":
+            packed["file_tree"] = text
+            report.levels[item.key] = level
+        else:
+            file_info = changed_files[int(item.key)]
+            packed["changed_files"][int(item.key)] = dict(file_info, content=text)
+            report.levels[file_info["path"]] = level
+
+    report.tokens = budget - remaining
+    return packed, report
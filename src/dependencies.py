@@ -9,7 +9,7 @@ from dataclasses import dataclass
 from typing import Optional
 
 try:
-    from .cache import CacheManager, get_cache_manager
+    from .cache import TieredCache, get_cache_manager
     from .interfaces import (
         AsyncFileSystemWrapper,
         AsyncGitClientWrapper,
@@ -24,9 +24,13 @@ try:
         create_async_filesystem,
         create_async_git_client,
     )
-    from .services import FileFinder
+    from .interfaces.cache_protocol import CacheProtocol
+    from .prompt_layout import PrefixTracker
+    from .review_artifacts import ReviewArtifacts
+    from .review_snapshot import ReviewSnapshots
+    from .services import FileFinder, ProjectFingerprint
 except ImportError:
-    from cache import CacheManager, get_cache_manager
+    from cache import TieredCache, get_cache_manager
     from interfaces import (
         AsyncFileSystemWrapper,
         AsyncGitClientWrapper,
@@ -41,7 +45,11 @@ except ImportError:
         create_async_filesystem,
         create_async_git_client,
     )
-    from services import FileFinder
+    from interfaces.cache_protocol import CacheProtocol
+    from prompt_layout import PrefixTracker
+    from review_artifacts import ReviewArtifacts
+    from review_snapshot import ReviewSnapshots
+    from services import FileFinder, ProjectFingerprint
 
 
 @dataclass
@@ -58,7 +66,12 @@ class Dependencies:
 class DependencyContainer:
     """Simple dependency injection container."""
 
-    def __init__(self, use_production: bool = True, enable_cache: bool = True):
+    def __init__(
+        self,
+        use_production: bool = True,
+        enable_cache: bool = True,
+        enable_memory_tier: bool = True,
+    ):
         """
         Initialize the container.
 
@@ -66,21 +79,31 @@ class DependencyContainer:
             use_production: If True, use production implementations.
                            If False, use in-memory implementations for testing.
             enable_cache: If True, wrap production implementations with caching.
+            enable_memory_tier: If True, serve hot cache keys from an in-process
+                               LRU in front of the SQLite cache.
         """
         self.use_production = use_production
         self.enable_cache = enable_cache and use_production  # Only cache in production
+        self.enable_memory_tier = enable_memory_tier
         self._filesystem: Optional[FileSystem] = None
         self._git_client: Optional[GitClient] = None
         self._file_finder: Optional[FileFinder] = None
-        self._cache_manager: Optional[CacheManager] = None
+        self._project_fingerprint: Optional[ProjectFingerprint] = None
+        self._review_artifacts: Optional[ReviewArtifacts] = None
+        self._review_snapshots: Optional[ReviewSnapshots] = None
+        self._prefix_tracker: Optional[PrefixTracker] = None
+        self._cache_manager: Optional[CacheProtocol] = None
         self._async_filesystem: Optional[AsyncFileSystemWrapper] = None
         self._async_git_client: Optional[AsyncGitClientWrapper] = None
 
     @property
-    def cache_manager(self) -> Optional[CacheManager]:
+    def cache_manager(self) -> Optional[CacheProtocol]:
         """Get or create cache manager."""
         if self.enable_cache and self._cache_manager is None:
-            self._cache_manager = get_cache_manager()
+            if self.enable_memory_tier:
+                self._cache_manager = TieredCache(get_cache_manager())
+            else:
+                self._cache_manager = get_cache_manager()
         return self._cache_manager
 
     @property
@@ -118,6 +141,36 @@ class DependencyContainer:
             self._file_finder = FileFinder(self.filesystem)
         return self._file_finder
 
+    @property
+    def project_fingerprint(self) -> ProjectFingerprint:
+        """Get or create the project fingerprint service."""
+        if self._project_fingerprint is None:
+            self._project_fingerprint = ProjectFingerprint()
+        return self._project_fingerprint
+
+    @property
+    def review_artifacts(self) -> ReviewArtifacts:
+        """Get or create the persistent review artifact cache."""
+        if self._review_artifacts is None:
+            self._review_artifacts = ReviewArtifacts(
+                self.cache_manager, self.project_fingerprint
+            )
+        return self._review_artifacts
+
+    @property
+    def review_snapshots(self) -> ReviewSnapshots:
+        """Get or create the store of previous review snapshots."""
+        if self._review_snapshots is None:
+            self._review_snapshots = ReviewSnapshots(self.cache_manager)
+        return self._review_snapshots
+
+    @property
+    def prefix_tracker(self) -> PrefixTracker:
+        """Get or create the tracker of context prefixes sent per project."""
+        if self._prefix_tracker is None:
+            self._prefix_tracker = PrefixTracker(self.cache_manager)
+        return self._prefix_tracker
+
     @property
     def async_filesystem(self) -> AsyncFileSystemWrapper:
         """Get or create async filesystem wrapper."""
@@ -147,6 +200,10 @@ class DependencyContainer:
         self._filesystem = None
         self._git_client = None
         self._file_finder = None
+        self._project_fingerprint = None
+        self._review_artifacts = None
+        self._review_snapshots = None
+        self._prefix_tracker = None
         self._cache_manager = None
         self._async_filesystem = None
         self._async_git_client = None
@@ -24,6 +24,8 @@ try:
         FileSelection,
     )
     from .file_selector import (
+        estimate_selection_tokens,
+        estimate_tokens,
         read_file_with_line_ranges,
         validate_file_paths,
     )
@@ -42,6 +44,8 @@ except ImportError:
         FileSelection,
     )
     from file_selector import (
+        estimate_selection_tokens,
+        estimate_tokens,
         read_file_with_line_ranges,
         validate_file_paths,
     )
@@ -101,7 +105,7 @@ def generate_file_context_data(config: FileContextConfig) -> FileContextResult:
         )
 
         # Estimate tokens for configuration
-        config_tokens = len(configuration_content) // 4
+        config_tokens = estimate_tokens(configuration_content)
         total_tokens += config_tokens
 
         logger.info(f"Configuration content: ~{config_tokens} tokens")
@@ -109,6 +113,23 @@ def generate_file_context_data(config: FileContextConfig) -> FileContextResult:
     # Read files in order, tracking tokens
     for selection in valid_selections:
         try:
+            # Line ranges of indexed files are estimated before they are read
+            estimated_tokens = estimate_selection_tokens(
+                selection["path"], selection.get("line_ranges"), config.project_path
+            )
+            if (
+                estimated_tokens is not None
+                and total_tokens + estimated_tokens > config.token_limit
+            ):
+                excluded_files.append(
+                    (
+                        selection["path"],
+                        f"Would exceed token limit ({total_tokens + estimated_tokens} > {config.token_limit})",
+                    )
+                )
+                logger.warning(f"Excluding {selection['path']} due to token limit")
+                continue
+
             file_data = read_selected_files([selection], config.project_path)[0]
 
             # Check if adding this file would exceed token limit
@@ -10,14 +10,18 @@ Main functions:
 - parse_file_selections: Parse multiple selections from various formats
 - normalize_file_selections_from_dicts: Convert dict selections to FileSelection objects
 - validate_file_paths: Check file existence and readability
+- merge_line_ranges: Sort and merge line ranges into disjoint intervals
 - extract_line_ranges: Read specific line ranges from files
 - format_file_content: Format content with line numbers
+- estimate_selection_tokens: Estimate line ranges of indexed files before reading
 - read_file_with_line_ranges: Read file with metadata
 """
 
+import os
 import re
+from itertools import chain, count
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple, Union
 
 try:
     from .file_context_types import (
@@ -29,6 +33,13 @@ try:
         LineRange,
         normalize_file_selection,
     )
+    from .line_index import (
+        LineIndex,
+        estimate_range_tokens,
+        get_line_index_store,
+        number_prefix,
+    )
+    from .token_estimator import estimate_tokens as _estimate_tokens
 except ImportError:
     # Fall back to absolute imports for testing
     from file_context_types import (
@@ -40,6 +51,16 @@ except ImportError:
         LineRange,
         normalize_file_selection,
     )
+    from line_index import (
+        LineIndex,
+        estimate_range_tokens,
+        get_line_index_store,
+        number_prefix,
+    )
+    from token_estimator import estimate_tokens as _estimate_tokens
+
+# Characters read at a time when only counting the lines after a selection
+_COUNT_CHUNK_CHARS = 1 << 20
 
 
 def parse_file_selection(selection_str: str) -> FileSelection:
@@ -209,60 +230,133 @@ def validate_file_paths(
     return valid_selections, errors
 
 
+def merge_line_ranges(line_ranges: List[LineRange]) -> List[LineRange]:
+    """
+    Sort line ranges and merge the ones that overlap or touch.
+
+    Args:
+        line_ranges: (start, end) tuples (1-indexed, inclusive) in any order
+
+    Returns:
+        Disjoint ranges in file order; empty ranges (start > end) are dropped
+
+    Raises:
+        InvalidLineRangeError: If a line number is not positive
+    """
+    merged: List[LineRange] = []
+    for start, end in sorted(line_ranges):
+        if start < 1 or end < 1:
+            raise InvalidLineRangeError(
+                f"Line numbers must be positive (got {start}-{end})"
+            )
+        if start > end:
+            continue
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _count_lines(text: str) -> int:
+    """Count lines the way readlines() splits them."""
+    return text.count("\n") + (1 if text and not text.endswith("\n") else 0)
+
+
+def _count_remaining_lines(f: TextIO) -> int:
+    """Count the lines left in a text file in large chunks, without keeping them."""
+    count = 0
+    last_char = ""
+    for chunk in iter(lambda: f.read(_COUNT_CHUNK_CHARS), ""):
+        count += chunk.count("\n")
+        last_char = chunk[-1]
+    # A last line without a newline still counts
+    return count + (1 if last_char and last_char != "\n" else 0)
+
+
 def extract_line_ranges(
     file_path: str, line_ranges: Optional[List[LineRange]] = None
 ) -> Tuple[str, int, int]:
     """
     Read specific line ranges from a file.
 
+    The ranges are merged into sorted intervals and the file is read in a
+    single pass that keeps only the lines inside them. After the last
+    interval the rest of the file is only counted, in large chunks.
+
     Args:
         file_path: Path to the file
         line_ranges: Optional list of (start, end) tuples (1-indexed, inclusive)
                     If None, returns the entire file
 
     Returns:
-        Tuple of (content, total_lines, included_lines)
+        Tuple of (content, total_lines, included_lines); content holds the
+        selected lines once each, in file order
 
     Raises:
         FileNotFoundError: If file doesn't exist
         InvalidLineRangeError: If line ranges are out of bounds
     """
+    if line_ranges:
+        index = get_line_index_store().get_for_read(os.path.realpath(file_path))
+        if index is not None:
+            return _extract_indexed_line_ranges(file_path, index, line_ranges)
+
+    selected_lines: List[str] = []
     try:
         with open(file_path, "r", encoding="utf-8") as f:
-            all_lines = f.readlines()
+            # If no ranges specified, return entire file
+            if not line_ranges:
+                content = f.read()
+                total_lines = _count_lines(content)
+                return content, total_lines, total_lines
+
+            intervals = merge_line_ranges(line_ranges)
+            last_line = intervals[-1][1] if intervals else 0
+            line_num = 0
+            interval_index = 0
+            if last_line:
+                for line_num, line in enumerate(f, 1):
+                    while intervals[interval_index][1] < line_num:
+                        interval_index += 1
+                    if intervals[interval_index][0] <= line_num:
+                        selected_lines.append(line)
+                    if line_num == last_line:
+                        break
+            total_lines = line_num + _count_remaining_lines(f)
     except FileNotFoundError:
         raise FileNotFoundError(f"File not found: {file_path}")
+    except InvalidLineRangeError:
+        raise
     except Exception as e:
         raise FileNotFoundError(f"Cannot read file {file_path}: {str(e)}")
 
-    total_lines = len(all_lines)
-
-    # If no ranges specified, return entire file
-    if not line_ranges:
-        return "".join(all_lines), total_lines, total_lines
+    _check_line_ranges_in_file(line_ranges, total_lines)
+    return "".join(selected_lines), total_lines, len(selected_lines)
 
-    # Validate and extract line ranges
-    selected_lines: List[str] = []
-    included_line_numbers: set[int] = set()
 
+def _check_line_ranges_in_file(line_ranges: List[LineRange], total_lines: int) -> None:
+    """Raise InvalidLineRangeError for a range past the end of the file."""
     for start, end in line_ranges:
-        # Validate range
-        if start < 1 or end < 1:
-            raise InvalidLineRangeError(
-                f"Line numbers must be positive (got {start}-{end})"
-            )
         if start > total_lines or end > total_lines:
             raise InvalidLineRangeError(
                 f"Line range {start}-{end} out of bounds (file has {total_lines} lines)"
             )
 
-        # Extract lines (convert to 0-indexed)
-        for line_num in range(start - 1, end):
-            if line_num not in included_line_numbers:
-                selected_lines.append(all_lines[line_num])
-                included_line_numbers.add(line_num)
 
-    return "".join(selected_lines), total_lines, len(included_line_numbers)
+def _extract_indexed_line_ranges(
+    file_path: str, index: LineIndex, line_ranges: List[LineRange]
+) -> Tuple[str, int, int]:
+    """Read line ranges by seeking to the offsets of a line index."""
+    intervals = merge_line_ranges(line_ranges)
+    _check_line_ranges_in_file(line_ranges, index.line_count)
+    try:
+        with open(file_path, "rb") as f:
+            content = "".join(index.read(f, start, end) for start, end in intervals)
+    except Exception as e:
+        raise FileNotFoundError(f"Cannot read file {file_path}: {str(e)}")
+    included_lines = sum(end - start + 1 for start, end in intervals)
+    return content, index.line_count, included_lines
 
 
 def format_file_content(
@@ -277,79 +371,104 @@ def format_file_content(
     Args:
         file_path: Path to the file (for header)
         content: File content to format
-        line_ranges: Optional line ranges that were extracted
+        line_ranges: Optional line ranges that were extracted; the content is
+            expected in file order, as extract_line_ranges returns it
         show_line_numbers: Whether to show line numbers
 
     Returns:
         Formatted content string
     """
-    lines = content.splitlines(keepends=True)
-
     if not show_line_numbers:
         return content
 
-    # If we have line ranges, we need to determine the starting line number
-    # for each line in the content
-    if line_ranges:
-        # Build a map of which lines are included
-        line_map: List[int] = []
-        for start, end in sorted(line_ranges):
-            for line_num in range(start, end + 1):
-                if line_num not in line_map:
-                    line_map.append(line_num)
-
-        # Format with actual line numbers
-        formatted_lines: List[str] = []
-        for i, line in enumerate(lines):
-            if i < len(line_map):
-                actual_line_num = line_map[i]
-                # Preserve existing line ending if present
-                if line.endswith("\n"):
-                    formatted_lines.append(f"{actual_line_num:6d} | {line}")
-                else:
-                    formatted_lines.append(f"{actual_line_num:6d} | {line}\n")
-            else:
-                # Shouldn't happen, but handle gracefully
-                formatted_lines.append(f"     ? | {line}")
-
-        # Remove trailing newline if original didn't have one
-        result = "".join(formatted_lines)
-        if not content.endswith("\n") and result.endswith("\n"):
-            result = result[:-1]
-        return result
-    else:
-        # Full file - simple sequential numbering
-        formatted_lines: List[str] = []
-        for i, line in enumerate(lines, 1):
-            # Preserve existing line ending if present
-            if line.endswith("\n"):
-                formatted_lines.append(f"{i:6d} | {line}")
-            else:
-                formatted_lines.append(f"{i:6d} | {line}\n")
-
-        # Remove trailing newline if original didn't have one
-        result = "".join(formatted_lines)
-        if not content.endswith("\n") and result.endswith("\n"):
-            result = result[:-1]
-        return result
-
-
-def estimate_tokens(content: str) -> int:
+    # Number lines straight from the merged intervals, or sequentially for
+    # a full file
+    line_numbers: Iterator[int] = (
+        chain.from_iterable(
+            range(start, end + 1) for start, end in merge_line_ranges(line_ranges)
+        )
+        if line_ranges
+        else count(1)
+    )
+
+    formatted_lines: List[str] = []
+    for line in content.splitlines(keepends=True):
+        line_num = next(line_numbers, None)
+        if line_num is None:
+            # Shouldn't happen, but handle gracefully
+            formatted_lines.append(f"     ? | {line}")
+        # Preserve existing line ending if present
+        elif line.endswith("\n"):
+            formatted_lines.append(f"{number_prefix(line_num)}{line}")
+        else:
+            formatted_lines.append(f"{number_prefix(line_num)}{line}\n")
+
+    # Remove trailing newline if original didn't have one
+    result = "".join(formatted_lines)
+    if not content.endswith("\n") and result.endswith("\n"):
+        result = result[:-1]
+    return result
+
+
+def estimate_tokens(content: str, path: Optional[str] = None) -> int:
     """
     Estimate the number of tokens in content.
 
-    This is a rough approximation based on character count.
-    More accurate token counting would require the actual tokenizer.
+    Uses the calibrated estimator in token_estimator, which accounts for
+    the content's language and character mix (minified code, CJK text,
+    indentation) instead of assuming ~4 characters per token.
 
     Args:
         content: Text content
+        path: File the content comes from; its estimate is then cached per
+            file version
 
     Returns:
         Estimated token count
     """
-    # Rough approximation: ~4 characters per token on average
-    # This varies by content type and tokenizer, but is reasonable for code
-    return len(content) // 4
+    return _estimate_tokens(content, path, persist=path is not None)
+
+
+def _resolve_path(file_path: str, project_path: Optional[str]) -> str:
+    """Resolve a selected file against the project path."""
+    path = Path(file_path)
+    if not path.is_absolute() and project_path:
+        path = Path(project_path) / path
+    return str(path.resolve())
+
+
+def estimate_selection_tokens(
+    file_path: str,
+    line_ranges: Optional[List[LineRange]] = None,
+    project_path: Optional[str] = None,
+) -> Optional[int]:
+    """
+    Estimate the tokens of a line-range selection without reading it.
+
+    Only possible for files large enough to have a line index (see
+    line_index), where the estimate is two prefix-sum lookups per range.
+
+    Args:
+        file_path: Path to the file (absolute or relative)
+        line_ranges: Line ranges to estimate
+        project_path: Optional project path for relative paths
+
+    Returns:
+        The estimate read_file_with_line_ranges would report, or None when
+        the selection has no ranges, the file is not indexed or the ranges
+        are invalid (reading the file then reports the error)
+    """
+    if not line_ranges:
+        return None
+    index = get_line_index_store().get(_resolve_path(file_path, project_path))
+    if index is None:
+        return None
+    try:
+        intervals = merge_line_ranges(line_ranges)
+        _check_line_ranges_in_file(line_ranges, index.line_count)
+    except InvalidLineRangeError:
+        return None
+    return estimate_range_tokens(index, intervals)
 
 
 def read_file_with_line_ranges(
@@ -373,11 +492,7 @@ def read_file_with_line_ranges(
         InvalidLineRangeError: If line ranges are invalid
     """
     # Resolve path
-    path = Path(file_path)
-    if not path.is_absolute() and project_path:
-        path = Path(project_path) / path
-
-    absolute_path = str(path.resolve())
+    absolute_path = _resolve_path(file_path, project_path)
 
     # Extract content
     content, total_lines, included_lines = extract_line_ranges(
@@ -389,8 +504,13 @@ def read_file_with_line_ranges(
         file_path, content, line_ranges, show_line_numbers=True
     )
 
-    # Estimate tokens
-    estimated_tokens = estimate_tokens(formatted_content)
+    # Estimate tokens, from the line index when the file has one
+    estimated_tokens = estimate_selection_tokens(absolute_path, line_ranges)
+    if estimated_tokens is None:
+        # Only whole files recur; a one-off slice is not worth a cache entry
+        estimated_tokens = _estimate_tokens(
+            formatted_content, absolute_path, persist=not line_ranges
+        )
 
     return FileContentData(
         path=file_path,
@@ -35,8 +35,10 @@ except ImportError:
 # Import configuration types
 try:
     from .config_types import CodeReviewConfig
+    from .project_snapshot import ProjectSnapshot
 except ImportError:
     from config_types import CodeReviewConfig
+    from project_snapshot import ProjectSnapshot
 
 
 # Re-export CLI functions for backward compatibility
@@ -152,6 +154,10 @@ def generate_code_review_context_main(
     auto_prompt_content: Optional[str] = None,
     thinking_budget: Optional[int] = None,
     url_context: Optional[Union[str, List[str]]] = None,
+    since_last_review: bool = False,
+    cache_friendly_layout: bool = False,
+    project_snapshot: Optional[ProjectSnapshot] = None,
+    model: Optional[str] = None,
 ) -> tuple[str, Optional[str]]:
     """
     Generate code review context with enhanced configuration discovery.
@@ -177,6 +183,12 @@ def generate_code_review_context_main(
         include_cursor_rules: Whether to include Cursor rules files
         raw_context_only: Exclude AI review instructions (for intermediate processing)
         auto_prompt_content: Pre-generated meta-prompt content to use
+        since_last_review: Only include files changed since the last recorded
+            review, with a summary of that review
+        cache_friendly_layout: Order sections from most to least stable so
+            repeat reviews share a prefix the model can cache
+        project_snapshot: Project snapshot already used for the meta-prompt
+        model: Gemini model the context is sized for and sent to
 
     Returns:
         Tuple of (context_file_path, gemini_review_path)
@@ -202,6 +214,10 @@ def generate_code_review_context_main(
         auto_prompt_content=auto_prompt_content,
         thinking_budget=thinking_budget,
         url_context=url_context,
+        since_last_review=since_last_review,
+        cache_friendly_layout=cache_friendly_layout,
+        project_snapshot=project_snapshot,
+        model=model,
     )
 
     return _generate_code_review_context_impl(config)
@@ -10,11 +10,13 @@ import fnmatch
 import logging
 import os
 import subprocess
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 try:
+    from .large_file_sampler import changed_line_ranges, read_for_review
     from .progress import progress
 except ImportError:
+    from large_file_sampler import changed_line_ranges, read_for_review
     from progress import progress
 
 logger = logging.getLogger(__name__)
@@ -133,14 +135,15 @@ def get_changed_files(project_path: str) -> List[Dict[str, str]]:
                             if file_size > max_file_size:
                                 content = f"[File too large: {file_size / (1024 * 1024):.1f}MB, limit is {max_file_size / (1024 * 1024)}MB]"
                             else:
-                                with open(absolute_path, "r", encoding="utf-8") as f:
-                                    content_lines = f.readlines()
-
-                                if len(content_lines) > max_lines:
-                                    content = "".join(content_lines[:max_lines])
-                                    content += f"\n... (truncated, showing first {max_lines} lines)"
-                                else:
-                                    content = "".join(content_lines).rstrip("\n")
+                                # Files over max_lines become an outline with
+                                # the changed regions, head and tail
+                                content = read_for_review(
+                                    absolute_path,
+                                    max_lines,
+                                    lambda file_path=file_path: changed_line_ranges(
+                                        project_path, file_path
+                                    ),
+                                )
                         else:
                             content = "[File not found in working directory]"
 
@@ -164,6 +167,59 @@ def get_changed_files(project_path: str) -> List[Dict[str, str]]:
         return []
 
 
+def get_git_metadata(project_path: str) -> Dict[str, Any]:
+    """
+    Get the current branch, commit count and number of uncommitted paths.
+
+    Args:
+        project_path: Path to project root
+
+    Returns:
+        Dictionary with "is_repository", "branch", "commit_count" and
+        "changed_paths", or an empty dictionary outside a git repository
+    """
+    try:
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--branch"],
+            cwd=project_path,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        if status.returncode != 0:
+            return {}
+
+        lines = status.stdout.splitlines()
+        header = lines[0][3:] if lines and lines[0].startswith("## ") else ""
+        if header.startswith("No commits yet on "):
+            branch = header[len("No commits yet on ") :]
+        elif header.startswith("HEAD (no branch)"):
+            branch = ""
+        else:
+            branch = header.split("...")[0].split(" ")[0]
+
+        commit_count: Optional[int] = None
+        count = subprocess.run(
+            ["git", "rev-list", "--count", "HEAD"],
+            cwd=project_path,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        if count.returncode == 0 and count.stdout.strip().isdigit():
+            commit_count = int(count.stdout.strip())
+
+        return {
+            "is_repository": True,
+            "branch": branch,
+            "commit_count": commit_count,
+            "changed_paths": len(lines) - 1 if header else len(lines),
+        }
+    except (OSError, subprocess.SubprocessError):
+        logger.warning("Git not available or not in a git repository")
+        return {}
+
+
 def generate_file_tree(project_path: str, max_depth: Optional[int] = None) -> str:
     """
     Generate ASCII file tree representation.
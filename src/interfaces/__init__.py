@@ -7,7 +7,7 @@ try:
     )
     from .cached_filesystem import CachedFileSystem
     from .cached_git_client import CachedGitClient
-    from .filesystem import FileSystem
+    from .filesystem import FileSystem, StatSignature
     from .filesystem_impl import InMemoryFileSystem, ProductionFileSystem
     from .git_client import GitClient, GitCommit, GitFileChange
     from .git_client_impl import InMemoryGitClient, ProductionGitClient
@@ -20,13 +20,14 @@ except ImportError:
     )
     from cached_filesystem import CachedFileSystem
     from cached_git_client import CachedGitClient
-    from filesystem import FileSystem
+    from filesystem import FileSystem, StatSignature
     from filesystem_impl import InMemoryFileSystem, ProductionFileSystem
     from git_client import GitClient, GitCommit, GitFileChange
     from git_client_impl import InMemoryGitClient, ProductionGitClient
 
 __all__ = [
     "FileSystem",
+    "StatSignature",
     "ProductionFileSystem",
     "InMemoryFileSystem",
     "CachedFileSystem",
@@ -2,13 +2,13 @@
 
 import asyncio
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import List, Optional, Sequence, Union
 
 try:
-    from .filesystem import FileSystem
+    from .filesystem import FileSystem, StatSignature
     from .git_client import GitClient, GitFileChange
 except ImportError:
-    from filesystem import FileSystem
+    from filesystem import FileSystem, StatSignature
     from git_client import GitClient, GitFileChange
 
 
@@ -31,10 +31,20 @@ class AsyncFileSystemWrapper:
         """Check if path is a directory."""
         return await asyncio.to_thread(self._fs.is_dir, path)
 
+    async def stat_signature(self, path: Union[str, Path]) -> Optional[StatSignature]:
+        """Get a signature that changes when the path is modified."""
+        return await asyncio.to_thread(self._fs.stat_signature, path)
+
     async def read_text(self, path: Union[str, Path], encoding: str = "utf-8") -> str:
         """Read text content from a file."""
         return await asyncio.to_thread(self._fs.read_text, path, encoding)
 
+    async def read_texts(
+        self, paths: List[Union[str, Path]], encoding: str = "utf-8"
+    ) -> List[str]:
+        """Read text content from several files."""
+        return await asyncio.to_thread(self._fs.read_texts, paths, encoding)
+
     async def write_text(
         self, path: Union[str, Path], content: str, encoding: str = "utf-8"
     ) -> None:
@@ -87,6 +97,19 @@ class AsyncGitClientWrapper:
         """Get current branch name."""
         return await asyncio.to_thread(self._git.get_current_branch, repo_path)
 
+    async def get_repo_state(
+        self,
+        repo_path: Path,
+        refs: Sequence[str] = ("HEAD",),
+        working_tree: bool = False,
+        files: Sequence[str] = (),
+        index: bool = False,
+    ) -> Optional[str]:
+        """Get a token that changes whenever git results may have changed."""
+        return await asyncio.to_thread(
+            self._git.get_repo_state, repo_path, refs, working_tree, files, index
+        )
+
     async def get_changed_files(
         self, repo_path: Path, base_branch: Optional[str] = None
     ) -> List[GitFileChange]:
@@ -4,7 +4,7 @@ This module defines the protocol for cache managers, enabling easy swapping
 between SQLite-based and in-memory implementations for testing.
 """
 
-from typing import Any, Dict, Optional, Protocol, runtime_checkable
+from typing import Any, Dict, List, Optional, Protocol, Tuple, runtime_checkable
 
 
 @runtime_checkable
@@ -42,6 +42,37 @@ class CacheProtocol(Protocol):
         """
         ...
 
+    def get_many(
+        self, operation: str, params_list: List[Dict[str, Any]]
+    ) -> List[Optional[Any]]:
+        """
+        Get several values of one operation in a single round-trip.
+
+        Args:
+            operation: The operation name
+            params_list: Parameters identifying each entry
+
+        Returns:
+            Values in the same order as params_list, None for misses
+        """
+        ...
+
+    def set_many(
+        self,
+        operation: str,
+        items: List[Tuple[Dict[str, Any], Any]],
+        ttl: Optional[int] = None,
+    ) -> None:
+        """
+        Store several values of one operation in a single round-trip.
+
+        Args:
+            operation: The operation name
+            items: (params, value) pairs to store
+            ttl: Time-to-live in seconds (uses default if not specified)
+        """
+        ...
+
     def invalidate(
         self, operation: Optional[str] = None, params: Optional[Dict[str, Any]] = None
     ) -> int:
@@ -57,9 +88,12 @@ class CacheProtocol(Protocol):
         """
         ...
 
-    def cleanup_expired(self) -> int:
+    def cleanup_expired(self, batch_size: Optional[int] = None) -> int:
         """
-        Remove all expired entries from cache.
+        Remove expired entries from cache.
+
+        Args:
+            batch_size: If provided, remove at most this many entries
 
         Returns:
             Number of entries removed
@@ -1,24 +1,33 @@
-"""Cached filesystem implementation that wraps another filesystem."""
+"""Cached filesystem implementation that wraps another filesystem.
+
+Entries are stored as ``{"stat": signature, "value": result}``. A hit is only
+served after one ``stat`` confirms the source is unchanged; the cache TTL is
+just an upper bound on how long an entry lives.
+"""
 
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 try:
-    from ..cache import CacheManager, get_cache_manager
-    from .filesystem import FileSystem
+    from ..cache import get_cache_manager
+    from ..cache.single_flight import SingleFlight
+    from .cache_protocol import CacheProtocol
+    from .filesystem import FileSystem, StatSignature
 except ImportError:
     import sys
     from pathlib import Path as PathLib
     sys.path.insert(0, str(PathLib(__file__).parent.parent.parent))
-    from cache import CacheManager, get_cache_manager
-    from interfaces.filesystem import FileSystem
+    from cache import get_cache_manager
+    from cache.single_flight import SingleFlight
+    from interfaces.cache_protocol import CacheProtocol
+    from interfaces.filesystem import FileSystem, StatSignature
 
 
 class CachedFileSystem(FileSystem):
     """Filesystem wrapper that caches expensive operations."""
 
     def __init__(
-        self, filesystem: FileSystem, cache_manager: Optional[CacheManager] = None
+        self, filesystem: FileSystem, cache_manager: Optional[CacheProtocol] = None
     ):
         """
         Initialize cached filesystem.
@@ -29,6 +38,7 @@ class CachedFileSystem(FileSystem):
         """
         self._fs = filesystem
         self._cache = cache_manager or get_cache_manager()
+        self._flight = SingleFlight(self._cache)
 
     def exists(self, path: Union[str, Path]) -> bool:
         """Check if a file or directory exists (not cached - fast operation)."""
@@ -42,22 +52,70 @@ class CachedFileSystem(FileSystem):
         """Check if path is a directory (not cached - fast operation)."""
         return self._fs.is_dir(path)
 
-    def read_text(self, path: Union[str, Path], encoding: str = "utf-8") -> str:
-        """Read text content from a file (cached for repeated reads)."""
-        cache_params = {"path": str(path), "encoding": encoding}
+    @staticmethod
+    def _is_fresh(entry: Any, signature: StatSignature) -> bool:
+        """Check that a cached entry was stored for the given stat signature."""
+        return isinstance(entry, dict) and entry.get("stat") == list(signature)
+
+    def _signatures_match(self, entry: Any) -> bool:
+        """Check a multi-directory entry by re-stating every directory it lists."""
+        if not isinstance(entry, dict) or not isinstance(entry.get("stat"), dict):
+            return False
+        for directory, signature in entry["stat"].items():
+            current = self._fs.stat_signature(directory)
+            if (list(current) if current is not None else None) != signature:
+                return False
+        return True
+
+    def stat_signature(self, path: Union[str, Path]) -> Optional[StatSignature]:
+        """Get the stat signature of a path (not cached - it validates caches)."""
+        return self._fs.stat_signature(path)
 
-        # Try cache first
-        cached = self._cache.get("fs_read_text", cache_params)
-        if cached is not None:
-            return cached
+    def read_text(self, path: Union[str, Path], encoding: str = "utf-8") -> str:
+        """Read text content from a file (cached while the file is unchanged)."""
+        # Stat before reading so a concurrent edit can only make the entry stale
+        signature = self._fs.stat_signature(path)
+        if signature is None:
+            return self._fs.read_text(path, encoding)
 
-        # Read from filesystem
-        content = self._fs.read_text(path, encoding)
+        cache_params = {"path": str(path), "encoding": encoding}
 
-        # Cache the result
-        self._cache.set("fs_read_text", cache_params, content)
+        # Concurrent misses for the same file share one read
+        entry = self._flight.get_or_compute(
+            "fs_read_text",
+            cache_params,
+            lambda: {
+                "stat": list(signature),
+                "value": self._fs.read_text(path, encoding),
+            },
+            is_valid=lambda cached: self._is_fresh(cached, signature),
+        )
+        return entry["value"]
+
+    def read_texts(
+        self, paths: List[Union[str, Path]], encoding: str = "utf-8"
+    ) -> List[str]:
+        """Read several files with one cache lookup and one cache write."""
+        signatures = [self._fs.stat_signature(path) for path in paths]
+        params_list = [{"path": str(path), "encoding": encoding} for path in paths]
+        cached = self._cache.get_many("fs_read_text", params_list)
+
+        contents: List[str] = []
+        to_cache: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        for path, signature, params, hit in zip(
+            paths, signatures, params_list, cached
+        ):
+            if signature is not None and self._is_fresh(hit, signature):
+                contents.append(hit["value"])
+                continue
+            content = self._fs.read_text(path, encoding)
+            contents.append(content)
+            if signature is not None:
+                to_cache.append((params, {"stat": list(signature), "value": content}))
+
+        self._cache.set_many("fs_read_text", to_cache)
 
-        return content
+        return contents
 
     def write_text(
         self, path: Union[str, Path], content: str, encoding: str = "utf-8"
@@ -71,39 +129,67 @@ class CachedFileSystem(FileSystem):
         self._fs.write_text(path, content, encoding)
 
     def list_dir(self, path: Union[str, Path]) -> List[Path]:
-        """List contents of a directory (cached)."""
-        cache_params = {"path": str(path)}
-
-        # Try cache first
-        cached = self._cache.get("fs_list_dir", cache_params)
-        if cached is not None:
-            # Convert strings back to Path objects
-            return [Path(p) for p in cached]
+        """List contents of a directory (cached while its mtime is unchanged)."""
+        signature = self._fs.stat_signature(path)
+        if signature is None:
+            return self._fs.list_dir(path)
 
-        # List from filesystem
-        contents = self._fs.list_dir(path)
+        cache_params = {"path": str(path)}
 
         # Cache as strings (Path objects aren't JSON serializable)
-        self._cache.set("fs_list_dir", cache_params, [str(p) for p in contents])
-
-        return contents
+        entry = self._flight.get_or_compute(
+            "fs_list_dir",
+            cache_params,
+            lambda: {
+                "stat": list(signature),
+                "value": [str(p) for p in self._fs.list_dir(path)],
+            },
+            is_valid=lambda cached: self._is_fresh(cached, signature),
+        )
+
+        # Convert strings back to Path objects
+        return [Path(p) for p in entry["value"]]
+
+    def _glob_directories(
+        self, path: Union[str, Path], pattern: str
+    ) -> Dict[str, Optional[List[int]]]:
+        """Stat every directory whose entries can change a glob's result."""
+        directories: List[Union[str, Path]] = [path]
+        if "**" in pattern or "/" in pattern:
+            # Multi-level patterns depend on every subdirectory; creating or
+            # removing one changes its parent's mtime, so the set is closed
+            directories.extend(
+                p for p in self._fs.glob(path, "**") if self._fs.is_dir(p)
+            )
+
+        signatures: Dict[str, Optional[List[int]]] = {}
+        for directory in directories:
+            # A directory removed mid-walk is recorded as missing
+            signature = self._fs.stat_signature(directory)
+            signatures[str(directory)] = list(signature) if signature else None
+        return signatures
 
     def glob(self, path: Union[str, Path], pattern: str) -> List[Path]:
-        """Find files matching a glob pattern (cached)."""
-        cache_params = {"path": str(path), "pattern": pattern}
+        """Find files matching a glob pattern (validated by directory mtimes)."""
+        if self._fs.stat_signature(path) is None:
+            return self._fs.glob(path, pattern)
 
-        # Try cache first
-        cached = self._cache.get("fs_glob", cache_params)
-        if cached is not None:
-            return [Path(p) for p in cached]
-
-        # Glob from filesystem
-        matches = self._fs.glob(path, pattern)
-
-        # Cache as strings
-        self._cache.set("fs_glob", cache_params, [str(p) for p in matches])
+        cache_params = {"path": str(path), "pattern": pattern}
 
-        return matches
+        # Directories are stat'ed before globbing so concurrent changes can
+        # only make the entry stale, never wrong
+        entry = self._flight.get_or_compute(
+            "fs_glob",
+            cache_params,
+            lambda: {
+                "stat": self._glob_directories(path, pattern),
+                # Cache as strings
+                "value": [str(p) for p in self._fs.glob(path, pattern)],
+            },
+            is_valid=self._signatures_match,
+        )
+
+        return [Path(p) for p in entry["value"]]
 
     def mkdir(
         self, path: Union[str, Path], parents: bool = False, exist_ok: bool = False
@@ -1,24 +1,39 @@
-"""Cached Git client implementation that wraps another Git client."""
+"""Cached Git client implementation that wraps another Git client.
+
+Results that depend on the repository are stored together with the state
+token reported by the wrapped client (HEAD, refs, index and working-tree
+stats). A hit is only used while the token still matches, so entries stay
+valid for as long as the repository is unchanged and go stale the moment a
+commit, checkout, fetch or edit happens.
+"""
 
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 try:
-    from ..cache import CacheManager, get_cache_manager
+    from ..cache import get_cache_manager
+    from ..cache.single_flight import SingleFlight
+    from .cache_protocol import CacheProtocol
     from .git_client import GitClient, GitCommit, GitFileChange
 except ImportError:
     import sys
     from pathlib import Path as PathLib
+
     sys.path.insert(0, str(PathLib(__file__).parent.parent.parent))
-    from cache import CacheManager, get_cache_manager
+    from cache import get_cache_manager
+    from cache.single_flight import SingleFlight
+    from interfaces.cache_protocol import CacheProtocol
     from interfaces.git_client import GitClient, GitCommit, GitFileChange
 
+# Validated entries only expire to bound storage of repositories never revisited
+VALIDATED_TTL = 7 * 24 * 3600
+
 
 class CachedGitClient(GitClient):
     """Git client wrapper that caches expensive operations."""
 
     def __init__(
-        self, git_client: GitClient, cache_manager: Optional[CacheManager] = None
+        self, git_client: GitClient, cache_manager: Optional[CacheProtocol] = None
     ):
         """
         Initialize cached Git client.
@@ -29,27 +44,122 @@ class CachedGitClient(GitClient):
         """
         self._git = git_client
         self._cache = cache_manager or get_cache_manager()
+        self._flight = SingleFlight(self._cache)
+
+    @staticmethod
+    def _is_current(entry: Any, state: Optional[str]) -> bool:
+        """Check that a cached entry was computed in the given repository state."""
+        return (
+            isinstance(entry, dict)
+            and entry.keys() == {"state", "value"}
+            and entry["state"] == state
+        )
+
+    def _diff_state(
+        self,
+        repo_path: Union[str, Path],
+        base_ref: Optional[str],
+        head_ref: Optional[str],
+    ) -> Optional[str]:
+        """Get the repository state a diff or change list depends on."""
+        if base_ref and head_ref:
+            return self._git.get_repo_state(repo_path, refs=(base_ref, head_ref))
+        # Without both refs the working tree is compared against HEAD
+        return self._git.get_repo_state(repo_path, working_tree=True)
+
+    def _file_diff_states(
+        self,
+        repo_path: Union[str, Path],
+        file_paths: Sequence[str],
+        base_ref: Optional[str],
+        head_ref: Optional[str],
+    ) -> Dict[str, Optional[str]]:
+        """
+        Get the repository state each file's diff depends on.
+
+        The shared part is computed once for the whole batch. Working-tree
+        diffs of one file only depend on HEAD, the index and that file, so
+        they are validated without scanning the rest of the working tree.
+
+        Args:
+            repo_path: Path to the repository
+            file_paths: Files, relative to the repository root
+            base_ref: Base revision, if comparing two refs
+            head_ref: Head revision, if comparing two refs
+
+        Returns:
+            State token per file path (None if the client cannot tell)
+        """
+        if base_ref and head_ref:
+            state = self._diff_state(repo_path, base_ref, head_ref)
+            return {file_path: state for file_path in file_paths}
+
+        shared = self._git.get_repo_state(repo_path, index=True)
+        states: Dict[str, Optional[str]] = {}
+        for file_path in file_paths:
+            own = self._git.get_repo_state(repo_path, refs=(), files=(file_path,))
+            states[file_path] = (
+                None if shared is None or own is None else f"{shared}:{own}"
+            )
+        return states
+
+    def _get_validated(
+        self,
+        operation: str,
+        params: Dict[str, Any],
+        compute: Callable[[], Any],
+        state: Optional[str],
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """
+        Get a cached value computed in the current repository state.
+
+        Args:
+            operation: Cache operation name
+            params: Cache key parameters
+            compute: Produces the value on a miss or a stale hit
+            state: Current state token from the wrapped client
+            ttl: Time-to-live used when the client reports no state
+
+        Returns:
+            The cached or freshly computed value
+        """
+        entry = self._flight.get_or_compute(
+            operation,
+            params,
+            lambda: {"state": state, "value": compute()},
+            ttl=VALIDATED_TTL if state is not None else ttl,
+            is_valid=lambda cached: self._is_current(cached, state),
+        )
+        return entry["value"]
 
     def is_git_repo(self, path: Union[str, Path]) -> bool:
         """Check if path is a Git repository (not cached - fast operation)."""
         return self._git.is_git_repo(path)
 
+    def get_repo_state(
+        self,
+        repo_path: Union[str, Path],
+        refs: Sequence[str] = ("HEAD",),
+        working_tree: bool = False,
+        files: Sequence[str] = (),
+        index: bool = False,
+    ) -> Optional[str]:
+        """Get the repository state token (not cached - it validates the cache)."""
+        return self._git.get_repo_state(repo_path, refs, working_tree, files, index)
+
     def get_current_branch(self, repo_path: Union[str, Path]) -> str:
-        """Get current branch name (cached with short TTL)."""
+        """Get current branch name (cached until HEAD changes)."""
         cache_params = {"repo_path": str(repo_path)}
 
-        # Try cache first (with shorter TTL since branches can change)
-        cached = self._cache.get("git_current_branch", cache_params)
-        if cached is not None:
-            return cached
-
-        # Get from Git
-        branch = self._git.get_current_branch(repo_path)
-
-        # Cache with shorter TTL (60 seconds)
-        self._cache.set("git_current_branch", cache_params, branch, ttl=60)
-
-        return branch
+        # Clients without state tracking fall back to a short TTL
+        return self._get_validated(
+            "git_current_branch",
+            cache_params,
+            lambda: self._git.get_current_branch(repo_path),
+            self._git.get_repo_state(repo_path),
+            ttl=60,
+        )
 
     def get_changed_files(
         self,
@@ -66,31 +176,31 @@ class CachedGitClient(GitClient):
             "include_untracked": include_untracked,
         }
 
-        # Try cache first
-        cached = self._cache.get("git_changed_files", cache_params)
-        if cached is not None:
-            # Reconstruct GitFileChange objects from cached data
-            return [GitFileChange(**change_data) for change_data in cached]
-
-        # Get from Git
-        changes = self._git.get_changed_files(
-            repo_path, base_ref, head_ref, include_untracked
+        def compute() -> List[Dict[str, Any]]:
+            changes = self._git.get_changed_files(
+                repo_path, base_ref, head_ref, include_untracked
+            )
+            # Cache as dictionaries
+            return [
+                {
+                    "file_path": change.file_path,
+                    "status": change.status,
+                    "additions": change.additions,
+                    "deletions": change.deletions,
+                    "old_path": change.old_path,
+                }
+                for change in changes
+            ]
+
+        cached = self._get_validated(
+            "git_changed_files",
+            cache_params,
+            compute,
+            self._diff_state(repo_path, base_ref, head_ref),
         )
 
-        # Cache as dictionaries
-        cache_data = [
-            {
-                "file_path": change.file_path,
-                "status": change.status,
-                "additions": change.additions,
-                "deletions": change.deletions,
-                "old_path": change.old_path,
-            }
-            for change in changes
-        ]
-        self._cache.set("git_changed_files", cache_params, cache_data)
-
-        return changes
+        # Reconstruct GitFileChange objects from cached data
+        return [GitFileChange(**change_data) for change_data in cached]
 
     def get_file_diff(
         self,
@@ -107,18 +217,60 @@ class CachedGitClient(GitClient):
             "head_ref": head_ref or "default",
         }
 
-        # Try cache first
-        cached = self._cache.get("git_file_diff", cache_params)
-        if cached is not None:
-            return cached
-
-        # Get from Git
-        diff = self._git.get_file_diff(repo_path, file_path, base_ref, head_ref)
+        return self._get_validated(
+            "git_file_diff",
+            cache_params,
+            lambda: self._git.get_file_diff(repo_path, file_path, base_ref, head_ref),
+            self._file_diff_states(repo_path, [file_path], base_ref, head_ref)[
+                file_path
+            ],
+        )
 
-        # Cache the result
-        self._cache.set("git_file_diff", cache_params, diff)
+    def get_file_diffs(
+        self,
+        repo_path: Union[str, Path],
+        file_paths: List[str],
+        base_ref: Optional[str] = None,
+        head_ref: Optional[str] = None,
+    ) -> Dict[str, str]:
+        """Get diffs for several files with one cache lookup and one write."""
+        params_list = [
+            {
+                "repo_path": str(repo_path),
+                "file_path": file_path,
+                "base_ref": base_ref or "default",
+                "head_ref": head_ref or "default",
+            }
+            for file_path in file_paths
+        ]
+        states = self._file_diff_states(repo_path, file_paths, base_ref, head_ref)
+        cached = self._cache.get_many("git_file_diff", params_list)
+
+        diffs: Dict[str, str] = {}
+        to_cache: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        stale = 0
+        for file_path, params, hit in zip(file_paths, params_list, cached):
+            state = states[file_path]
+            if self._is_current(hit, state):
+                diffs[file_path] = hit["value"]
+                continue
+            if hit is not None:
+                stale += 1
+            diff = self._git.get_file_diff(repo_path, file_path, base_ref, head_ref)
+            diffs[file_path] = diff
+            to_cache.append((params, {"state": state, "value": diff}))
+
+        record_stale = getattr(self._cache, "record_stale", None)
+        if stale and record_stale is not None:
+            record_stale("git_file_diff", stale)
+
+        self._cache.set_many(
+            "git_file_diff",
+            to_cache,
+            ttl=VALIDATED_TTL if None not in states.values() else None,
+        )
 
-        return diff
+        return diffs
 
     def get_remote_url(
         self, repo_path: Union[str, Path], remote: str = "origin"
@@ -126,37 +278,24 @@ class CachedGitClient(GitClient):
         """Get remote URL (cached)."""
         cache_params = {"repo_path": str(repo_path), "remote": remote}
 
-        # Try cache first
-        cached = self._cache.get("git_remote_url", cache_params)
-        if cached is not None:
-            return cached if cached != "None" else None
-
-        # Get from Git
-        url = self._git.get_remote_url(repo_path, remote)
-
-        # Cache the result (store "None" string for null values)
-        self._cache.set(
-            "git_remote_url", cache_params, url if url is not None else "None"
-        )
+        def compute() -> str:
+            url = self._git.get_remote_url(repo_path, remote)
+            # Store "None" string for null values
+            return url if url is not None else "None"
 
-        return url
+        cached = self._flight.get_or_compute("git_remote_url", cache_params, compute)
+        return cached if cached != "None" else None
 
     def get_repo_root(self, path: Union[str, Path]) -> Optional[Path]:
         """Get repository root directory (cached)."""
         cache_params = {"path": str(path)}
 
-        # Try cache first
-        cached = self._cache.get("git_repo_root", cache_params)
-        if cached is not None:
-            return Path(cached) if cached != "None" else None
+        def compute() -> str:
+            root = self._git.get_repo_root(path)
+            return str(root) if root else "None"
 
-        # Get from Git
-        root = self._git.get_repo_root(path)
-
-        # Cache the result
-        self._cache.set("git_repo_root", cache_params, str(root) if root else "None")
-
-        return root
+        cached = self._flight.get_or_compute("git_repo_root", cache_params, compute)
+        return Path(cached) if cached != "None" else None
 
     def get_commits(
         self, repo_path: Union[str, Path], branch: Optional[str] = None, limit: int = 10
@@ -168,28 +307,28 @@ class CachedGitClient(GitClient):
             "limit": limit,
         }
 
-        # Try cache first
-        cached = self._cache.get("git_commits", cache_params)
-        if cached is not None:
-            # Reconstruct GitCommit objects from cached data
-            return [GitCommit(**commit_data) for commit_data in cached]
-
-        # Get from Git
-        commits = self._git.get_commits(repo_path, branch, limit)
-
-        # Cache as dictionaries
-        cache_data = [
-            {
-                "sha": commit.sha,
-                "author": commit.author,
-                "date": commit.date,
-                "message": commit.message,
-            }
-            for commit in commits
-        ]
-        self._cache.set("git_commits", cache_params, cache_data)
+        def compute() -> List[Dict[str, Any]]:
+            commits = self._git.get_commits(repo_path, branch, limit)
+            # Cache as dictionaries
+            return [
+                {
+                    "sha": commit.sha,
+                    "author": commit.author,
+                    "date": commit.date,
+                    "message": commit.message,
+                }
+                for commit in commits
+            ]
+
+        cached = self._get_validated(
+            "git_commits",
+            cache_params,
+            compute,
+            self._git.get_repo_state(repo_path, refs=(branch or "HEAD",)),
+        )
 
-        return commits
+        # Reconstruct GitCommit objects from cached data
+        return [GitCommit(**commit_data) for commit_data in cached]
 
     def get_file_content(
         self, repo_path: Union[str, Path], file_path: str, ref: Optional[str] = None
@@ -201,20 +340,18 @@ class CachedGitClient(GitClient):
             "ref": ref or "working_tree",
         }
 
-        # Try cache first
-        cached = self._cache.get("git_file_content", cache_params)
-        if cached is not None:
-            return cached if cached != "None" else None
+        def compute() -> str:
+            content = self._git.get_file_content(repo_path, file_path, ref)
+            # Store "None" string for null values
+            return content if content is not None else "None"
 
-        # Get from Git
-        content = self._git.get_file_content(repo_path, file_path, ref)
-
-        # Cache the result (store "None" string for null values)
-        self._cache.set(
-            "git_file_content", cache_params, content if content is not None else "None"
-        )
-
-        return content
+        if ref:
+            state = self._git.get_repo_state(repo_path, refs=(ref,))
+        else:
+            # Working-tree content is read from disk, so only the file matters
+            state = self._git.get_repo_state(repo_path, refs=(), files=(file_path,))
+        cached = self._get_validated("git_file_content", cache_params, compute, state)
+        return cached if cached != "None" else None
 
     def invalidate_cache(
         self, operation: Optional[str] = None, repo_path: Optional[Path] = None
@@ -1,6 +1,10 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import List, Union
+from typing import List, Optional, Tuple, Union
+
+# (st_mtime_ns, st_size, st_ino): changes whenever a file's content or a
+# directory's entries change
+StatSignature = Tuple[int, int, int]
 
 
 class FileSystem(ABC):
@@ -21,11 +25,26 @@ class FileSystem(ABC):
         """Check if path is a directory."""
         pass
 
+    def stat_signature(self, path: Union[str, Path]) -> Optional[StatSignature]:
+        """
+        Get a cheap signature that changes when the path is modified.
+
+        For directories the signature changes when entries are added or removed.
+        Implementations that cannot stat return None, which disables caching.
+        """
+        return None
+
     @abstractmethod
     def read_text(self, path: Union[str, Path], encoding: str = "utf-8") -> str:
         """Read text content from a file."""
         pass
 
+    def read_texts(
+        self, paths: List[Union[str, Path]], encoding: str = "utf-8"
+    ) -> List[str]:
+        """Read text content from several files, in order."""
+        return [self.read_text(path, encoding) for path in paths]
+
     @abstractmethod
     def write_text(
         self, path: Union[str, Path], content: str, encoding: str = "utf-8"
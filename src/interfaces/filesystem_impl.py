@@ -1,10 +1,12 @@
+import itertools
+import os
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 
 try:
-    from .filesystem import FileSystem
+    from .filesystem import FileSystem, StatSignature
 except ImportError:
-    from filesystem import FileSystem
+    from filesystem import FileSystem, StatSignature
 
 
 class ProductionFileSystem(FileSystem):
@@ -19,6 +21,13 @@ class ProductionFileSystem(FileSystem):
     def is_dir(self, path: Union[str, Path]) -> bool:
         return Path(path).is_dir()
 
+    def stat_signature(self, path: Union[str, Path]) -> Optional[StatSignature]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
     def read_text(self, path: Union[str, Path], encoding: str = "utf-8") -> str:
         return Path(path).read_text(encoding=encoding)
 
@@ -58,6 +67,11 @@ class InMemoryFileSystem(FileSystem):
         self._files: Dict[str, str] = {}
         self._dirs: set[str] = {"/"}
         self._cwd = Path("/")
+        # Simulated stat data: a logical clock stands in for mtime and every
+        # created path gets a fresh inode number
+        self._clock = itertools.count(1)
+        self._inodes = itertools.count(1)
+        self._stats: Dict[str, List[int]] = {"/": [0, next(self._inodes)]}
 
     def _normalize_path(self, path: Union[str, Path]) -> str:
         """Normalize path to absolute string format."""
@@ -66,6 +80,11 @@ class InMemoryFileSystem(FileSystem):
             p = self._cwd / p
         return str(p.resolve())
 
+    def _touch(self, norm_path: str) -> None:
+        """Record a modification of a path, creating its stat data if needed."""
+        stats = self._stats.setdefault(norm_path, [0, next(self._inodes)])
+        stats[0] = next(self._clock)
+
     def exists(self, path: Union[str, Path]) -> bool:
         norm_path = self._normalize_path(path)
         return norm_path in self._files or norm_path in self._dirs
@@ -76,6 +95,17 @@ class InMemoryFileSystem(FileSystem):
     def is_dir(self, path: Union[str, Path]) -> bool:
         return self._normalize_path(path) in self._dirs
 
+    def stat_signature(self, path: Union[str, Path]) -> Optional[StatSignature]:
+        norm_path = self._normalize_path(path)
+        if norm_path in self._files:
+            size = len(self._files[norm_path].encode("utf-8"))
+        elif norm_path in self._dirs:
+            size = 0
+        else:
+            return None
+        mtime, inode = self._stats[norm_path]
+        return (mtime, size, inode)
+
     def read_text(self, path: Union[str, Path], encoding: str = "utf-8") -> str:
         norm_path = self._normalize_path(path)
         if norm_path not in self._files:
@@ -89,7 +119,10 @@ class InMemoryFileSystem(FileSystem):
         parent = str(Path(norm_path).parent)
         if parent not in self._dirs:
             raise FileNotFoundError(f"Parent directory does not exist: {parent}")
+        if norm_path not in self._files:
+            self._touch(parent)
         self._files[norm_path] = content
+        self._touch(norm_path)
 
     def list_dir(self, path: Union[str, Path]) -> List[Path]:
         norm_path = self._normalize_path(path)
@@ -155,12 +188,16 @@ class InMemoryFileSystem(FileSystem):
                 raise FileNotFoundError(f"Parent directory does not exist: {parent}")
 
         self._dirs.add(norm_path)
+        self._touch(norm_path)
+        self._touch(parent)
 
     def remove(self, path: Union[str, Path]) -> None:
         norm_path = self._normalize_path(path)
         if norm_path not in self._files:
             raise FileNotFoundError(f"No such file: {path}")
         del self._files[norm_path]
+        del self._stats[norm_path]
+        self._touch(str(Path(norm_path).parent))
 
     def rmdir(self, path: Union[str, Path]) -> None:
         norm_path = self._normalize_path(path)
@@ -180,6 +217,8 @@ class InMemoryFileSystem(FileSystem):
                 raise OSError(f"Directory not empty: {path}")
 
         self._dirs.remove(norm_path)
+        del self._stats[norm_path]
+        self._touch(str(Path(norm_path).parent))
 
     def get_cwd(self) -> Path:
         return self._cwd
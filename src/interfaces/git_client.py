@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Sequence, Union
 
 
 @dataclass(frozen=True)
@@ -43,6 +43,34 @@ class GitClient(ABC):
         """Get the name of the current branch."""
         pass
 
+    def get_repo_state(
+        self,
+        repo_path: Union[str, Path],
+        refs: Sequence[str] = ("HEAD",),
+        working_tree: bool = False,
+        files: Sequence[str] = (),
+        index: bool = False,
+    ) -> Optional[str]:
+        """
+        Get a cheap token that changes whenever a result may have changed.
+
+        Implementations that cannot tell return None, which limits caching
+        of git results to a time-to-live.
+
+        Args:
+            repo_path: Path to the repository
+            refs: Revisions the result depends on ("HEAD" covers checkouts)
+            working_tree: Whether the result depends on the index and on
+                uncommitted files
+            files: Files, relative to repo root, read directly from disk
+            index: Whether the result depends on the index (implied by
+                working_tree), without scanning the working tree
+
+        Returns:
+            Opaque state token, or None if unsupported
+        """
+        return None
+
     @abstractmethod
     def get_changed_files(
         self,
@@ -87,6 +115,30 @@ class GitClient(ABC):
         """
         pass
 
+    def get_file_diffs(
+        self,
+        repo_path: Union[str, Path],
+        file_paths: List[str],
+        base_ref: Optional[str] = None,
+        head_ref: Optional[str] = None,
+    ) -> Dict[str, str]:
+        """
+        Get diffs for several files.
+
+        Args:
+            repo_path: Path to the repository
+            file_paths: Paths to the files relative to repo root
+            base_ref: Base reference to compare against
+            head_ref: Head reference to compare
+
+        Returns:
+            Mapping of file path to diff content
+        """
+        return {
+            file_path: self.get_file_diff(repo_path, file_path, base_ref, head_ref)
+            for file_path in file_paths
+        }
+
     @abstractmethod
     def get_commits(
         self, repo_path: Union[str, Path], branch: Optional[str] = None, limit: int = 10
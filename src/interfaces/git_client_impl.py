@@ -1,6 +1,7 @@
+import itertools
 import subprocess
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Sequence, Union
 
 try:
     from ..progress import progress
@@ -16,6 +17,9 @@ except ImportError:
 class ProductionGitClient(GitClient):
     """Production implementation of GitClient using actual git commands."""
 
+    def __init__(self):
+        self._fingerprint = None
+
     def _run_git_command(self, cmd: List[str], cwd: Union[str, Path]) -> str:
         """Run a git command and return output."""
         try:
@@ -43,6 +47,31 @@ class ProductionGitClient(GitClient):
     def get_current_branch(self, repo_path: Union[str, Path]) -> str:
         return self._run_git_command(["branch", "--show-current"], repo_path)
 
+    def get_repo_state(
+        self,
+        repo_path: Union[str, Path],
+        refs: Sequence[str] = ("HEAD",),
+        working_tree: bool = False,
+        files: Sequence[str] = (),
+        index: bool = False,
+    ) -> Optional[str]:
+        if self._fingerprint is None:
+            # Imported lazily: the services package depends on this one
+            try:
+                from ..services.project_fingerprint import ProjectFingerprint
+            except ImportError:
+                from services.project_fingerprint import ProjectFingerprint
+            self._fingerprint = ProjectFingerprint()
+
+        components = ["refs", "files"]
+        if working_tree or index:
+            components.append("index")
+        if working_tree:
+            components.append("worktree")
+        return self._fingerprint.compute(
+            repo_path, components=components, refs=refs, files=files
+        ).digest
+
     def get_changed_files(
         self,
         repo_path: Union[str, Path],
@@ -206,6 +235,7 @@ class InMemoryGitClient(GitClient):
 
     def __init__(self):
         self._repos: Dict[str, Dict[str, Any]] = {}
+        self._generations = itertools.count()
 
     def setup_repo(
         self,
@@ -222,6 +252,8 @@ class InMemoryGitClient(GitClient):
             "changes": changes or [],
             "commits": commits or [],
             "remotes": {"origin": "https://github.com/test/repo.git"},
+            # Every setup counts as a repository change
+            "generation": next(self._generations),
         }
 
     def is_git_repo(self, path: Union[str, Path]) -> bool:
@@ -241,6 +273,19 @@ class InMemoryGitClient(GitClient):
             return self._repos[repo_path_str]["current_branch"]
         raise RuntimeError(f"Not a git repository: {repo_path}")
 
+    def get_repo_state(
+        self,
+        repo_path: Union[str, Path],
+        refs: Sequence[str] = ("HEAD",),
+        working_tree: bool = False,
+        files: Sequence[str] = (),
+        index: bool = False,
+    ) -> Optional[str]:
+        repo_path_str = str(Path(repo_path).resolve())
+        if repo_path_str in self._repos:
+            return str(self._repos[repo_path_str]["generation"])
+        return "no-repo"
+
     def get_changed_files(
         self,
         repo_path: Union[str, Path],
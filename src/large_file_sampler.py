@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Sampling of changed files longer than MAX_FILE_CONTENT_LINES.
+
+Changed files used to be cut after their first MAX_FILE_CONTENT_LINES
+lines, hiding every change further down. A file over the limit is now
+represented, within the same number of lines, by:
+
+    outline  definition lines (classes, functions, headings) with numbers
+    regions  the changed hunks of its diff with a few lines of context
+    head     the first lines, given whatever budget the rest leaves
+    tail     the last lines
+
+The file is read once, line by line: only the head, the lines of selected
+regions, bounded outline entries and a rolling tail are kept, so giant
+files are never loaded into memory as a whole.
+"""
+
+import logging
+import os
+import re
+import subprocess
+from collections import deque
+from itertools import islice
+from typing import Callable, Deque, Dict, Iterable, List, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Context lines shown around each changed hunk
+HUNK_CONTEXT_LINES = 3
+# Share of the per-file line budget reserved for the outline
+OUTLINE_SHARE = 0.3
+MIN_HEAD_LINES = 10
+TAIL_LINES = 10
+
+_MARKDOWN_EXTENSIONS = {".md", ".markdown", ".mdx"}
+_DEFINITION = re.compile(
+    r"^\s*(?:(?:export|default|public|private|protected|internal|static|async"
+    r"|abstract|final|pub)\s+)*"
+    r"(?:def|class|function|interface|struct|enum|trait|impl|fn|func|module"
+    r"|type)\b"
+)
+_HEADING = re.compile(r"^#{1,6}\s")
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+# Inclusive 1-based line range
+LineRange = Tuple[int, int]
+
+# First line of every sampled file
+SAMPLE_HEADER = "[Large file: "
+_SAMPLE_TOTAL = re.compile(re.escape(SAMPLE_HEADER) + r"([\d,]+) lines")
+_NUMBERED_LINE = re.compile(r"^ *\d+ \| ")
+
+
+def outline_pattern(path: str) -> Pattern[str]:
+    """
+    Get the pattern of outline lines for a file.
+
+    Args:
+        path: File path, used for its extension
+
+    Returns:
+        Markdown heading pattern for markdown files, definition pattern otherwise
+    """
+    extension = os.path.splitext(path)[1].lower()
+    return _HEADING if extension in _MARKDOWN_EXTENSIONS else _DEFINITION
+
+
+def numbered_outline(path: str, content: str) -> Tuple[str, int]:
+    """
+    Extract the numbered outline lines of a file's content.
+
+    Samples already hold an outline numbered by the lines of the whole
+    file, which is returned as it is.
+
+    Args:
+        path: File path, used for its extension
+        content: Complete file content, or a sample from read_for_review
+
+    Returns:
+        Tuple of (definition lines, or headings for markdown, with their
+        line numbers; number of lines in the file)
+    """
+    lines = content.splitlines()
+    total = _SAMPLE_TOTAL.match(content)
+    if total:
+        sampled: List[str] = []
+        in_outline = False
+        for line in lines[1:]:
+            if line.startswith("[Outline: "):
+                in_outline = True
+            elif in_outline and _NUMBERED_LINE.match(line):
+                sampled.append(line)
+            elif in_outline:
+                break
+        return "\n".join(sampled), int(total.group(1).replace(",", ""))
+
+    pattern = outline_pattern(path)
+    outline = (
+        f"{number:6d} | {line.rstrip()}"
+        for number, line in enumerate(lines, 1)
+        if pattern.match(line)
+    )
+    return "\n".join(outline), len(lines)
+
+
+def is_sampled(content: str) -> bool:
+    """Check whether changed-file content is a sample from read_for_review."""
+    return content.startswith(SAMPLE_HEADER)
+
+
+def changed_line_ranges(project_path: str, relative_path: str) -> List[LineRange]:
+    """
+    Get the lines of a file changed since HEAD.
+
+    Args:
+        project_path: Repository root
+        relative_path: File path relative to the root
+
+    Returns:
+        Line ranges in the working tree version; a deletion is shown as the
+        line it happened at. Empty if git has no diff for the file.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "diff", "-U0", "--no-color", "HEAD", "--", relative_path],
+            cwd=project_path,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        logger.debug(f"No diff for {relative_path}: {e}")
+        return []
+    ranges: List[LineRange] = []
+    for line in result.stdout.splitlines():
+        match = _HUNK_HEADER.match(line)
+        if match:
+            start = int(match.group(1))
+            count = int(match.group(2)) if match.group(2) is not None else 1
+            ranges.append((max(start, 1), max(start + count - 1, start, 1)))
+    return ranges
+
+
+def _merge(ranges: Iterable[LineRange]) -> List[LineRange]:
+    """Merge overlapping or adjacent ranges."""
+    merged: List[LineRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _select_regions(
+    ranges: List[LineRange], budget: int
+) -> Tuple[List[LineRange], int]:
+    """Pick changed regions with context, in file order, up to a line budget."""
+    regions: List[LineRange] = []
+    omitted = 0
+    remaining = budget
+    for start, end in _merge(
+        (max(start - HUNK_CONTEXT_LINES, 1), end + HUNK_CONTEXT_LINES)
+        for start, end in ranges
+    ):
+        if remaining <= 0:
+            omitted += 1
+            continue
+        end = min(end, start + remaining - 1)
+        regions.append((start, end))
+        remaining -= end - start + 1
+    return regions, omitted
+
+
+def read_for_review(
+    path: str,
+    max_lines: int,
+    changed_ranges: Callable[[], List[LineRange]] = lambda: [],
+) -> str:
+    """
+    Read a changed file, sampling it if it is longer than max_lines.
+
+    Args:
+        path: File to read
+        max_lines: Per-file line budget
+        changed_ranges: Returns the changed line ranges; only called for
+            files over the budget
+
+    Returns:
+        The file content, or an outline with the changed regions, head and
+        tail in at most about max_lines lines
+
+    Raises:
+        OSError, UnicodeDecodeError: If the file cannot be read as text
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        head = list(islice(f, max_lines + 1))
+        if len(head) <= max_lines:
+            return "".join(head).rstrip("\n")
+        return _sample(path, head, f, max_lines, changed_ranges())
+
+
+def _sample(
+    path: str,
+    head: List[str],
+    rest: Iterable[str],
+    budget: int,
+    ranges: List[LineRange],
+) -> str:
+    """Stream the rest of an oversized file and assemble its sample."""
+    tail_lines = min(TAIL_LINES, budget // 10)
+    outline_cap = int(budget * OUTLINE_SHARE)
+    regions, omitted_regions = _select_regions(
+        ranges, budget - outline_cap - tail_lines - min(MIN_HEAD_LINES, budget // 10)
+    )
+    pattern = outline_pattern(path)
+
+    # Top-level definitions first, so the outline of a huge file spans all of it
+    top_level: List[Tuple[int, str]] = []
+    nested: List[Tuple[int, str]] = []
+    outline_total = 0
+    kept: Dict[int, str] = {}
+    tail: Deque[Tuple[int, str]] = deque(maxlen=tail_lines)
+    region_index = 0
+    total = 0
+    for number, line in enumerate(_chain(head, rest), 1):
+        total = number
+        if pattern.match(line):
+            outline_total += 1
+            entries = nested if line[:1].isspace() else top_level
+            if len(entries) < outline_cap:
+                entries.append((number, line.rstrip()))
+        if number > len(head):
+            while region_index < len(regions) and regions[region_index][1] < number:
+                region_index += 1
+            if region_index < len(regions) and regions[region_index][0] <= number:
+                kept[number] = line
+            if tail_lines:
+                tail.append((number, line))
+
+    for number, line in tail:
+        kept[number] = line
+    for number, line in enumerate(head, 1):
+        kept[number] = line
+
+    outline = sorted(top_level + nested[: outline_cap - len(top_level)])
+    region_lines = sum(end - start + 1 for start, end in regions)
+    head_lines = max(budget - len(outline) - tail_lines - region_lines, 0)
+    shown = list(regions)
+    if head_lines:
+        shown.append((1, head_lines))
+    if tail_lines:
+        shown.append((total - tail_lines + 1, total))
+
+    parts = [
+        f"{SAMPLE_HEADER}{total:,} lines, over the {budget}-line limit. Showing "
+        "an outline, the changed regions and the first and last lines]"
+    ]
+    if outline:
+        more = outline_total - len(outline)
+        parts.append(f"[Outline: {outline_total} definitions]")
+        parts.extend(f"{number:6d} | {line}" for number, line in outline)
+        if more:
+            parts.append(f"[... {more} more definitions]")
+    changed = _merge(ranges)
+    for start, end in _merge(shown):
+        end = min(end, total)
+        if start > end:
+            continue  # the diff is older than the file
+        label = (
+            ", changed"
+            if any(start <= c_end and c_start <= end for c_start, c_end in changed)
+            else ""
+        )
+        parts.append(f"[Lines {start}-{end}{label}]")
+        parts.append(
+            "".join(kept.get(number, "\n") for number in range(start, end + 1)).rstrip(
+                "\n"
+            )
+        )
+    if omitted_regions:
+        parts.append(
+            f"[{omitted_regions} more changed regions omitted to fit the "
+            f"{budget}-line limit]"
+        )
+    return "\n".join(parts)
+
+
+def _chain(head: List[str], rest: Iterable[str]) -> Iterable[str]:
+    """Iterate the lines already read, then the rest of the file."""
+    yield from head
+    yield from rest
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Persistent line index for repeated line-range reads of large files.
+
+Agents ask about the same large files again and again with different line
+ranges, and each read used to scan the file from its first line. The second
+range read of a file of at least GEMINI_LINE_INDEX_MIN_BYTES builds an index
+of it in one pass:
+
+    offsets  array('Q') of the byte offset where each line starts, plus
+             the file size
+    tokens   array('Q') prefix sums of the raw token counts of the lines
+             as format_file_content numbers them
+
+The index is keyed by the file's stat signature and kept in the shared
+cache, so later reads of any range seek straight to its bytes, and the
+token estimate of any range is two lookups, available before any content
+is read.
+"""
+
+import logging
+import os
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+try:
+    from .interfaces.filesystem import StatSignature
+    from .token_estimator import get_token_estimator, measure_lines
+except ImportError:
+    from interfaces.filesystem import StatSignature
+    from token_estimator import get_token_estimator, measure_lines
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored layout or the token counting changes
+LINE_INDEX_VERSION = 1
+LINE_INDEX_OPERATION = "line_index"
+# Entries are keyed by stat signature, so they never go stale; the TTL only
+# lets indexes of files that are no longer read expire
+LINE_INDEX_TTL = 7 * 24 * 3600
+
+# Smaller files are read faster than an index is built and looked up
+DEFAULT_MIN_BYTES = 1 << 20
+# Indexes kept decoded in memory, for repeated reads within one process
+_MEMO_SIZE = 16
+# Files whose read count or indexing failure is remembered
+_SEEN_SIZE = 256
+
+# Inclusive 1-based line range
+LineRange = Tuple[int, int]
+
+_HEADER = struct.Struct("<QH")
+
+
+class UnsupportedNewlinesError(ValueError):
+    """A file uses lone carriage returns, which text mode reads as newlines."""
+
+
+def number_prefix(line_number: int) -> str:
+    """
+    Get the prefix format_file_content puts before a line.
+
+    Args:
+        line_number: 1-based line number
+
+    Returns:
+        The right-aligned line number and separator
+    """
+    return f"{line_number:6d} | "
+
+
+def line_index_min_bytes() -> int:
+    """
+    Read the indexing threshold from GEMINI_LINE_INDEX_MIN_BYTES.
+
+    Returns:
+        Minimum size of an indexed file in bytes, 0 when indexing is off
+    """
+    setting = os.getenv("GEMINI_LINE_INDEX_MIN_BYTES")
+    if setting is None:
+        return DEFAULT_MIN_BYTES
+    if setting.strip().lower() in ("", "off", "none", "false", "0"):
+        return 0
+    try:
+        min_bytes = int(setting)
+        if min_bytes < 0:
+            raise ValueError(setting)
+        return min_bytes
+    except ValueError:
+        logger.warning(
+            f"Invalid GEMINI_LINE_INDEX_MIN_BYTES='{setting}', "
+            f"using {DEFAULT_MIN_BYTES}"
+        )
+        return DEFAULT_MIN_BYTES
+
+
+class LineIndex:
+    """Byte offsets and token prefix sums of the lines of one file version."""
+
+    def __init__(self, content_class: str, offsets: array, tokens: array):
+        """
+        Initialize the index.
+
+        Args:
+            content_class: Token estimator content class of the numbered file
+            offsets: Start offset of every line, then the file size
+            tokens: 0, then the running raw token count after every line
+        """
+        self.content_class = content_class
+        self.offsets = offsets
+        self.tokens = tokens
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines, counted the way readlines() splits them."""
+        return len(self.offsets) - 1
+
+    def raw_tokens(self, start: int, end: int) -> int:
+        """
+        Get the raw token count of a range of numbered lines.
+
+        Args:
+            start: First line (1-based)
+            end: Last line, inclusive, at most line_count
+
+        Returns:
+            Raw token count, to be calibrated for content_class
+        """
+        return self.tokens[end] - self.tokens[start - 1]
+
+    def read(self, f: Any, start: int, end: int) -> str:
+        """
+        Read a range of lines.
+
+        Args:
+            f: The indexed file, opened in binary mode
+            start: First line (1-based)
+            end: Last line, inclusive, at most line_count
+
+        Returns:
+            The lines with their line endings, as text mode would read them
+        """
+        f.seek(self.offsets[start - 1])
+        data = f.read(self.offsets[end] - self.offsets[start - 1])
+        return data.decode("utf-8").replace("\r\n", "\n")
+
+    def to_bytes(self) -> bytes:
+        """Serialize the index for the cache."""
+        content_class = self.content_class.encode("utf-8")
+        return b"".join(
+            (
+                _HEADER.pack(self.line_count, len(content_class)),
+                content_class,
+                self.offsets.tobytes(),
+                self.tokens.tobytes(),
+            )
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "LineIndex":
+        """
+        Deserialize an index written by to_bytes.
+
+        Args:
+            data: Serialized index
+
+        Returns:
+            LineIndex
+
+        Raises:
+            ValueError: If the data is truncated
+        """
+        line_count, class_length = _HEADER.unpack_from(data)
+        position = _HEADER.size
+        content_class = data[position : position + class_length].decode("utf-8")
+        position += class_length
+        array_bytes = (line_count + 1) * 8
+        if len(data) != position + 2 * array_bytes:
+            raise ValueError("Truncated line index")
+        offsets = array("Q", data[position : position + array_bytes])
+        tokens = array("Q", data[position + array_bytes :])
+        return cls(content_class, offsets, tokens)
+
+
+def _numbered_lines(f: Any, offsets: array) -> Iterator[str]:
+    """Decode a binary file line by line, recording where each line ends."""
+    offset = 0
+    for number, raw in enumerate(f, 1):
+        carriage_returns = raw.count(b"\r")
+        if carriage_returns and (carriage_returns > 1 or not raw.endswith(b"\r\n")):
+            raise UnsupportedNewlinesError(f"Lone carriage return in line {number}")
+        offset += len(raw)
+        offsets.append(offset)
+        line = raw.decode("utf-8")
+        if carriage_returns:
+            line = line[:-2] + "\n"
+        yield number_prefix(number) + line
+
+
+def build_line_index(path: str) -> LineIndex:
+    """
+    Index a file in one pass.
+
+    Args:
+        path: File to index
+
+    Returns:
+        LineIndex of the file as it is now
+
+    Raises:
+        OSError, UnicodeDecodeError: If the file cannot be read as text
+        UnsupportedNewlinesError: If the file has lone carriage returns
+    """
+    offsets = array("Q", [0])
+    with open(path, "rb") as f:
+        content_class, counts = measure_lines(_numbered_lines(f, offsets), path)
+    tokens = array("Q", [0])
+    running = 0
+    for count in counts:
+        running += count
+        tokens.append(running)
+    return LineIndex(content_class, offsets, tokens)
+
+
+def _note_version(
+    versions: "OrderedDict[str, StatSignature]", path: str, signature: StatSignature
+) -> None:
+    """Record a file's current version, forgetting least recently seen files."""
+    versions[path] = signature
+    versions.move_to_end(path)
+    if len(versions) > _SEEN_SIZE:
+        versions.popitem(last=False)
+
+
+def _stat_signature(path: str) -> Optional[StatSignature]:
+    """Get the signature that changes whenever the file changes."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class LineIndexStore:
+    """Line indexes of large files, cached per file version."""
+
+    def __init__(self, cache: Optional[Any] = None, min_bytes: int = DEFAULT_MIN_BYTES):
+        """
+        Initialize the store.
+
+        Args:
+            cache: Cache for indexes across processes, if any
+            min_bytes: Minimum size of an indexed file, 0 to never index
+        """
+        self._cache = cache
+        self.min_bytes = min_bytes
+        self._memo: "OrderedDict[Tuple[str, StatSignature], LineIndex]" = OrderedDict()
+        # Current version of files read once, and of files that cannot be
+        # indexed; a path's newer version replaces the older one
+        self._read_once: "OrderedDict[str, StatSignature]" = OrderedDict()
+        self._unindexable: "OrderedDict[str, StatSignature]" = OrderedDict()
+
+    def get(self, path: str) -> Optional[LineIndex]:
+        """
+        Get the index of a file if one has been built.
+
+        Args:
+            path: Absolute path of the file
+
+        Returns:
+            LineIndex of the current file version, or None
+        """
+        key = self._key(path)
+        if key is None:
+            return None
+        index = self._memo.get(key)
+        if index is not None:
+            self._memo.move_to_end(key)
+            return index
+        index = self._lookup(*key)
+        if index is not None:
+            self._remember(key, index)
+        return index
+
+    def get_for_read(self, path: str) -> Optional[LineIndex]:
+        """
+        Get the index of a file about to be read, building it when useful.
+
+        Building costs a full read of the file, so it happens on the second
+        range read of a file version; a file read once is not indexed.
+
+        Args:
+            path: Absolute path of the file
+
+        Returns:
+            LineIndex, or None if the file is too small, read for the first
+            time or cannot be indexed (read errors are left to the caller)
+        """
+        index = self.get(path)
+        key = self._key(path)
+        if index is not None or key is None or self._unindexable.get(path) == key[1]:
+            return index
+        if self._read_once.get(path) != key[1]:
+            _note_version(self._read_once, *key)
+            return None
+
+        del self._read_once[path]
+        try:
+            index = build_line_index(path)
+        except (OSError, UnicodeDecodeError, UnsupportedNewlinesError) as e:
+            logger.debug(f"Not indexing {path}: {e}")
+            _note_version(self._unindexable, *key)
+            return None
+        # A file modified while it was read must not be kept as the old version
+        if self._key(path) != key:
+            return index
+        self._store(*key, index)
+        self._remember(key, index)
+        return index
+
+    def _key(self, path: str) -> Optional[Tuple[str, StatSignature]]:
+        """Identify the current version of a file large enough to index."""
+        signature = _stat_signature(path)
+        if not self.min_bytes or signature is None or signature[1] < self.min_bytes:
+            return None
+        return path, signature
+
+    def _remember(self, key: Tuple[str, StatSignature], index: LineIndex) -> None:
+        """Keep an index decoded in memory."""
+        self._memo[key] = index
+        if len(self._memo) > _MEMO_SIZE:
+            self._memo.popitem(last=False)
+
+    def _lookup(self, path: str, signature: StatSignature) -> Optional[LineIndex]:
+        """Read a cached index."""
+        if self._cache is None:
+            return None
+        try:
+            cached = self._cache.get(LINE_INDEX_OPERATION, _params(path, signature))
+            return LineIndex.from_bytes(cached) if cached else None
+        except Exception as e:
+            logger.debug(f"Failed to read cached line index of {path}: {e}")
+            return None
+
+    def _store(self, path: str, signature: StatSignature, index: LineIndex) -> None:
+        """Cache an index."""
+        if self._cache is None:
+            return
+        try:
+            self._cache.set(
+                LINE_INDEX_OPERATION,
+                _params(path, signature),
+                index.to_bytes(),
+                LINE_INDEX_TTL,
+            )
+        except Exception as e:
+            logger.debug(f"Failed to cache line index of {path}: {e}")
+
+
+def _params(path: str, signature: StatSignature) -> Dict[str, Any]:
+    """Cache key of a file version's index."""
+    return {
+        "path": path,
+        "signature": list(signature),
+        "version": LINE_INDEX_VERSION,
+        # Arrays are stored in native byte order
+        "byteorder": sys.byteorder,
+    }
+
+
+def estimate_range_tokens(index: LineIndex, intervals: Iterable[LineRange]) -> int:
+    """
+    Estimate the tokens of numbered line ranges without reading them.
+
+    Args:
+        index: Index of the file
+        intervals: Disjoint line ranges within the file
+
+    Returns:
+        Estimated token count of the ranges as format_file_content numbers them
+    """
+    raw = sum(index.raw_tokens(start, end) for start, end in intervals)
+    return get_token_estimator().calibrated(index.content_class, raw)
+
+
+_store: Optional[LineIndexStore] = None
+
+
+def get_line_index_store() -> LineIndexStore:
+    """
+    Get the shared line index store.
+
+    Uses the metadata cache when available and GEMINI_LINE_INDEX_MIN_BYTES
+    as the indexing threshold.
+
+    Returns:
+        Process-wide LineIndexStore
+    """
+    global _store
+    if _store is None:
+        min_bytes = line_index_min_bytes()
+        cache = None
+        if min_bytes:
+            try:
+                try:
+                    from .cache import get_cache_manager
+                except ImportError:
+                    from cache import get_cache_manager
+
+                cache = get_cache_manager()
+            except Exception as e:
+                logger.debug(f"Cache not available for line indexes: {e}")
+        _store = LineIndexStore(cache, min_bytes)
+    return _store
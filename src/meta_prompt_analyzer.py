@@ -6,12 +6,31 @@ structure and configuration without creating temporary context files.
 """
 
 import os
-from pathlib import Path
+from collections import Counter
 from typing import Any, Dict, List, Optional
 
+try:
+    from .project_snapshot import ProjectSnapshot, build_project_snapshot
+except ImportError:
+    from project_snapshot import ProjectSnapshot, build_project_snapshot
+
+# Top-level entries worth mentioning in the structure summary
+COMMON_DIRS = ["src", "lib", "tests", "test", "docs", "scripts", "examples"]
+COMMON_FILES = [
+    "package.json",
+    "pyproject.toml",
+    "requirements.txt",
+    "Cargo.toml",
+    "go.mod",
+    "README.md",
+    "CLAUDE.md",
+]
+
 
 def analyze_project_for_meta_prompt(
-    project_path: str, scope: str = "recent_phase"
+    project_path: str,
+    scope: str = "recent_phase",
+    snapshot: Optional[ProjectSnapshot] = None,
 ) -> Dict[str, Any]:
     """
     Analyze project structure and configuration for meta prompt generation
@@ -20,6 +39,8 @@ def analyze_project_for_meta_prompt(
     Args:
         project_path: Absolute path to project root directory
         scope: Analysis scope (recent_phase, full_project, etc.)
+        snapshot: Project snapshot shared with the review context; one with
+            the default discovery flags is built if not provided
 
     Returns:
         Dict containing project analysis data for meta prompt generation
@@ -39,6 +60,9 @@ def analyze_project_for_meta_prompt(
         if not os.path.isdir(project_path):
             raise ValueError(f"Project path must be a directory: {project_path}")
 
+        if snapshot is None or snapshot.project_path != project_path:
+            snapshot = build_project_snapshot(project_path)
+
         # Collect project analysis data without creating files
         project_data = {
             "project_path": project_path,
@@ -50,40 +74,9 @@ def analyze_project_for_meta_prompt(
             "analysis_completed": True,
         }
 
-        # Discover project configuration (CLAUDE.md/cursor rules)
+        # Project configuration (CLAUDE.md/cursor rules)
         try:
-            try:
-                from .context_builder import discover_project_configurations
-            except ImportError:
-                from context_builder import discover_project_configurations
-
-            config_data = discover_project_configurations(project_path)
-
-            if config_data and (
-                config_data.get("claude_memory_files")
-                or config_data.get("cursor_rules_files")
-            ):
-                configuration_context = "\n# PROJECT CONFIGURATION GUIDELINES\n\n"
-
-                # Add CLAUDE.md content
-                claude_files = config_data.get("claude_memory_files", [])
-                if claude_files:
-                    configuration_context += "## CLAUDE.md Guidelines:\n"
-                    for claude_file in claude_files:
-                        configuration_context += (
-                            f"### {claude_file.file_path}:\n{claude_file.content}\n\n"
-                        )
-
-                # Add cursor rules content
-                cursor_files = config_data.get("cursor_rules_files", [])
-                if cursor_files:
-                    configuration_context += "## Cursor Rules:\n"
-                    for cursor_file in cursor_files:
-                        configuration_context += (
-                            f"### {cursor_file.file_path}:\n{cursor_file.content}\n\n"
-                        )
-
-                project_data["configuration_context"] = configuration_context
+            project_data["configuration_context"] = _configuration_context(snapshot)
         except Exception as e:
             print(f"Warning: Could not discover project configuration: {e}")
             project_data["configuration_context"] = ""
@@ -91,7 +84,7 @@ def analyze_project_for_meta_prompt(
         # Generate basic file structure summary (without full file tree)
         try:
             project_data["file_structure_summary"] = (
-                _generate_lightweight_structure_summary(project_path)
+                _generate_lightweight_structure_summary(snapshot.file_tree)
             )
         except Exception as e:
             print(f"Warning: Could not generate file structure summary: {e}")
@@ -99,7 +92,7 @@ def analyze_project_for_meta_prompt(
 
         # Get basic git context (without full diffs)
         try:
-            project_data["git_context"] = _get_lightweight_git_context(project_path)
+            project_data["git_context"] = _get_lightweight_git_context(snapshot)
         except Exception as e:
             print(f"Warning: Could not get git context: {e}")
             project_data["git_context"] = ""
@@ -110,40 +103,61 @@ def analyze_project_for_meta_prompt(
         raise Exception(f"Failed to analyze project for meta prompt: {str(e)}")
 
 
-def _generate_lightweight_structure_summary(project_path: str) -> str:
-    """Generate a lightweight summary of project structure."""
+def _configuration_context(snapshot: ProjectSnapshot) -> str:
+    """Format the snapshot's CLAUDE.md files and Cursor rules as guidelines."""
+    configurations = snapshot.configurations
+    claude_files = configurations["claude_memory_files"]
+    cursor_rules = configurations["cursor_rules"]
+    if not claude_files and not cursor_rules:
+        return ""
+
+    configuration_context = "\n# PROJECT CONFIGURATION GUIDELINES\n\n"
+    if claude_files:
+        configuration_context += "## CLAUDE.md Guidelines:\n"
+        for claude_file in claude_files:
+            configuration_context += (
+                f"### {claude_file.file_path}:\n{claude_file.content}\n\n"
+            )
+    if cursor_rules:
+        configuration_context += "## Cursor Rules:\n"
+        for cursor_rule in cursor_rules:
+            configuration_context += (
+                f"### {cursor_rule.file_path}:\n{cursor_rule.content}\n\n"
+            )
+    return configuration_context
+
+
+def _generate_lightweight_structure_summary(file_tree: str) -> str:
+    """Summarize the project structure from its file tree."""
     try:
         structure_info: List[str] = []
 
-        # Check for common directories and files
-        common_dirs = ["src", "lib", "tests", "test", "docs", "scripts", "examples"]
-        common_files = [
-            "package.json",
-            "pyproject.toml",
-            "requirements.txt",
-            "Cargo.toml",
-            "go.mod",
-            "README.md",
-            "CLAUDE.md",
-        ]
-
-        project_root = Path(project_path)
+        # Tree lines after the root look like "│   ├── name" with four
+        # characters per level; directories end with "/"
+        top_dirs: List[str] = []
+        top_files: List[str] = []
+        file_counts: Counter[str] = Counter()
+        current_dir: Optional[str] = None
+        for line in file_tree.splitlines()[1:]:
+            marker = max(line.find("├── "), line.find("└── "))
+            if marker < 0:
+                continue
+            name = line[marker + 4 :]
+            is_dir = name.endswith("/")
+            if marker == 0:
+                current_dir = name.rstrip("/") if is_dir else None
+                (top_dirs if is_dir else top_files).append(name.rstrip("/"))
+            elif current_dir is not None and not is_dir:
+                file_counts[current_dir] += 1
 
         # Count directories
-        for dir_name in common_dirs:
-            dir_path = project_root / dir_name
-            if dir_path.exists() and dir_path.is_dir():
-                # Count files in directory
-                try:
-                    file_count = len([f for f in dir_path.rglob("*") if f.is_file()])
-                    structure_info.append(f"📁 {dir_name}/ ({file_count} files)")
-                except Exception:
-                    structure_info.append(f"📁 {dir_name}/")
+        for dir_name in COMMON_DIRS:
+            if dir_name in top_dirs:
+                structure_info.append(f"📁 {dir_name}/ ({file_counts[dir_name]} files)")
 
         # Check for important files
-        for file_name in common_files:
-            file_path = project_root / file_name
-            if file_path.exists() and file_path.is_file():
+        for file_name in COMMON_FILES:
+            if file_name in top_files:
                 structure_info.append(f"📄 {file_name}")
 
         if structure_info:
@@ -155,80 +169,23 @@ def _generate_lightweight_structure_summary(project_path: str) -> str:
         return "Could not analyze project structure"
 
 
-def _get_lightweight_git_context(project_path: str) -> str:
+def _get_lightweight_git_context(snapshot: ProjectSnapshot) -> str:
     """Get lightweight git context without full diffs."""
-    try:
-        import subprocess
-        from pathlib import Path
-
-        # Validate and resolve project path for security
-        try:
-            validated_path = Path(project_path).resolve()
-            if not validated_path.exists() or not validated_path.is_dir():
-                return "Invalid project path"
-        except (OSError, ValueError):
-            return "Invalid project path"
-
-        # Check if git is available and this is a git repo
-        result = subprocess.run(
-            ["git", "status", "--porcelain"],
-            cwd=str(validated_path),
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-
-        if result.returncode != 0:
-            return "Not a git repository or git not available"
-
-        git_info: List[str] = []
-
-        # Get current branch
-        try:
-            branch_result = subprocess.run(
-                ["git", "branch", "--show-current"],
-                cwd=project_path,
-                capture_output=True,
-                text=True,
-                timeout=5,
-            )
-            if branch_result.returncode == 0:
-                branch = branch_result.stdout.strip()
-                git_info.append(f"Current branch: {branch}")
-        except Exception:
-            pass
-
-        # Get changed files count
-        status_output = result.stdout.strip()
-        if status_output:
-            changed_files = len(status_output.split("\n"))
-            git_info.append(f"Modified files: {changed_files}")
-        else:
-            git_info.append("Working directory clean")
+    git = snapshot.git
+    if not git.is_repository:
+        return "Not a git repository or git not available"
 
-        # Get recent commit count
-        try:
-            commit_result = subprocess.run(
-                ["git", "rev-list", "--count", "HEAD"],
-                cwd=project_path,
-                capture_output=True,
-                text=True,
-                timeout=5,
-            )
-            if commit_result.returncode == 0:
-                commit_count = commit_result.stdout.strip()
-                git_info.append(f"Total commits: {commit_count}")
-        except Exception:
-            pass
-
-        return (
-            "Git context:\n" + "\n".join(git_info)
-            if git_info
-            else "Git repository detected"
-        )
+    git_info: List[str] = []
+    if git.branch:
+        git_info.append(f"Current branch: {git.branch}")
+    if git.changed_paths:
+        git_info.append(f"Modified files: {git.changed_paths}")
+    else:
+        git_info.append("Working directory clean")
+    if git.commit_count is not None:
+        git_info.append(f"Total commits: {git.commit_count}")
 
-    except Exception:
-        return "No git context available"
+    return "Git context:\n" + "\n".join(git_info)
 
 
 def generate_meta_prompt_from_analysis(
@@ -337,6 +294,7 @@ def generate_optimized_meta_prompt(
     custom_template: Optional[str] = None,
     temperature: float = 0.5,
     thinking_budget: Optional[int] = None,
+    snapshot: Optional[ProjectSnapshot] = None,
 ) -> Dict[str, Any]:
     """
     Generate meta prompt with optimized single-pass analysis.
@@ -350,6 +308,7 @@ def generate_optimized_meta_prompt(
         custom_template: Optional custom template string
         temperature: Temperature for AI model (default: 0.5, range: 0.0-2.0)
         thinking_budget: Optional token budget for thinking mode (if supported by model)
+        snapshot: Project snapshot to reuse for the review context afterwards
 
     Returns:
         Dict containing generated_prompt and metadata
@@ -359,7 +318,7 @@ def generate_optimized_meta_prompt(
     """
     try:
         # Step 1: Analyze project without creating files
-        project_data = analyze_project_for_meta_prompt(project_path, scope)
+        project_data = analyze_project_for_meta_prompt(project_path, scope, snapshot)
 
         # Step 2: Generate meta prompt from analysis
         meta_prompt_result = generate_meta_prompt_from_analysis(
@@ -62,6 +62,31 @@ def load_model_config() -> Dict[str, Any]:
     return default_config
 
 
+# Context window of current Gemini models, used when model_config.json has no entry
+DEFAULT_INPUT_TOKEN_LIMIT = 1048576
+
+
+def get_input_token_limit(model: Optional[str] = None) -> int:
+    """
+    Get the input token limit (context window) of a model.
+
+    Args:
+        model: Model name or alias (default: GEMINI_MODEL env var or config default)
+
+    Returns:
+        Maximum number of input tokens the model accepts
+    """
+    config = load_model_config()
+    name = model or os.getenv("GEMINI_MODEL", config["defaults"]["model"])
+    name = config["model_aliases"].get(name, name)
+    limits = config.get("input_token_limits", {})
+    limit = limits.get(name, limits.get("default", DEFAULT_INPUT_TOKEN_LIMIT))
+    if not isinstance(limit, int) or limit <= 0:
+        logger.warning(f"Invalid input token limit {limit!r} for {name}, using default")
+        return DEFAULT_INPUT_TOKEN_LIMIT
+    return limit
+
+
 def load_meta_prompt_templates(
     config_path: Optional[str] = None,
 ) -> Dict[str, Dict[str, Any]]:
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+One view of a project shared by everything that serves a single request.
+
+A review request used to discover configurations, walk the tree and ask git
+about the repository once for the meta-prompt and again for the review
+context. A ``ProjectSnapshot`` is built once per request and handed to both.
+Each facet (configurations, changed files, file tree, git metadata) is
+computed on first access at most once, through the persistent review
+artifact cache, so a facet nobody asks for costs nothing.
+
+Snapshots are immutable: consumers copy the changed file entries before
+rewriting them.
+"""
+
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from .config_types import (
+        DEFAULT_INCLUDE_CLAUDE_MEMORY,
+        DEFAULT_INCLUDE_CURSOR_RULES,
+    )
+    from .context_builder import (
+        DiscoveredConfigurations,
+        discover_project_configurations_with_flags,
+    )
+    from .git_utils import generate_file_tree, get_changed_files, get_git_metadata
+    from .review_artifacts import ReviewArtifacts
+    from .services import Fingerprint
+except ImportError:
+    from config_types import DEFAULT_INCLUDE_CLAUDE_MEMORY, DEFAULT_INCLUDE_CURSOR_RULES
+    from context_builder import (
+        DiscoveredConfigurations,
+        discover_project_configurations_with_flags,
+    )
+    from git_utils import generate_file_tree, get_changed_files, get_git_metadata
+    from review_artifacts import ReviewArtifacts
+    from services import Fingerprint
+
+
+@dataclass(frozen=True)
+class SnapshotProducers:
+    """Functions that compute each facet when it is not cached."""
+
+    configurations: Callable[[str, bool, bool], DiscoveredConfigurations] = (
+        discover_project_configurations_with_flags
+    )
+    changed_files: Callable[[str], List[Dict[str, Any]]] = get_changed_files
+    file_tree: Callable[[str], str] = generate_file_tree
+    git_metadata: Callable[[str], Dict[str, Any]] = get_git_metadata
+
+
+@dataclass(frozen=True)
+class GitMetadata:
+    """Repository facts shown to the meta-prompt."""
+
+    is_repository: bool = False
+    branch: str = ""
+    commit_count: Optional[int] = None
+    changed_paths: int = 0
+
+
+@dataclass(frozen=True, eq=False)
+class ProjectSnapshot:
+    """Immutable, lazily populated view of a project for one request."""
+
+    project_path: str
+    include_claude_memory: bool
+    include_cursor_rules: bool
+    fingerprint: Fingerprint = field(repr=False)
+    artifacts: ReviewArtifacts = field(repr=False)
+    producers: SnapshotProducers = field(default_factory=SnapshotProducers, repr=False)
+
+    def matches(
+        self, project_path: str, include_claude_memory: bool, include_cursor_rules: bool
+    ) -> bool:
+        """
+        Check whether this snapshot can serve a request.
+
+        Args:
+            project_path: Project the request is about
+            include_claude_memory: Whether the request includes CLAUDE.md files
+            include_cursor_rules: Whether the request includes Cursor rules
+
+        Returns:
+            True if the snapshot was built for the same project and flags
+        """
+        return (
+            self.project_path == project_path
+            and self.include_claude_memory == include_claude_memory
+            and self.include_cursor_rules == include_cursor_rules
+        )
+
+    @property
+    def discovers_configurations(self) -> bool:
+        """Whether any configuration source is enabled."""
+        return self.include_claude_memory or self.include_cursor_rules
+
+    @cached_property
+    def configurations(self) -> DiscoveredConfigurations:
+        """Discovered Claude memory files and Cursor rules."""
+        if not self.discovers_configurations:
+            return {
+                "claude_memory_files": [],
+                "cursor_rules": [],
+                "discovery_errors": [],
+                "performance_stats": {},
+            }
+        return self.artifacts.configurations(
+            self.project_path,
+            self.include_claude_memory,
+            self.include_cursor_rules,
+            self.producers.configurations,
+            self.fingerprint,
+        )
+
+    @cached_property
+    def changed_files(self) -> Tuple[Dict[str, Any], ...]:
+        """Staged, unstaged and untracked files with their content."""
+        return tuple(
+            self.artifacts.changed_files(
+                self.project_path, self.producers.changed_files, self.fingerprint
+            )
+        )
+
+    @cached_property
+    def file_tree(self) -> str:
+        """ASCII file tree of the project."""
+        return self.artifacts.file_tree(
+            self.project_path, self.producers.file_tree, self.fingerprint
+        )
+
+    @cached_property
+    def git(self) -> GitMetadata:
+        """Branch, commit count and number of uncommitted paths."""
+        metadata = self.artifacts.git_metadata(
+            self.project_path, self.producers.git_metadata, self.fingerprint
+        )
+        return GitMetadata(**metadata) if metadata else GitMetadata()
+
+
+def build_project_snapshot(
+    project_path: str,
+    include_claude_memory: bool = DEFAULT_INCLUDE_CLAUDE_MEMORY,
+    include_cursor_rules: bool = DEFAULT_INCLUDE_CURSOR_RULES,
+    artifacts: Optional[ReviewArtifacts] = None,
+    producers: Optional[SnapshotProducers] = None,
+) -> ProjectSnapshot:
+    """
+    Fingerprint a project and wrap it in a snapshot.
+
+    Args:
+        project_path: Project directory
+        include_claude_memory: Whether to discover CLAUDE.md files
+        include_cursor_rules: Whether to discover Cursor rules
+        artifacts: Artifact cache (the production container's if not provided)
+        producers: Facet producers (the real ones if not provided)
+
+    Returns:
+        ProjectSnapshot whose facets are computed on first access
+    """
+    if artifacts is None:
+        try:
+            from .dependencies import get_production_container
+        except ImportError:
+            from dependencies import get_production_container
+
+        artifacts = get_production_container().review_artifacts
+    return ProjectSnapshot(
+        project_path=project_path,
+        include_claude_memory=include_claude_memory,
+        include_cursor_rules=include_cursor_rules,
+        fingerprint=artifacts.fingerprint(project_path),
+        artifacts=artifacts,
+        producers=producers or SnapshotProducers(),
+    )
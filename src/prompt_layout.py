@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Cache-friendly prompt layout and prefix stability tracking.
+
+Gemini reuses the processing of a prompt prefix it has seen before (implicit
+context caching), but only for a byte-identical prefix. The default review
+layout opens with the review scope and phase, so consecutive reviews of the
+same project diverge in the first line. The cache-friendly layout orders the
+document from the most stable sections (project configuration, PRD, file
+tree) to the most volatile ones (changed files, scope, previous review,
+instructions), sorts what has no inherent order, and keeps timestamps out
+of the prefix.
+
+``PrefixTracker`` remembers block digests of the last context sent for each
+project and reports how much of the new context's prefix is unchanged, which
+is the part the model can serve from its cache.
+"""
+
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from .interfaces.cache_protocol import CacheProtocol
+except ImportError:
+    from interfaces.cache_protocol import CacheProtocol
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LAYOUT = "default"
+CACHE_FRIENDLY_LAYOUT = "cache_friendly"
+LAYOUTS = (DEFAULT_LAYOUT, CACHE_FRIENDLY_LAYOUT)
+
+PREFIX_OPERATION = "review_prefix"
+# Model-side caches expire within hours; older digests would only mislead
+PREFIX_TTL = 24 * 3600
+
+# Prefixes are compared block by block; smaller blocks report more precisely
+# but store more digests per context
+PREFIX_BLOCK_CHARS = 256
+
+
+def context_layout(cache_friendly: bool = False) -> str:
+    """
+    Get the review context layout.
+
+    Args:
+        cache_friendly: Whether the caller asked for the cache-friendly layout
+
+    Returns:
+        CACHE_FRIENDLY_LAYOUT if requested or set in GEMINI_CONTEXT_LAYOUT,
+        otherwise DEFAULT_LAYOUT
+    """
+    if cache_friendly:
+        return CACHE_FRIENDLY_LAYOUT
+    setting = os.getenv("GEMINI_CONTEXT_LAYOUT")
+    if not setting:
+        return DEFAULT_LAYOUT
+    layout = setting.strip().lower().replace("-", "_")
+    if layout not in LAYOUTS:
+        logger.warning(
+            f"Invalid GEMINI_CONTEXT_LAYOUT='{setting}', expected one of "
+            f"{', '.join(LAYOUTS)}; using {DEFAULT_LAYOUT}"
+        )
+        return DEFAULT_LAYOUT
+    return layout
+
+
+def apply_layout(data: Dict[str, Any], layout: str) -> Dict[str, Any]:
+    """
+    Prepare template data for a layout.
+
+    The cache-friendly layout sorts changed files and applicable rules, whose
+    order otherwise depends on git and discovery order, so identical inputs
+    always render identically.
+
+    Args:
+        data: Template data
+        layout: DEFAULT_LAYOUT or CACHE_FRIENDLY_LAYOUT
+
+    Returns:
+        The data unchanged for the default layout, otherwise a sorted copy
+        with "layout" set
+    """
+    if layout != CACHE_FRIENDLY_LAYOUT:
+        return data
+    laid_out = dict(data, layout=layout)
+    laid_out["changed_files"] = sorted(
+        data.get("changed_files") or [], key=lambda file_info: file_info["path"]
+    )
+    laid_out["applicable_rules"] = sorted(
+        data.get("applicable_rules") or [],
+        key=lambda rule: (str(rule.file_path), rule.description),
+    )
+    return laid_out
+
+
+@dataclass
+class PrefixReport:
+    """How much of a context's prefix matches the previous context."""
+
+    total_chars: int
+    reused_chars: int
+    has_previous: bool
+
+    @property
+    def reused_ratio(self) -> float:
+        """Fraction of the context covered by the unchanged prefix."""
+        return self.reused_chars / self.total_chars if self.total_chars else 0.0
+
+    def summary(self) -> str:
+        """One-line description for CLI output."""
+        if not self.has_previous:
+            return (
+                f"Prefix stability: first context of {self.total_chars:,} chars "
+                "recorded as the baseline"
+            )
+        return (
+            f"Prefix stability: {self.reused_chars:,} of {self.total_chars:,} "
+            f"chars ({self.reused_ratio:.0%}) unchanged since the previous context"
+        )
+
+
+def _block_digests(chunks: Iterable[str], block_chars: int) -> Dict[str, Any]:
+    """Digest a document in fixed-size blocks, streaming its chunks."""
+    digests: List[str] = []
+    buffer = ""
+    total = 0
+    for chunk in chunks:
+        total += len(chunk)
+        buffer += chunk
+        start = 0
+        while len(buffer) - start >= block_chars:
+            block = buffer[start : start + block_chars]
+            digests.append(hashlib.sha256(block.encode("utf-8")).hexdigest()[:16])
+            start += block_chars
+        buffer = buffer[start:]
+    tail = hashlib.sha256(buffer.encode("utf-8")).hexdigest()[:16]
+    return {"blocks": digests, "tail": tail, "total": total}
+
+
+class PrefixTracker:
+    """Per-project digests of the last context, kept in the shared cache."""
+
+    def __init__(
+        self, cache: Optional[CacheProtocol], block_chars: int = PREFIX_BLOCK_CHARS
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            cache: Shared cache, or None to report without a baseline
+            block_chars: Size of the compared blocks
+        """
+        self._cache = cache
+        self._block_chars = block_chars
+
+    def measure(
+        self, project_path: str, chunks: Iterable[str], kind: str = "review_context"
+    ) -> PrefixReport:
+        """
+        Compare a context with the previous one and make it the new baseline.
+
+        Args:
+            project_path: Project the context is about
+            chunks: The context, in pieces of any size
+            kind: Kind of document, so different documents are not compared
+
+        Returns:
+            PrefixReport with the unchanged prefix, to block precision
+        """
+        current = _block_digests(chunks, self._block_chars)
+        params = {
+            "project_path": os.path.abspath(project_path),
+            "kind": kind,
+            "block_chars": self._block_chars,
+        }
+
+        previous = None
+        if self._cache is not None:
+            try:
+                previous = self._cache.get(PREFIX_OPERATION, params)
+                self._cache.set(PREFIX_OPERATION, params, current, PREFIX_TTL)
+            except Exception as e:
+                logger.debug(f"Prefix tracking unavailable for {project_path}: {e}")
+
+        report = PrefixReport(current["total"], 0, previous is not None)
+        if previous is None:
+            return report
+        matched = 0
+        for block, previous_block in zip(current["blocks"], previous["blocks"]):
+            if block != previous_block:
+                break
+            matched += 1
+        report.reused_chars = matched * self._block_chars
+        if (
+            matched == len(current["blocks"]) == len(previous["blocks"])
+            and current["tail"] == previous["tail"]
+        ):
+            report.reused_chars = current["total"]
+        return report
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of the inputs every review starts from.
+
+The file tree, changed files, configuration discovery, parsed task list and
+PRD summary are stored in the shared cache under the project fingerprint
+components they depend on. A review therefore reuses whatever an earlier
+review, or a background ``gemini-code-review-mcp cache warm`` run after a
+commit or checkout, already computed for the same repository state.
+
+Each accessor takes the producing function as an argument (defaulting to
+the real one) so callers keep control over what runs on a miss.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+try:
+    from .cache.single_flight import SingleFlight
+    from .configuration_context import ClaudeMemoryFile, CursorRule
+    from .context_builder import (
+        DiscoveredConfigurations,
+        discover_project_configurations_with_flags,
+    )
+    from .git_utils import generate_file_tree, get_changed_files, get_git_metadata
+    from .interfaces.cache_protocol import CacheProtocol
+    from .services import FileFinder, Fingerprint, ProjectFingerprint
+    from .task_list_parser import TaskData, extract_prd_summary, parse_task_list
+except ImportError:
+    from cache.single_flight import SingleFlight
+    from configuration_context import ClaudeMemoryFile, CursorRule
+    from context_builder import (
+        DiscoveredConfigurations,
+        discover_project_configurations_with_flags,
+    )
+    from git_utils import generate_file_tree, get_changed_files, get_git_metadata
+    from interfaces.cache_protocol import CacheProtocol
+    from services import FileFinder, Fingerprint, ProjectFingerprint
+    from task_list_parser import TaskData, extract_prd_summary, parse_task_list
+
+logger = logging.getLogger(__name__)
+
+# Entries are keyed by project state and never go stale; the TTL only bounds
+# how long states nobody returns to are kept
+ARTIFACT_TTL = 24 * 3600
+
+# Git-visible project state: commits, staging and uncommitted files
+_TREE_COMPONENTS = ("head", "index", "worktree")
+
+# Settings read by the producers themselves
+_FILE_TREE_ENV = ("MAX_FILE_TREE_DEPTH",)
+_CHANGED_FILES_ENV = ("MAX_FILE_CONTENT_LINES", "MAX_FILE_SIZE_MB")
+
+# (operation, cache params, producer) for one artifact; no params means the
+# artifact cannot be keyed on project state and is always computed
+_Request = Tuple[str, Optional[Dict[str, Any]], Callable[[], Any]]
+
+# Flag combinations a review can run discovery with
+CONFIGURATION_FLAGS = ((True, False), (False, True), (True, True))
+
+
+def _env_params(names: Tuple[str, ...]) -> Dict[str, Optional[str]]:
+    """Capture environment settings that change a producer's output."""
+    return {name: os.getenv(name) for name in names}
+
+
+def _encode_configurations(configurations: DiscoveredConfigurations) -> Dict[str, Any]:
+    """Convert discovered configurations into JSON-compatible data."""
+    data = {
+        **configurations,
+        "claude_memory_files": [
+            asdict(memory) for memory in configurations["claude_memory_files"]
+        ],
+        "cursor_rules": [asdict(rule) for rule in configurations["cursor_rules"]],
+    }
+    # Rule metadata comes from YAML front matter and may hold dates
+    return json.loads(json.dumps(data, default=str))
+
+
+def _decode_configurations(data: Dict[str, Any]) -> DiscoveredConfigurations:
+    """Rebuild discovered configurations from cached data."""
+    return {
+        "claude_memory_files": [
+            ClaudeMemoryFile(**memory) for memory in data["claude_memory_files"]
+        ],
+        "cursor_rules": [CursorRule(**rule) for rule in data["cursor_rules"]],
+        "discovery_errors": data.get("discovery_errors", []),
+        "performance_stats": data.get("performance_stats", {}),
+    }
+
+
+class ReviewArtifacts:
+    """Review inputs cached across processes, keyed by project state."""
+
+    def __init__(
+        self,
+        cache: Optional[CacheProtocol],
+        fingerprint: Optional[ProjectFingerprint] = None,
+    ):
+        """
+        Initialize the artifact cache.
+
+        Args:
+            cache: Shared cache, or None to compute everything directly
+            fingerprint: Fingerprint service (a default one if not provided)
+        """
+        self._flight = SingleFlight(cache) if cache is not None else None
+        self._fingerprint = fingerprint or ProjectFingerprint()
+
+    def fingerprint(self, project_path: Union[str, Path]) -> Fingerprint:
+        """
+        Fingerprint a project once so several artifacts can share it.
+
+        Args:
+            project_path: Project directory
+
+        Returns:
+            Fingerprint with git state and configuration components
+        """
+        return self._fingerprint.compute(
+            project_path, components=(*_TREE_COMPONENTS, "config_content")
+        )
+
+    def _get(self, request: _Request) -> Tuple[Any, bool]:
+        """
+        Get an artifact, computing it at most once per state across processes.
+
+        Returns:
+            (value, whether it had to be computed)
+        """
+        operation, params, compute = request
+        computed = False
+
+        def produce() -> Any:
+            nonlocal computed
+            computed = True
+            return compute()
+
+        if self._flight is None or params is None:
+            return produce(), True
+        value = self._flight.get_or_compute(
+            operation, params, produce, ttl=ARTIFACT_TTL
+        )
+        return value, computed
+
+    def _project_request(
+        self,
+        operation: str,
+        project_path: str,
+        compute: Callable[[], Any],
+        fingerprint: Optional[Fingerprint],
+        components: Tuple[str, ...],
+        **params: Any,
+    ) -> _Request:
+        """Build a request keyed on project state components."""
+        fingerprint = fingerprint or self.fingerprint(project_path)
+        params.update(
+            project_path=str(Path(project_path).resolve()),
+            state=fingerprint.key_for(*components),
+        )
+        return operation, params, compute
+
+    def _file_request(
+        self, operation: str, path: str, compute: Callable[[str], Any], *components: str
+    ) -> _Request:
+        """
+        Build a request that parses one file, keyed on its content.
+
+        Task lists and PRDs are small, so hashing them costs little, and
+        unlike a stat signature the key survives a fresh checkout (e.g. a
+        cache bundle restored in CI).
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        state = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        if components:
+            fingerprint = self._fingerprint.compute(
+                Path(path).resolve().parent, components=components
+            )
+            state += fingerprint.key_for(*components)
+
+        params = {"path": str(Path(path).resolve()), "state": state}
+        return operation, params, lambda: compute(content)
+
+    def file_tree(
+        self,
+        project_path: str,
+        compute: Callable[[str], str] = generate_file_tree,
+        fingerprint: Optional[Fingerprint] = None,
+    ) -> str:
+        """
+        Get the project file tree.
+
+        Files ignored by git do not invalidate the tree. Outside a git
+        repository nothing tracks file changes, so the tree is not cached.
+
+        Args:
+            project_path: Project directory
+            compute: Produces the tree on a miss
+            fingerprint: Precomputed project fingerprint
+
+        Returns:
+            ASCII file tree
+        """
+        return self._get(self._file_tree_request(project_path, compute, fingerprint))[0]
+
+    def _file_tree_request(
+        self,
+        project_path: str,
+        compute: Callable[[str], str] = generate_file_tree,
+        fingerprint: Optional[Fingerprint] = None,
+    ) -> _Request:
+        fingerprint = fingerprint or self.fingerprint(project_path)
+        if not fingerprint.in_git_repo:
+            return "review_file_tree", None, lambda: compute(project_path)
+        return self._project_request(
+            "review_file_tree",
+            project_path,
+            lambda: compute(project_path),
+            fingerprint,
+            _TREE_COMPONENTS,
+            **_env_params(_FILE_TREE_ENV),
+        )
+
+    def changed_files(
+        self,
+        project_path: str,
+        compute: Callable[[str], List[Dict[str, Any]]] = get_changed_files,
+        fingerprint: Optional[Fingerprint] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get staged, unstaged and untracked files with their content.
+
+        Args:
+            project_path: Project directory
+            compute: Produces the changed files on a miss
+            fingerprint: Precomputed project fingerprint
+
+        Returns:
+            List of changed file dictionaries
+        """
+        return self._get(
+            self._changed_files_request(project_path, compute, fingerprint)
+        )[0]
+
+    def _changed_files_request(
+        self,
+        project_path: str,
+        compute: Callable[[str], List[Dict[str, Any]]] = get_changed_files,
+        fingerprint: Optional[Fingerprint] = None,
+    ) -> _Request:
+        return self._project_request(
+            "review_changed_files",
+            project_path,
+            lambda: compute(project_path),
+            fingerprint,
+            _TREE_COMPONENTS,
+            **_env_params(_CHANGED_FILES_ENV),
+        )
+
+    def git_metadata(
+        self,
+        project_path: str,
+        compute: Callable[[str], Dict[str, Any]] = get_git_metadata,
+        fingerprint: Optional[Fingerprint] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get the current branch, commit count and number of uncommitted paths.
+
+        Args:
+            project_path: Project directory
+            compute: Produces the metadata on a miss
+            fingerprint: Precomputed project fingerprint
+
+        Returns:
+            Git metadata dictionary, empty outside a git repository
+        """
+        return self._get(
+            self._git_metadata_request(project_path, compute, fingerprint)
+        )[0]
+
+    def _git_metadata_request(
+        self,
+        project_path: str,
+        compute: Callable[[str], Dict[str, Any]] = get_git_metadata,
+        fingerprint: Optional[Fingerprint] = None,
+    ) -> _Request:
+        return self._project_request(
+            "review_git_metadata",
+            project_path,
+            lambda: compute(project_path),
+            fingerprint,
+            _TREE_COMPONENTS,
+        )
+
+    def configurations(
+        self,
+        project_path: str,
+        include_claude_memory: bool,
+        include_cursor_rules: bool,
+        compute: Callable[
+            [str, bool, bool], DiscoveredConfigurations
+        ] = discover_project_configurations_with_flags,
+        fingerprint: Optional[Fingerprint] = None,
+    ) -> DiscoveredConfigurations:
+        """
+        Get discovered Claude memory files and Cursor rules.
+
+        Args:
+            project_path: Project directory
+            include_claude_memory: Whether to discover CLAUDE.md files
+            include_cursor_rules: Whether to discover Cursor rules
+            compute: Runs discovery on a miss
+            fingerprint: Precomputed project fingerprint
+
+        Returns:
+            Discovered configurations
+        """
+        request = self._configurations_request(
+            project_path,
+            include_claude_memory,
+            include_cursor_rules,
+            compute,
+            fingerprint,
+        )
+        return _decode_configurations(self._get(request)[0])
+
+    def _configurations_request(
+        self,
+        project_path: str,
+        include_claude_memory: bool,
+        include_cursor_rules: bool,
+        compute: Callable[
+            [str, bool, bool], DiscoveredConfigurations
+        ] = discover_project_configurations_with_flags,
+        fingerprint: Optional[Fingerprint] = None,
+    ) -> _Request:
+        return self._project_request(
+            "review_configurations",
+            project_path,
+            lambda: _encode_configurations(
+                compute(project_path, include_claude_memory, include_cursor_rules)
+            ),
+            fingerprint,
+            # Content, not stat, so an imported cache bundle serves them too
+            ("config_content",),
+            include_claude_memory=include_claude_memory,
+            include_cursor_rules=include_cursor_rules,
+        )
+
+    def task_list(
+        self, task_file: str, compute: Callable[[str], TaskData] = parse_task_list
+    ) -> TaskData:
+        """
+        Get a parsed task list.
+
+        Args:
+            task_file: Path to the task list file
+            compute: Parses the file content on a miss
+
+        Returns:
+            Parsed task data
+        """
+        return self._get(self._file_request("review_task_list", task_file, compute))[0]
+
+    def prd_summary(
+        self, prd_file: str, compute: Callable[[str], str] = extract_prd_summary
+    ) -> str:
+        """
+        Get the summary of a PRD file.
+
+        Summaries may come from the Gemini API, so the GEMINI_* settings are
+        part of the key.
+
+        Args:
+            prd_file: Path to the PRD file
+            compute: Summarizes the file content on a miss
+
+        Returns:
+            PRD summary
+        """
+        request = self._file_request("review_prd_summary", prd_file, compute, "env")
+        return self._get(request)[0]
+
+    def warm(
+        self,
+        project_path: str,
+        file_finder: FileFinder,
+        task_list: Optional[str] = None,
+    ) -> Dict[str, bool]:
+        """
+        Precompute every artifact a review of the project will ask for.
+
+        Artifacts already cached for the current state are only looked up,
+        so running this repeatedly costs one fingerprint and a few reads.
+
+        Args:
+            project_path: Project directory
+            file_finder: Service used to locate the task list and PRD
+            task_list: Specific task list file name (most recent if None)
+
+        Returns:
+            Mapping of artifact name to whether it had to be computed
+        """
+        fingerprint = self.fingerprint(project_path)
+        requests: Dict[str, _Request] = {
+            "file tree": self._file_tree_request(project_path, fingerprint=fingerprint),
+            "changed files": self._changed_files_request(
+                project_path, fingerprint=fingerprint
+            ),
+            "git metadata": self._git_metadata_request(
+                project_path, fingerprint=fingerprint
+            ),
+        }
+        for include_claude_memory, include_cursor_rules in CONFIGURATION_FLAGS:
+            sources = [
+                name
+                for name, enabled in (
+                    ("Claude memory", include_claude_memory),
+                    ("Cursor rules", include_cursor_rules),
+                )
+                if enabled
+            ]
+            requests[f"configuration ({' and '.join(sources)})"] = (
+                self._configurations_request(
+                    project_path,
+                    include_claude_memory,
+                    include_cursor_rules,
+                    fingerprint=fingerprint,
+                )
+            )
+
+        project_files = file_finder.find_project_files(Path(project_path), task_list)
+        if project_files.task_list_file:
+            requests["task list"] = self._file_request(
+                "review_task_list", str(project_files.task_list_file), parse_task_list
+            )
+        if project_files.prd_file:
+            requests["PRD summary"] = self._file_request(
+                "review_prd_summary",
+                str(project_files.prd_file),
+                extract_prd_summary,
+                "env",
+            )
+
+        return {name: self._get(request)[1] for name, request in requests.items()}
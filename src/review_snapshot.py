@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Snapshots of the inputs of the last review of each project.
+
+Generating a review context stages a snapshot of its inputs: a content
+digest per changed file and a hash of the file tree. Once a review has been
+produced from that context, ``record_review`` stores the snapshot together
+with the review text. A later ``--since-last-review`` run then only sends
+the files whose content differs from that snapshot, along with a summary of
+the previous review, so repeated reviews of a growing branch do not resend
+and re-review everything.
+"""
+
+import hashlib
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from .interfaces.cache_protocol import CacheProtocol
+except ImportError:
+    from interfaces.cache_protocol import CacheProtocol
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_OPERATION = "review_snapshot"
+PENDING_OPERATION = "review_snapshot_pending"
+
+# Branches are iterated on for weeks; an expired snapshot means a full review
+SNAPSHOT_TTL = 30 * 24 * 3600
+
+# The previous review is context, not the subject of the review
+REVIEW_SUMMARY_CHARS = 6000
+
+
+@dataclass
+class ReviewSnapshot:
+    """Inputs of one review, and the review produced from them."""
+
+    files: Dict[str, str]  # project-relative path -> content digest
+    tree_hash: str
+    created_at: str = field(
+        default_factory=lambda: datetime.now().isoformat(timespec="seconds")
+    )
+    review: str = ""
+
+
+@dataclass
+class ReviewDelta:
+    """How the current change set differs from a snapshot."""
+
+    changed: List[Dict[str, Any]]  # changed file entries to review again
+    unchanged: List[str]  # relative paths identical to the snapshot
+    reverted: List[str]  # relative paths no longer part of the change set
+    tree_changed: bool
+
+
+def content_digest(content: str) -> str:
+    """Digest of a file's content as it appears in the review context."""
+    return hashlib.sha256(content.encode("utf-8", "replace")).hexdigest()
+
+
+def take_snapshot(
+    project_path: str, changed_files: List[Dict[str, Any]], file_tree: str
+) -> ReviewSnapshot:
+    """
+    Capture the inputs of a review.
+
+    Args:
+        project_path: Project root
+        changed_files: Changed file entries with "path" and "content"
+        file_tree: Rendered file tree
+
+    Returns:
+        Snapshot without review text
+    """
+    return ReviewSnapshot(
+        files={
+            os.path.relpath(file_info["path"], project_path): content_digest(
+                file_info.get("content") or ""
+            )
+            for file_info in changed_files
+        },
+        tree_hash=content_digest(file_tree or ""),
+    )
+
+
+def changes_since(
+    snapshot: ReviewSnapshot,
+    current: ReviewSnapshot,
+    project_path: str,
+    changed_files: List[Dict[str, Any]],
+) -> ReviewDelta:
+    """
+    Compare the current change set with a previous review's snapshot.
+
+    Args:
+        snapshot: Snapshot of the previous review
+        current: Snapshot of the current inputs
+        project_path: Project root
+        changed_files: Current changed file entries
+
+    Returns:
+        ReviewDelta with the entries whose content differs from the snapshot
+    """
+    changed: List[Dict[str, Any]] = []
+    unchanged: List[str] = []
+    for file_info in changed_files:
+        relative = os.path.relpath(file_info["path"], project_path)
+        if snapshot.files.get(relative) == current.files.get(relative):
+            unchanged.append(relative)
+        else:
+            changed.append(file_info)
+    reverted = sorted(set(snapshot.files) - set(current.files))
+    return ReviewDelta(
+        changed, unchanged, reverted, snapshot.tree_hash != current.tree_hash
+    )
+
+
+def summarize_review(review: str, limit: int = REVIEW_SUMMARY_CHARS) -> str:
+    """
+    Shorten a previous review to fit the context as background.
+
+    Cuts at the last paragraph break before the limit, so findings are
+    not split mid-sentence.
+
+    Args:
+        review: Full review text
+        limit: Maximum characters kept
+
+    Returns:
+        The review, or its leading paragraphs with a note of what was cut
+    """
+    review = review.strip()
+    if len(review) <= limit:
+        return review
+    cut = review.rfind("\n\n", 0, limit)
+    if cut <= 0:
+        cut = limit
+    return (
+        review[:cut].rstrip()
+        + f"\n\n[... {len(review) - cut:,} more characters of the review omitted]"
+    )
+
+
+class ReviewSnapshots:
+    """Per-project review snapshots kept in the shared cache."""
+
+    def __init__(self, cache: Optional[CacheProtocol]):
+        """
+        Initialize the snapshot store.
+
+        Args:
+            cache: Shared cache, or None to disable snapshots
+        """
+        self._cache = cache
+
+    @staticmethod
+    def _params(project_path: str) -> Dict[str, Any]:
+        return {"project_path": os.path.abspath(project_path)}
+
+    def _read(self, operation: str, project_path: str) -> Optional[ReviewSnapshot]:
+        if self._cache is None:
+            return None
+        try:
+            stored = self._cache.get(operation, self._params(project_path))
+            return ReviewSnapshot(**stored) if stored else None
+        except Exception as e:
+            logger.debug(f"Failed to read {operation} for {project_path}: {e}")
+            return None
+
+    def _write(
+        self, operation: str, project_path: str, snapshot: ReviewSnapshot
+    ) -> None:
+        if self._cache is None:
+            return
+        try:
+            self._cache.set(
+                operation, self._params(project_path), asdict(snapshot), SNAPSHOT_TTL
+            )
+        except Exception as e:
+            logger.warning(f"Failed to store {operation} for {project_path}: {e}")
+
+    def load(self, project_path: str) -> Optional[ReviewSnapshot]:
+        """
+        Get the snapshot of the last recorded review of a project.
+
+        Args:
+            project_path: Project root
+
+        Returns:
+            The snapshot, or None if no review was recorded
+        """
+        return self._read(SNAPSHOT_OPERATION, project_path)
+
+    def stage(self, project_path: str, snapshot: ReviewSnapshot) -> None:
+        """
+        Remember the inputs of a context until a review is produced from it.
+
+        Args:
+            project_path: Project root
+            snapshot: Snapshot of the context's inputs
+        """
+        self._write(PENDING_OPERATION, project_path, snapshot)
+
+    def record_review(self, project_path: str, review: str) -> bool:
+        """
+        Store the staged snapshot with the review produced from it.
+
+        Args:
+            project_path: Project root
+            review: Review text
+
+        Returns:
+            True if a staged snapshot was recorded
+        """
+        pending = self._read(PENDING_OPERATION, project_path)
+        if pending is None or not review:
+            return False
+        pending.review = review
+        pending.created_at = datetime.now().isoformat(timespec="seconds")
+        self._write(SNAPSHOT_OPERATION, project_path, pending)
+        return True
+
+
+def previous_review_data(
+    snapshot: ReviewSnapshot, delta: ReviewDelta
+) -> Dict[str, Any]:
+    """
+    Build the template data describing the previous review.
+
+    Args:
+        snapshot: Snapshot of the previous review
+        delta: Changes since that review
+
+    Returns:
+        Dictionary for the "previous_review" template key
+    """
+    return {
+        "reviewed_at": snapshot.created_at,
+        "summary": summarize_review(snapshot.review),
+        "unchanged_files": delta.unchanged,
+        "reverted_files": delta.reverted,
+        "tree_changed": delta.tree_changed,
+    }
+
+
+def split_by_snapshot(
+    snapshots: ReviewSnapshots,
+    project_path: str,
+    changed_files: List[Dict[str, Any]],
+    file_tree: str,
+    since_last_review: bool,
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Stage the current inputs and, in delta mode, drop files already reviewed.
+
+    Args:
+        snapshots: Snapshot store
+        project_path: Project root
+        changed_files: Current changed file entries
+        file_tree: Rendered file tree
+        since_last_review: Whether to only keep files changed since the last
+            recorded review
+
+    Returns:
+        Tuple of (changed files to render, "previous_review" template data or
+        None when there is no previous review to compare against)
+    """
+    current = take_snapshot(project_path, changed_files, file_tree)
+    snapshots.stage(project_path, current)
+    if not since_last_review:
+        return changed_files, None
+
+    previous = snapshots.load(project_path)
+    if previous is None:
+        return changed_files, None
+    delta = changes_since(previous, current, project_path, changed_files)
+    return delta.changed, previous_review_data(previous, delta)
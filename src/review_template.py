@@ -0,0 +1,678 @@
+#!/usr/bin/env python3
+"""
+Review template rendering.
+
+The review document is assembled from independent sections: header,
+PRD/task context, GitHub PR metadata, configuration, file tree, one section
+per changed file, and the closing instructions. The cache-friendly layout
+(see prompt_layout) puts the same sections in order of stability instead.
+Each rendered section is cached under a content hash of exactly the inputs
+it reads plus the template version, so re-rendering after one file changes
+only redoes that file's section, and a render can never be served for
+different content.
+
+Sections are produced one at a time by ``iter_review_template`` so large
+reviews can be written to a file or socket as they are rendered, without
+building the whole document in memory first.
+"""
+
+import hashlib
+import json
+import logging
+import marshal
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+try:
+    from .prompt_layout import CACHE_FRIENDLY_LAYOUT
+except ImportError:
+    from prompt_layout import CACHE_FRIENDLY_LAYOUT
+
+logger = logging.getLogger(__name__)
+
+SECTION_OPERATION = "template_section"
+# Sections are keyed by content, so entries never go stale; the TTL only
+# bounds how long renders nobody asks for again are kept
+SECTION_TTL = 1800
+
+# Sections looked up per cache query; bounds how many cached renders are
+# held at once while streaming
+_LOOKUP_BATCH = 32
+# Rendered misses are buffered for a batched cache write, flushed early past
+# this many characters so a large review is never held twice
+_CACHE_FLUSH_CHARS = 1 << 20
+
+# (name, inputs that determine the output, renderer)
+_Section = Tuple[str, Any, Callable[[], str]]
+
+# Section order of the cache-friendly layout, from what changes least between
+# reviews of a project to what changes every time; changed files keep their
+# relative order
+_CACHE_FRIENDLY_ORDER = (
+    "title",
+    "configuration",
+    "task_context",
+    "url_context",
+    "file_tree",
+    "files_open",
+    "changed_file",
+    "files_close",
+    "review_scope",
+    "pr_metadata",
+    "previous_review",
+    "compression",
+    "instructions",
+)
+
+
+def extract_clean_prompt_content(auto_prompt_content: str) -> str:
+    """
+    Extract clean prompt content from auto-generated prompt response.
+
+    Since auto-prompt generation now returns raw content without headers/footers,
+    this function primarily handles basic cleanup and formatting.
+
+    Args:
+        auto_prompt_content: Auto-prompt response (should be clean already)
+
+    Returns:
+        Clean prompt content suitable for user_instructions
+    """
+    # Basic cleanup - remove any extra whitespace
+    content = auto_prompt_content.strip()
+
+    # Remove any remaining code block markers if present (just in case)
+    if content.startswith("```") and content.endswith("```"):
+        lines = content.split("\n")
+        if len(lines) > 2:
+            content = "\n".join(lines[1:-1]).strip()
+
+    # Collapse multiple blank lines
+    content = re.sub(r"\n\n\n+", "\n\n", content)
+
+    return content
+
+
+def _scope_info(data: Dict[str, Any]) -> str:
+    """Describe the review mode and scope in one line."""
+    review_mode = data.get("review_mode", "task_list_based")
+    if review_mode == "github_pr":
+        scope_info = "Review Mode: GitHub PR Analysis"
+    else:
+        scope_info = f"Review Scope: {data['scope']}"
+        if data.get("phase_number"):
+            scope_info += f" (Phase: {data['phase_number']})"
+        elif data.get("task_number"):
+            scope_info += f" (Task: {data['task_number']})"
+    return scope_info
+
+
+def _render_header(data: Dict[str, Any]) -> str:
+    """Render the title line with the review scope."""
+    return f"""# Code Review Context - {_scope_info(data)}
+"""
+
+
+def _render_title(data: Dict[str, Any]) -> str:
+    """Render the title line alone, identical for every review."""
+    return """# Code Review Context
+"""
+
+
+def _render_review_scope(data: Dict[str, Any]) -> str:
+    """Render the review scope as its own block, away from the title."""
+    return f"""
+<review_scope>
+{_scope_info(data)}
+</review_scope>"""
+
+
+def _render_task_context(data: Dict[str, Any]) -> str:
+    """Render the PRD summary and task list progress."""
+    template = ""
+
+    # Check if we have task list data (total_phases > 0 indicates a task list exists)
+    has_task_list = data.get("total_phases", 0) > 0
+
+    if has_task_list:
+        # Include PRD/task list related tags only when task list exists
+        template += f"""
+<overall_prd_summary>
+{data['prd_summary']}
+</overall_prd_summary>
+
+<total_phases>
+{data['total_phases']}
+</total_phases>
+
+<current_phase_number>
+{data['current_phase_number']}
+</current_phase_number>
+"""
+
+        # Only add previous phase if it exists
+        if data["previous_phase_completed"]:
+            template += f"""
+<previous_phase_completed>
+{data['previous_phase_completed']}
+</previous_phase_completed>
+"""
+
+        # Only add next phase if it exists
+        if data["next_phase"]:
+            template += f"""
+<next_phase>
+{data['next_phase']}
+</next_phase>
+"""
+
+        template += f"""<current_phase_description>
+{data['current_phase_description']}
+</current_phase_description>
+
+<subtasks_completed>
+{chr(10).join(f"- {subtask}" for subtask in data['subtasks_completed'])}
+</subtasks_completed>"""
+    else:
+        # For projects without task lists, just include the summary/prompt
+        if data.get("prd_summary"):
+            template += f"""
+<project_context>
+{data['prd_summary']}
+</project_context>"""
+
+    return template
+
+
+def _render_pr_metadata(data: Dict[str, Any]) -> str:
+    """Render GitHub PR metadata, if the review is of a PR."""
+    branch_data = data.get("branch_comparison_data")
+    if not (branch_data and branch_data["mode"] == "github_pr"):
+        return ""
+
+    pr_data = branch_data["pr_data"]
+    summary = branch_data.get("summary", {})
+    template = f"""
+<github_pr_metadata>
+Repository: {branch_data['repository']}
+PR Number: {pr_data['pr_number']}
+Title: {pr_data['title']}
+Author: {pr_data['author']}
+Source Branch: {pr_data['source_branch']}
+Target Branch: {pr_data['target_branch']}
+Source SHA: {pr_data.get('source_sha', 'N/A')[:8]}...
+Target SHA: {pr_data.get('target_sha', 'N/A')[:8]}...
+State: {pr_data['state']}
+Created: {pr_data['created_at']}
+Updated: {pr_data['updated_at']}
+Files Changed: {summary.get('files_changed', 'N/A')}
+Files Added: {summary.get('files_added', 'N/A')}
+Files Modified: {summary.get('files_modified', 'N/A')}
+Files Deleted: {summary.get('files_deleted', 'N/A')}"""
+    if pr_data.get("body") and pr_data["body"].strip():
+        # Show first 200 chars of PR description
+        description = pr_data["body"].strip()[:200]
+        if len(pr_data["body"]) > 200:
+            description += "..."
+        template += f"""
+Description: {description}"""
+    template += """
+</github_pr_metadata>"""
+    return template
+
+
+def _render_configuration(data: Dict[str, Any]) -> str:
+    """Render the project path, configuration context and applicable rules."""
+    template = f"""
+<project_path>
+{data['project_path']}
+</project_path>"""
+
+    # Add configuration content section if available
+    if data.get("configuration_content"):
+        template += f"""
+<configuration_context>
+{data['configuration_content']}
+</configuration_context>"""
+
+        # Add applicable rules summary if available
+        applicable_rules = data.get("applicable_rules", [])
+        if applicable_rules:
+            template += f"""
+<applicable_configuration_rules>
+The following configuration rules apply to the changed files:
+{chr(10).join(f"- {rule.description} (from {rule.file_path})" for rule in applicable_rules)}
+</applicable_configuration_rules>"""
+
+    return template
+
+
+def _render_compression(data: Dict[str, Any]) -> str:
+    """Tell the reviewer what compression and deduplication removed, if anything."""
+    notes = data.get("compression_notes")
+    if not notes:
+        return ""
+    return f"""
+<context_compression>
+Parts of this context were compressed to save tokens:
+{chr(10).join(f"- {note}" for note in notes)}
+</context_compression>"""
+
+
+def _render_previous_review(data: Dict[str, Any]) -> str:
+    """Summarize the previous review when only the delta since it is sent."""
+    previous = data.get("previous_review")
+    if not previous:
+        return ""
+    lines: List[str] = []
+    if previous["unchanged_files"]:
+        lines.append("Unchanged since then, so not included below:")
+        lines.extend(f"- {path}" for path in previous["unchanged_files"])
+    if previous["reverted_files"]:
+        lines.append("No longer changed (reverted or committed upstream):")
+        lines.extend(f"- {path}" for path in previous["reverted_files"])
+    if previous["tree_changed"]:
+        lines.append("The project structure has changed since then.")
+    omitted = "".join(f"\n{line}" for line in lines)
+    return f"""
+<previous_review>
+This is a follow-up review. The files below changed since the previous review of {previous['reviewed_at']}; focus on them and on whether earlier findings were addressed, without repeating findings that still apply unchanged.
+{omitted}
+
+Summary of the previous review:
+{previous['summary']}
+</previous_review>"""
+
+
+def _render_file_tree(data: Dict[str, Any]) -> str:
+    """Render the file tree."""
+    return f"""
+<file_tree>
+{data['file_tree']}
+</file_tree>"""
+
+
+def _render_files_open(data: Dict[str, Any]) -> str:
+    """Open the changed files block."""
+    return """
+
+<files_changed>"""
+
+
+def _render_files_close(data: Dict[str, Any]) -> str:
+    """Close the changed files block."""
+    return """
+</files_changed>"""
+
+
+def _render_changed_file(file_info: Dict[str, Any]) -> str:
+    """Render one changed file as a fenced code block."""
+    file_ext = os.path.splitext(file_info["path"])[1].lstrip(".")
+    if not file_ext:
+        file_ext = "txt"
+
+    return f"""
+File: {file_info['path']} ({file_info['status']})
+```{file_ext}
+{file_info['content']}
+```"""
+
+
+def _render_instructions(data: Dict[str, Any]) -> str:
+    """Render the reviewer instructions."""
+    # Add AI review instructions only if not raw_context_only
+    if data.get("raw_context_only", False):
+        return ""
+
+    template = """
+
+<user_instructions>"""
+
+    # Check if auto-generated meta-prompt should be used
+    auto_prompt_content = data.get("auto_prompt_content")
+    if auto_prompt_content:
+        # Extract clean prompt content (remove headers, metadata, and formatting)
+        clean_prompt = extract_clean_prompt_content(auto_prompt_content)
+        # Use the auto-generated meta-prompt as user instructions
+        template += clean_prompt
+    else:
+        # Use default template-based instructions
+        # Customize instructions based on review mode and scope
+        review_mode = data.get("review_mode", "task_list_based")
+        branch_data = data.get("branch_comparison_data")
+
+        if review_mode == "github_pr" and branch_data:
+            config_note = ""
+            if data.get("configuration_content"):
+                config_note = "\n\nPay special attention to the configuration context (Claude memory and Cursor rules) provided above, which contains project-specific guidelines and coding standards that should be followed."
+
+            template += f"""You are reviewing a GitHub Pull Request that contains changes from branch '{branch_data['pr_data']['source_branch']}' to '{branch_data['pr_data']['target_branch']}'.
+
+The PR "{branch_data['pr_data']['title']}" by {branch_data['pr_data']['author']} includes {branch_data['summary']['files_changed']} changed files with {branch_data['summary']['files_added']} additions, {branch_data['summary']['files_modified']} modifications, and {branch_data['summary']['files_deleted']} deletions.{config_note}
+
+Based on the PR metadata, commit history, and file changes shown above, conduct a comprehensive code review focusing on:
+1. Code quality and best practices
+2. Security implications of the changes
+3. Performance considerations
+4. Testing coverage and approach
+5. Documentation completeness
+6. Integration and compatibility issues
+
+Identify specific lines, files, or patterns that are concerning and provide actionable feedback."""
+        elif data["scope"] == "full_project":
+            config_note = ""
+            if data.get("configuration_content"):
+                config_note = "\n\nImportant: Refer to the configuration context (Claude memory and Cursor rules) provided above for project-specific guidelines and coding standards that should be followed throughout the project."
+
+            template += f"""We have completed all phases (and subtasks within) of this project: {data['current_phase_description']}.{config_note}
+
+Based on the PRD, all completed phases, all subtasks that were finished across the entire project, and the files changed in the working directory, your job is to conduct a comprehensive code review and output your code review feedback for the entire project. Identify specific lines or files that are concerning when appropriate."""
+        elif data["scope"] == "specific_task":
+            config_note = ""
+            if data.get("configuration_content"):
+                config_note = "\n\nImportant: Refer to the configuration context (Claude memory and Cursor rules) provided above for project-specific guidelines and coding standards."
+
+            template += f"""We have just completed task #{data['current_phase_number']}: "{data['current_phase_description']}".{config_note}
+
+Based on the PRD, the completed task, and the files changed in the working directory, your job is to conduct a code review and output your code review feedback for this specific task. Identify specific lines or files that are concerning when appropriate."""
+        else:
+            config_note = ""
+            if data.get("configuration_content"):
+                config_note = "\n\nImportant: Refer to the configuration context (Claude memory and Cursor rules) provided above for project-specific guidelines and coding standards."
+
+            template += f"""We have just completed phase #{data['current_phase_number']}: "{data['current_phase_description']}".{config_note}
+
+Based on the PRD, the completed phase, all subtasks that were finished in that phase, and the files changed in the working directory, your job is to conduct a code review and output your code review feedback for the completed phase. Identify specific lines or files that are concerning when appropriate."""
+
+    template += """
+</user_instructions>"""
+    return template
+
+
+def _render_url_context(data: Dict[str, Any]) -> str:
+    """Render URL context fetched for the review, if any."""
+    if data.get("url_context_content"):
+        return "\n\n" + data["url_context_content"] + "\n"
+    return ""
+
+
+def _template_version() -> str:
+    """
+    Fingerprint the template so cached sections die with template changes.
+
+    Hashes this module's source; falls back to the renderers' bytecode when
+    the source is unavailable (e.g. zip imports).
+    """
+    try:
+        source = Path(__file__).read_bytes()
+    except OSError:
+        source = b"".join(
+            marshal.dumps(renderer.__code__)
+            for renderer in (
+                _render_header,
+                _render_title,
+                _render_review_scope,
+                _render_task_context,
+                _render_pr_metadata,
+                _render_configuration,
+                _render_compression,
+                _render_previous_review,
+                _render_file_tree,
+                _render_files_open,
+                _render_files_close,
+                _render_changed_file,
+                _render_instructions,
+                _render_url_context,
+                extract_clean_prompt_content,
+            )
+        )
+    return hashlib.sha256(source).hexdigest()[:16]
+
+
+# Computed once; hashing the source on every render meant a file read each time
+TEMPLATE_VERSION = _template_version()
+
+
+def _select(data: Dict[str, Any], *keys: str) -> Dict[str, Any]:
+    """Pick the template inputs a section reads."""
+    return {key: data.get(key) for key in keys}
+
+
+def _sections(data: Dict[str, Any]) -> List[_Section]:
+    """Split a render into sections with the inputs each one depends on."""
+    scope_inputs = _select(data, "review_mode", "scope", "phase_number", "task_number")
+    sections: List[_Section] = [
+        ("header", scope_inputs, lambda: _render_header(data)),
+        (
+            "task_context",
+            _select(
+                data,
+                "total_phases",
+                "prd_summary",
+                "current_phase_number",
+                "previous_phase_completed",
+                "next_phase",
+                "current_phase_description",
+                "subtasks_completed",
+            ),
+            lambda: _render_task_context(data),
+        ),
+        (
+            "pr_metadata",
+            _select(data, "branch_comparison_data"),
+            lambda: _render_pr_metadata(data),
+        ),
+        (
+            "configuration",
+            {
+                **_select(data, "project_path", "configuration_content"),
+                "applicable_rules": [
+                    (rule.description, rule.file_path)
+                    for rule in data.get("applicable_rules") or []
+                ],
+            },
+            lambda: _render_configuration(data),
+        ),
+        (
+            "compression",
+            _select(data, "compression_notes"),
+            lambda: _render_compression(data),
+        ),
+        (
+            "previous_review",
+            _select(data, "previous_review"),
+            lambda: _render_previous_review(data),
+        ),
+        (
+            "file_tree",
+            _select(data, "file_tree"),
+            lambda: _render_file_tree(data),
+        ),
+        ("files_open", {}, lambda: _render_files_open(data)),
+    ]
+    for file_info in data["changed_files"]:
+        sections.append(
+            (
+                "changed_file",
+                _select(file_info, "path", "status", "content"),
+                lambda file_info=file_info: _render_changed_file(file_info),
+            )
+        )
+    sections.append(("files_close", {}, lambda: _render_files_close(data)))
+    sections.append(
+        (
+            "instructions",
+            {
+                **_select(
+                    data,
+                    "raw_context_only",
+                    "auto_prompt_content",
+                    "review_mode",
+                    "branch_comparison_data",
+                    "scope",
+                    "current_phase_number",
+                    "current_phase_description",
+                ),
+                "has_configuration": bool(data.get("configuration_content")),
+            },
+            lambda: _render_instructions(data),
+        )
+    )
+    sections.append(
+        (
+            "url_context",
+            _select(data, "url_context_content"),
+            lambda: _render_url_context(data),
+        )
+    )
+    if data.get("layout") != CACHE_FRIENDLY_LAYOUT:
+        return sections
+
+    # The title no longer carries the scope, so every review shares it
+    sections = [section for section in sections if section[0] != "header"]
+    sections.append(("title", {}, lambda: _render_title(data)))
+    sections.append(("review_scope", scope_inputs, lambda: _render_review_scope(data)))
+    rank = {name: index for index, name in enumerate(_CACHE_FRIENDLY_ORDER)}
+    return sorted(sections, key=lambda section: rank[section[0]])
+
+
+def _section_params(name: str, inputs: Any) -> Dict[str, str]:
+    """Build the cache key of a section from a hash of its inputs."""
+    encoded = json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")
+    return {
+        "section": name,
+        "version": TEMPLATE_VERSION,
+        "inputs": hashlib.sha256(encoded).hexdigest(),
+    }
+
+
+def _section_cache() -> Optional[Any]:
+    """Get the cache for rendered sections, or None if it is unavailable."""
+    try:
+        try:
+            from .cache import get_cache_manager
+        except ImportError:
+            from cache import get_cache_manager
+
+        return get_cache_manager()
+    except Exception as e:
+        logger.debug(f"Cache not available for template rendering: {e}")
+        return None
+
+
+def _lookup(cache: Any, params_list: List[Dict[str, str]]) -> List[Optional[str]]:
+    """Fetch cached sections, treating cache errors as misses."""
+    try:
+        return cache.get_many(SECTION_OPERATION, params_list)
+    except Exception as e:
+        logger.debug(f"Failed to read cached template sections: {e}")
+        return [None] * len(params_list)
+
+
+def _store(cache: Any, rendered: List[Tuple[Dict[str, str], str]]) -> None:
+    """Cache rendered sections in one write."""
+    if not rendered:
+        return
+    try:
+        cache.set_many(SECTION_OPERATION, rendered, ttl=SECTION_TTL)
+    except Exception as e:
+        logger.debug(f"Failed to cache template sections: {e}")
+
+
+def iter_review_template(data: Dict[str, Any], use_cache: bool = True) -> Iterator[str]:
+    """
+    Render the review template as a sequence of chunks.
+
+    Args:
+        data: Dictionary containing all template data
+        use_cache: Whether to reuse cached renders of unchanged sections
+
+    Yields:
+        Consecutive pieces of the formatted markdown template
+    """
+    sections = _sections(data)
+    cache = _section_cache() if use_cache else None
+    if cache is None:
+        for _, _, render in sections:
+            yield render()
+        return
+
+    pending: List[Tuple[Dict[str, str], str]] = []
+    pending_chars = 0
+    rendered = 0
+    try:
+        for start in range(0, len(sections), _LOOKUP_BATCH):
+            batch = sections[start : start + _LOOKUP_BATCH]
+            params_list = [_section_params(name, inputs) for name, inputs, _ in batch]
+            cached = _lookup(cache, params_list)
+            for (_, _, render), params, chunk in zip(batch, params_list, cached):
+                if chunk is None:
+                    chunk = render()
+                    rendered += 1
+                    pending.append((params, chunk))
+                    pending_chars += len(chunk)
+                    if pending_chars >= _CACHE_FLUSH_CHARS:
+                        _store(cache, pending)
+                        pending = []
+                        pending_chars = 0
+                yield chunk
+    finally:
+        # Also runs when the consumer stops early, keeping what was rendered
+        _store(cache, pending)
+        logger.debug(
+            f"Rendered {rendered} of {len(sections)} template sections, "
+            "reused the rest"
+        )
+
+
+def write_review_template(
+    data: Dict[str, Any], out: TextIO, use_cache: bool = True
+) -> int:
+    """
+    Render the review template straight into a text stream.
+
+    Args:
+        data: Dictionary containing all template data
+        out: File, io.StringIO, socket file or any object with write(str)
+        use_cache: Whether to reuse cached renders of unchanged sections
+
+    Returns:
+        Number of characters written
+    """
+    written = 0
+    for chunk in iter_review_template(data, use_cache):
+        out.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def format_review_template(data: Dict[str, Any], use_cache: bool = True) -> str:
+    """
+    Format the final review template.
+
+    Args:
+        data: Dictionary containing all template data
+        use_cache: Whether to reuse cached renders of unchanged sections
+
+    Returns:
+        Formatted markdown template
+    """
+    return "".join(iter_review_template(data, use_cache))
+
+
+def render_sections(data: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+    """
+    Render each section without the cache, paired with its name.
+
+    Used to measure sections, e.g. when fitting a review into a token budget.
+
+    Args:
+        data: Dictionary containing all template data
+
+    Yields:
+        (section name, rendered text) in document order
+    """
+    for name, _, render in _sections(data):
+        yield name, render()
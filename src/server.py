@@ -6,7 +6,17 @@ import logging
 import os
 import sys
 import warnings
-from typing import Any, Callable, Dict, List, Optional, Protocol, Union, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Union,
+    cast,
+)
 
 # Add current directory to path for imports
 sys.path.insert(0, os.path.dirname(__file__))
@@ -28,6 +38,8 @@ try:
             generate_code_review_context_main as generate_review_context,
         )
         from .model_config_manager import load_model_config
+        from .project_snapshot import ProjectSnapshot, build_project_snapshot
+        from .prompt_layout import CACHE_FRIENDLY_LAYOUT, context_layout
     except ImportError:
         # Fall back to absolute imports for testing
         from file_context_generator import generate_file_context_data, save_file_context
@@ -38,6 +50,8 @@ try:
             generate_code_review_context_main as generate_review_context,
         )
         from model_config_manager import load_model_config
+        from project_snapshot import ProjectSnapshot, build_project_snapshot
+        from prompt_layout import CACHE_FRIENDLY_LAYOUT, context_layout
 except ImportError as e:
     print(f"Required dependencies not available: {e}", file=sys.stderr)
     sys.exit(1)
@@ -124,19 +138,21 @@ app = mcp
 generate_context = generate_review_context
 
 
-def generate_context_in_memory(
-    github_pr_url: Optional[str] = None,
-    project_path: Optional[str] = None,
+def iter_context_in_memory(
+    github_pr_url: Optional[str],
+    project_path: str,
     include_claude_memory: bool = True,
     include_cursor_rules: bool = False,
     auto_prompt_content: Optional[str] = None,
-    temperature: float = 0.5,
-) -> str:
+    snapshot: Optional[ProjectSnapshot] = None,
+) -> Iterator[str]:
     """
-    Generate code review context content in memory without creating any files.
+    Generate code review context line by line without creating any files.
 
-    This function extracts the core context generation logic without file I/O operations.
-    It's designed for the DEFAULT behavior where no files should be created.
+    Lines can be written out as they are produced; generate_context_in_memory
+    joins them into one string. In the cache-friendly layout (see
+    prompt_layout) the timestamp and the meta-prompt move behind the project
+    configuration and PR data, so repeat reviews share a cacheable prefix.
 
     Args:
         github_pr_url: GitHub PR URL for analysis
@@ -144,151 +160,210 @@ def generate_context_in_memory(
         include_claude_memory: Include CLAUDE.md files in context
         include_cursor_rules: Include Cursor rules files in context
         auto_prompt_content: Generated meta-prompt content to embed
-        temperature: AI temperature setting
+        snapshot: Project snapshot already used for the meta-prompt
 
-    Returns:
-        Generated context content as string
+    Yields:
+        Lines of the context document, without line breaks
     """
-    try:
-        # Import here to avoid circular imports
-        import datetime
+    # Import here to avoid circular imports
+    import datetime
 
-        from context_builder import (
-            discover_project_configurations_with_fallback,
-        )
-        from github_pr_integration import get_complete_pr_analysis
+    from github_pr_integration import get_complete_pr_analysis
 
-        if not project_path:
-            project_path = os.getcwd()
+    cache_friendly = context_layout() == CACHE_FRIENDLY_LAYOUT
 
-        # Generate timestamp for context header
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d at %H:%M:%S")
-
-        # Start building context content
-        context_parts: List[str] = []
-
-        # Header
-        context_parts.append("# Code Review Context - Review Mode: GitHub PR Analysis")
-        context_parts.append(f"*Generated on {timestamp}*")
-        context_parts.append("")
+    # Generate timestamp for context header
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d at %H:%M:%S")
 
+    def user_instructions_lines() -> Iterator[str]:
         # Add user instructions (meta prompt) if provided
         if auto_prompt_content:
-            context_parts.append("<user_instructions>")
-            context_parts.append(auto_prompt_content)
-            context_parts.append("</user_instructions>")
-            context_parts.append("")
-
-        # Project summary
-        project_name = os.path.basename(os.path.abspath(project_path))
-        context_parts.append("<project_context>")
-        context_parts.append(
-            f"Generate comprehensive code review for recent development changes focusing on code quality, security, performance, and best practices for project: {project_name}"
-        )
-        context_parts.append("</project_context>")
-        context_parts.append("")
+            yield "<user_instructions>"
+            yield auto_prompt_content
+            yield "</user_instructions>"
+            yield ""
 
+    def pr_lines() -> Iterator[str]:
         # GitHub PR Analysis
-        if github_pr_url:
-            try:
-                context_parts.append("## GitHub Pull Request Analysis")
-                context_parts.append(f"**PR URL:** {github_pr_url}")
-                context_parts.append("")
-
-                # Get PR data
-                pr_analysis = get_complete_pr_analysis(github_pr_url)
-                pr_data = pr_analysis.get("pr_data", {})
-                file_changes = pr_analysis.get("file_changes", {})
-
-                # PR metadata
-                context_parts.append("### Pull Request Details")
-                context_parts.append(f"- **Title:** {pr_data.get('title', 'N/A')}")
-                context_parts.append(f"- **Author:** {pr_data.get('author', 'N/A')}")
-                context_parts.append(
-                    f"- **Source Branch:** {pr_data.get('source_branch', 'N/A')}"
-                )
-                context_parts.append(
-                    f"- **Target Branch:** {pr_data.get('target_branch', 'N/A')}"
-                )
-                context_parts.append(f"- **Status:** {pr_data.get('state', 'N/A')}")
-                context_parts.append("")
-
-                if pr_data.get("body"):
-                    context_parts.append("### PR Description")
-                    context_parts.append(pr_data["body"])
-                    context_parts.append("")
-
-                # File changes summary
-                summary = file_changes.get("summary", {})
-                context_parts.append("### Changes Summary")
-                context_parts.append(
-                    f"- **Files Changed:** {summary.get('files_changed', 0)}"
-                )
-                context_parts.append(
-                    f"- **Lines Added:** {summary.get('total_additions', 0)}"
-                )
-                context_parts.append(
-                    f"- **Lines Deleted:** {summary.get('total_deletions', 0)}"
-                )
-                context_parts.append("")
-
-                # File changes details
-                changed_files = file_changes.get("changed_files", [])
-                if changed_files:
-                    context_parts.append("### File Changes")
-                    for file_change in changed_files:
-                        context_parts.append(f"#### {file_change['path']}")
-                        context_parts.append(f"**Status:** {file_change['status']}")
-                        context_parts.append(
-                            f"**Changes:** +{file_change.get('additions', 0)} -{file_change.get('deletions', 0)}"
-                        )
+        if not github_pr_url:
+            return
+        try:
+            yield "## GitHub Pull Request Analysis"
+            yield f"**PR URL:** {github_pr_url}"
+            yield ""
+
+            # Get PR data
+            pr_analysis = get_complete_pr_analysis(github_pr_url)
+            pr_data = pr_analysis.get("pr_data", {})
+            file_changes = pr_analysis.get("file_changes", {})
+
+            # PR metadata
+            yield "### Pull Request Details"
+            yield f"- **Title:** {pr_data.get('title', 'N/A')}"
+            yield f"- **Author:** {pr_data.get('author', 'N/A')}"
+            yield f"- **Source Branch:** {pr_data.get('source_branch', 'N/A')}"
+            yield f"- **Target Branch:** {pr_data.get('target_branch', 'N/A')}"
+            yield f"- **Status:** {pr_data.get('state', 'N/A')}"
+            yield ""
+
+            if pr_data.get("body"):
+                yield "### PR Description"
+                yield pr_data["body"]
+                yield ""
+
+            # File changes summary
+            summary = file_changes.get("summary", {})
+            yield "### Changes Summary"
+            yield f"- **Files Changed:** {summary.get('files_changed', 0)}"
+            yield f"- **Lines Added:** {summary.get('total_additions', 0)}"
+            yield f"- **Lines Deleted:** {summary.get('total_deletions', 0)}"
+            yield ""
+
+            # File changes details
+            changed_files = file_changes.get("changed_files", [])
+            if cache_friendly:
+                changed_files = sorted(changed_files, key=lambda f: f["path"])
+            if changed_files:
+                yield "### File Changes"
+                for file_change in changed_files:
+                    yield f"#### {file_change['path']}"
+                    yield f"**Status:** {file_change['status']}"
+                    yield (
+                        f"**Changes:** +{file_change.get('additions', 0)} -{file_change.get('deletions', 0)}"
+                    )
 
-                        if file_change.get("patch"):
-                            context_parts.append("```diff")
-                            context_parts.append(file_change["patch"])
-                            context_parts.append("```")
-                        context_parts.append("")
+                    if file_change.get("patch"):
+                        yield "```diff"
+                        yield file_change["patch"]
+                        yield "```"
+                    yield ""
 
-            except Exception as e:
-                context_parts.append(f"⚠️ Failed to fetch PR data: {str(e)}")
-                context_parts.append("")
+        except Exception as e:
+            yield f"⚠️ Failed to fetch PR data: {str(e)}"
+            yield ""
 
+    def configuration_lines() -> Iterator[str]:
         # Configuration discovery (CLAUDE.md, Cursor rules, etc.)
-        if include_claude_memory or include_cursor_rules:
-            try:
-                config_data = discover_project_configurations_with_fallback(
-                    project_path
+        if not (include_claude_memory or include_cursor_rules):
+            return
+        try:
+            configured = snapshot
+            if configured is None or not configured.matches(
+                project_path, include_claude_memory, include_cursor_rules
+            ):
+                configured = build_project_snapshot(
+                    project_path, include_claude_memory, include_cursor_rules
                 )
+            configurations = configured.configurations
+
+            if include_claude_memory and configurations["claude_memory_files"]:
+                yield "## Project Configuration - CLAUDE.md Files"
+                for memory_file in configurations["claude_memory_files"]:
+                    yield f"### {memory_file.file_path}"
+                    yield "```markdown"
+                    yield memory_file.content
+                    yield "```"
+                    yield ""
+
+            if include_cursor_rules and configurations["cursor_rules"]:
+                yield "## Project Configuration - Cursor Rules"
+                for rule in configurations["cursor_rules"]:
+                    yield f"### {rule.file_path}"
+                    yield "```"
+                    yield rule.content
+                    yield "```"
+                    yield ""
 
-                if include_claude_memory and config_data.get("claude_memory_files"):
-                    context_parts.append("## Project Configuration - CLAUDE.md Files")
-                    for memory_file in config_data["claude_memory_files"]:
-                        context_parts.append(f"### {memory_file['path']}")
-                        context_parts.append("```markdown")
-                        context_parts.append(memory_file["content"])
-                        context_parts.append("```")
-                        context_parts.append("")
-
-                if include_cursor_rules and config_data.get("cursor_rules"):
-                    context_parts.append("## Project Configuration - Cursor Rules")
-                    for rule in config_data["cursor_rules"]:
-                        context_parts.append(f"### {rule['path']}")
-                        context_parts.append("```")
-                        context_parts.append(rule["content"])
-                        context_parts.append("```")
-                        context_parts.append("")
+        except Exception as e:
+            yield f"⚠️ Configuration discovery failed: {str(e)}"
+            yield ""
+
+    # Header
+    yield "# Code Review Context - Review Mode: GitHub PR Analysis"
+    if not cache_friendly:
+        yield f"*Generated on {timestamp}*"
+    yield ""
+
+    if not cache_friendly:
+        yield from user_instructions_lines()
+
+    # Project summary
+    project_name = os.path.basename(os.path.abspath(project_path))
+    yield "<project_context>"
+    yield (
+        f"Generate comprehensive code review for recent development changes focusing on code quality, security, performance, and best practices for project: {project_name}"
+    )
+    yield "</project_context>"
+    yield ""
 
-            except Exception as e:
-                context_parts.append(f"⚠️ Configuration discovery failed: {str(e)}")
-                context_parts.append("")
+    if cache_friendly:
+        # Most stable first: configuration, then the PR, then the meta-prompt
+        yield from configuration_lines()
+        yield from pr_lines()
+        yield from user_instructions_lines()
+    else:
+        yield from pr_lines()
+        yield from configuration_lines()
+
+    # Footer
+    yield "---"
+    yield f"*Context generated in-memory for project: {project_name}*"
+    if cache_friendly:
+        yield f"*Generated on {timestamp}*"
+
+
+def generate_context_in_memory(
+    github_pr_url: Optional[str] = None,
+    project_path: Optional[str] = None,
+    include_claude_memory: bool = True,
+    include_cursor_rules: bool = False,
+    auto_prompt_content: Optional[str] = None,
+    temperature: float = 0.5,
+    snapshot: Optional[ProjectSnapshot] = None,
+) -> str:
+    """
+    Generate code review context content in memory without creating any files.
+
+    This function extracts the core context generation logic without file I/O operations.
+    It's designed for the DEFAULT behavior where no files should be created.
+
+    Args:
+        github_pr_url: GitHub PR URL for analysis
+        project_path: Project directory path
+        include_claude_memory: Include CLAUDE.md files in context
+        include_cursor_rules: Include Cursor rules files in context
+        auto_prompt_content: Generated meta-prompt content to embed
+        temperature: AI temperature setting
+        snapshot: Project snapshot already used for the meta-prompt
+
+    Returns:
+        Generated context content as string
+    """
+    if not project_path:
+        project_path = os.getcwd()
 
-        # Footer
-        context_parts.append("---")
-        context_parts.append(
-            f"*Context generated in-memory for project: {project_name}*"
+    try:
+        content = "\n".join(
+            iter_context_in_memory(
+                github_pr_url,
+                project_path,
+                include_claude_memory,
+                include_cursor_rules,
+                auto_prompt_content,
+                snapshot,
+            )
         )
+        if context_layout() == CACHE_FRIENDLY_LAYOUT:
+            try:
+                from .dependencies import get_production_container
+            except ImportError:
+                from dependencies import get_production_container
 
-        return "\n".join(context_parts)
+            prefix = get_production_container().prefix_tracker.measure(
+                project_path, [content], kind="pr_context"
+            )
+            logger.info(prefix.summary())
+        return content
 
     except Exception as e:
         # Fallback minimal context
@@ -379,6 +454,11 @@ async def generate_pr_review(
         stderr_capture = io.StringIO()
 
         try:
+            # One look at the project serves the meta prompt and the context
+            snapshot = build_project_snapshot(
+                project_path, include_claude_memory, include_cursor_rules
+            )
+
             # Generate meta prompt if requested and not overridden by use_templated_instructions
             auto_prompt_content = None
             if auto_meta_prompt and not use_templated_instructions:
@@ -391,6 +471,7 @@ async def generate_pr_review(
                         scope="recent_phase",  # Default scope for PR reviews
                         temperature=temperature,
                         thinking_budget=thinking_budget,
+                        snapshot=snapshot,
                     )
                     auto_prompt_content = meta_prompt_result.get("generated_prompt")
                     if not auto_prompt_content:
@@ -412,6 +493,7 @@ async def generate_pr_review(
                         include_claude_memory=include_claude_memory,
                         include_cursor_rules=include_cursor_rules,
                         auto_prompt_content=auto_prompt_content,
+                        project_snapshot=snapshot,
                     )
             elif create_context_file:
                 # Mode: Create context file (for backward compatibility)
@@ -424,6 +506,7 @@ async def generate_pr_review(
                         include_claude_memory=include_claude_memory,
                         include_cursor_rules=include_cursor_rules,
                         auto_prompt_content=auto_prompt_content,
+                        project_snapshot=snapshot,
                     )
             else:
                 # DEFAULT behavior: Pure in-memory context generation (NO intermediate files created)
@@ -436,6 +519,7 @@ async def generate_pr_review(
                         include_cursor_rules=include_cursor_rules,
                         auto_prompt_content=auto_prompt_content,
                         temperature=temperature,
+                        snapshot=snapshot,
                     )
 
                     # No files created - context is purely in memory
@@ -669,6 +753,11 @@ def generate_code_review_context(
         if supports_thinking and not disable_thinking:
             actual_capabilities.append("thinking mode")
 
+        # One look at the project serves the meta prompt and the context
+        snapshot = build_project_snapshot(
+            project_path, include_claude_memory, include_cursor_rules
+        )
+
         # Generate meta prompt if requested
         auto_prompt_content = None
         if auto_meta_prompt:
@@ -680,6 +769,7 @@ def generate_code_review_context(
                     project_path=project_path,
                     scope=scope,
                     thinking_budget=thinking_budget,
+                    snapshot=snapshot,
                 )
                 auto_prompt_content = meta_prompt_result.get("generated_prompt")
                 if not auto_prompt_content:
@@ -704,6 +794,7 @@ def generate_code_review_context(
                 include_cursor_rules=include_cursor_rules,
                 raw_context_only=raw_context_only,
                 auto_prompt_content=auto_prompt_content,
+                project_snapshot=snapshot,
             )
 
             # Return response based on text_output setting
@@ -792,6 +883,7 @@ def generate_ai_code_review(
     include_cursor_rules: bool = False,
     thinking_budget: Optional[int] = None,
     url_context: Optional[Union[str, List[str]]] = None,
+    since_last_review: bool = False,
 ) -> str:
     """Generate AI-powered code review from context file, content, or project analysis.
 
@@ -814,6 +906,7 @@ def generate_ai_code_review(
         include_cursor_rules: Include Cursor rules files in context (default: false)
         thinking_budget: Optional token budget for thinking mode (if supported by model)
         url_context: Optional URL(s) to include in context - can be string or list of strings
+        since_last_review: With project_path, only review files changed since the last review of the project, with that review's summary as context (default: false)
 
     Returns:
         Default (text_output=True): Generated AI review content as text string for AI agent chaining
@@ -999,6 +1092,7 @@ Provide specific, actionable feedback with code examples where appropriate."""
                 # Generate context internally from project_path and clean up intermediate files
                 import tempfile
 
+                from dependencies import get_production_container
                 from generate_code_review_context import (
                     generate_code_review_context_main,
                 )
@@ -1007,6 +1101,15 @@ Provide specific, actionable feedback with code examples where appropriate."""
                 # Generate context internally with temporary file cleanup
                 temp_context_file = None
                 try:
+                    # One look at the project serves the meta prompt and the context
+                    snapshot = (
+                        build_project_snapshot(
+                            project_path, include_claude_memory, include_cursor_rules
+                        )
+                        if project_path
+                        else None
+                    )
+
                     # Generate meta prompt if enabled
                     if auto_meta_prompt and project_path:
                         meta_prompt_result = generate_optimized_meta_prompt(
@@ -1014,6 +1117,7 @@ Provide specific, actionable feedback with code examples where appropriate."""
                             scope=scope,
                             temperature=temperature,
                             thinking_budget=thinking_budget,
+                            snapshot=snapshot,
                         )
                         auto_prompt_content = meta_prompt_result.get("generated_prompt")
                     else:
@@ -1040,6 +1144,9 @@ Provide specific, actionable feedback with code examples where appropriate."""
                         raw_context_only=False,
                         auto_prompt_content=auto_prompt_content,
                         temperature=temperature,
+                        since_last_review=since_last_review,
+                        project_snapshot=snapshot,
+                        model=model,
                     )
 
                     # Read the generated context content
@@ -1087,6 +1194,12 @@ Provide specific, actionable feedback with code examples where appropriate."""
                     if not ai_review_content:
                         return "ERROR: Gemini API failed to generate AI review"
 
+                    # Baseline for the next since_last_review run
+                    if project_path:
+                        get_production_container().review_snapshots.record_review(
+                            project_path, ai_review_content
+                        )
+
                     # Create AI review file if text_output=False, otherwise keep as None
                     if not text_output:
                         # Generate timestamped filename for AI review
@@ -1622,6 +1735,15 @@ def get_mcp_tools():
 
 def main():
     """Entry point for uvx execution"""
+    # `gemini-code-review-mcp cache ...` manages the cache instead of serving
+    if len(sys.argv) > 1 and sys.argv[1] == "cache":
+        try:
+            from .cli.cache_command import main as cache_main
+        except ImportError:
+            from cli.cache_command import main as cache_main
+
+        sys.exit(cache_main(sys.argv[2:]))
+
     # Configure logging for MCP context
     try:
         from .logging_config import setup_mcp_logging
@@ -1629,6 +1751,18 @@ def main():
         from logging_config import setup_mcp_logging
     
     setup_mcp_logging()
+
+    # Remove expired cache entries in the background while the server runs
+    try:
+        from .cache import start_cache_sweeper
+        from .dependencies import get_production_container
+    except ImportError:
+        from cache import start_cache_sweeper
+        from dependencies import get_production_container
+
+    cache = get_production_container().cache_manager
+    if cache is not None:
+        start_cache_sweeper(cache)
     
     # FastMCP handles all the server setup, protocol, and routing
     # Default transport is stdio (best for local tools and command-line scripts)
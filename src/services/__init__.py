@@ -1,6 +1,8 @@
 try:
     from .file_finder import FileFinder, ProjectFiles
+    from .project_fingerprint import Fingerprint, ProjectFingerprint
 except ImportError:
     from file_finder import FileFinder, ProjectFiles
+    from project_fingerprint import Fingerprint, ProjectFingerprint
 
-__all__ = ["FileFinder", "ProjectFiles"]
+__all__ = ["FileFinder", "Fingerprint", "ProjectFiles", "ProjectFingerprint"]
@@ -0,0 +1,399 @@
+"""Cheap, composable fingerprint of everything that can change a review.
+
+A fingerprint is a Merkle hash over independent components. Each cache keys
+on the sub-hashes it actually depends on, so an edit to a CLAUDE.md file
+invalidates configuration caches without touching git caches, and a new
+commit invalidates git caches without re-reading configuration.
+
+Components:
+    head:     OID that HEAD resolves to, read from ref files (no subprocess)
+    index:    trailing checksum of .git/index, which changes with staging
+    worktree: stat signatures of modified, deleted and untracked files
+    config:   stat signatures of CLAUDE.md, Cursor rules, pyproject.toml, .env
+    env:      GEMINI_* environment variables and caller-supplied flags
+
+More components are computed only on request:
+
+    refs:     what each named revision (branch, tag, remote branch) resolves to
+    files:    stat signatures of named files
+    config_content: content hashes of the configuration files, which unlike
+              their stat signatures are the same in every checkout
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+logger = logging.getLogger(__name__)
+
+COMPONENTS = ("head", "index", "worktree", "config", "env")
+
+# Files read by configuration discovery and the config loader, as git pathspecs
+CONFIG_PATHSPECS = (
+    ":(glob)**/CLAUDE.md",
+    ":(glob).cursor/rules/**/*.mdc",
+    ".cursorrules",
+    "pyproject.toml",
+    ".env",
+)
+
+ENV_PREFIX = "GEMINI_"
+# Credentials never change review content and are left out of the hash
+_SECRET_MARKERS = ("KEY", "TOKEN", "SECRET")
+
+# Index checksum trailer: SHA-1 repositories use 20 bytes
+_INDEX_CHECKSUM_BYTES = 20
+
+# Revision suffixes (main~2, HEAD^, origin/main@{1}, v1.0:path) follow the name
+_REV_SUFFIX_RE = re.compile(r"[~^@:]")
+_OBJECT_ID_RE = re.compile(r"[0-9a-f]{7,64}")
+# Pseudo-refs such as HEAD or FETCH_HEAD live directly in the git directory
+_PSEUDO_REF_RE = re.compile(r"[A-Z_]+")
+# Symbolic refs pointing at symbolic refs are rare; bound the chain anyway
+_MAX_SYMREF_DEPTH = 5
+
+
+def _hash_lines(lines: Iterable[str]) -> str:
+    """Hash an iterable of lines into a hex digest."""
+    h = hashlib.sha256()
+    for line in lines:
+        h.update(line.encode("utf-8", "surrogateescape"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def _content_line(path: Path, label: str) -> str:
+    """Describe a file's content hash, or its absence, as one line."""
+    try:
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return f"{label}\0-"
+    return f"{label}\0{digest}"
+
+
+def _stat_line(path: Path, label: str) -> str:
+    """Describe a file's stat signature, or its absence, as one line."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return f"{label}\0-"
+    return f"{label}\0{st.st_mtime_ns},{st.st_size},{st.st_ino}"
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """Fingerprint of a project with per-component sub-hashes."""
+
+    digest: str
+    components: Dict[str, str] = field(default_factory=dict)
+    # Outside a repository the git components are constants that never change
+    in_git_repo: bool = True
+
+    def key_for(self, *names: str) -> str:
+        """
+        Combine the sub-hashes of selected components.
+
+        Args:
+            *names: Component names the caller's cache depends on
+
+        Returns:
+            Hex digest that changes only when one of those components changes
+
+        Raises:
+            KeyError: If a component name is unknown
+        """
+        return _hash_lines(f"{name}:{self.components[name]}" for name in sorted(names))
+
+
+class ProjectFingerprint:
+    """Service that computes project fingerprints in a few milliseconds."""
+
+    def __init__(self, git_timeout: float = 10.0):
+        """
+        Initialize the fingerprint service.
+
+        Args:
+            git_timeout: Seconds to wait for git ls-files before giving up
+        """
+        self.git_timeout = git_timeout
+
+    def compute(
+        self,
+        project_path: Union[str, Path],
+        flags: Optional[Dict[str, Any]] = None,
+        components: Iterable[str] = COMPONENTS,
+        refs: Sequence[str] = (),
+        files: Sequence[Union[str, Path]] = (),
+    ) -> Fingerprint:
+        """
+        Fingerprint a project.
+
+        Args:
+            project_path: Project directory
+            flags: Extra inputs that affect the result (e.g. include_claude_memory)
+            components: Components to compute; skipping unneeded ones saves time
+            refs: Revisions hashed by the "refs" component
+            files: Files, relative to the project, hashed by the "files" component
+
+        Returns:
+            Fingerprint whose digest covers the computed components
+        """
+        project = Path(project_path).resolve()
+        git_dirs = self._find_git_dirs(project)
+
+        builders = {
+            "head": lambda: self._head_hash(git_dirs),
+            "index": lambda: self._index_hash(git_dirs),
+            "worktree": lambda: self._worktree_hash(project, git_dirs),
+            "config": lambda: self._config_hash(project, git_dirs),
+            "config_content": lambda: self._config_hash(
+                project, git_dirs, _content_line
+            ),
+            "env": lambda: self._env_hash(flags),
+            "refs": lambda: self._refs_hash(git_dirs, refs),
+            "files": lambda: _hash_lines(
+                _stat_line(project / path, str(path)) for path in files
+            ),
+        }
+        sub_hashes: Dict[str, str] = {}
+        for name in components:
+            if name not in builders:
+                raise KeyError(f"Unknown fingerprint component: {name}")
+            sub_hashes[name] = builders[name]()
+
+        digest = _hash_lines(
+            f"{name}:{sub_hashes[name]}" for name in sorted(sub_hashes)
+        )
+        return Fingerprint(
+            digest=digest, components=sub_hashes, in_git_repo=git_dirs is not None
+        )
+
+    def _find_git_dirs(self, project: Path) -> Optional[Tuple[Path, Path]]:
+        """
+        Locate the git directory and common directory for a project.
+
+        Handles worktrees and submodules, where .git is a file pointing
+        elsewhere and shared refs live in the common directory.
+
+        Returns:
+            (git_dir, common_dir), or None outside a repository
+        """
+        for candidate in (project, *project.parents):
+            dot_git = candidate / ".git"
+            if dot_git.is_dir():
+                git_dir = dot_git
+            elif dot_git.is_file():
+                try:
+                    content = dot_git.read_text(encoding="utf-8").strip()
+                except OSError:
+                    return None
+                if not content.startswith("gitdir:"):
+                    return None
+                git_dir = (candidate / content[len("gitdir:") :].strip()).resolve()
+            else:
+                continue
+
+            common_dir = git_dir
+            commondir_file = git_dir / "commondir"
+            if commondir_file.is_file():
+                common_dir = (
+                    git_dir / commondir_file.read_text(encoding="utf-8").strip()
+                ).resolve()
+            return git_dir, common_dir
+        return None
+
+    def _lookup_ref(
+        self, git_dirs: Tuple[Path, Path], ref: str, depth: int = 0
+    ) -> Optional[str]:
+        """Look a ref up in loose ref files and packed-refs, or return None."""
+        git_dir, common_dir = git_dirs
+        for base in (git_dir, common_dir):
+            try:
+                value = (base / ref).read_text(encoding="utf-8").strip()
+            except (OSError, ValueError):
+                continue
+            if value.startswith("ref:") and depth < _MAX_SYMREF_DEPTH:
+                target = value[len("ref:") :].strip()
+                return self._lookup_ref(git_dirs, target, depth + 1) or value
+            return value
+
+        try:
+            with open(common_dir / "packed-refs", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2 and parts[1] == ref:
+                        return parts[0]
+        except OSError:
+            pass
+        return None
+
+    def _resolve_ref(self, git_dirs: Tuple[Path, Path], ref: str) -> str:
+        """Resolve a symbolic ref through loose ref files and packed-refs."""
+        # Unborn branch: no commit yet
+        return self._lookup_ref(git_dirs, ref) or f"unborn:{ref}"
+
+    def _rev_state(self, git_dirs: Tuple[Path, Path], rev: str) -> str:
+        """
+        Describe what a revision currently points to, without running git.
+
+        Suffixes are ignored: main~2 moves exactly when main moves. Names are
+        tried in the order git uses to disambiguate them.
+        """
+        name = _REV_SUFFIX_RE.split(rev, 1)[0] or "HEAD"
+        if name == "HEAD":
+            return self._head_hash(git_dirs)
+
+        candidates = []
+        if name.startswith("refs/") or _PSEUDO_REF_RE.fullmatch(name):
+            candidates.append(name)
+        candidates.extend(
+            [
+                f"refs/{name}",
+                f"refs/tags/{name}",
+                f"refs/heads/{name}",
+                f"refs/remotes/{name}",
+                f"refs/remotes/{name}/HEAD",
+            ]
+        )
+        for candidate in candidates:
+            oid = self._lookup_ref(git_dirs, candidate)
+            if oid is not None:
+                return f"{candidate}\0{oid}"
+        if _OBJECT_ID_RE.fullmatch(name):
+            # Object IDs never move
+            return f"object\0{name}"
+        return f"unresolved\0{name}"
+
+    def _refs_hash(
+        self, git_dirs: Optional[Tuple[Path, Path]], refs: Sequence[str]
+    ) -> str:
+        """Hash what each named revision resolves to."""
+        if git_dirs is None:
+            return _hash_lines(["no-git"])
+        return _hash_lines(f"{rev}\0{self._rev_state(git_dirs, rev)}" for rev in refs)
+
+    def _head_hash(self, git_dirs: Optional[Tuple[Path, Path]]) -> str:
+        """Hash the commit HEAD points to (and the branch name)."""
+        if git_dirs is None:
+            return _hash_lines(["no-git"])
+        try:
+            head = (git_dirs[0] / "HEAD").read_text(encoding="utf-8").strip()
+        except OSError:
+            return _hash_lines(["no-head"])
+
+        if head.startswith("ref:"):
+            ref = head[len("ref:") :].strip()
+            return _hash_lines([ref, self._resolve_ref(git_dirs, ref)])
+        return _hash_lines(["detached", head])
+
+    def _index_hash(self, git_dirs: Optional[Tuple[Path, Path]]) -> str:
+        """Hash the index checksum trailer, which git rewrites on every change."""
+        if git_dirs is None:
+            return _hash_lines(["no-git"])
+        index_path = git_dirs[0] / "index"
+        try:
+            with open(index_path, "rb") as f:
+                f.seek(-_INDEX_CHECKSUM_BYTES, os.SEEK_END)
+                checksum = f.read().hex()
+        except OSError:
+            return _hash_lines(["no-index"])
+        return _hash_lines([checksum])
+
+    def _git_ls_files(self, project: Path, args: List[str]) -> Optional[List[str]]:
+        """Run git ls-files -z and return its paths, or None on failure."""
+        try:
+            result = subprocess.run(
+                ["git", "ls-files", "-z", *args],
+                cwd=project,
+                capture_output=True,
+                timeout=self.git_timeout,
+                check=True,
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.debug(f"git ls-files failed in {project}: {e}")
+            return None
+        return [
+            p for p in result.stdout.decode("utf-8", "surrogateescape").split("\0") if p
+        ]
+
+    def _worktree_hash(
+        self, project: Path, git_dirs: Optional[Tuple[Path, Path]]
+    ) -> str:
+        """Hash stat signatures of modified, deleted and untracked files."""
+        if git_dirs is None:
+            return _hash_lines(["no-git"])
+        paths = self._git_ls_files(
+            project, ["--modified", "--others", "--exclude-standard"]
+        )
+        if paths is None:
+            # Unknown state: make the component unique so nothing is reused
+            return _hash_lines(["unavailable", os.urandom(8).hex()])
+        return _hash_lines(
+            _stat_line(project / path, path) for path in sorted(set(paths))
+        )
+
+    def _config_paths(
+        self, project: Path, git_dirs: Optional[Tuple[Path, Path]]
+    ) -> List[str]:
+        """List configuration files relative to the project."""
+        if git_dirs is not None:
+            paths = self._git_ls_files(
+                project,
+                ["--cached", "--others", "--exclude-standard", "--", *CONFIG_PATHSPECS],
+            )
+            if paths is not None:
+                return paths
+
+        # Outside git: fixed locations plus the same globs discovery uses
+        paths = [".cursorrules", "pyproject.toml", ".env"]
+        for pattern in ("**/CLAUDE.md", ".cursor/rules/**/*.mdc"):
+            paths.extend(
+                os.path.relpath(match, project)
+                for match in glob.glob(str(project / pattern), recursive=True)
+            )
+        return paths
+
+    def _config_hash(
+        self,
+        project: Path,
+        git_dirs: Optional[Tuple[Path, Path]],
+        describe: Callable[[Path, str], str] = _stat_line,
+    ) -> str:
+        """Hash stat signatures (or contents) of project and user configuration."""
+        lines = [
+            describe(project / path, path)
+            for path in sorted(set(self._config_paths(project, git_dirs)))
+        ]
+        user_memory = Path.home() / ".claude" / "CLAUDE.md"
+        lines.append(describe(user_memory, "~/.claude/CLAUDE.md"))
+        return _hash_lines(lines)
+
+    def _env_hash(self, flags: Optional[Dict[str, Any]]) -> str:
+        """Hash relevant environment variables and caller flags."""
+        env = sorted(
+            (name, value)
+            for name, value in os.environ.items()
+            if name.startswith(ENV_PREFIX)
+            and not any(marker in name for marker in _SECRET_MARKERS)
+        )
+        return _hash_lines(
+            [json.dumps(env), json.dumps(flags or {}, sort_keys=True, default=str)]
+        )
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+"""
+Token estimation calibrated per content class.
+
+``len(text) // 4`` is close for English prose and ordinary code but off by
+2x or more for minified code, CJK text, digits and deep indentation. The
+estimator instead splits text roughly the way subword tokenizers pre-split
+it (words and camelCase parts, single digits, CJK characters, punctuation
+runs, whitespace runs) and charges each piece a cost.
+
+Every text falls into a content class: the language implied by its file
+extension plus its character mix (``python/plain``, ``javascript/dense``,
+``markdown/cjk``...). The raw count is scaled by the class's calibration
+factor. Factors start at 1.0 and are learned from exact counts: with a
+TokenCounter such as GeminiTokenCounter configured, a sample of newly seen
+texts is also counted exactly and each class's factor moves towards the
+observed ratio. The local estimate stands in for count_tokens everywhere,
+so no request ever waits on the endpoint unless sampling is enabled.
+
+Estimates of texts of at least ``CACHE_MIN_CHARS`` are memoized per
+content digest, and file contents are also cached persistently, so each
+file version is measured once.
+"""
+
+import logging
+import math
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple
+
+try:
+    from .cache.content_store import content_digest
+except ImportError:
+    from cache.content_store import content_digest
+
+logger = logging.getLogger(__name__)
+
+# Bump when the piece costs change; cached raw counts die with the version
+ESTIMATOR_VERSION = 1
+ESTIMATE_OPERATION = "token_estimate"
+CALIBRATION_OPERATION = "token_calibration"
+# Estimates are keyed by content, so entries never go stale
+ESTIMATE_TTL = 7 * 24 * 3600
+CALIBRATION_TTL = 30 * 24 * 3600
+
+# Shorter texts are cheaper to measure than to hash and look up
+CACHE_MIN_CHARS = 4096
+_MEMO_SIZE = 4096
+
+# Weight of the newest exact count once a class has this many samples
+_MIN_LEARNING_RATE = 0.1
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_PIECES = re.compile(
+    rf"(?P<word> ?(?:[A-Z]+(?![a-z])|[A-Z]?[a-z]+))"
+    rf"|(?P<digit>[0-9])"
+    rf"|(?P<cjk>[{_CJK}])"
+    rf"|(?P<other> ?[^\x00-\x7f{_CJK}]+)"
+    rf"|(?P<space>\s+)"
+    rf"|(?P<punct> ?[^\sA-Za-z0-9\x80-\U0010ffff]+)"
+)
+
+_LANGUAGES = {
+    ".py": "python",
+    ".pyi": "python",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".mjs": "javascript",
+    ".ts": "javascript",
+    ".tsx": "javascript",
+    ".md": "markdown",
+    ".mdx": "markdown",
+    ".rst": "markdown",
+    ".txt": "text",
+    ".json": "data",
+    ".yaml": "data",
+    ".yml": "data",
+    ".toml": "data",
+    ".csv": "data",
+    ".html": "markup",
+    ".xml": "markup",
+    ".svg": "markup",
+}
+
+# (content class, raw token count, exact count if validated)
+_Record = Tuple[str, int, Optional[int]]
+
+
+class TokenCounter(Protocol):
+    """Exact token counter used to calibrate the estimator."""
+
+    name: str
+
+    def count_tokens(self, text: str) -> int:
+        """Count the tokens of a text."""
+        ...
+
+
+class GeminiTokenCounter:
+    """Exact counts from the Gemini count_tokens endpoint."""
+
+    def __init__(self, model: Optional[str] = None, api_key: Optional[str] = None):
+        """
+        Initialize the counter.
+
+        Args:
+            model: Model name or alias (default: GEMINI_MODEL or the config default)
+            api_key: API key (default: load_api_key())
+
+        Raises:
+            ImportError: If google-genai is not installed
+            ValueError: If no API key is available
+        """
+        try:
+            from .gemini_api_client import GEMINI_AVAILABLE, genai, load_api_key
+            from .model_config_manager import load_model_config
+        except ImportError:
+            from gemini_api_client import GEMINI_AVAILABLE, genai, load_api_key
+            from model_config_manager import load_model_config
+
+        if not GEMINI_AVAILABLE:
+            raise ImportError("google-genai is required for exact token counts")
+        api_key = api_key or load_api_key()
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY is required for exact token counts")
+
+        config = load_model_config()
+        model = model or os.getenv("GEMINI_MODEL", config["defaults"]["model"])
+        self.model = config["model_aliases"].get(model, model)
+        self.name = f"gemini:{self.model}"
+        self._client = genai.Client(api_key=api_key)
+
+    def count_tokens(self, text: str) -> int:
+        """Count the tokens of a text with the model's tokenizer."""
+        response = self._client.models.count_tokens(model=self.model, contents=text)
+        return int(response.total_tokens)
+
+
+def _language(path: Optional[str]) -> str:
+    """Guess the language of a file from its extension."""
+    if not path:
+        return "text"
+    extension = os.path.splitext(path)[1].lower()
+    return _LANGUAGES.get(extension, "code" if extension else "text")
+
+
+def _count(text: str) -> Tuple[int, int, int]:
+    """Count raw tokens, CJK characters and long whitespace runs of a text."""
+    tokens = 0
+    cjk = 0
+    whitespace = 0  # Characters in runs longer than one separator
+    for match in _PIECES.finditer(text):
+        kind = match.lastgroup
+        length = match.end() - match.start()
+        if kind == "word":
+            # Common words are single tokens; long identifiers split up
+            tokens += 1 if length <= 14 else math.ceil(length / 6)
+        elif kind == "space":
+            if length > 1:
+                whitespace += length
+            tokens += 1 + length // 8
+        elif kind == "punct" or kind == "other":
+            tokens += math.ceil(length / 2)
+        else:
+            # Digits and CJK characters are a token each
+            cjk += kind == "cjk"
+            tokens += 1
+    return tokens, cjk, whitespace
+
+
+def _content_class(
+    path: Optional[str], length: int, lines: int, cjk: int, whitespace: int
+) -> str:
+    """Name the content class of a text from its character mix."""
+    if cjk * 10 > length:
+        mix = "cjk"
+    elif length / lines > 200:
+        mix = "dense"  # Minified code, base64, long data lines
+    elif whitespace * 3 > length:
+        mix = "sparse"  # Deep indentation, aligned tables
+    else:
+        mix = "plain"
+    return f"{_language(path)}/{mix}"
+
+
+def measure(text: str, path: Optional[str] = None) -> Tuple[str, int]:
+    """
+    Count tokens of a text without calibration.
+
+    Args:
+        text: Text to measure
+        path: File the text comes from, used to pick the language
+
+    Returns:
+        Tuple of (content class, raw token count)
+    """
+    tokens, cjk, whitespace = _count(text)
+    lines = text.count("\n") + 1
+    return _content_class(path, len(text), lines, cjk, whitespace), tokens
+
+
+def measure_lines(
+    lines: Iterable[str], path: Optional[str] = None
+) -> Tuple[str, List[int]]:
+    """
+    Count tokens of a text line by line, without calibration.
+
+    Whitespace between lines (trailing spaces, the newline, blank lines, the
+    indentation of the next line) is one piece for the tokenizer, so it is
+    charged to the next line with text, and the sum over any run of lines is
+    close to what measure gives for the run.
+
+    Args:
+        lines: Lines with their line endings, as readlines() returns them
+        path: File the lines come from, used to pick the language
+
+    Returns:
+        Tuple of (content class of the whole text, raw token count per line)
+    """
+    counts: List[int] = []
+    length = cjk = whitespace = 0
+    pending = ""  # Whitespace since the last line with text
+    for line in lines:
+        length += len(line)
+        body = line.rstrip()
+        if not body:
+            counts.append(0)
+            pending += line
+            continue
+        tokens, line_cjk, line_whitespace = _count(pending + body)
+        counts.append(tokens)
+        cjk += line_cjk
+        whitespace += line_whitespace
+        pending = line[len(body) :]
+    if pending:
+        tokens, _, line_whitespace = _count(pending)
+        whitespace += line_whitespace
+        if counts:
+            counts[-1] += tokens
+    # Like text.count("\n") + 1 in measure
+    lines_in_text = len(counts) + (1 if not counts or line.endswith("\n") else 0)
+    content_class = _content_class(path, length, lines_in_text, cjk, whitespace)
+    return content_class, counts
+
+
+class TokenEstimator:
+    """Token estimates calibrated per content class and cached per content."""
+
+    def __init__(
+        self,
+        cache: Optional[Any] = None,
+        counter: Optional[TokenCounter] = None,
+        validation_rate: float = 0.0,
+    ):
+        """
+        Initialize the estimator.
+
+        Args:
+            cache: Cache for estimates and calibration factors, if any
+            counter: Exact counter used to validate a sample of new texts
+            validation_rate: Fraction (0-1) of new texts counted exactly
+        """
+        self._cache = cache
+        self._counter = counter
+        self._validation_rate = validation_rate if counter is not None else 0.0
+        self._memo: "OrderedDict[Tuple[str, str], _Record]" = OrderedDict()
+        self._factors: Optional[Dict[str, Tuple[float, int]]] = None
+
+    def factors(self) -> Dict[str, float]:
+        """Current calibration factor of every calibrated content class."""
+        return {name: factor for name, (factor, _) in self._load_factors().items()}
+
+    def _load_factors(self) -> Dict[str, Tuple[float, int]]:
+        """Load the learned factors on first use."""
+        if self._factors is None:
+            self._factors = {}
+            if self._cache is not None:
+                try:
+                    stored = self._cache.get(
+                        CALIBRATION_OPERATION, {"version": ESTIMATOR_VERSION}
+                    )
+                except Exception as e:
+                    logger.debug(f"Failed to read token calibration: {e}")
+                    stored = None
+                if stored:
+                    self._factors = {
+                        name: (float(factor), int(samples))
+                        for name, (factor, samples) in stored.items()
+                    }
+        return self._factors
+
+    def _scaled(self, content_class: str, raw: int) -> int:
+        """Apply the calibration factor of a content class."""
+        factor, _ = self._load_factors().get(content_class, (1.0, 0))
+        return round(raw * factor)
+
+    def calibrated(self, content_class: str, raw: int) -> int:
+        """
+        Turn a raw count from measure or measure_lines into an estimate.
+
+        Args:
+            content_class: Content class the count was measured for
+            raw: Raw token count
+
+        Returns:
+            Estimated token count
+        """
+        return self._scaled(content_class, raw)
+
+    def estimate(
+        self, text: str, path: Optional[str] = None, persist: bool = False
+    ) -> int:
+        """
+        Estimate the token count of a text.
+
+        Args:
+            text: Text to estimate
+            path: File the text comes from, used to pick the content class
+            persist: Also cache the estimate across processes; meant for file
+                contents, which recur, rather than one-off strings
+
+        Returns:
+            Estimated token count (the exact count if the text was validated)
+        """
+        if not text:
+            return 0
+        if len(text) < CACHE_MIN_CHARS:
+            return self._scaled(*measure(text, path))
+
+        key = (content_digest(text), _language(path))
+        record = self._memo.get(key)
+        if record is None:
+            record = self._lookup(key) if persist else None
+            if record is None:
+                content_class, raw = measure(text, path)
+                exact = self._sample(text, key[0], content_class, raw)
+                record = (content_class, raw, exact)
+                if persist:
+                    self._store(key, record)
+            self._memo[key] = record
+            if len(self._memo) > _MEMO_SIZE:
+                self._memo.popitem(last=False)
+        else:
+            self._memo.move_to_end(key)
+
+        content_class, raw, exact = record
+        return exact if exact is not None else self._scaled(content_class, raw)
+
+    def _lookup(self, key: Tuple[str, str]) -> Optional[_Record]:
+        """Read a cached estimate."""
+        if self._cache is None:
+            return None
+        try:
+            cached = self._cache.get(ESTIMATE_OPERATION, self._params(key))
+        except Exception as e:
+            logger.debug(f"Failed to read cached token estimate: {e}")
+            return None
+        return tuple(cached) if cached else None  # type: ignore[return-value]
+
+    def _store(self, key: Tuple[str, str], record: _Record) -> None:
+        """Cache an estimate."""
+        if self._cache is None:
+            return
+        try:
+            self._cache.set(
+                ESTIMATE_OPERATION, self._params(key), list(record), ESTIMATE_TTL
+            )
+        except Exception as e:
+            logger.debug(f"Failed to cache token estimate: {e}")
+
+    @staticmethod
+    def _params(key: Tuple[str, str]) -> Dict[str, Any]:
+        digest, language = key
+        return {"digest": digest, "language": language, "version": ESTIMATOR_VERSION}
+
+    def _sample(
+        self, text: str, digest: str, content_class: str, raw: int
+    ) -> Optional[int]:
+        """Count a deterministic sample of new texts exactly."""
+        if int(digest[:8], 16) >= self._validation_rate * 0x100000000:
+            return None
+        return self._validate(text, content_class, raw)
+
+    def validate(self, text: str, path: Optional[str] = None) -> Optional[int]:
+        """
+        Count a text exactly and calibrate its content class with the result.
+
+        Args:
+            text: Text to count
+            path: File the text comes from, used to pick the content class
+
+        Returns:
+            Exact token count, or None without a counter or on failure
+        """
+        if not text:
+            return 0
+        return self._validate(text, *measure(text, path))
+
+    def _validate(self, text: str, content_class: str, raw: int) -> Optional[int]:
+        """Count exactly and move the class factor towards the observed ratio."""
+        if self._counter is None:
+            return None
+        try:
+            exact = self._counter.count_tokens(text)
+        except Exception as e:
+            logger.debug(f"Exact token count failed with {self._counter.name}: {e}")
+            return None
+
+        if raw > 0:
+            factors = self._load_factors()
+            factor, samples = factors.get(content_class, (1.0, 0))
+            # Running mean at first, then an exponential moving average
+            rate = max(1.0 / (samples + 1), _MIN_LEARNING_RATE)
+            factors[content_class] = (
+                factor + rate * (exact / raw - factor),
+                samples + 1,
+            )
+            self._save_factors()
+        return exact
+
+    def _save_factors(self) -> None:
+        """Persist the learned factors."""
+        if self._cache is None or self._factors is None:
+            return
+        try:
+            self._cache.set(
+                CALIBRATION_OPERATION,
+                {"version": ESTIMATOR_VERSION},
+                {name: list(value) for name, value in self._factors.items()},
+                CALIBRATION_TTL,
+            )
+        except Exception as e:
+            logger.debug(f"Failed to cache token calibration: {e}")
+
+
+_estimator: Optional[TokenEstimator] = None
+
+
+def _validation_rate_from_env() -> float:
+    """Read GEMINI_TOKEN_VALIDATION_RATE, defaulting to no validation."""
+    rate_env = os.getenv("GEMINI_TOKEN_VALIDATION_RATE", "0")
+    try:
+        rate = float(rate_env)
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(rate_env)
+        return rate
+    except ValueError:
+        logger.warning(
+            f"Invalid GEMINI_TOKEN_VALIDATION_RATE='{rate_env}', using default 0"
+        )
+        return 0.0
+
+
+def get_token_estimator() -> TokenEstimator:
+    """
+    Get the shared token estimator.
+
+    Uses the metadata cache when available. With GEMINI_TOKEN_VALIDATION_RATE
+    above 0 and an API key, that fraction of new texts is also counted with
+    the Gemini count_tokens endpoint to calibrate the estimates.
+
+    Returns:
+        Process-wide TokenEstimator
+    """
+    global _estimator
+    if _estimator is None:
+        try:
+            try:
+                from .cache import get_cache_manager
+            except ImportError:
+                from cache import get_cache_manager
+
+            cache = get_cache_manager()
+        except Exception as e:
+            logger.debug(f"Cache not available for token estimates: {e}")
+            cache = None
+
+        counter: Optional[TokenCounter] = None
+        rate = _validation_rate_from_env()
+        if rate > 0:
+            try:
+                counter = GeminiTokenCounter()
+            except (ImportError, ValueError) as e:
+                logger.warning(f"Token count validation disabled: {e}")
+        _estimator = TokenEstimator(cache, counter, rate)
+    return _estimator
+
+
+def estimate_tokens(
+    text: str, path: Optional[str] = None, persist: bool = False
+) -> int:
+    """
+    Estimate the token count of a text with the shared estimator.
+
+    Args:
+        text: Text to estimate
+        path: File the text comes from, used to pick the content class
+        persist: Cache the estimate across processes (for file contents)
+
+    Returns:
+        Estimated token count
+    """
+    return get_token_estimator().estimate(text, path, persist)
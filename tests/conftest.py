@@ -3,6 +3,7 @@ Test isolation and cleanup protocols for auto-prompt generation system.
 Following TDD Protocol: Ensuring test isolation, deterministic behavior, and proper cleanup.
 """
 
+import copy
 import gc
 import os
 import shutil
@@ -238,6 +239,37 @@ def deterministic_timestamps():
             yield fixed_timestamp
 
 
+@pytest.fixture
+def template_data() -> Callable[..., Dict[str, Any]]:
+    """Provide a factory for review template data.
+
+    The defaults describe a one-phase review of ``/project`` with no changed
+    files. Positional dicts are applied over the defaults in order, then the
+    keyword overrides; each call returns an independent copy.
+    """
+
+    def make(*bases: Dict[str, Any], **overrides: Any) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "scope": "recent_phase",
+            "prd_summary": "Build the feature.",
+            "total_phases": 1,
+            "current_phase_number": "1.0",
+            "previous_phase_completed": "",
+            "next_phase": "",
+            "current_phase_description": "Write the code",
+            "subtasks_completed": [],
+            "project_path": "/project",
+            "file_tree": "/project",
+            "changed_files": [],
+        }
+        for base in bases:
+            data.update(base)
+        data.update(overrides)
+        return copy.deepcopy(data)
+
+    return make
+
+
 @pytest.fixture
 def reset_module_state():
     """Reset module-level state between tests."""
@@ -1,7 +1,9 @@
 """Tests for SQLite caching layer."""
 
 import asyncio
+import gzip
 import json
+import os
 import sqlite3
 import time
 from pathlib import Path
@@ -9,7 +11,25 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from src.cache.adaptive_ttl import AdaptiveTTL
+from src.cache.bundle import PROJECT_MARKER, export_bundle, import_bundle
+from src.cache.codec import (
+    CODEC_STR,
+    CODEC_STR_LIST,
+    CODEC_ZLIB,
+    decode_value,
+    encode_value,
+)
+from src.cache.content_store import (
+    BLOB_REF_KEY,
+    BLOB_THRESHOLD,
+    content_digest,
+    externalize,
+    internalize,
+)
+from src.cache.single_flight import SingleFlight
 from src.cache.sqlite_cache import CacheEntry, CacheManager, get_cache_manager
+from src.cache.sweeper import CacheSweeper
 from src.errors import CacheError
 
 
@@ -312,6 +332,642 @@ class TestCacheManager:
             assert result == value, f"Failed for type: {data_type}"
 
 
+class TestCacheBatchOperations:
+    @pytest.fixture
+    def cache_manager(self, tmp_path):
+        """Create a cache manager with temporary directory."""
+        return CacheManager(cache_dir=tmp_path, ttl=300)
+
+    def test_set_many_and_get_many(self, cache_manager):
+        """Test that batch results line up with the requested params."""
+        cache_manager.set_many(
+            "fs_read_text", [({"path": f"/f{i}"}, f"content {i}") for i in range(3)]
+        )
+
+        results = cache_manager.get_many(
+            "fs_read_text", [{"path": "/f2"}, {"path": "/missing"}, {"path": "/f0"}]
+        )
+        assert results == ["content 2", None, "content 0"]
+
+    def test_warming_uses_one_transaction(self, cache_manager):
+        """Test that 1,000 entries are written and read with one connection each."""
+        items = [({"n": i}, f"value {i}") for i in range(1000)]
+
+        with patch.object(
+            cache_manager, "_get_connection", wraps=cache_manager._get_connection
+        ) as connection:
+            cache_manager.set_many("warm", items)
+            assert connection.call_count == 1
+
+            results = cache_manager.get_many("warm", [params for params, _ in items])
+            assert connection.call_count == 2
+
+        assert results == [value for _, value in items]
+
+    def test_get_many_skips_expired(self, cache_manager):
+        """Test that expired entries are reported as misses."""
+        cache_manager.set_many("op", [({"n": 1}, "old")], ttl=1)
+        cache_manager.set("op", {"n": 2}, "fresh")
+        time.sleep(1.1)
+
+        assert cache_manager.get_many("op", [{"n": 1}, {"n": 2}]) == [None, "fresh"]
+
+
+class TestCacheCodec:
+    @pytest.mark.parametrize(
+        "value",
+        [
+            "plain string",
+            "unicode ✓ 日本語",
+            "",
+            b"\x00\x01raw",
+            ["a.py", "b/c.py"],
+            [],
+            [""],
+            ["with\0nul"],
+            {"nested": [1, 2, None]},
+            None,
+            42,
+        ],
+    )
+    def test_round_trip(self, value):
+        """Test that every supported value type decodes to the original."""
+        assert decode_value(encode_value(value)) == value
+
+    def test_string_uses_raw_codec(self):
+        """Test that plain strings bypass JSON."""
+        encoded = encode_value("hello")
+        assert encoded[1] == CODEC_STR
+        assert encoded.endswith(b"hello")
+
+    def test_string_list_codec(self):
+        """Test that lists of strings use the compact list codec."""
+        assert encode_value(["a", "b"])[1] == CODEC_STR_LIST
+
+    def test_large_values_are_compressed(self):
+        """Test that large compressible payloads shrink substantially."""
+        source = Path(__file__).read_text()
+        encoded = encode_value(source)
+
+        assert encoded[1] & CODEC_ZLIB
+        assert len(encoded) * 3 < len(source.encode())
+        assert decode_value(encoded) == source
+
+    def test_legacy_json_text(self):
+        """Test that TEXT rows written as JSON are still readable."""
+        assert decode_value(json.dumps({"legacy": True})) == {"legacy": True}
+
+    def test_legacy_rows_read_through_manager(self, tmp_path):
+        """Test that CacheManager reads rows stored in the old JSON format."""
+        manager = CacheManager(cache_dir=tmp_path)
+        key = manager._generate_key("fs_read_text", {"path": "/a"})
+        conn = sqlite3.connect(manager.db_path)
+        conn.execute(
+            "INSERT INTO cache (key, value, timestamp, ttl, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, json.dumps("old content"), time.time(), 900, time.time() + 900),
+        )
+        conn.commit()
+        conn.close()
+
+        assert manager.get("fs_read_text", {"path": "/a"}) == "old content"
+
+
+class TestCacheEviction:
+    def test_lru_eviction_by_size(self, tmp_path):
+        """Test that least recently used entries are evicted over the limit."""
+        manager = CacheManager(cache_dir=tmp_path, max_size_bytes=3000)
+        manager.set("file", {"n": 1}, "a" * 1000)
+        manager.set("file", {"n": 2}, "b" * 1000)
+        # Touch entry 1 so entry 2 becomes least recently used
+        time.sleep(0.01)
+        assert manager.get("file", {"n": 1}) is not None
+        manager.set("file", {"n": 3}, "c" * 1000)
+
+        assert manager.get("file", {"n": 1}) is not None
+        assert manager.get("file", {"n": 2}) is None
+        assert manager.get("file", {"n": 3}) is not None
+
+        stats = manager.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["cache_size_bytes"] <= 3000
+
+    def test_lfu_eviction_by_size(self, tmp_path):
+        """Test that least frequently used entries are evicted first."""
+        manager = CacheManager(
+            cache_dir=tmp_path, max_size_bytes=3000, eviction_policy="lfu"
+        )
+        manager.set("file", {"n": 1}, "a" * 1000)
+        manager.set("file", {"n": 2}, "b" * 1000)
+        for _ in range(3):
+            manager.get("file", {"n": 1})
+        manager.get("file", {"n": 2})
+        manager.set("file", {"n": 3}, "c" * 1000)
+
+        # Entry 3 has never been read, so it goes first
+        assert manager.get("file", {"n": 3}) is None
+        assert manager.get("file", {"n": 1}) is not None
+
+    def test_invalid_eviction_policy(self, tmp_path):
+        """Test that unknown eviction policies are rejected."""
+        with pytest.raises(ValueError, match="Invalid eviction policy"):
+            CacheManager(cache_dir=tmp_path, eviction_policy="random")
+
+    def test_vacuum_reclaims_free_pages(self, tmp_path):
+        """Test that deleted entries leave no free pages after vacuum."""
+        manager = CacheManager(cache_dir=tmp_path, vacuum_interval=10_000)
+        for i in range(20):
+            # Random data so compression can't shrink it below a page
+            manager.set("file", {"n": i}, os.urandom(5_000).hex())
+        manager.invalidate()
+
+        assert manager.get_stats()["free_pages"] > 0
+        assert manager.vacuum() > 0
+
+        stats = manager.get_stats()
+        assert stats["free_pages"] == 0
+        assert stats["fragmentation"] == 0.0
+
+    def test_legacy_database_is_migrated(self, tmp_path):
+        """Test that databases without eviction columns are upgraded."""
+        conn = sqlite3.connect(tmp_path / "metadata_cache.db")
+        conn.execute(
+            "CREATE TABLE cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "timestamp REAL NOT NULL, ttl INTEGER NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO cache VALUES (?, ?, ?, ?)",
+            ("legacy", json.dumps("old value"), time.time(), 900),
+        )
+        conn.commit()
+        conn.close()
+
+        manager = CacheManager(cache_dir=tmp_path)
+        stats = manager.get_stats()
+        assert stats["total_entries"] == 1
+        assert stats["cache_size_bytes"] == len(json.dumps("old value"))
+
+
+class TestSqlExpiry:
+    @pytest.fixture
+    def cache_manager(self, tmp_path):
+        """Create a cache manager with temporary directory."""
+        return CacheManager(cache_dir=tmp_path, ttl=300)
+
+    def _expire_all(self, cache_manager):
+        """Move every entry's expiry into the past."""
+        conn = sqlite3.connect(cache_manager.db_path)
+        conn.execute("UPDATE cache SET expires_at = ?", (time.time() - 1,))
+        conn.commit()
+        conn.close()
+
+    def test_expiry_uses_index(self, cache_manager):
+        """Test that expired rows are found through the expires_at index."""
+        conn = sqlite3.connect(cache_manager.db_path)
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT rowid FROM cache WHERE expires_at < 0"
+        ).fetchall()
+        conn.close()
+        assert any("idx_expires_at" in row[-1] for row in plan)
+
+    def test_cleanup_expired_in_batches(self, cache_manager):
+        """Test that batched cleanup removes at most batch_size rows."""
+        cache_manager.set_many("op", [({"n": i}, i) for i in range(25)])
+        self._expire_all(cache_manager)
+
+        assert cache_manager.cleanup_expired(batch_size=10) == 10
+        assert cache_manager.get_stats()["expired_entries"] == 15
+        assert cache_manager.cleanup_expired() == 15
+        assert cache_manager.get_stats()["total_entries"] == 0
+
+    def test_get_does_not_delete_expired(self, cache_manager):
+        """Test that reads leave expired rows for the sweeper."""
+        cache_manager.set("op", {}, "value")
+        self._expire_all(cache_manager)
+
+        assert cache_manager.get("op", {}) is None
+        assert cache_manager.get_stats()["expired_entries"] == 1
+
+    def test_sweeper_caps_batches(self, cache_manager):
+        """Test that one sweep pass stops after max_batches."""
+        cache_manager.set_many("op", [({"n": i}, i) for i in range(30)])
+        self._expire_all(cache_manager)
+
+        sweeper = CacheSweeper(cache_manager, batch_size=10, max_batches=2)
+        assert sweeper.sweep_once() == 20
+        assert sweeper.sweep_once() == 10
+        assert sweeper.total_removed == 30
+
+    def test_sweeper_thread(self, cache_manager):
+        """Test that the background thread sweeps and stops cleanly."""
+        cache_manager.set("op", {}, "value")
+        self._expire_all(cache_manager)
+
+        sweeper = CacheSweeper(cache_manager, interval=0.05)
+        sweeper.start()
+        deadline = time.time() + 5
+        while sweeper.total_removed == 0 and time.time() < deadline:
+            time.sleep(0.05)
+        sweeper.stop(timeout=5)
+
+        assert sweeper.total_removed == 1
+
+
+class TestContentStore:
+    @pytest.fixture
+    def cache_manager(self, tmp_path):
+        """Create a cache manager with temporary directory."""
+        return CacheManager(cache_dir=tmp_path, ttl=300)
+
+    def test_externalize_round_trip(self):
+        """Test that large leaves become references and resolve back."""
+        big = "x" * BLOB_THRESHOLD
+        value = {"stat": [1, 2, 3], "value": big, "items": [big, "small"]}
+        blobs = {}
+
+        stored = externalize(value, blobs)
+
+        assert list(blobs) == [content_digest(big)]
+        assert stored["value"] == {BLOB_REF_KEY: content_digest(big)}
+        assert stored["items"][1] == "small"
+        assert internalize(stored, blobs) == value
+
+    def test_str_and_bytes_do_not_share_digest(self):
+        """Test that the payload type is part of the content address."""
+        assert content_digest("abc") != content_digest(b"abc")
+
+    def test_identical_content_stored_once(self, cache_manager):
+        """Test that the same payload under different keys shares one blob."""
+        content = "def main():\n    pass\n" * 200
+        cache_manager.set("fs_read_text", {"path": "/a"}, {"value": content})
+        cache_manager.set("fs_read_text", {"path": "/b"}, {"value": content})
+        cache_manager.set("git_file_diff", {"path": "/a"}, content)
+
+        stats = cache_manager.get_stats()
+        assert stats["blob_entries"] == 1
+        assert cache_manager.get("fs_read_text", {"path": "/b"}) == {"value": content}
+        assert cache_manager.get("git_file_diff", {"path": "/a"}) == content
+
+    def test_unreferenced_blobs_are_removed(self, cache_manager):
+        """Test that blobs go away with the last entry referencing them."""
+        shared = os.urandom(4_000).hex()
+        cache_manager.set("op", {"n": 1}, shared)
+        cache_manager.set("op", {"n": 2}, shared)
+
+        cache_manager.invalidate("op", {"n": 1})
+        assert cache_manager.get_stats()["blob_entries"] == 1
+
+        # Replacing the last reference releases the old blob
+        cache_manager.set("op", {"n": 2}, "y" * 2_000)
+        assert cache_manager.get_stats()["blob_entries"] == 1
+        assert cache_manager.get("op", {"n": 2}) == "y" * 2_000
+
+        cache_manager.invalidate()
+        assert cache_manager.get_stats()["blob_entries"] == 0
+
+    def test_rewriting_same_content_keeps_blob(self, cache_manager):
+        """Test that replacing an entry with identical content keeps its blob."""
+        content = "z" * 5_000
+        cache_manager.set("op", {}, content)
+        cache_manager.set("op", {}, content)
+
+        assert cache_manager.get_stats()["blob_entries"] == 1
+        assert cache_manager.get("op", {}) == content
+
+    def test_expired_cleanup_releases_blobs(self, cache_manager):
+        """Test that expiry cleanup also drops blobs of removed entries."""
+        cache_manager.set("op", {}, "q" * 3_000, ttl=1)
+        conn = sqlite3.connect(cache_manager.db_path)
+        conn.execute("UPDATE cache SET expires_at = 0")
+        conn.commit()
+        conn.close()
+
+        assert cache_manager.cleanup_expired() == 1
+        assert cache_manager.get_stats()["blob_entries"] == 0
+
+    def test_eviction_counts_blob_bytes(self, tmp_path):
+        """Test that the size limit covers blobs, counting shared ones once."""
+        manager = CacheManager(cache_dir=tmp_path, max_size_bytes=30_000)
+        for i in range(10):
+            manager.set("file", {"n": i}, os.urandom(4_000).hex())
+
+        stats = manager.get_stats()
+        assert stats["cache_size_bytes"] <= 30_000
+        assert stats["evictions"] > 0
+        assert stats["blob_entries"] == stats["total_entries"]
+
+        shared = os.urandom(4_000).hex()
+        manager.invalidate()
+        for i in range(10):
+            manager.set("file", {"n": i}, shared)
+        # Ten references to one 8 KB blob fit comfortably
+        assert manager.get_stats()["total_entries"] == 10
+
+
+class TestAdaptiveTTL:
+    @pytest.fixture
+    def cache_manager(self, tmp_path):
+        """Create a cache manager adapting after every four reads."""
+        policy = AdaptiveTTL(min_ttl=60, max_ttl=1000, window=4)
+        return CacheManager(cache_dir=tmp_path, ttl=300, adaptive_ttl=policy)
+
+    def _read(self, cache_manager, operation, times, stale=False):
+        """Hit an operation's entry, optionally rejecting it as stale."""
+        for _ in range(times):
+            assert cache_manager.get(operation, {"k": 1}) is not None
+            if stale:
+                cache_manager.record_stale(operation)
+
+    def test_stats_per_operation(self, cache_manager):
+        """Test that hits, misses and stale hits are reported per operation."""
+        cache_manager.get("branch", {"k": 1})
+        cache_manager.set("branch", {"k": 1}, "main")
+        self._read(cache_manager, "branch", 2)
+        cache_manager.record_stale("branch")
+
+        stats = cache_manager.get_stats()["operations"]["branch"]
+        assert (stats["hits"], stats["misses"], stats["stale"]) == (2, 1, 1)
+        assert stats["hit_rate"] == pytest.approx(1 / 3)
+        assert stats["effective_ttl"] == 300
+
+    def test_stable_operation_ttl_grows_to_max(self, cache_manager):
+        """Test that entries that never go stale get longer TTLs."""
+        ttls = []
+        for _ in range(5):
+            cache_manager.set("template", {"k": 1}, "rendered", ttl=200)
+            ttls.append(cache_manager.get_entry("template", {"k": 1}).ttl)
+            self._read(cache_manager, "template", 4)
+
+        assert ttls == [200, 400, 800, 1000, 1000]
+        operations = cache_manager.get_stats()["operations"]
+        assert operations["template"]["effective_ttl"] == 1000
+
+    def test_churny_operation_ttl_shrinks_to_min(self, cache_manager):
+        """Test that entries that keep going stale get shorter TTLs."""
+        ttls = []
+        for _ in range(4):
+            cache_manager.set("diff", {"k": 1}, "patch", ttl=200)
+            ttls.append(cache_manager.get_entry("diff", {"k": 1}).ttl)
+            self._read(cache_manager, "diff", 4, stale=True)
+
+        assert ttls == [200, 100, 60, 60]
+
+    def test_invalidations_count_as_churn(self, cache_manager):
+        """Test that explicitly invalidated entries shorten the TTL."""
+        for _ in range(4):
+            cache_manager.set("read", {"k": 1}, "content", ttl=200)
+            assert cache_manager.invalidate("read", {"k": 1}) == 1
+
+        cache_manager.set("read", {"k": 1}, "content", ttl=200)
+        assert cache_manager.get_entry("read", {"k": 1}).ttl == 100
+        assert cache_manager.get_stats()["operations"]["read"]["invalidations"] == 4
+
+    def test_requested_ttl_below_min_is_kept(self, cache_manager):
+        """Test that adaptation never moves a TTL across the configured bounds."""
+        for _ in range(2):
+            cache_manager.set("lease", {"k": 1}, "x", ttl=10)
+            self._read(cache_manager, "lease", 4, stale=True)
+
+        cache_manager.set("lease", {"k": 1}, "x", ttl=10)
+        assert cache_manager.get_entry("lease", {"k": 1}).ttl == 10
+
+    def test_disabled_policy_records_without_adapting(self, tmp_path):
+        """Test that a manager without a policy keeps requested TTLs."""
+        manager = CacheManager(cache_dir=tmp_path)
+        for _ in range(30):
+            manager.set("op", {"k": 1}, "v", ttl=100)
+            manager.get("op", {"k": 1})
+
+        assert manager.get_entry("op", {"k": 1}).ttl == 100
+        stats = manager.get_stats()
+        assert not stats["adaptive_ttl"]
+        assert stats["operations"]["op"]["hits"] == 31
+
+    def test_stats_shared_across_processes(self, cache_manager, tmp_path):
+        """Test that another manager on the same database sees learned TTLs."""
+        cache_manager.set("template", {"k": 1}, "rendered", ttl=200)
+        self._read(cache_manager, "template", 4)
+        cache_manager.get_stats()
+
+        other = CacheManager(
+            cache_dir=tmp_path, adaptive_ttl=AdaptiveTTL(60, 1000, window=4)
+        )
+        other.set("template", {"k": 2}, "rendered", ttl=200)
+        assert other.get_entry("template", {"k": 2}).ttl == 400
+        # Four hits through the first manager, one through get_entry above
+        assert other.get_stats()["operations"]["template"]["hits"] == 5
+
+    def test_single_flight_reports_stale_values(self, cache_manager):
+        """Test that values rejected by is_valid are recorded as stale."""
+        flight = SingleFlight(cache_manager)
+        cache_manager.set("fs", {"k": 1}, "old")
+
+        value = flight.get_or_compute(
+            "fs", {"k": 1}, lambda: "new", is_valid=lambda v: v == "new"
+        )
+
+        assert value == "new"
+        assert cache_manager.get_stats()["operations"]["fs"]["stale"] == 1
+
+    def test_invalid_bounds(self):
+        """Test that inverted bounds are rejected."""
+        with pytest.raises(ValueError):
+            AdaptiveTTL(min_ttl=100, max_ttl=10)
+
+    def test_env_configuration(self, tmp_path):
+        """Test that the global manager reads the TTL bounds from env vars."""
+        import src.cache.sqlite_cache
+
+        src.cache.sqlite_cache._cache_manager = None
+        env = {
+            "GEMINI_CACHE_MIN_TTL": "30",
+            "GEMINI_CACHE_MAX_TTL": "not-a-number",
+            "GEMINI_CACHE_ADAPTIVE_TTL": "false",
+        }
+        try:
+            with patch.dict(os.environ, env):
+                manager = get_cache_manager(cache_dir=tmp_path)
+        finally:
+            src.cache.sqlite_cache._cache_manager = None
+
+        assert manager.adaptive_ttl.min_ttl == 30
+        assert manager.adaptive_ttl.max_ttl == 86400
+        assert not manager.adaptive_ttl.enabled
+
+
+class TestCacheBundle:
+    FINGERPRINT = {"head": "abc123", "env": "e1"}
+
+    @pytest.fixture
+    def source(self, tmp_path):
+        """Create a cache holding entries of two projects and one global entry."""
+        manager = CacheManager(cache_dir=tmp_path / "source-cache")
+        project = tmp_path / "ci-1" / "repo"
+        project.mkdir(parents=True)
+        large = "x" * 5_000
+        manager.set(
+            "review_prd_summary",
+            {"path": f"{project}/tasks/prd.md", "state": "s1"},
+            "A feature.",
+        )
+        manager.set(
+            "review_changed_files",
+            {"project_path": str(project), "state": "s2"},
+            [{"path": f"{project}/app.py", "content": large}],
+        )
+        manager.set("fs_read_text", {"path": f"{project}/copy.py"}, large)
+        manager.set("fs_read_text", {"path": "/elsewhere/other.py"}, "other")
+        manager.set("template", {"name": "review"}, "rendered")
+        return manager, project
+
+    def _import(self, tmp_path, bundle, fingerprint=None):
+        """Import a bundle into a fresh cache for a checkout at another path."""
+        manager = CacheManager(cache_dir=tmp_path / "target-cache")
+        project = tmp_path / "ci-2" / "checkout"
+        project.mkdir(parents=True)
+        report = import_bundle(
+            manager, project, bundle, fingerprint or self.FINGERPRINT
+        )
+        return manager, project, report
+
+    def test_round_trip_maps_paths(self, source, tmp_path):
+        """Test that entries are re-keyed onto the importing checkout."""
+        manager, project = source
+        bundle = tmp_path / "bundle.gz"
+
+        exported = export_bundle(manager, project, bundle, self.FINGERPRINT)
+        target, checkout, imported = self._import(tmp_path, bundle)
+
+        assert (exported.entries, exported.skipped) == (3, 2)
+        # The large payload is shared by two entries but bundled once
+        assert exported.blobs == 1
+        assert imported.entries == 3
+        assert (
+            target.get(
+                "review_prd_summary",
+                {"path": f"{checkout}/tasks/prd.md", "state": "s1"},
+            )
+            == "A feature."
+        )
+        changed = target.get(
+            "review_changed_files", {"project_path": str(checkout), "state": "s2"}
+        )
+        assert changed[0]["path"] == f"{checkout}/app.py"
+        assert target.get("fs_read_text", {"path": f"{checkout}/copy.py"}) == (
+            "x" * 5_000
+        )
+        assert target.get("template", {"name": "review"}) is None
+        assert target.get_stats()["blob_entries"] == 1
+
+    def test_bundle_has_no_absolute_paths(self, source, tmp_path):
+        """Test that machine-specific paths are not written to the bundle."""
+        manager, project = source
+        bundle = tmp_path / "bundle.gz"
+        export_bundle(manager, project, bundle, self.FINGERPRINT)
+
+        text = gzip.open(bundle, "rt").read()
+        assert str(project) not in text
+        assert PROJECT_MARKER in text
+
+    def test_file_tree_paths_are_relativized(self, source, tmp_path):
+        """Test that the root line of a rendered file tree is mapped too."""
+        manager, project = source
+        manager.set(
+            "review_file_tree",
+            {"project_path": str(project), "state": "s3"},
+            f"{project}\n├── app.py\n{project}-other\n",
+        )
+        bundle = tmp_path / "bundle.gz"
+        export_bundle(manager, project, bundle, self.FINGERPRINT)
+
+        assert str(project) + "\n" not in gzip.open(bundle, "rt").read()
+        target, checkout, _ = self._import(tmp_path, bundle)
+        assert (
+            target.get(
+                "review_file_tree", {"project_path": str(checkout), "state": "s3"}
+            )
+            == f"{checkout}\n├── app.py\n{project}-other\n"
+        )
+
+    def test_import_merges_and_keeps_expiry(self, source, tmp_path):
+        """Test that import keeps local entries and the remaining lifetime."""
+        manager, project = source
+        bundle = tmp_path / "bundle.gz"
+        export_bundle(manager, project, bundle, self.FINGERPRINT)
+
+        target = CacheManager(cache_dir=tmp_path / "target-cache")
+        target.set("local", {"k": 1}, "kept")
+        import_bundle(target, project, bundle, self.FINGERPRINT)
+
+        assert target.get("local", {"k": 1}) == "kept"
+        entry = target.get_entry(
+            "review_prd_summary", {"path": f"{project}/tasks/prd.md", "state": "s1"}
+        )
+        assert 0 < entry.ttl <= manager.ttl
+
+    def test_mismatched_fingerprint_is_rejected(self, source, tmp_path):
+        """Test that a bundle from another commit is not imported."""
+        manager, project = source
+        bundle = tmp_path / "bundle.gz"
+        export_bundle(manager, project, bundle, self.FINGERPRINT)
+
+        with pytest.raises(CacheError, match="head"):
+            self._import(tmp_path, bundle, {"head": "def456", "env": "e1"})
+
+    def test_expired_and_corrupt_entries_are_skipped(self, source, tmp_path):
+        """Test that stale entries and entries with bad blobs are dropped."""
+        manager, project = source
+        bundle = tmp_path / "bundle.gz"
+        export_bundle(manager, project, bundle, self.FINGERPRINT)
+        lines = [json.loads(line) for line in gzip.open(bundle, "rt")]
+        for line in lines:
+            if "blob" in line:
+                line["blob"] = "0" * 64
+            elif line.get("operation") == "review_prd_summary":
+                line["expires_at"] = time.time() - 1
+        with gzip.open(bundle, "wt") as f:
+            f.writelines(json.dumps(line) + "\n" for line in lines)
+
+        _, _, report = self._import(tmp_path, bundle)
+        assert (report.entries, report.skipped) == (0, 3)
+
+    @pytest.mark.parametrize(
+        "field,kind", [("fingerprint", "header"), ("expires_at", "entry")]
+    )
+    def test_malformed_bundle_raises_cache_error(self, source, tmp_path, field, kind):
+        """Test that missing header or entry fields raise CacheError."""
+        manager, project = source
+        bundle = tmp_path / "bundle.gz"
+        export_bundle(manager, project, bundle, self.FINGERPRINT)
+        lines = [json.loads(line) for line in gzip.open(bundle, "rt")]
+        for line in lines:
+            line.pop(field, None)
+        with gzip.open(bundle, "wt") as f:
+            f.writelines(json.dumps(line) + "\n" for line in lines)
+
+        with pytest.raises(CacheError, match=f"{kind} has no valid '{field}'"):
+            self._import(tmp_path, bundle)
+
+    def test_not_a_bundle(self, tmp_path):
+        """Test that unreadable files raise CacheError."""
+        path = tmp_path / "bundle.gz"
+        path.write_text("not gzip")
+
+        with pytest.raises(CacheError):
+            self._import(tmp_path, path)
+
+    def test_legacy_rows_are_not_exported(self, tmp_path):
+        """Test that rows written before keys were stored are skipped."""
+        manager = CacheManager(cache_dir=tmp_path)
+        manager.set("op", {"path": str(tmp_path)}, "value")
+        conn = sqlite3.connect(manager.db_path)
+        conn.execute("UPDATE cache SET operation = NULL, params = NULL")
+        conn.commit()
+        conn.close()
+
+        assert manager.export_entries() == []
+
+
 class TestGlobalCacheManager:
     def test_get_cache_manager_singleton(self):
         """Test that get_cache_manager returns singleton."""
@@ -1,21 +1,28 @@
 """Tests for cached filesystem and Git client implementations."""
 
 import asyncio
+import os
+import subprocess
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from src.cache import CacheManager
+from src.cache.memory_cache import InMemoryCache
 from src.interfaces import (
     AsyncFileSystemWrapper,
     AsyncGitClientWrapper,
     CachedFileSystem,
     CachedGitClient,
+    GitClient,
     GitFileChange,
     InMemoryFileSystem,
     InMemoryGitClient,
+    ProductionFileSystem,
+    ProductionGitClient,
 )
+from src.interfaces.cached_git_client import VALIDATED_TTL
 
 
 class TestCachedFileSystem:
@@ -37,9 +44,12 @@ class TestCachedFileSystem:
         """Create cached filesystem."""
         return CachedFileSystem(base_fs, cache_manager)
 
-    def test_read_text_cache_hit(self, cached_fs, cache_manager):
+    def test_read_text_cache_hit(self, cached_fs, cache_manager, base_fs):
         """Test reading text with cache hit."""
-        cache_manager.get.return_value = "cached content"
+        cache_manager.get.return_value = {
+            "stat": list(base_fs.stat_signature("/test/file.txt")),
+            "value": "cached content",
+        }
 
         result = cached_fs.read_text("/test/file.txt")
 
@@ -58,7 +68,69 @@ class TestCachedFileSystem:
         assert result == "content"
         cache_manager.get.assert_called_once()
         cache_manager.set.assert_called_once_with(
-            "fs_read_text", {"path": "/test/file.txt", "encoding": "utf-8"}, "content"
+            "fs_read_text",
+            {"path": "/test/file.txt", "encoding": "utf-8"},
+            {
+                "stat": list(cached_fs.stat_signature("/test/file.txt")),
+                "value": "content",
+            },
+        )
+
+    def test_read_text_stale_entry_is_reread(self, base_fs):
+        """Test that an edit made behind the cache's back is detected by stat."""
+        cached_fs = CachedFileSystem(base_fs, InMemoryCache())
+        assert cached_fs.read_text("/test/file.txt") == "content"
+
+        base_fs.write_text("/test/file.txt", "edited")
+
+        assert cached_fs.read_text("/test/file.txt") == "edited"
+
+    def test_read_text_unchanged_file_not_reread(self, base_fs):
+        """Test that a validated hit does not touch the underlying file."""
+        cached_fs = CachedFileSystem(base_fs, InMemoryCache())
+        cached_fs.read_text("/test/file.txt")
+
+        with patch.object(base_fs, "read_text") as read_text:
+            assert cached_fs.read_text("/test/file.txt") == "content"
+        read_text.assert_not_called()
+
+    def test_list_dir_and_glob_track_directory_changes(self, base_fs):
+        """Test that listings are refreshed when entries are added or removed."""
+        base_fs.mkdir("/test/sub")
+        cached_fs = CachedFileSystem(base_fs, InMemoryCache())
+        assert len(cached_fs.list_dir("/test")) == 2
+        assert cached_fs.glob("/test", "**/*.txt") == []
+
+        base_fs.write_text("/test/sub/nested.txt", "nested")
+        assert cached_fs.glob("/test", "**/*.txt") == [Path("/test/sub/nested.txt")]
+
+        base_fs.remove("/test/file.txt")
+        assert cached_fs.list_dir("/test") == [Path("/test/sub")]
+
+    def test_read_texts_batches_cache_access(self, base_fs):
+        """Test that read_texts serves hits and caches misses in one batch."""
+        base_fs.write_text("/test/other.txt", "other")
+        cache = InMemoryCache()
+        cache.set(
+            "fs_read_text",
+            {"path": "/test/file.txt", "encoding": "utf-8"},
+            {"stat": list(base_fs.stat_signature("/test/file.txt")), "value": "cached"},
+        )
+        cached_fs = CachedFileSystem(base_fs, cache)
+
+        with patch.object(cache, "set_many", wraps=cache.set_many) as set_many:
+            result = cached_fs.read_texts(["/test/file.txt", "/test/other.txt"])
+
+        assert result == ["cached", "other"]
+        other_stat = list(base_fs.stat_signature("/test/other.txt"))
+        set_many.assert_called_once_with(
+            "fs_read_text",
+            [
+                (
+                    {"path": "/test/other.txt", "encoding": "utf-8"},
+                    {"stat": other_stat, "value": "other"},
+                )
+            ],
         )
 
     def test_write_text_invalidates_cache(self, cached_fs, cache_manager):
@@ -82,12 +154,15 @@ class TestCachedFileSystem:
         assert len(result) == 2
         cache_manager.set.assert_called_once()
         # Check that paths are cached as strings
-        cached_data = cache_manager.set.call_args[0][2]
+        cached_data = cache_manager.set.call_args[0][2]["value"]
         assert all(isinstance(p, str) for p in cached_data)
 
-    def test_list_dir_cache_hit(self, cached_fs, cache_manager):
+    def test_list_dir_cache_hit(self, cached_fs, cache_manager, base_fs):
         """Test directory listing with cache hit."""
-        cache_manager.get.return_value = ["/test/cached1.txt", "/test/cached2.txt"]
+        cache_manager.get.return_value = {
+            "stat": list(base_fs.stat_signature("/test")),
+            "value": ["/test/cached1.txt", "/test/cached2.txt"],
+        }
 
         result = cached_fs.list_dir("/test")
 
@@ -158,6 +233,21 @@ class TestCachedFileSystem:
         assert count == 3  # read_text + list_dir + glob
         assert cache_manager.invalidate.call_count == 3
 
+    def test_production_files_validated_by_stat(self, tmp_path):
+        """Test stat validation against real files and the SQLite cache."""
+        target = tmp_path / "module.py"
+        target.write_text("v1")
+        cache = CacheManager(cache_dir=tmp_path / "cache")
+        cached_fs = CachedFileSystem(ProductionFileSystem(), cache)
+
+        assert cached_fs.read_text(target) == "v1"
+        target.write_text("version 2")
+        assert cached_fs.read_text(target) == "version 2"
+
+        assert cached_fs.glob(tmp_path, "*.py") == [target]
+        (tmp_path / "new.py").write_text("")
+        assert Path(tmp_path / "new.py") in cached_fs.glob(tmp_path, "*.py")
+
 
 class TestCachedGitClient:
     @pytest.fixture
@@ -177,15 +267,36 @@ class TestCachedGitClient:
         """Create cached Git client."""
         return CachedGitClient(base_git, cache_manager)
 
-    def test_get_current_branch_short_ttl(self, cached_git, cache_manager):
-        """Test that current branch is cached with short TTL."""
+    def test_get_current_branch_validated_by_state(
+        self, cached_git, cache_manager, base_git
+    ):
+        """Test that current branch is cached with the repository state."""
         cache_manager.get.return_value = None
 
         result = cached_git.get_current_branch(Path("/repo"))
 
         assert result == "main"
         cache_manager.set.assert_called_once_with(
-            "git_current_branch", {"repo_path": "/repo"}, "main", ttl=60  # Short TTL
+            "git_current_branch",
+            {"repo_path": "/repo"},
+            {"state": base_git.get_repo_state("/repo"), "value": "main"},
+            ttl=VALIDATED_TTL,
+        )
+
+    def test_stateless_client_falls_back_to_ttl(self, cache_manager):
+        """Test that clients without state tracking keep the short branch TTL."""
+        git = MagicMock(spec=GitClient)
+        git.get_current_branch.return_value = "main"
+        git.get_repo_state.return_value = None
+        cache_manager.get.return_value = None
+
+        CachedGitClient(git, cache_manager).get_current_branch(Path("/repo"))
+
+        cache_manager.set.assert_called_once_with(
+            "git_current_branch",
+            {"repo_path": "/repo"},
+            {"state": None, "value": "main"},
+            ttl=60,
         )
 
     def test_get_changed_files_caching(self, cached_git, cache_manager, base_git):
@@ -202,11 +313,11 @@ class TestCachedGitClient:
 
         assert len(result) == 2
         # Check cache data format
-        cache_data = cache_manager.set.call_args[0][2]
+        cache_data = cache_manager.set.call_args[0][2]["value"]
         assert all(isinstance(item, dict) for item in cache_data)
         assert cache_data[0]["file_path"] == "file1.py"
 
-    def test_get_changed_files_cache_hit(self, cached_git, cache_manager):
+    def test_get_changed_files_cache_hit(self, cached_git, cache_manager, base_git):
         """Test changed files with cache hit."""
         cache_data = [
             {
@@ -224,7 +335,10 @@ class TestCachedGitClient:
                 "old_path": None,
             },
         ]
-        cache_manager.get.return_value = cache_data
+        cache_manager.get.return_value = {
+            "state": base_git.get_repo_state("/repo", working_tree=True),
+            "value": cache_data,
+        }
 
         result = cached_git.get_changed_files(Path("/repo"))
 
@@ -242,6 +356,111 @@ class TestCachedGitClient:
         assert "diff --git" in result
         cache_manager.set.assert_called_once()
 
+    def test_get_file_diffs_batches_cache_access(self, base_git):
+        """Test that bulk diffs use one cache lookup and one cache write."""
+        cache = InMemoryCache()
+        cached_git = CachedGitClient(base_git, cache)
+
+        first = cached_git.get_file_diffs(Path("/repo"), ["a.py", "b.py"])
+        with patch.object(base_git, "get_file_diff") as get_file_diff:
+            second = cached_git.get_file_diffs(Path("/repo"), ["a.py", "b.py"])
+
+        assert first == second
+        get_file_diff.assert_not_called()
+
+    def test_repo_change_invalidates_entries(self, base_git):
+        """Test that cached results go stale as soon as the repository changes."""
+        cached_git = CachedGitClient(base_git, InMemoryCache())
+        assert cached_git.get_changed_files(Path("/repo")) == []
+
+        change = GitFileChange("new.py", "Added", 3, 0)
+        base_git.setup_repo("/repo", current_branch="feature", changes=[change])
+
+        assert cached_git.get_changed_files(Path("/repo")) == [change]
+        assert cached_git.get_current_branch(Path("/repo")) == "feature"
+        with patch.object(base_git, "get_changed_files") as get_changed_files:
+            assert cached_git.get_changed_files(Path("/repo")) == [change]
+        get_changed_files.assert_not_called()
+
+    def test_production_state_tracks_commits_and_checkouts(self, tmp_path):
+        """Test validation against a real repository and the SQLite cache."""
+        env = {
+            **os.environ,
+            "GIT_AUTHOR_NAME": "Test",
+            "GIT_AUTHOR_EMAIL": "test@example.com",
+            "GIT_COMMITTER_NAME": "Test",
+            "GIT_COMMITTER_EMAIL": "test@example.com",
+        }
+
+        def git(*args):
+            subprocess.run(["git", *args], cwd=repo, check=True, env=env)
+
+        repo = tmp_path / "repo"
+        repo.mkdir()
+        git("init", "-q", "-b", "main")
+        (repo / "app.py").write_text("v1\n")
+        git("add", ".")
+        git("commit", "-q", "-m", "initial")
+
+        base_git = ProductionGitClient()
+        cached_git = CachedGitClient(base_git, CacheManager(cache_dir=tmp_path / "c"))
+
+        assert cached_git.get_changed_files(repo) == []
+        (repo / "app.py").write_text("v2\n")
+        assert [c.file_path for c in cached_git.get_changed_files(repo)] == ["app.py"]
+        git("commit", "-q", "-am", "second")
+        assert cached_git.get_changed_files(repo) == []
+
+        assert cached_git.get_current_branch(repo) == "main"
+        git("checkout", "-q", "-b", "feature")
+        assert cached_git.get_current_branch(repo) == "feature"
+
+        # Unchanged repositories are served from the cache
+        with patch.object(base_git, "get_current_branch") as get_current_branch:
+            assert cached_git.get_current_branch(repo) == "feature"
+        get_current_branch.assert_not_called()
+
+    def test_production_file_diff_hits_do_not_scan_worktree(self, tmp_path):
+        """Test that diff hits check HEAD, the index and the file, not ls-files."""
+        env = {
+            **os.environ,
+            "GIT_AUTHOR_NAME": "Test",
+            "GIT_AUTHOR_EMAIL": "test@example.com",
+            "GIT_COMMITTER_NAME": "Test",
+            "GIT_COMMITTER_EMAIL": "test@example.com",
+        }
+
+        def git(*args):
+            subprocess.run(["git", *args], cwd=repo, check=True, env=env)
+
+        repo = tmp_path / "repo"
+        repo.mkdir()
+        git("init", "-q", "-b", "main")
+        (repo / "a.py").write_text("a1\n")
+        (repo / "b.py").write_text("b1\n")
+        git("add", ".")
+        git("commit", "-q", "-m", "initial")
+        (repo / "a.py").write_text("a2\n")
+
+        base_git = ProductionGitClient()
+        cached_git = CachedGitClient(base_git, CacheManager(cache_dir=tmp_path / "c"))
+        first = cached_git.get_file_diffs(repo, ["a.py", "b.py"])
+        assert "+a2" in first["a.py"]
+
+        (repo / "untracked.py").write_text("")
+        with patch("subprocess.run", wraps=subprocess.run) as run:
+            assert cached_git.get_file_diffs(repo, ["a.py", "b.py"]) == first
+            assert cached_git.get_file_diff(repo, "a.py") == first["a.py"]
+        run.assert_not_called()
+
+        (repo / "b.py").write_text("b2\n")
+        assert cached_git.get_file_diff(repo, "a.py") == first["a.py"]
+        assert "+b2" in cached_git.get_file_diff(repo, "b.py")
+        git("add", "a.py")
+        assert "+a2" in cached_git.get_file_diff(repo, "a.py")
+        git("commit", "-q", "-m", "second")
+        assert cached_git.get_file_diff(repo, "a.py") == ""
+
     def test_get_remote_url_caching(self, cached_git, cache_manager, base_git):
         """Test remote URL caching."""
         # First call - cache miss
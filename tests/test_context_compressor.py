@@ -0,0 +1,105 @@
+"""Tests for the changed-file compression stage."""
+
+from src.context_compressor import (
+    DEFAULT_TRANSFORMS,
+    compress_review_context,
+    compression_transforms,
+    normalize_whitespace,
+    strip_license_header,
+)
+from src.review_template import format_review_template
+
+LICENSED = """#!/usr/bin/env python
+# Copyright 2024 Example Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+
+import os
+
+
+def main():
+        if os.environ:   
+                return 1
+"""
+
+
+class TestContextCompressor:
+    def test_license_header_is_replaced_by_marker(self):
+        """Test that license comments are dropped but the shebang is kept."""
+        content, removed = strip_license_header(LICENSED)
+
+        assert removed == 4
+        assert content.startswith(
+            "#!/usr/bin/env python\n[License header removed: 4 lines]\n\nimport os"
+        )
+
+    def test_ordinary_comments_are_kept(self):
+        """Test that comment blocks without license wording stay."""
+        content = "# Parse the input\n# one line at a time\n# and return\nx = 1"
+
+        assert strip_license_header(content) == (content, 0)
+
+    def test_whitespace_is_normalized(self):
+        """Test trailing spaces, blank runs and indentation rescaling."""
+        content = "def f():\n        x = 1   \n\n\n\n        return x\n"
+
+        assert normalize_whitespace(content) == "def f():\n  x = 1\n\n  return x\n"
+
+        # Odd alignment would change meaning, so indentation is kept
+        aligned = "call(a,\n     b)\n    x = 1"
+        assert normalize_whitespace(aligned) == aligned
+
+    def test_review_context_reports_each_transform(self, template_data):
+        """Test that compressed files shrink and the template says why."""
+        blob = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk" * 5
+        data = template_data(
+            changed_files=[
+                {"path": "/project/app.py", "status": "modified", "content": LICENSED},
+                {
+                    "path": "/project/vendor/app.py",
+                    "status": "added",
+                    "content": LICENSED,
+                },
+                {
+                    "path": "/project/logo.py",
+                    "status": "added",
+                    "content": f'LOGO = "{blob}"',
+                },
+                {"path": "/project/old.py", "status": "D", "content": "[File deleted]"},
+            ]
+        )
+
+        packed, report = compress_review_context(
+            data, DEFAULT_TRANSFORMS + ("literals",)
+        )
+        files = packed["changed_files"]
+
+        assert files[1]["content"] == "[Identical to app.py]"
+        assert files[2]["content"] == 'LOGO = "[elided 300-char string]"'
+        assert files[3] is data["changed_files"][3]
+        assert 0 < report.tokens_after < report.tokens_before
+        assert data["changed_files"][0]["content"] == LICENSED
+
+        rendered = format_review_template(packed, use_cache=False)
+        assert "<context_compression>" in rendered
+        assert "- License headers removed (4 lines): app.py\n" in rendered
+        assert "- vendor/app.py is identical to app.py\n" in rendered
+        assert "(300 chars): logo.py\n" in rendered
+
+    def test_literals_are_opt_in(self, monkeypatch, template_data):
+        """Test transform selection from GEMINI_CONTEXT_COMPRESSION."""
+        monkeypatch.delenv("GEMINI_CONTEXT_COMPRESSION", raising=False)
+        assert compression_transforms() == DEFAULT_TRANSFORMS
+        assert "literals" not in DEFAULT_TRANSFORMS
+
+        monkeypatch.setenv("GEMINI_CONTEXT_COMPRESSION", "whitespace, literals, zip")
+        assert compression_transforms() == ("whitespace", "literals")
+
+        monkeypatch.setenv("GEMINI_CONTEXT_COMPRESSION", "off")
+        data = template_data(
+            changed_files=[
+                {"path": "/project/app.py", "status": "M", "content": LICENSED}
+            ]
+        )
+        assert compress_review_context(data, compression_transforms())[0] is data
@@ -0,0 +1,124 @@
+"""Tests for deduplication of text repeated across review context sections."""
+
+import pytest
+
+from src.context_dedup import (
+    DEFAULT_MIN_CHARS,
+    BlockDeduplicator,
+    dedup_min_chars,
+    deduplicate_review_context,
+)
+
+GUIDELINES = "\n".join(
+    f"- Guideline {number}: keep functions short and name them for what they do"
+    for number in range(1, 9)
+)
+
+
+def _data(**extra):
+    """Template data with a configuration context."""
+    return {
+        "project_path": "/project",
+        "configuration_content": f"# Claude Memory Configuration\n\n{GUIDELINES}",
+        "changed_files": [],
+        **extra,
+    }
+
+
+class TestDeduplicateReviewContext:
+    def test_meta_prompt_repeating_configuration_is_referenced(self):
+        """Test that configuration embedded in the meta-prompt is sent once."""
+        data = _data(auto_prompt_content=f"Review carefully.\n{GUIDELINES}\nThanks.")
+
+        deduplicated, report = deduplicate_review_context(data)
+
+        assert deduplicated["configuration_content"] == data["configuration_content"]
+        assert deduplicated["auto_prompt_content"] == (
+            "Review carefully.\n"
+            "[... 8 lines repeated from <configuration_context>, lines 3-10 ...]\n"
+            "Thanks."
+        )
+        assert report.saved > 0
+        assert deduplicated["compression_notes"] == [
+            "8 lines of <user_instructions> repeated from <configuration_context>, "
+            "replaced with references"
+        ]
+
+    def test_repeats_within_configuration_and_short_repeats(self):
+        """Test that a doubly imported file is merged once, short text is kept."""
+        data = _data(
+            configuration_content=f"{GUIDELINES}\n\n## Imported again\n{GUIDELINES}",
+            auto_prompt_content="\n".join(GUIDELINES.splitlines()[:3]),
+        )
+
+        deduplicated, report = deduplicate_review_context(data)
+
+        assert deduplicated["configuration_content"].endswith(
+            "## Imported again\n"
+            "[... 8 lines repeated from <configuration_context>, lines 1-8 ...]"
+        )
+        assert deduplicated["auto_prompt_content"] == data["auto_prompt_content"]
+        assert len(report.repeats) == 1
+
+    def test_changed_files_are_only_deduplicated_across_sections(self):
+        """Test that a file's own repetition is kept but copies elsewhere are not."""
+        repeated = f"{GUIDELINES}\n{GUIDELINES}"
+        data = _data(
+            changed_files=[
+                {"path": "/project/CLAUDE.md", "status": "M", "content": GUIDELINES},
+                {"path": "/project/notes.md", "status": "A", "content": repeated},
+            ],
+            compression_notes=["a.py: license header removed"],
+        )
+        data["configuration_content"] = ""
+
+        deduplicated, report = deduplicate_review_context(data)
+
+        claude_md, notes = deduplicated["changed_files"]
+        assert claude_md is data["changed_files"][0]
+        assert notes["content"] == (
+            "[... 8 lines repeated from File: CLAUDE.md, lines 1-8 ...]\n"
+            "[... 8 lines repeated from File: CLAUDE.md, lines 1-8 ...]"
+        )
+        assert deduplicated["compression_notes"][0] == "a.py: license header removed"
+
+    def test_disabled_returns_data_unchanged(self):
+        """Test that a zero threshold turns deduplication off."""
+        data = _data(auto_prompt_content=GUIDELINES)
+
+        deduplicated, report = deduplicate_review_context(data, min_chars=0)
+
+        assert deduplicated is data
+        assert not report.repeats
+
+    @pytest.mark.parametrize(
+        "setting,expected",
+        [
+            (None, DEFAULT_MIN_CHARS),
+            ("off", 0),
+            ("250", 250),
+            ("-1", DEFAULT_MIN_CHARS),
+        ],
+    )
+    def test_threshold_setting(self, monkeypatch, setting, expected):
+        """Test GEMINI_CONTEXT_DEDUP_MIN_CHARS parsing."""
+        if setting is None:
+            monkeypatch.delenv("GEMINI_CONTEXT_DEDUP_MIN_CHARS", raising=False)
+        else:
+            monkeypatch.setenv("GEMINI_CONTEXT_DEDUP_MIN_CHARS", setting)
+
+        assert dedup_min_chars() == expected
+
+
+def test_references_point_into_deduplicated_text():
+    """Test that line numbers refer to the source as it is sent."""
+    deduplicator = BlockDeduplicator(min_chars=50)
+    block = "\n".join(f"line {number} of the shared block" for number in range(6))
+    other = "\n".join(f"line {number} of another block" for number in range(6))
+
+    first = deduplicator.add("<a>", f"{block}\n{block}\n{other}")
+    second = deduplicator.add("<b>", f"intro\n{other}")
+
+    assert first.splitlines()[6] == "[... 6 lines repeated from <a>, lines 1-6 ...]"
+    assert first.splitlines()[7:] == other.splitlines()
+    assert second == "intro\n[... 6 lines repeated from <a>, lines 8-13 ...]"
@@ -0,0 +1,162 @@
+"""Tests for fitting review contexts into a model's token budget."""
+
+from unittest.mock import patch
+
+from src.context_compressor import compress_review_context
+from src.context_packer import (
+    PROMPT_RESERVE_TOKENS,
+    context_token_budget,
+    pack_review_context,
+)
+from src.file_selector import estimate_tokens
+from src.review_template import format_review_template
+
+SOURCE = "\n".join(
+    ["import os", "", "class Parser:", "    def parse(self):"]
+    + [f"        value_{i} = os.getenv('NAME_{i}')" for i in range(200)]
+    + ["", "def main():", "    Parser().parse()"]
+)
+DIFF = """diff --git a/app.py b/app.py
+index 1111111..2222222 100644
+--- a/app.py
++++ b/app.py
+@@ -3,2 +3,2 @@ import os
+-class Parser:
++class Parser(object):
+     def parse(self):"""
+
+
+# One large source file and a lock file in a parser task
+PARSER_REVIEW = {
+    "prd_summary": "Improve the parser.",
+    "current_phase_description": "Parser fixes",
+    "subtasks_completed": ["1.1 Fix parser"],
+    "file_tree": "\n".join(f"/project/file_{i}.py" for i in range(300)),
+    "configuration_content": "# Rules\nUse type hints.",
+    "changed_files": [
+        {"path": "/project/app.py", "status": "modified", "content": SOURCE},
+        {
+            "path": "/project/poetry.lock",
+            "status": "modified",
+            "content": "\n".join(f'name = "pkg{i}"' for i in range(300)),
+        },
+    ],
+}
+
+
+def _tokens(data):
+    return estimate_tokens(format_review_template(data, use_cache=False))
+
+
+class TestContextPacker:
+    def test_fitting_context_is_unchanged(self, template_data):
+        """Test that a context within budget is returned as is."""
+        data = template_data(PARSER_REVIEW)
+
+        packed, report = pack_review_context(data, 10**6)
+
+        assert packed is data
+        assert not report.degraded
+        assert report.tokens == _tokens(data)
+
+    def test_degrades_to_fit_budget(self, template_data):
+        """Test that oversized contexts shrink without overflowing."""
+        data = template_data(PARSER_REVIEW)
+        full = _tokens(data)
+
+        for budget in (full - 100, full // 2, full // 4, 800):
+            packed, report = pack_review_context(data, budget, lambda paths: {})
+
+            assert _tokens(packed) <= budget
+            assert report.tokens <= budget
+            assert report.degraded
+
+    def test_important_files_keep_more_content(self, template_data):
+        """Test that source files win over lock files and degrade to hunks."""
+        data = template_data(PARSER_REVIEW)
+        budget = _tokens(data) - 1000
+
+        packed, report = pack_review_context(
+            data, budget, lambda paths: {"/project/app.py": DIFF}
+        )
+
+        assert report.levels["/project/app.py"] == "full"
+        assert report.levels["/project/poetry.lock"] == "truncated"
+        assert report.levels["configuration"] == "full"
+        assert packed["changed_files"][1]["content"].endswith(
+            "... (truncated to fit the model's context window)"
+        )
+
+        budget = _tokens(data) // 4
+        packed, report = pack_review_context(
+            data, budget, lambda paths: {"/project/app.py": DIFF}
+        )
+        app = packed["changed_files"][0]["content"]
+        assert report.levels["/project/app.py"] == "hunks"
+        assert app.startswith("[Changed hunks only; file has 207 lines]\n@@ -3,2")
+        assert "+class Parser(object):" in app
+
+    def test_outline_without_diff(self, template_data):
+        """Test that files without a diff fall back to their outline."""
+        data = template_data(PARSER_REVIEW)
+        # Relevant to the task, so it gets the leftover budget first
+        data["changed_files"][1] = {
+            "path": "/project/parser.txt",
+            "status": "added",
+            "content": "text\n" * 8000,
+        }
+        budget = _tokens(data) // 8
+
+        packed, report = pack_review_context(data, budget)
+
+        assert report.levels["/project/app.py"] == "outline"
+        assert report.levels["/project/parser.txt"] == "truncated"
+        outline = packed["changed_files"][0]["content"].splitlines()
+        assert outline == [
+            "[Outline only: 3 definitions in 207 lines]",
+            "     3 | class Parser:",
+            "     4 |     def parse(self):",
+            "   206 | def main():",
+        ]
+        assert _tokens(packed) <= budget
+
+    def test_outline_numbers_lines_before_compression(self, template_data):
+        """Test that outlines of compressed files keep the original numbers."""
+        data = template_data(PARSER_REVIEW)
+        data["changed_files"][0]["content"] = SOURCE.replace(
+            "import os\n", "import os\n\n\n\n"
+        )
+        data["changed_files"][1] = {
+            "path": "/project/parser.txt",
+            "status": "added",
+            "content": "text\n" * 8000,
+        }
+        compressed, compression = compress_review_context(data)
+        assert compression.whitespace
+
+        packed, report = pack_review_context(compressed, _tokens(compressed) // 8)
+
+        assert report.levels["/project/app.py"] == "outline"
+        assert packed["changed_files"][0]["content"].splitlines() == [
+            "[Outline only: 3 definitions in 210 lines]",
+            "     6 | class Parser:",
+            "     7 |     def parse(self):",
+            "   209 | def main():",
+        ]
+
+    def test_budget_follows_model_config(self, monkeypatch):
+        """Test that the budget comes from the model's input token limit."""
+        monkeypatch.delenv("GEMINI_CONTEXT_TOKEN_BUDGET", raising=False)
+        with patch(
+            "src.context_packer.get_input_token_limit", return_value=100_000
+        ) as limit:
+            assert (
+                context_token_budget("gemini-2.5-pro") < 100_000 - PROMPT_RESERVE_TOKENS
+            )
+            limit.assert_called_once_with("gemini-2.5-pro")
+
+            monkeypatch.setenv("GEMINI_CONTEXT_TOKEN_BUDGET", "5000")
+            assert context_token_budget() == 5000
+
+            monkeypatch.setenv("GEMINI_CONTEXT_TOKEN_BUDGET", "lots")
+            assert context_token_budget() > 5000
@@ -1,5 +1,6 @@
 import pytest
 
+from src.cache import CacheManager, TieredCache
 from src.dependencies import (
     DependencyContainer,
     get_container,
@@ -35,6 +36,14 @@ class TestDependencyContainer:
         fs2 = container.filesystem
         assert fs1 is fs2
 
+    def test_production_container_uses_memory_tier(self):
+        container = DependencyContainer(use_production=True)
+        assert isinstance(container.cache_manager, TieredCache)
+        assert container.filesystem._cache is container.cache_manager
+
+        container = DependencyContainer(use_production=True, enable_memory_tier=False)
+        assert isinstance(container.cache_manager, CacheManager)
+
     def test_test_container(self):
         container = DependencyContainer(use_production=False)
 
@@ -63,6 +72,7 @@ class TestDependencyContainer:
         # Get instances
         fs1 = container.filesystem
         git1 = container.git_client
+        tracker1 = container.prefix_tracker
 
         # Reset
         container.reset()
@@ -70,10 +80,12 @@ class TestDependencyContainer:
         # Get new instances
         fs2 = container.filesystem
         git2 = container.git_client
+        tracker2 = container.prefix_tracker
 
         # Should be different instances after reset
         assert fs1 is not fs2
         assert git1 is not git2
+        assert tracker1 is not tracker2
 
 
 class TestGlobalContainers:
@@ -6,6 +6,7 @@ Unit tests for file_selector module.
 import os
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
@@ -18,6 +19,7 @@ from src.file_selector import (
     estimate_tokens,
     extract_line_ranges,
     format_file_content,
+    merge_line_ranges,
     parse_file_selection,
     parse_file_selections,
     read_file_with_line_ranges,
@@ -277,6 +279,37 @@ class TestExtractLineRanges:
         with pytest.raises(FileNotFoundError):
             extract_line_ranges("/does/not/exist.py")
 
+    def test_extract_out_of_order_ranges_in_file_order(self, tmp_path):
+        """Test that out-of-order ranges are returned in file order, once."""
+        path = tmp_path / "lines.txt"
+        path.write_text("line1\nline2\r\nline3\nline4\nline5")
+
+        content, total, included = extract_line_ranges(
+            str(path), [(4, 4), (1, 2), (2, 2)]
+        )
+
+        assert content == "line1\nline2\nline4\n"
+        assert total == 5
+        assert included == 3
+
+    def test_extract_stops_reading_after_last_range(self, tmp_path, monkeypatch):
+        """Test that lines after the last range are counted, not split."""
+        path = tmp_path / "generated.py"
+        with open(path, "w") as f:
+            f.writelines(f"value_{n} = {n}\n" for n in range(1, 500_001))
+        monkeypatch.setattr("src.file_selector._COUNT_CHUNK_CHARS", 4096)
+
+        content, total, included = extract_line_ranges(
+            str(path), [(250_010, 250_011), (100, 101)]
+        )
+
+        assert content == (
+            "value_100 = 100\nvalue_101 = 101\n"
+            "value_250010 = 250010\nvalue_250011 = 250011\n"
+        )
+        assert total == 500_000
+        assert included == 4
+
 
 class TestFormatFileContent:
     """Tests for format_file_content function."""
@@ -327,6 +360,34 @@ class TestFormatFileContent:
         assert "     3 |" in result
         assert "     5 |" in result
 
+    def test_format_overlapping_out_of_order_ranges(self):
+        """Test that numbers follow the merged intervals, not the request order."""
+        result = format_file_content(
+            "test.py",
+            "line2\nline3\nline4\nline8",
+            line_ranges=[(8, 8), (3, 4), (2, 3)],
+        )
+
+        assert result == (
+            "     2 | line2\n     3 | line3\n     4 | line4\n     8 | line8"
+        )
+
+
+class TestMergeLineRanges:
+    """Tests for merge_line_ranges function."""
+
+    def test_merge_sorts_and_joins_overlapping_and_adjacent(self):
+        """Test that overlapping and touching ranges become one interval."""
+        assert merge_line_ranges([(20, 30), (1, 5), (4, 9), (10, 10), (12, 11)]) == [
+            (1, 10),
+            (20, 30),
+        ]
+
+    def test_merge_rejects_non_positive_lines(self):
+        """Test that line numbers below 1 are rejected."""
+        with pytest.raises(InvalidLineRangeError, match="must be positive"):
+            merge_line_ranges([(3, 4), (0, 2)])
+
 
 class TestEstimateTokens:
     """Tests for estimate_tokens function."""
@@ -343,8 +404,17 @@ class TestEstimateTokens:
     def test_estimate_code(self):
         """Test token estimation for code."""
         code = "def hello():\n    print('Hello, world!')\n"
-        # 40 chars / 4 = 10 tokens
-        assert estimate_tokens(code) == 10
+        # def, " hello", "():"(2), "\n    ", print, "('", Hello, ",", " world",
+        # "!')"(2), "\n"
+        assert estimate_tokens(code) == 13
+
+    def test_estimate_dense_and_cjk_text(self):
+        """Test that minified code and CJK text are not underestimated."""
+        minified = "var a=function(b){return b+1};" * 50
+        cjk = "你好，世界。这是一个测试。" * 10
+
+        assert estimate_tokens(minified) > len(minified) // 4 * 1.5
+        assert estimate_tokens(cjk) > len(cjk) // 4 * 3
 
 
 class TestReadFileWithLineRanges:
@@ -386,6 +456,20 @@ class TestReadFileWithLineRanges:
             finally:
                 os.unlink(f.name)
 
+    def test_only_full_file_estimates_persist(self, tmp_path):
+        """Test that line-range selections do not cache their token estimates."""
+        path = tmp_path / "module.py"
+        path.write_text("line1\nline2\nline3\n")
+
+        with patch(
+            "src.file_selector._estimate_tokens", return_value=3
+        ) as estimate_tokens_mock:
+            read_file_with_line_ranges(str(path), [(1, 2)])
+            read_file_with_line_ranges(str(path))
+
+        persisted = [call.kwargs["persist"] for call in estimate_tokens_mock.mock_calls]
+        assert persisted == [False, True]
+
     def test_read_relative_path(self):
         """Test reading file with relative path."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -0,0 +1,108 @@
+"""Tests for sampling changed files over the per-file line limit."""
+
+import os
+import subprocess
+from unittest.mock import MagicMock
+
+from src.context_compressor import compress_review_context
+from src.large_file_sampler import (
+    changed_line_ranges,
+    numbered_outline,
+    read_for_review,
+)
+
+
+def _write_module(path, classes=30, methods=9):
+    """Write a Python module with numbered classes, methods and bodies."""
+    lines = []
+    for c in range(classes):
+        lines.append(f"class Model{c}:")
+        for m in range(methods):
+            lines.append(f"    def method_{c}_{m}(self, value):")
+            lines.append(f"        return value + {c * 100 + m}")
+    path.write_text("\n".join(lines) + "\n")
+    return lines
+
+
+class TestReadForReview:
+    def test_small_file_is_read_whole(self, tmp_path):
+        """Test that files within the limit are returned unchanged."""
+        path = tmp_path / "small.py"
+        path.write_text("a = 1\nb = 2\n")
+        ranges = MagicMock(return_value=[])
+
+        assert read_for_review(str(path), 10, ranges) == "a = 1\nb = 2"
+        ranges.assert_not_called()
+
+    def test_large_file_shows_outline_changes_head_and_tail(self, tmp_path):
+        """Test that changes past the head are shown within the budget."""
+        path = tmp_path / "models.py"
+        lines = _write_module(path)
+
+        sample = read_for_review(str(path), 100, lambda: [(400, 400)])
+        shown = sample.splitlines()
+
+        assert shown[0].startswith(f"[Large file: {len(lines)} lines")
+        assert "[Outline: 300 definitions]" in shown
+        assert "     1 | class Model0:" in shown
+        assert f"   381 | class Model{380 // 19}:" in shown
+        assert "[Lines 397-403, changed]" in shown
+        assert lines[399] in shown
+        assert shown[-10:] == lines[-10:]
+        assert len(shown) <= 100 + 10
+
+    def test_regions_over_budget_are_counted(self, tmp_path):
+        """Test that changed regions that do not fit are reported."""
+        path = tmp_path / "models.py"
+        _write_module(path)
+
+        sample = read_for_review(
+            str(path), 40, lambda: [(line, line) for line in range(100, 500, 20)]
+        )
+
+        assert "more changed regions omitted to fit the 40-line limit]" in sample
+        assert "[Lines 97-103, changed]" in sample
+
+    def test_compression_keeps_sampled_line_numbers(self, tmp_path):
+        """Test that compressing a sample leaves its numbered blocks intact."""
+        path = tmp_path / "models.py"
+        lines = _write_module(path)
+        lines[:0] = ["# Copyright 2024 Example Corp.", "# Licensed under MIT.", "#"]
+        lines[200:200] = ["", "", ""]
+        path.write_text("\n".join(lines) + "\n")
+        sample = read_for_review(str(path), 100, lambda: [(201, 202)])
+
+        data, _ = compress_review_context(
+            {"changed_files": [{"path": str(path), "content": sample}]}
+        )
+        compressed = data["changed_files"][0]["content"]
+
+        assert compressed.splitlines() == [line.rstrip() for line in sample.split("\n")]
+        assert numbered_outline(str(path), compressed) == (
+            numbered_outline(str(path), sample)
+        )
+        outline, total = numbered_outline(str(path), sample)
+        assert total == len(lines)
+        assert outline.splitlines()[0] == "     4 | class Model0:"
+
+
+def test_changed_line_ranges(tmp_path):
+    """Test that hunks of the working tree diff become line ranges."""
+    env = {
+        **os.environ,
+        "GIT_AUTHOR_NAME": "Test",
+        "GIT_AUTHOR_EMAIL": "test@example.com",
+        "GIT_COMMITTER_NAME": "Test",
+        "GIT_COMMITTER_EMAIL": "test@example.com",
+    }
+    path = tmp_path / "app.py"
+    path.write_text("".join(f"line {n}\n" for n in range(1, 21)))
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "add", "."], cwd=tmp_path, check=True)
+    subprocess.run(["git", "commit", "-qm", "x"], cwd=tmp_path, check=True, env=env)
+
+    content = path.read_text().replace("line 5\n", "five\n").replace("line 12\n", "")
+    path.write_text(content + "line 21\nline 22\n")
+
+    assert changed_line_ranges(str(tmp_path), "app.py") == [(5, 5), (11, 11), (20, 21)]
+    assert changed_line_ranges(str(tmp_path), "missing.py") == []
@@ -0,0 +1,148 @@
+"""Tests for the persistent line index of large files."""
+
+from unittest.mock import patch
+
+import pytest
+
+import src.line_index as line_index
+from src.cache.sqlite_cache import CacheManager
+from src.file_selector import (
+    estimate_selection_tokens,
+    extract_line_ranges,
+    read_file_with_line_ranges,
+)
+from src.line_index import (
+    DEFAULT_MIN_BYTES,
+    LineIndex,
+    LineIndexStore,
+    build_line_index,
+    line_index_min_bytes,
+)
+from src.token_estimator import get_token_estimator, measure
+
+
+def _write_module(path, lines=2000):
+    """Write a Python module with multi-byte characters and blank lines."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for number in range(1, lines + 1):
+            if number % 10 == 0:
+                f.write("\r\n")
+            else:
+                f.write(f"    total += {number}  # café\n")
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Index every file through a store backed by a fresh cache."""
+    store = LineIndexStore(CacheManager(cache_dir=tmp_path / "cache"), min_bytes=1)
+    monkeypatch.setattr(line_index, "_store", store)
+    return store
+
+
+class TestLineIndex:
+    def test_offsets_and_round_trip(self, tmp_path):
+        """Test that offsets point at line starts and survive serialization."""
+        path = _write_module(tmp_path / "module.py", lines=30)
+        data = open(path, "rb").read()
+
+        index = LineIndex.from_bytes(build_line_index(path).to_bytes())
+
+        assert index.line_count == 30
+        assert index.offsets[-1] == len(data)
+        assert data[index.offsets[9] : index.offsets[10]] == b"\r\n"
+        with open(path, "rb") as f:
+            assert index.read(f, 9, 11) == (
+                "    total += 9  # café\n\n    total += 11  # café\n"
+            )
+
+    def test_range_tokens_match_measured_content(self, tmp_path, store):
+        """Test that a range estimate matches measuring the numbered lines."""
+        path = _write_module(tmp_path / "module.py")
+        extract_line_ranges(path, [(1, 1)])
+        extract_line_ranges(path, [(1, 1)])
+
+        result = read_file_with_line_ranges(path, [(1200, 1540), (30, 41)])
+
+        content_class, raw = measure(result.content, path)
+        expected = get_token_estimator().calibrated(content_class, raw)
+        assert result.estimated_tokens == pytest.approx(expected, abs=2)
+        assert estimate_selection_tokens(path, [(1200, 1540), (30, 41)]) == (
+            result.estimated_tokens
+        )
+
+
+class TestLineIndexStore:
+    def test_second_read_builds_index_and_reads_match(self, tmp_path, store):
+        """Test that indexed reads return what a streaming read returns."""
+        path = _write_module(tmp_path / "module.py")
+        ranges = [(1500, 1520), (7, 12), (10, 11)]
+        streamed = extract_line_ranges(path, ranges)
+
+        assert store.get(path) is None
+        assert estimate_selection_tokens(path, ranges) is None
+
+        with patch.object(
+            line_index, "build_line_index", wraps=build_line_index
+        ) as build:
+            assert extract_line_ranges(path, ranges) == streamed
+            assert extract_line_ranges(path, [(2000, 2000)])[1] == 2000
+        build.assert_called_once()
+
+        # Another process finds the index in the cache
+        fresh = LineIndexStore(store._cache, min_bytes=1)
+        assert fresh.get(path).offsets == store.get(path).offsets
+
+    def test_modified_file_is_reindexed(self, tmp_path, store):
+        """Test that a new file version does not use the old index."""
+        path = _write_module(tmp_path / "module.py", lines=50)
+        store.get_for_read(path)
+        assert store.get_for_read(path).line_count == 50
+
+        _write_module(tmp_path / "module.py", lines=60)
+
+        assert store.get(path) is None
+        content, total, included = extract_line_ranges(path, [(55, 56)])
+        assert (total, included) == (60, 2)
+
+    def test_small_and_unsupported_files_are_not_indexed(self, tmp_path):
+        """Test the size threshold and files with lone carriage returns."""
+        small = _write_module(tmp_path / "small.py", lines=5)
+        old_mac = tmp_path / "old_mac.txt"
+        old_mac.write_bytes(b"one\rtwo\rthree\r" * 100)
+        store = LineIndexStore(None, min_bytes=1000)
+
+        for _ in range(2):
+            assert store.get_for_read(small) is None
+            assert store.get_for_read(str(old_mac)) is None
+
+    def test_read_tracking_is_bounded(self, tmp_path, monkeypatch):
+        """Test that only the latest version of recently read files is kept."""
+        monkeypatch.setattr(line_index, "_SEEN_SIZE", 2)
+        store = LineIndexStore(None, min_bytes=1)
+        paths = [_write_module(tmp_path / f"m{n}.py", lines=5) for n in range(3)]
+        for path in paths:
+            store.get_for_read(path)
+        _write_module(tmp_path / "m2.py", lines=6)
+        store.get_for_read(paths[2])
+
+        assert list(store._read_once) == paths[1:]
+        assert store._read_once[paths[2]] == line_index._stat_signature(paths[2])
+
+    @pytest.mark.parametrize(
+        "setting,expected",
+        [
+            (None, DEFAULT_MIN_BYTES),
+            ("off", 0),
+            ("4096", 4096),
+            ("-1", DEFAULT_MIN_BYTES),
+        ],
+    )
+    def test_threshold_setting(self, monkeypatch, setting, expected):
+        """Test GEMINI_LINE_INDEX_MIN_BYTES parsing."""
+        if setting is None:
+            monkeypatch.delenv("GEMINI_LINE_INDEX_MIN_BYTES", raising=False)
+        else:
+            monkeypatch.setenv("GEMINI_LINE_INDEX_MIN_BYTES", setting)
+
+        assert line_index_min_bytes() == expected
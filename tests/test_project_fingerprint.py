@@ -0,0 +1,154 @@
+"""Tests for the project fingerprint service."""
+
+import os
+import subprocess
+import time
+
+import pytest
+
+from src.services import ProjectFingerprint
+
+
+def _git(repo, *args):
+    """Run a git command in a test repository."""
+    subprocess.run(
+        ["git", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+        env={
+            **os.environ,
+            "GIT_AUTHOR_NAME": "Test",
+            "GIT_AUTHOR_EMAIL": "test@example.com",
+            "GIT_COMMITTER_NAME": "Test",
+            "GIT_COMMITTER_EMAIL": "test@example.com",
+        },
+    )
+
+
+class TestProjectFingerprint:
+    @pytest.fixture
+    def repo(self, tmp_path):
+        """Create a git repository with one commit."""
+        _git(tmp_path, "init", "-q", "-b", "main")
+        (tmp_path / "app.py").write_text("print('hi')\n")
+        (tmp_path / "CLAUDE.md").write_text("# Rules\n")
+        _git(tmp_path, "add", ".")
+        _git(tmp_path, "commit", "-q", "-m", "initial")
+        return tmp_path
+
+    @pytest.fixture
+    def service(self):
+        return ProjectFingerprint()
+
+    def test_stable_when_nothing_changes(self, service, repo):
+        """Test that repeated fingerprints of an unchanged project match."""
+        assert service.compute(repo).digest == service.compute(repo).digest
+
+    def test_commit_changes_head_only(self, service, repo):
+        """Test that a new commit changes head but leaves config alone."""
+        before = service.compute(repo)
+        (repo / "app.py").write_text("print('bye')\n")
+        _git(repo, "commit", "-q", "-am", "change")
+        after = service.compute(repo)
+
+        assert after.components["head"] != before.components["head"]
+        assert after.components["config"] == before.components["config"]
+        assert after.key_for("config") == before.key_for("config")
+        assert after.digest != before.digest
+
+    def test_dirty_and_untracked_files_change_worktree(self, service, repo):
+        """Test that edits and new files are picked up without staging."""
+        before = service.compute(repo)
+
+        (repo / "app.py").write_text("print('edited')\n")
+        edited = service.compute(repo)
+        assert edited.components["worktree"] != before.components["worktree"]
+        assert edited.components["index"] == before.components["index"]
+
+        (repo / "new.py").write_text("x = 1\n")
+        untracked = service.compute(repo)
+        assert untracked.components["worktree"] != edited.components["worktree"]
+
+    def test_staging_changes_index(self, service, repo):
+        """Test that staging a change updates the index component."""
+        (repo / "app.py").write_text("print('staged')\n")
+        before = service.compute(repo)
+        _git(repo, "add", "app.py")
+        assert service.compute(repo).components["index"] != before.components["index"]
+
+    def test_config_files_tracked(self, service, repo):
+        """Test that adding, editing and removing config files is detected."""
+        before = service.compute(repo, components=("config",))
+
+        rules = repo / ".cursor" / "rules"
+        rules.mkdir(parents=True)
+        (rules / "style.mdc").write_text("rule")
+        added = service.compute(repo, components=("config",))
+        assert added.digest != before.digest
+
+        time.sleep(0.01)
+        (repo / "CLAUDE.md").write_text("# Rules, edited\n")
+        edited = service.compute(repo, components=("config",))
+        assert edited.digest != added.digest
+
+        (rules / "style.mdc").unlink()
+        assert service.compute(repo, components=("config",)).digest != edited.digest
+
+    def test_env_and_flags(self, service, repo, monkeypatch):
+        """Test that GEMINI_* settings and flags feed the env component."""
+        base = service.compute(repo, flags={"include_claude_memory": False})
+        flagged = service.compute(repo, flags={"include_claude_memory": True})
+        assert flagged.components["env"] != base.components["env"]
+
+        monkeypatch.setenv("GEMINI_MODEL", "other-model")
+        assert service.compute(repo).components["env"] != base.components["env"]
+
+        # Credentials are not part of the fingerprint
+        env_only = service.compute(repo, components=("env",))
+        monkeypatch.setenv("GEMINI_API_KEY", "secret")
+        assert service.compute(repo, components=("env",)).digest == env_only.digest
+
+    def test_packed_refs(self, service, repo):
+        """Test that HEAD resolves through packed-refs after gc."""
+        before = service.compute(repo, components=("head",))
+        _git(repo, "pack-refs", "--all")
+        assert not (repo / ".git" / "refs" / "heads" / "main").exists()
+        assert service.compute(repo, components=("head",)).digest == before.digest
+
+    def test_named_refs(self, service, repo):
+        """Test that the refs component follows branches, tags and suffixes."""
+        _git(repo, "tag", "v1")
+        refs = ("main", "main~0", "v1")
+        before = service.compute(repo, components=("refs",), refs=refs)
+
+        (repo / "app.py").write_text("print('edited')\n")
+        assert service.compute(repo, components=("refs",), refs=refs) == before
+
+        _git(repo, "commit", "-q", "-am", "change")
+        assert service.compute(repo, components=("refs",), refs=refs) != before
+        assert service.compute(
+            repo, components=("refs",), refs=("v1",)
+        ) == service.compute(repo, components=("refs",), refs=("v1",))
+
+    def test_named_files(self, service, repo):
+        """Test that the files component tracks only the named files."""
+        before = service.compute(repo, components=("files",), files=("app.py",))
+        (repo / "other.py").write_text("x = 1\n")
+        assert service.compute(repo, components=("files",), files=("app.py",)) == before
+        (repo / "app.py").write_text("print('a longer edit')\n")
+        assert service.compute(repo, components=("files",), files=("app.py",)) != before
+
+    def test_outside_git(self, service, tmp_path):
+        """Test that non-repository directories still fingerprint their config."""
+        before = service.compute(tmp_path)
+        (tmp_path / "CLAUDE.md").write_text("rules")
+        after = service.compute(tmp_path)
+
+        assert after.components["head"] == before.components["head"]
+        assert after.components["config"] != before.components["config"]
+
+    def test_unknown_component(self, service, tmp_path):
+        """Test that asking for an unknown component fails loudly."""
+        with pytest.raises(KeyError):
+            service.compute(tmp_path, components=("nope",))
@@ -0,0 +1,152 @@
+"""Tests for the project snapshot shared by the meta-prompt and the review."""
+
+import os
+import subprocess
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.cache.memory_cache import InMemoryCache
+from src.config_types import CodeReviewConfig
+from src.context_generator import generate_review_context_data
+from src.git_utils import get_git_metadata
+from src.meta_prompt_analyzer import analyze_project_for_meta_prompt
+from src.project_snapshot import SnapshotProducers, build_project_snapshot
+from src.review_artifacts import ReviewArtifacts
+
+TREE = """/project
+├── src/
+│   ├── app.py
+│   └── util/
+│       └── io.py
+├── tests/
+│   └── test_app.py
+├── README.md
+└── setup.cfg"""
+
+
+def _producers():
+    """Producers that record their calls instead of touching the project."""
+    return SnapshotProducers(
+        configurations=MagicMock(
+            return_value={
+                "claude_memory_files": [],
+                "cursor_rules": [],
+                "discovery_errors": [],
+                "performance_stats": {},
+            }
+        ),
+        changed_files=MagicMock(
+            return_value=[
+                {"path": "/project/src/app.py", "status": "unstaged-M", "content": "x"}
+            ]
+        ),
+        file_tree=MagicMock(return_value=TREE),
+        git_metadata=MagicMock(
+            return_value={
+                "is_repository": True,
+                "branch": "feature",
+                "commit_count": 12,
+                "changed_paths": 1,
+            }
+        ),
+    )
+
+
+class TestProjectSnapshot:
+    @pytest.fixture
+    def snapshot(self, tmp_path):
+        return build_project_snapshot(
+            str(tmp_path),
+            include_claude_memory=True,
+            artifacts=ReviewArtifacts(InMemoryCache()),
+            producers=_producers(),
+        )
+
+    def test_facets_are_computed_lazily_and_once(self, snapshot):
+        """Test that each facet is produced on first access only."""
+        assert snapshot.file_tree == TREE
+        assert snapshot.file_tree == TREE
+        assert len(snapshot.changed_files) == 1
+
+        snapshot.producers.file_tree.assert_called_once()
+        snapshot.producers.changed_files.assert_called_once()
+        snapshot.producers.configurations.assert_not_called()
+        snapshot.producers.git_metadata.assert_not_called()
+        with pytest.raises(AttributeError):
+            snapshot.project_path = "/elsewhere"
+
+    def test_meta_prompt_analysis_reads_the_snapshot(self, snapshot):
+        """Test that the analyzer summarizes the snapshot instead of the disk."""
+        data = analyze_project_for_meta_prompt(snapshot.project_path, snapshot=snapshot)
+
+        assert data["file_structure_summary"].splitlines() == [
+            "Project structure:",
+            "📁 src/ (2 files)",
+            "📁 tests/ (1 files)",
+            "📄 README.md",
+        ]
+        assert data["git_context"].splitlines() == [
+            "Git context:",
+            "Current branch: feature",
+            "Modified files: 1",
+            "Total commits: 12",
+        ]
+        snapshot.producers.configurations.assert_called_once()
+
+    def test_review_context_reuses_the_snapshot(self, snapshot):
+        """Test that the review context does not discover the project again."""
+        config = CodeReviewConfig(
+            project_path=snapshot.project_path,
+            include_claude_memory=True,
+            project_snapshot=snapshot,
+        )
+        analyze_project_for_meta_prompt(snapshot.project_path, snapshot=snapshot)
+
+        data = generate_review_context_data(config)
+
+        assert data["file_tree"] == TREE
+        assert [f["path"] for f in data["changed_files"]] == ["/project/src/app.py"]
+        for producer in ("configurations", "changed_files", "file_tree"):
+            getattr(snapshot.producers, producer).assert_called_once()
+
+    def test_review_context_is_sized_for_requested_model(self, snapshot):
+        """Test that the context budget follows the model the caller picked."""
+        config = CodeReviewConfig(
+            project_path=snapshot.project_path,
+            project_snapshot=snapshot,
+            model="gemini-1.5-pro",
+        )
+
+        with patch(
+            "src.context_generator.context_token_budget", return_value=10_000
+        ) as budget:
+            generate_review_context_data(config)
+
+        budget.assert_called_once_with("gemini-1.5-pro")
+
+
+def test_git_metadata(tmp_path):
+    """Test branch, commit count and uncommitted paths of a repository."""
+    assert get_git_metadata(str(tmp_path)) == {}
+
+    env = {
+        **os.environ,
+        "GIT_AUTHOR_NAME": "Test",
+        "GIT_AUTHOR_EMAIL": "test@example.com",
+        "GIT_COMMITTER_NAME": "Test",
+        "GIT_COMMITTER_EMAIL": "test@example.com",
+    }
+    for args in (
+        ["init", "-q", "-b", "main"],
+        ["commit", "-q", "--allow-empty", "-m", "x"],
+    ):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, env=env)
+    (tmp_path / "new.py").write_text("")
+
+    assert get_git_metadata(str(tmp_path)) == {
+        "is_repository": True,
+        "branch": "main",
+        "commit_count": 1,
+        "changed_paths": 1,
+    }
@@ -0,0 +1,162 @@
+"""Tests for the cache-friendly review layout and prefix stability tracking."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import src.context_generator as context_generator
+import src.review_template as review_template
+from src.cache.memory_cache import InMemoryCache
+from src.config_types import CodeReviewConfig
+from src.prompt_layout import (
+    CACHE_FRIENDLY_LAYOUT,
+    DEFAULT_LAYOUT,
+    PrefixTracker,
+    apply_layout,
+    context_layout,
+)
+from src.review_template import format_review_template, render_sections
+
+# A phase review of two unsorted files
+PHASE_REVIEW = {
+    "total_phases": 2,
+    "phase_number": "1.0",
+    "configuration_content": "Use tabs.",
+    "file_tree": "/project\n├── a.py\n└── b.py",
+    "changed_files": [
+        {"path": "/project/b.py", "status": "modified", "content": "b = 1"},
+        {"path": "/project/a.py", "status": "modified", "content": "a = 1"},
+    ],
+}
+
+
+class TestCacheFriendlyLayout:
+    def test_stable_sections_come_first(self, template_data):
+        """Test the section order and that changed files are sorted."""
+        data = apply_layout(
+            template_data(PHASE_REVIEW, compression_notes=["a.py: 3 lines"]),
+            "cache_friendly",
+        )
+
+        names = [name for name, _ in render_sections(data)]
+
+        assert names[:5] == [
+            "title",
+            "configuration",
+            "task_context",
+            "url_context",
+            "file_tree",
+        ]
+        assert names.index("review_scope") > names.index("files_close")
+        assert names[-1] == "instructions"
+        assert [f["path"] for f in data["changed_files"]] == [
+            "/project/a.py",
+            "/project/b.py",
+        ]
+
+    def test_scope_changes_keep_the_prefix(self, template_data):
+        """Test that a different phase only changes the end of the document."""
+        first = format_review_template(
+            apply_layout(
+                template_data(PHASE_REVIEW, phase_number="1.0"), CACHE_FRIENDLY_LAYOUT
+            ),
+            use_cache=False,
+        )
+        second = format_review_template(
+            apply_layout(
+                template_data(PHASE_REVIEW, phase_number="2.0"), CACHE_FRIENDLY_LAYOUT
+            ),
+            use_cache=False,
+        )
+
+        assert first.startswith("# Code Review Context\n")
+        shared = next(i for i, (a, b) in enumerate(zip(first, second)) if a != b)
+        assert first.index("</files_changed>") < shared
+
+    def test_default_layout_is_unchanged(self, template_data):
+        """Test that the scope stays in the title by default."""
+        data = template_data(PHASE_REVIEW)
+        assert apply_layout(data, DEFAULT_LAYOUT) is data
+
+        rendered = format_review_template(data, use_cache=False)
+
+        assert rendered.startswith(
+            "# Code Review Context - Review Scope: recent_phase (Phase: 1.0)\n"
+        )
+        assert "<review_scope>" not in rendered
+
+    @pytest.mark.parametrize(
+        "setting,expected",
+        [
+            (None, DEFAULT_LAYOUT),
+            ("cache-friendly", CACHE_FRIENDLY_LAYOUT),
+            ("sideways", DEFAULT_LAYOUT),
+        ],
+    )
+    def test_layout_setting(self, monkeypatch, setting, expected):
+        """Test GEMINI_CONTEXT_LAYOUT parsing."""
+        if setting is None:
+            monkeypatch.delenv("GEMINI_CONTEXT_LAYOUT", raising=False)
+        else:
+            monkeypatch.setenv("GEMINI_CONTEXT_LAYOUT", setting)
+
+        assert context_layout() == expected
+        assert context_layout(cache_friendly=True) == CACHE_FRIENDLY_LAYOUT
+
+
+class TestPrefixTracker:
+    def test_reports_unchanged_prefix(self):
+        """Test the reused prefix against the previous context of a project."""
+        tracker = PrefixTracker(InMemoryCache(), block_chars=10)
+        stable = "s" * 35
+
+        first = tracker.measure("/project", [stable, "tail one"])
+        assert not first.has_previous
+        assert first.total_chars == 43
+
+        same = tracker.measure("/project", [stable[:20], stable[20:], "tail one"])
+        assert same.reused_chars == 43
+
+        changed = tracker.measure("/project", [stable, "tail two"])
+        assert changed.reused_chars == 40
+        assert "40 of 43 chars (93%)" in changed.summary()
+
+        other = tracker.measure("/elsewhere", [stable, "tail two"])
+        assert not other.has_previous
+
+    def test_without_cache_there_is_no_baseline(self):
+        """Test that a missing cache only reports the size."""
+        tracker = PrefixTracker(None)
+
+        tracker.measure("/project", ["text"])
+        report = tracker.measure("/project", ["text"])
+
+        assert not report.has_previous
+        assert report.reused_chars == 0
+
+    def test_written_context_is_measured_without_rendering_again(
+        self, tmp_path, capsys, template_data
+    ):
+        """Test that the chunks written to disk are the ones measured."""
+        container = MagicMock(prefix_tracker=PrefixTracker(InMemoryCache()))
+        config = CodeReviewConfig(
+            project_path=str(tmp_path),
+            output=str(tmp_path / "context.md"),
+            enable_gemini_review=False,
+        )
+        data = apply_layout(template_data(PHASE_REVIEW), CACHE_FRIENDLY_LAYOUT)
+
+        with (
+            patch.object(
+                context_generator, "get_production_container", return_value=container
+            ),
+            patch.object(
+                review_template, "_sections", wraps=review_template._sections
+            ) as render,
+        ):
+            context_generator.process_and_output_review(config, data)
+
+        render.assert_called_once()
+        written = (tmp_path / "context.md").read_text(encoding="utf-8")
+        assert written == format_review_template(data, use_cache=False)
+        assert f"first context of {len(written):,} chars" in capsys.readouterr().out
@@ -0,0 +1,171 @@
+"""Tests for the persistent review artifact cache and the cache warm command."""
+
+import os
+import subprocess
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.cache.memory_cache import InMemoryCache
+from src.cli.cache_command import create_argument_parser
+from src.interfaces import ProductionFileSystem
+from src.review_artifacts import ReviewArtifacts
+from src.services import FileFinder
+
+
+def _git(repo, *args):
+    """Run a git command in a test repository."""
+    subprocess.run(
+        ["git", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+        env={
+            **os.environ,
+            "GIT_AUTHOR_NAME": "Test",
+            "GIT_AUTHOR_EMAIL": "test@example.com",
+            "GIT_COMMITTER_NAME": "Test",
+            "GIT_COMMITTER_EMAIL": "test@example.com",
+        },
+    )
+
+
+class TestReviewArtifacts:
+    @pytest.fixture
+    def repo(self, tmp_path):
+        """Create a git repository with a task list and a PRD."""
+        _git(tmp_path, "init", "-q", "-b", "main")
+        (tmp_path / "app.py").write_text("print('hi')\n")
+        tasks = tmp_path / "tasks"
+        tasks.mkdir()
+        (tasks / "tasks-feature.md").write_text(
+            "## Tasks\n\n- [ ] 1.0 Build feature\n  - [ ] 1.1 Write code\n"
+        )
+        (tasks / "prd-feature.md").write_text("# PRD\n\n## Summary\nA feature.\n")
+        _git(tmp_path, "add", ".")
+        _git(tmp_path, "commit", "-q", "-m", "initial")
+        return tmp_path
+
+    @pytest.fixture
+    def artifacts(self):
+        return ReviewArtifacts(InMemoryCache())
+
+    @pytest.fixture
+    def file_finder(self):
+        return FileFinder(ProductionFileSystem())
+
+    def test_warm_is_idempotent(self, artifacts, file_finder, repo):
+        """Test that a second warm run finds everything cached."""
+        first = artifacts.warm(str(repo), file_finder)
+        second = artifacts.warm(str(repo), file_finder)
+
+        assert "task list" in first and "PRD summary" in first
+        assert all(first.values())
+        assert not any(second.values())
+
+    def test_review_reuses_warm_artifacts(self, artifacts, file_finder, repo):
+        """Test that accessors are served from what warm computed."""
+        artifacts.warm(str(repo), file_finder)
+        producer = MagicMock()
+
+        artifacts.file_tree(str(repo), producer)
+        artifacts.changed_files(str(repo), producer)
+        configurations = artifacts.configurations(str(repo), True, True, producer)
+        summary = artifacts.prd_summary(
+            str(repo / "tasks" / "prd-feature.md"), producer
+        )
+
+        producer.assert_not_called()
+        assert configurations["claude_memory_files"] == []
+        assert summary == "A feature."
+
+    def test_repository_changes_recompute(self, artifacts, file_finder, repo):
+        """Test that edits and commits invalidate only dependent artifacts."""
+        artifacts.warm(str(repo), file_finder)
+        assert artifacts.changed_files(str(repo)) == []
+
+        (repo / "app.py").write_text("print('edited')\n")
+        results = artifacts.warm(str(repo), file_finder)
+        assert results["changed files"] and results["file tree"]
+        assert not results["task list"]
+        assert [f["status"] for f in artifacts.changed_files(str(repo))] == [
+            "unstaged-M"
+        ]
+
+        _git(repo, "commit", "-q", "-am", "edit")
+        assert artifacts.changed_files(str(repo)) == []
+
+    def test_configurations_round_trip(self, artifacts, repo):
+        """Test that discovered configuration objects survive the cache."""
+        (repo / "CLAUDE.md").write_text("# Project rules\n")
+
+        fresh = artifacts.configurations(str(repo), True, False)
+        cached = artifacts.configurations(str(repo), True, False, MagicMock())
+
+        assert cached == fresh
+        assert cached["claude_memory_files"][0].content == "# Project rules\n"
+
+    def test_configurations_keyed_on_content(self, artifacts, repo):
+        """Test that a fresh checkout of the same configuration hits the cache."""
+        claude_md = repo / "CLAUDE.md"
+        claude_md.write_text("# Project rules\n")
+        artifacts.configurations(str(repo), True, False)
+
+        # A new checkout rewrites the file: new inode and mtime, same content
+        claude_md.unlink()
+        claude_md.write_text("# Project rules\n")
+        os.utime(claude_md, ns=(1, 1))
+        producer = MagicMock()
+        artifacts.configurations(str(repo), True, False, producer)
+        producer.assert_not_called()
+
+        claude_md.write_text("# Changed rules\n")
+        changed = artifacts.configurations(str(repo), True, False)
+        assert changed["claude_memory_files"][0].content == "# Changed rules\n"
+
+    def test_file_tree_outside_git_tracks_new_files(self, artifacts, tmp_path):
+        """Test that a project without git never gets a stale file tree."""
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "a.py").write_text("")
+        assert "b_new.py" not in artifacts.file_tree(str(project))
+
+        (project / "b_new.py").write_text("")
+
+        assert "b_new.py" in artifacts.file_tree(str(project))
+
+    def test_without_cache_computes_directly(self, repo):
+        """Test that a disabled cache still produces artifacts."""
+        artifacts = ReviewArtifacts(None)
+        assert "app.py" in artifacts.file_tree(str(repo))
+
+
+class TestCacheCommand:
+    def test_warm_arguments(self):
+        """Test parsing of the warm subcommand."""
+        args = create_argument_parser().parse_args(
+            ["warm", "/project", "--task-list", "tasks-a.md", "--quiet"]
+        )
+
+        assert args.command == "warm"
+        assert args.path == "/project"
+        assert args.task_list == "tasks-a.md"
+        assert args.quiet
+
+    def test_bundle_arguments(self):
+        """Test parsing of the export and import subcommands."""
+        parser = create_argument_parser()
+        export = parser.parse_args(["export", "cache.gz", "--project", "/project"])
+        restore = parser.parse_args(["import", "cache.gz"])
+
+        assert (export.command, export.bundle, export.project) == (
+            "export",
+            "cache.gz",
+            "/project",
+        )
+        assert (restore.command, restore.project) == ("import", ".")
+
+    def test_subcommand_required(self):
+        """Test that a subcommand must be given."""
+        with pytest.raises(SystemExit):
+            create_argument_parser().parse_args([])
@@ -0,0 +1,116 @@
+"""Tests for delta reviews against the previous review snapshot."""
+
+from src.cache.memory_cache import InMemoryCache
+from src.review_snapshot import ReviewSnapshots, split_by_snapshot, summarize_review
+from src.review_template import format_review_template
+
+
+def _files(**contents):
+    """Build changed file entries under /project."""
+    return [
+        {"path": f"/project/{name}.py", "status": "modified", "content": content}
+        for name, content in contents.items()
+    ]
+
+
+class TestReviewSnapshots:
+    def test_first_review_is_full_and_recorded(self):
+        """Test that without a snapshot every file is sent and the run recorded."""
+        snapshots = ReviewSnapshots(InMemoryCache())
+        files = _files(app="a = 1", util="b = 2")
+
+        kept, previous = split_by_snapshot(
+            snapshots, "/project", files, "/project", since_last_review=True
+        )
+
+        assert kept == files
+        assert previous is None
+        assert snapshots.load("/project") is None
+        assert snapshots.record_review("/project", "Looks good.")
+        snapshot = snapshots.load("/project")
+        assert snapshot is not None
+        assert snapshot.review == "Looks good."
+        assert set(snapshot.files) == {"app.py", "util.py"}
+
+    def test_delta_keeps_only_files_changed_since_review(self):
+        """Test that unchanged files are dropped and reported."""
+        snapshots = ReviewSnapshots(InMemoryCache())
+        split_by_snapshot(
+            snapshots,
+            "/project",
+            _files(app="a = 1", util="b = 2", old="c = 3"),
+            "/project",
+            since_last_review=False,
+        )
+        snapshots.record_review("/project", "Rename `a`.")
+
+        files = _files(app="alpha = 1", util="b = 2", new="d = 4")
+        kept, previous = split_by_snapshot(
+            snapshots, "/project", files, "/project", since_last_review=True
+        )
+
+        assert [f["path"] for f in kept] == ["/project/app.py", "/project/new.py"]
+        assert previous is not None
+        assert previous["summary"] == "Rename `a`."
+        assert previous["unchanged_files"] == ["util.py"]
+        assert previous["reverted_files"] == ["old.py"]
+        assert not previous["tree_changed"]
+
+    def test_without_delta_mode_all_files_are_kept(self):
+        """Test that snapshots only filter when asked to."""
+        snapshots = ReviewSnapshots(InMemoryCache())
+        files = _files(app="a = 1")
+        split_by_snapshot(snapshots, "/project", files, "/project", False)
+        snapshots.record_review("/project", "Fine.")
+
+        kept, previous = split_by_snapshot(
+            snapshots, "/project", files, "/project", False
+        )
+
+        assert kept == files
+        assert previous is None
+
+    def test_without_cache_nothing_is_recorded(self):
+        """Test that a missing cache degrades to full reviews."""
+        snapshots = ReviewSnapshots(None)
+        files = _files(app="a = 1")
+
+        split_by_snapshot(snapshots, "/project", files, "/project", True)
+
+        assert not snapshots.record_review("/project", "Fine.")
+        assert snapshots.load("/project") is None
+
+    def test_summary_is_cut_at_a_paragraph_and_rendered(self):
+        """Test that long reviews are shortened and shown to the reviewer."""
+        review = "First finding.\n\n" + "x" * 100
+
+        summary = summarize_review(review, limit=50)
+        assert summary.startswith("First finding.\n\n[... 102 more characters")
+
+        rendered = format_review_template(
+            {
+                "scope": "recent_phase",
+                "prd_summary": "Build the feature.",
+                "total_phases": 1,
+                "current_phase_number": "1.0",
+                "previous_phase_completed": "",
+                "next_phase": "",
+                "current_phase_description": "Write the code",
+                "subtasks_completed": [],
+                "project_path": "/project",
+                "file_tree": "/project",
+                "changed_files": [],
+                "previous_review": {
+                    "reviewed_at": "2026-01-01T00:00:00",
+                    "summary": summary,
+                    "unchanged_files": ["util.py"],
+                    "reverted_files": [],
+                    "tree_changed": True,
+                },
+            },
+            use_cache=False,
+        )
+        assert "<previous_review>" in rendered
+        assert "- util.py" in rendered
+        assert "The project structure has changed since then." in rendered
+        assert "First finding." in rendered
@@ -0,0 +1,127 @@
+"""Tests for section-memoized review template rendering."""
+
+import io
+from unittest.mock import patch
+
+import pytest
+
+import src.review_template as review_template
+from src.cache.sqlite_cache import CacheManager
+from src.review_template import (
+    SECTION_OPERATION,
+    format_review_template,
+    iter_review_template,
+    write_review_template,
+)
+
+# A phase review with two changed files
+PHASE_REVIEW = {
+    "total_phases": 2,
+    "next_phase": "2.0 Ship it",
+    "subtasks_completed": ["1.1 Parser", "1.2 Tests"],
+    "file_tree": "/project\n├── app.py\n└── Makefile",
+    "changed_files": [
+        {"path": "app.py", "status": "modified", "content": "x = 1"},
+        {"path": "Makefile", "status": "added", "content": "all:"},
+    ],
+}
+
+
+class TestReviewTemplate:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """Route template caching to a temporary SQLite cache."""
+        manager = CacheManager(cache_dir=tmp_path)
+        with patch("src.cache.get_cache_manager", return_value=manager):
+            yield manager
+
+    def test_cached_render_matches_uncached(self, cache, template_data):
+        """Test that reused sections produce the same document."""
+        data = template_data(PHASE_REVIEW, configuration_content="# Rules")
+
+        fresh = format_review_template(data, use_cache=False)
+
+        assert format_review_template(data) == fresh
+        assert format_review_template(data) == fresh
+        assert "File: Makefile (added)\n```txt\nall:\n```" in fresh
+        assert fresh.startswith("# Code Review Context - Review Scope: recent_phase\n")
+
+    def test_changed_file_rerenders_only_its_section(self, cache, template_data):
+        """Test that editing one file re-renders just that file's section."""
+        format_review_template(template_data(PHASE_REVIEW))
+        data = template_data(PHASE_REVIEW)
+        data["changed_files"][0]["content"] = "x = 2"
+
+        with (
+            patch.object(
+                review_template,
+                "_render_changed_file",
+                wraps=review_template._render_changed_file,
+            ) as render_file,
+            patch.object(
+                review_template, "_render_header", wraps=review_template._render_header
+            ) as render_header,
+        ):
+            result = format_review_template(data)
+
+        render_file.assert_called_once_with(data["changed_files"][0])
+        render_header.assert_not_called()
+        assert "x = 2" in result and "x = 1" not in result
+
+    def test_sections_share_one_cache_lookup(self, cache, template_data):
+        """Test that all sections are fetched and stored in one batch each."""
+        with patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+            with patch.object(cache, "set_many", wraps=cache.set_many) as set_many:
+                format_review_template(template_data(PHASE_REVIEW))
+                format_review_template(template_data(PHASE_REVIEW))
+
+        assert get_many.call_count == 2
+        set_many.assert_called_once()
+        assert set_many.call_args[0][0] == SECTION_OPERATION
+
+    def test_version_is_part_of_the_key(self, cache, template_data):
+        """Test that a new template version does not reuse old renders."""
+        format_review_template(template_data(PHASE_REVIEW))
+
+        with patch.object(review_template, "TEMPLATE_VERSION", "changed"):
+            with patch.object(
+                review_template,
+                "_render_header",
+                wraps=review_template._render_header,
+            ) as render_header:
+                format_review_template(template_data(PHASE_REVIEW))
+
+        render_header.assert_called_once()
+
+    def test_cache_failure_falls_back_to_rendering(self, template_data):
+        """Test that rendering works when the cache is unavailable."""
+        data = template_data(PHASE_REVIEW, raw_context_only=True)
+        with patch("src.cache.get_cache_manager", side_effect=OSError("read-only")):
+            result = format_review_template(data)
+
+        assert result == format_review_template(data, use_cache=False)
+        assert "<user_instructions>" not in result
+
+    def test_streamed_chunks_match_string_render(self, cache, template_data):
+        """Test that writing chunks to a buffer yields the joined document."""
+        data = template_data(PHASE_REVIEW, configuration_content="# Rules")
+        buffer = io.StringIO()
+
+        written = write_review_template(data, buffer)
+
+        assert buffer.getvalue() == format_review_template(data, use_cache=False)
+        assert written == len(buffer.getvalue())
+        assert len(list(iter_review_template(data))) > 1
+
+    def test_closed_stream_still_stores_rendered_sections(self, cache, template_data):
+        """Test that sections rendered before an early close are cached."""
+        chunks = iter_review_template(template_data(PHASE_REVIEW))
+        next(chunks)
+        chunks.close()
+
+        with patch.object(
+            review_template, "_render_header", wraps=review_template._render_header
+        ) as render_header:
+            format_review_template(template_data(PHASE_REVIEW))
+
+        render_header.assert_not_called()
@@ -0,0 +1,121 @@
+"""Tests for single-flight stampede protection."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.cache import CacheManager
+from src.cache.memory_cache import InMemoryCache
+from src.cache.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    @pytest.fixture
+    def backend(self, tmp_path):
+        """Create a SQLite cache manager in a temporary directory."""
+        return CacheManager(cache_dir=tmp_path / "cache", ttl=300)
+
+    def test_concurrent_misses_compute_once(self, backend):
+        """Test that threads missing the same key share one computation."""
+        flight = SingleFlight(backend)
+        calls = []
+        start = threading.Barrier(8)
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "value"
+
+        def worker():
+            start.wait()
+            results.append(flight.get_or_compute("op", {"k": 1}, compute))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert results == ["value"] * 8
+        assert backend.get("op", {"k": 1}) == "value"
+
+    def test_exception_propagates_to_waiters(self):
+        """Test that a failed computation is not cached and reaches all callers."""
+        cache = InMemoryCache()
+        flight = SingleFlight(cache)
+
+        def compute():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            flight.get_or_compute("op", {"k": 1}, compute)
+        assert cache.get("op", {"k": 1}) is None
+
+        # A later call retries rather than reusing the failure
+        assert flight.get_or_compute("op", {"k": 1}, lambda: "ok") == "ok"
+
+    def test_lease_excludes_other_owner(self, backend):
+        """Test that only one owner holds a lease until it is released."""
+        assert backend.acquire_lease("op", {"k": 1}, "a", ttl=30)
+        assert not backend.acquire_lease("op", {"k": 1}, "b", ttl=30)
+
+        backend.release_lease("op", {"k": 1}, "a")
+        assert backend.acquire_lease("op", {"k": 1}, "b", ttl=30)
+
+    def test_expired_lease_can_be_taken_over(self, backend):
+        """Test that a lease left by a crashed process lapses."""
+        assert backend.acquire_lease("op", {"k": 1}, "crashed", ttl=0.05)
+        time.sleep(0.1)
+        assert backend.acquire_lease("op", {"k": 1}, "b", ttl=30)
+
+    def test_waits_for_other_process_result(self, backend, tmp_path):
+        """Test that a follower polls for the value instead of recomputing."""
+        other_process = CacheManager(cache_dir=tmp_path / "cache", ttl=300)
+        assert other_process.acquire_lease("op", {"k": 1}, "other", ttl=30)
+
+        def finish_elsewhere():
+            time.sleep(0.2)
+            other_process.set("op", {"k": 1}, "from-other")
+            other_process.release_lease("op", {"k": 1}, "other")
+
+        threading.Thread(target=finish_elsewhere).start()
+
+        flight = SingleFlight(backend, poll_interval=0.02)
+        value = flight.get_or_compute("op", {"k": 1}, lambda: "recomputed")
+        assert value == "from-other"
+
+    def test_stops_waiting_for_unusable_results(self, backend, tmp_path):
+        """Test that a follower computes locally once the wait runs out."""
+        other_process = CacheManager(cache_dir=tmp_path / "cache", ttl=300)
+        assert other_process.acquire_lease("op", {"k": 1}, "other", ttl=30)
+        other_process.set("op", {"k": 1}, "stale")
+
+        flight = SingleFlight(backend, lease_ttl=0.1, poll_interval=0.02)
+        value = flight.get_or_compute(
+            "op", {"k": 1}, lambda: "fresh", is_valid=lambda v: v == "fresh"
+        )
+
+        assert value == "fresh"
+        assert backend.get("op", {"k": 1}) == "fresh"
+
+    def test_async_variant(self, backend):
+        """Test that async callers share the same in-flight computation."""
+        flight = SingleFlight(backend)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return [1, 2, 3]
+
+        async def run():
+            return await asyncio.gather(
+                *(flight.aget_or_compute("op", {"k": 1}, compute) for _ in range(4))
+            )
+
+        assert asyncio.run(run()) == [[1, 2, 3]] * 4
+        assert len(calls) == 1
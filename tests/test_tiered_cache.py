@@ -0,0 +1,193 @@
+"""Tests for the two-tier (memory + SQLite) cache."""
+
+import time
+
+import pytest
+
+import src.cache.sqlite_cache as sqlite_cache
+from src.cache import CacheManager, TieredCache
+from src.cache.adaptive_ttl import AdaptiveTTL
+from src.interfaces.cache_protocol import CacheProtocol
+
+
+class TestTieredCache:
+    @pytest.fixture
+    def backend(self, tmp_path):
+        """Create a SQLite cache manager in a temporary directory."""
+        return CacheManager(cache_dir=tmp_path / "cache", ttl=300)
+
+    @pytest.fixture
+    def cache(self, backend):
+        """Create a tiered cache that always re-checks the epoch."""
+        return TieredCache(backend, epoch_check_interval=0.0)
+
+    def test_implements_protocol(self, cache):
+        """Test that TieredCache satisfies CacheProtocol."""
+        assert isinstance(cache, CacheProtocol)
+
+    def test_write_through(self, cache, backend):
+        """Test that writes reach the SQLite tier."""
+        cache.set("git_current_branch", {"repo_path": "/repo"}, "main")
+
+        assert backend.get("git_current_branch", {"repo_path": "/repo"}) == "main"
+        assert cache.get("git_current_branch", {"repo_path": "/repo"}) == "main"
+
+    def test_memory_hit_skips_backend(self, cache, backend, monkeypatch):
+        """Test that repeated reads are served from memory."""
+        cache.set("template_render", {"key": "abc"}, "rendered")
+
+        def fail(*args, **kwargs):
+            raise AssertionError("backend should not be queried")
+
+        monkeypatch.setattr(backend, "get_entry", fail)
+        cache.epoch_check_interval = 60.0
+
+        assert cache.get("template_render", {"key": "abc"}) == "rendered"
+        assert cache.get_stats()["memory_tier"]["hits"] == 1
+
+    def test_values_are_not_shared_with_callers(self, cache):
+        """Test that mutating stored or returned values leaves the cache intact."""
+        value = {"files": ["a.py"]}
+        cache.set("file_tree", {"path": "/repo"}, value)
+        value["files"].append("b.py")
+
+        hit = cache.get("file_tree", {"path": "/repo"})
+        hit["files"].append("c.py")
+        cache.get_many("file_tree", [{"path": "/repo"}])[0]["files"].clear()
+
+        assert cache.get("file_tree", {"path": "/repo"}) == {"files": ["a.py"]}
+
+    def test_promotes_backend_entry_with_same_expiry(self, backend):
+        """Test that entries loaded from SQLite keep their original expiry."""
+        backend.set("fs_read_text", {"path": "/a"}, "content", ttl=1)
+        cache = TieredCache(backend, epoch_check_interval=60.0)
+
+        assert cache.get("fs_read_text", {"path": "/a"}) == "content"
+        time.sleep(1.1)
+        assert cache.get("fs_read_text", {"path": "/a"}) is None
+
+    def test_lru_eviction_by_entry_count(self, backend):
+        """Test that the least recently used entry is evicted first."""
+        cache = TieredCache(backend, max_entries=2, epoch_check_interval=60.0)
+        cache.set("op", {"k": 1}, "one")
+        cache.set("op", {"k": 2}, "two")
+        cache.get("op", {"k": 1})
+        cache.set("op", {"k": 3}, "three")
+
+        stats = cache.get_stats()["memory_tier"]
+        assert stats["entries"] == 2
+        assert stats["evictions"] == 1
+        # Evicted from memory but still available from SQLite
+        assert cache.get("op", {"k": 2}) == "two"
+
+    def test_eviction_by_bytes(self, backend):
+        """Test that the memory tier respects its byte budget."""
+        cache = TieredCache(backend, max_bytes=100, epoch_check_interval=60.0)
+        cache.set("op", {"k": 1}, "x" * 60)
+        cache.set("op", {"k": 2}, "y" * 60)
+
+        stats = cache.get_stats()["memory_tier"]
+        assert stats["entries"] == 1
+        assert stats["size_bytes"] <= 100
+
+    def test_cross_process_write_flushes_memory(self, cache, backend, tmp_path):
+        """Test that a write from another connection is detected via the epoch."""
+        cache.set("git_current_branch", {"repo_path": "/repo"}, "main")
+
+        other_process = CacheManager(cache_dir=tmp_path / "cache", ttl=300)
+        other_process.set("git_current_branch", {"repo_path": "/repo"}, "feature")
+
+        assert cache.get("git_current_branch", {"repo_path": "/repo"}) == "feature"
+
+    def test_cross_process_write_keeps_other_entries(
+        self, cache, backend, tmp_path, monkeypatch
+    ):
+        """Test that only the entries another process wrote leave memory."""
+        cache.set("op", {"k": 1}, "one")
+        cache.set("op", {"k": 2}, "two")
+
+        other_process = CacheManager(cache_dir=tmp_path / "cache", ttl=300)
+        other_process.set_many("op", [({"k": 2}, "TWO"), ({"k": 3}, "three")])
+        cache.set("op", {"k": 4}, "four")
+        other_process.invalidate("op", {"k": 4})
+
+        def fail(*args, **kwargs):
+            raise AssertionError("backend should not be queried")
+
+        assert cache.get("op", {"k": 2}) == "TWO"
+        assert cache.get("op", {"k": 4}) is None
+        monkeypatch.setattr(backend, "get_entry", fail)
+        assert cache.get("op", {"k": 1}) == "one"
+
+    def test_sweeping_expired_entries_keeps_memory(self, cache, backend, tmp_path):
+        """Test that another process removing expired rows flushes nothing."""
+        backend.set("op", {"k": "old"}, "old", ttl=1)
+        cache.set("op", {"k": 1}, "one")
+        epoch = backend.get_epoch()
+        time.sleep(1.1)
+
+        other_process = CacheManager(cache_dir=tmp_path / "cache", ttl=300)
+        assert other_process.cleanup_expired() == 1
+
+        assert backend.get_epoch() == epoch
+        assert cache.get_stats()["memory_tier"]["entries"] == 1
+
+    def test_pruned_change_log_flushes_memory(
+        self, cache, backend, tmp_path, monkeypatch
+    ):
+        """Test that a reader too far behind the change log drops everything."""
+        monkeypatch.setattr(sqlite_cache, "_CHANGE_LOG_SIZE", 2)
+        cache.set("op", {"k": 1}, "one")
+
+        other_process = CacheManager(cache_dir=tmp_path / "cache", ttl=300)
+        for n in range(3):
+            other_process.set("other", {"n": n}, n)
+
+        assert cache.get_stats()["memory_tier"]["entries"] == 1
+        cache.get("op", {"k": 2})
+        assert cache.get_stats()["memory_tier"]["entries"] == 0
+
+    def test_invalidate_clears_both_tiers(self, cache, backend):
+        """Test invalidation of a specific entry."""
+        cache.set("op", {"k": 1}, "one")
+        cache.set("op", {"k": 2}, "two")
+
+        assert cache.invalidate("op", {"k": 1}) == 1
+        assert cache.get("op", {"k": 1}) is None
+        assert cache.get("op", {"k": 2}) == "two"
+
+        cache.invalidate()
+        assert cache.get("op", {"k": 2}) is None
+        assert cache.get_stats()["memory_tier"]["entries"] == 0
+
+    def test_get_many_mixes_tiers(self, cache, backend):
+        """Test that batch reads combine memory hits with one backend query."""
+        cache.set_many("op", [({"k": 1}, "one")])
+        backend.set("op", {"k": 2}, "two")
+        cache.epoch_check_interval = 60.0
+
+        assert cache.get_many("op", [{"k": 1}, {"k": 2}, {"k": 3}]) == [
+            "one",
+            "two",
+            None,
+        ]
+        assert cache.get_stats()["memory_tier"]["hits"] == 1
+
+    def test_memory_hits_feed_adaptive_ttl(self, tmp_path):
+        """Test that memory-tier hits count towards the backend's TTL adaptation."""
+        backend = CacheManager(
+            cache_dir=tmp_path / "cache",
+            adaptive_ttl=AdaptiveTTL(min_ttl=60, max_ttl=1000, window=4),
+        )
+        cache = TieredCache(backend, epoch_check_interval=60.0)
+        cache.set("template", {"name": "review"}, "rendered", ttl=200)
+        for _ in range(4):
+            assert cache.get("template", {"name": "review"}) == "rendered"
+
+        before = time.time()
+        cache.set("template", {"name": "review"}, "rendered", ttl=200)
+
+        assert backend.get_entry("template", {"name": "review"}).ttl == 400
+        memory_entry = next(iter(cache._entries.values()))
+        assert memory_entry.expires_at >= before + 400
+        assert backend.get_stats()["operations"]["template"]["hits"] == 5
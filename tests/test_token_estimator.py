@@ -0,0 +1,102 @@
+"""Tests for calibrated token estimation."""
+
+from unittest.mock import patch
+
+import pytest
+
+import src.token_estimator as token_estimator
+from src.cache.sqlite_cache import CacheManager
+from src.token_estimator import (
+    CACHE_MIN_CHARS,
+    TokenEstimator,
+    measure,
+    measure_lines,
+)
+
+
+class DoublingCounter:
+    """Exact counter stand-in that reports twice the raw estimate."""
+
+    name = "doubling"
+
+    def __init__(self):
+        self.calls = 0
+
+    def count_tokens(self, text):
+        self.calls += 1
+        return 2 * measure(text)[1]
+
+
+def _source(seed):
+    """Build a Python file larger than CACHE_MIN_CHARS."""
+    lines = [f"def handler_{seed}_{i}(request):" for i in range(200)]
+    return "\n    return None\n".join(lines)
+
+
+class TestTokenEstimator:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return CacheManager(cache_dir=tmp_path)
+
+    def test_content_classes(self):
+        """Test that texts are classified by language and character mix."""
+        assert measure("x = 1\n", "app.py")[0] == "python/plain"
+        assert measure("a=1;" * 100, "app.min.js")[0] == "javascript/dense"
+        assert measure("你好世界" * 10, "README.md")[0] == "markdown/cjk"
+        assert measure("a\n" + " " * 40 + "b\n", None)[0] == "text/sparse"
+
+    def test_measure_lines_adds_up_to_measure(self):
+        """Test that line counts sum to the count of the whole text."""
+        text = _source(1) + "\n\n\n    # trailing comment\n"
+
+        content_class, counts = measure_lines(text.splitlines(keepends=True), "a.py")
+
+        assert (content_class, sum(counts)) == measure(text, "a.py")
+        assert len(counts) == len(text.splitlines())
+        assert counts[-3:-1] == [0, 0]  # Blank lines go with the next line
+
+    def test_file_estimates_are_cached_per_content(self, cache):
+        """Test that a file version is measured once across estimators."""
+        text = _source(1)
+        assert len(text) >= CACHE_MIN_CHARS
+        expected = TokenEstimator().estimate(text, "app.py")
+
+        with patch.object(token_estimator, "measure", wraps=measure) as measured:
+            assert TokenEstimator(cache).estimate(text, "app.py", True) == expected
+            assert TokenEstimator(cache).estimate(text, "app.py", True) == expected
+
+        measured.assert_called_once()
+
+    def test_validation_calibrates_content_class(self, cache):
+        """Test that exact counts move the class factor and persist it."""
+        counter = DoublingCounter()
+        estimator = TokenEstimator(cache, counter, validation_rate=1.0)
+
+        for seed in range(5):
+            text = _source(seed)
+            assert estimator.estimate(text, "app.py") == 2 * measure(text)[1]
+
+        assert counter.calls == 5
+        assert estimator.factors() == {"python/plain": pytest.approx(2.0)}
+
+        # A new estimator without a counter reuses the learned factor
+        unseen = _source(99)
+        estimate = TokenEstimator(cache).estimate(unseen, "app.py")
+        assert estimate == pytest.approx(2 * measure(unseen)[1], rel=0.01)
+
+    def test_sampling_without_counter_is_disabled(self):
+        """Test that a validation rate without a counter never counts."""
+        estimator = TokenEstimator(validation_rate=1.0)
+
+        assert estimator.validate("hello world") is None
+        assert estimator.estimate(_source(1)) == measure(_source(1))[1]
+
+    def test_counter_failure_keeps_estimate(self, cache):
+        """Test that endpoint errors fall back to the local estimate."""
+        counter = DoublingCounter()
+        counter.count_tokens = lambda text: 1 / 0
+        estimator = TokenEstimator(cache, counter, validation_rate=1.0)
+
+        text = _source(1)
+        assert estimator.estimate(text, "app.py") == measure(text)[1]
+        assert estimator.factors() == {}